@@ -3,26 +3,30 @@
 离线对话每轮平均时长统计脚本（T3 离线版）。
 
 解析 T1 BatchExportService 导出的 md/txt 文件（按冻结格式规范），
+或读取列式导出（format=columnar，ColumnarExportService）的 messages 表，
 输出每个 report 的每轮平均时长统计。
 
 用法:
     python scripts/conversation_stats.py <export_zip_or_dir>
 
 参数:
-    export_zip_or_dir: T1 导出的 zip 文件路径，或解压后的目录路径。
+    export_zip_or_dir: T1 导出的 zip 文件路径，或解压后的目录路径；
+                       含 manifest.json 时按列式导出读取。
 
 示例:
     python scripts/conversation_stats.py reports_batch_export_20260101_120000.zip
     python scripts/conversation_stats.py /path/to/extracted_reports/
 
 说明:
-    - 自动识别 md/txt 格式
+    - 自动识别 md/txt 格式；列式导出（Parquet / Arrow 需安装 pyarrow，CSV 无额外依赖）
+      直接按列读取，不走正则解析
     - 输出每个 report 的轮数 / 平均时长 / 总时长 / per_phase 明细
     - 与在线版 ConversationStatsService 的切轮逻辑保持一致
 """
 
 from __future__ import annotations
 
+import json
 import os
 import re
 import sys
@@ -36,11 +40,12 @@ _BACKEND_DIR = _THIS_DIR.parent / "src" / "backend"
 if str(_BACKEND_DIR) not in sys.path:
     sys.path.insert(0, str(_BACKEND_DIR))
 
+from app.services.columnar_export_service import TABLE_COLUMNS, decode_table  # noqa: E402
 from app.services.conversation_stats_service import (  # noqa: E402
     PHASE_LABEL_CN,
     _aggregate_phase_stats,
     _build_reminder_text,
-    compute_turn_stats_from_messages,
+    compute_turn_stats_many,
 )
 from app.utils.report_registry import STEP_IDS  # noqa: E402
 
@@ -244,11 +249,11 @@ def compute_report_stats_from_parsed(
         统计结果字典（结构与 ConversationStatsService 一致）
     """
     per_phase: List[Dict] = []
-    for phase in phases:
+    all_stats = compute_turn_stats_many([phase.get("messages") or [] for phase in phases])
+    for phase, stats in zip(phases, all_stats):
         phase_id = phase.get("phase_id") or ""
         phase_name = phase.get("phase_name") or PHASE_LABEL_CN.get(phase_id, phase_id)
         messages = phase.get("messages") or []
-        stats = compute_turn_stats_from_messages(messages)
         avg_minutes = stats["avg_seconds"] / 60.0
         total_minutes = stats["total_seconds"] / 60.0
         per_phase.append(
@@ -311,6 +316,116 @@ def _iter_export_files(path: str) -> List[Tuple[str, str]]:
     return files
 
 
+def _read_columnar_entries(path: str) -> Optional[Dict[str, bytes]]:
+    """
+    读取列式导出的全部文件（zip 或目录）；不含 manifest.json 时返回 None。
+
+    Returns:
+        {相对路径: 文件内容}
+    """
+    p = Path(path)
+    entries: Dict[str, bytes] = {}
+    if p.is_file() and p.suffix == ".zip":
+        with zipfile.ZipFile(p, "r") as zf:
+            names = set(zf.namelist())
+            if "manifest.json" not in names:
+                return None
+            for name in names:
+                if not name.endswith("/"):
+                    entries[name] = zf.read(name)
+    elif p.is_dir() and (p / "manifest.json").is_file():
+        for fp in p.rglob("*"):
+            if fp.is_file():
+                entries[fp.relative_to(p).as_posix()] = fp.read_bytes()
+    else:
+        return None
+    return entries
+
+
+def load_columnar_export(
+    entries: Dict[str, bytes],
+) -> List[Tuple[str, Dict[str, str], List[Dict]]]:
+    """
+    从列式导出的 messages 表还原每个 report 的 phase + 消息（结构同 parse_export_file）。
+
+    Args:
+        entries: _read_columnar_entries 的返回
+
+    Returns:
+        [(report_id, meta_dict, phases), ...]，按 manifest 中的 report 顺序
+    """
+    manifest = json.loads(entries["manifest.json"].decode("utf-8"))
+    fmt = manifest.get("format") or "csv"
+    table = manifest.get("tables", {}).get("messages") or {}
+    columns = [tuple(c) for c in table.get("columns") or TABLE_COLUMNS["messages"]]
+
+    # report_id -> step_id -> [row, ...]
+    grouped: Dict[str, Dict[str, List[Dict]]] = {}
+    user_ids: Dict[str, str] = {}
+    for part in table.get("partitions") or []:
+        for row in decode_table(entries[part["path"]], columns, fmt):
+            rid = row.get("report_id") or ""
+            grouped.setdefault(rid, {}).setdefault(row.get("step_id") or "", []).append(row)
+            if row.get("user_id"):
+                user_ids[rid] = row["user_id"]
+
+    results: List[Tuple[str, Dict[str, str], List[Dict]]] = []
+    for rid in manifest.get("reports") or []:
+        by_step = grouped.get(rid, {})
+        phases: List[Dict] = []
+        for step_id in STEP_IDS:
+            rows = by_step.get(step_id)
+            if not rows:
+                continue
+            rows.sort(key=lambda r: r.get("msg_index") or 0)
+            phases.append(
+                {
+                    "phase_id": step_id,
+                    "phase_name": PHASE_LABEL_CN.get(step_id, step_id),
+                    "messages": [
+                        {
+                            "role": r.get("role") or "",
+                            "created_at": r.get("created_at") or None,
+                            "content": r.get("content") or "",
+                        }
+                        for r in rows
+                    ],
+                }
+            )
+        meta = {"用户ID": user_ids[rid]} if rid in user_ids else {}
+        results.append((rid, meta, phases))
+    return results
+
+
+def _print_report_stats(report_id: str, filename: str, meta: Dict[str, str], stats: Dict) -> None:
+    print(f"{'=' * 60}")
+    print(f"报告: {report_id}")
+    print(f"文件: {filename}")
+    if meta.get("用户ID"):
+        print(f"用户ID: {meta['用户ID']}")
+    if meta.get("用户名") and meta["用户名"] != "未提供":
+        print(f"用户名: {meta['用户名']}")
+    print(f"{'─' * 40}")
+    print(f"  总轮数: {stats['total_turns']}")
+    print(f"  平均每轮: {stats['avg_minutes']:.1f} 分钟")
+    print(f"  总时长: {stats['total_minutes']:.0f} 分钟")
+    if stats["skipped_no_ts"] > 0:
+        print(f"  跳过(缺时间戳): {stats['skipped_no_ts']} 轮")
+    if stats["skipped_long_turns"] > 0:
+        print(f"  跳过(异常>2h): {stats['skipped_long_turns']} 轮")
+    print(f"  提醒: {stats['reminder_text']}")
+
+    if stats["per_phase"]:
+        print(f"  {'─' * 36}")
+        print(f"  各阶段明细:")
+        for ph in stats["per_phase"]:
+            print(
+                f"    {ph['phase_name']}({ph['phase_id']}): "
+                f"{ph['turns']}轮 / 均{ph['avg_minutes']:.1f}分 / 总{ph['total_minutes']:.0f}分"
+            )
+    print()
+
+
 def main(argv: List[str]) -> int:
     """命令行入口。"""
     if len(argv) < 2:
@@ -318,6 +433,16 @@ def main(argv: List[str]) -> int:
         return 1
 
     export_path = argv[1]
+
+    columnar = _read_columnar_entries(export_path)
+    if columnar is not None:
+        reports = load_columnar_export(columnar)
+        print(f"列式导出：共 {len(reports)} 个 report\n")
+        for report_id, meta, phases in reports:
+            stats = compute_report_stats_from_parsed(report_id, meta, phases)
+            _print_report_stats(report_id, "messages 表", meta, stats)
+        return 0
+
     files = _iter_export_files(export_path)
     if not files:
         print("未找到 .md 或 .txt 导出文件", file=sys.stderr)
@@ -332,33 +457,7 @@ def main(argv: List[str]) -> int:
             continue
 
         stats = compute_report_stats_from_parsed(report_id, meta, phases)
-
-        print(f"{'=' * 60}")
-        print(f"报告: {report_id}")
-        print(f"文件: {filename}")
-        if meta.get("用户ID"):
-            print(f"用户ID: {meta['用户ID']}")
-        if meta.get("用户名") and meta["用户名"] != "未提供":
-            print(f"用户名: {meta['用户名']}")
-        print(f"{'─' * 40}")
-        print(f"  总轮数: {stats['total_turns']}")
-        print(f"  平均每轮: {stats['avg_minutes']:.1f} 分钟")
-        print(f"  总时长: {stats['total_minutes']:.0f} 分钟")
-        if stats["skipped_no_ts"] > 0:
-            print(f"  跳过(缺时间戳): {stats['skipped_no_ts']} 轮")
-        if stats["skipped_long_turns"] > 0:
-            print(f"  跳过(异常>2h): {stats['skipped_long_turns']} 轮")
-        print(f"  提醒: {stats['reminder_text']}")
-
-        if stats["per_phase"]:
-            print(f"  {'─' * 36}")
-            print(f"  各阶段明细:")
-            for ph in stats["per_phase"]:
-                print(
-                    f"    {ph['phase_name']}({ph['phase_id']}): "
-                    f"{ph['turns']}轮 / 均{ph['avg_minutes']:.1f}分 / 总{ph['total_minutes']:.0f}分"
-                )
-        print()
+        _print_report_stats(report_id, filename, meta, stats)
 
     return 0
 
@@ -1,12 +1,15 @@
 """
 API中间件
 """
+import time
+
 from fastapi import Request, HTTPException
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from app.config.settings import settings
 from app.config.audio_config import AudioConfig
 from app.utils.helpers import format_error_response
+from app.utils.metrics import HTTP_REQUEST_SECONDS
 
 
 class AudioModeMiddleware(BaseHTTPMiddleware):
@@ -63,3 +66,47 @@ class ErrorHandlerMiddleware(BaseHTTPMiddleware):
                         code=500
                     )
                 )
+
+
+class MetricsMiddleware:
+    """
+    请求耗时埋点（纯 ASGI，不缓冲响应体，SSE 流式响应不受影响）。
+    route 标签取匹配到的完整路由模板（含 include_router 前缀，如 /api/v1/simple-chat/history），
+    未匹配为 "unmatched"，避免路径参数撑爆标签。
+    """
+
+    @staticmethod
+    def _route_label(scope) -> str:
+        route = scope.get("route")
+        path = getattr(route, "path", None)
+        if not path:
+            return "unmatched"
+        # 新版 FastAPI 的 include_router 不再复制路由：scope["route"] 是路由器内的相对模板，
+        # 带前缀的完整模板在 effective_route_context 上
+        effective = (scope.get("fastapi") or {}).get("effective_route_context")
+        return getattr(effective, "path", None) or path
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=scope.get("method", ""),
+                route=self._route_label(scope),
+                status=status["code"],
+            )
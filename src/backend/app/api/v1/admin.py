@@ -2,12 +2,15 @@
 Admin 专用 API：数据分析仪表盘、点赞详情查看、对话明细
 仅超级管理员可访问
 """
+import asyncio
 from typing import Optional, List, Dict, Any
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from app.api.v1.auth import get_current_user
-from app.utils.data_paths import get_debug_logs_dir, get_logs_dir
+from app.utils import storage_codec
+from app.utils.cow_copy import materialize
+from app.utils.debug_log_index import get_debug_log_index
 from app.utils.simple_activation_manager import (
     SimpleActivationManager,
     ActivationStatus,
@@ -144,6 +147,9 @@ class SavepointGeneratedScenarioBatchRunRequest(BaseModel):
     engine: str = Field(default="auto", min_length=1)
     timeout_sec: int = Field(default=600, ge=5, le=3600)
     max_retries: int = Field(default=1, ge=0, le=3)
+    # None 时使用 SAVEPOINT_BATCH_WORKERS
+    workers: Optional[int] = Field(default=None, ge=1, le=16)
+    fail_fast: bool = False
 
 
 class SavepointGeneratedScenarioBatchJobRequest(BaseModel):
@@ -152,6 +158,9 @@ class SavepointGeneratedScenarioBatchJobRequest(BaseModel):
     engine: str = Field(default="auto", min_length=1)
     timeout_sec: int = Field(default=600, ge=5, le=3600)
     max_retries: int = Field(default=1, ge=0, le=3)
+    # None 时使用 SAVEPOINT_BATCH_WORKERS
+    workers: Optional[int] = Field(default=None, ge=1, le=16)
+    fail_fast: bool = False
 
 
 class SavepointGeneratedScenarioBatchHistoryCleanupRequest(BaseModel):
@@ -312,25 +321,19 @@ async def get_like_detail(
     """根据 session_id 和 log_index 获取被点赞的原始记录详情（runs.jsonl 中对应行）"""
     if not _is_super_admin(current_user):
         raise HTTPException(status_code=403, detail="仅超级管理员可访问")
-    debug_path = get_debug_logs_dir() / f"{session_id}.jsonl"
-    candidates = [debug_path]
-    logs_root = get_logs_dir()
-    if logs_root.is_dir():
-        for user_dir in logs_root.iterdir():
-            if user_dir.is_dir():
-                p = user_dir / session_id / "runs.jsonl"
-                if p.is_file():
-                    candidates.append(p)
-    for p in candidates:
-        if not p.is_file():
-            continue
-        with open(p, "r", encoding="utf-8") as f:
-            for i, line in enumerate(f):
-                if i == log_index:
-                    try:
-                        return {"code": 200, "message": "success", "data": json.loads(line)}
-                    except json.JSONDecodeError:
-                        return {"code": 200, "message": "success", "data": {"raw": line[:2000]}}
+    try:
+        line = await asyncio.to_thread(get_debug_log_index().read_line, session_id, log_index)
+    except ValueError:
+        line = None
+    if line is not None:
+        try:
+            return {"code": 200, "message": "success", "data": json.loads(line)}
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return {
+                "code": 200,
+                "message": "success",
+                "data": {"raw": line.decode("utf-8", "replace")[:2000]},
+            }
     return {"code": 404, "message": "未找到对应记录", "data": None}
 
 
@@ -923,7 +926,7 @@ def _load_report_step_session(report_id: str, step_id: str, session_id: str) ->
     if not file.is_file():
         return None
     try:
-        return json.loads(file.read_text(encoding="utf-8") or "{}")
+        return storage_codec.loads(file.read_text(encoding="utf-8") or "{}", "conversation")
     except (OSError, json.JSONDecodeError):
         return None
 
@@ -933,7 +936,8 @@ def _save_report_step_session(report_id: str, step_id: str, session_id: str, dat
     registry = ReportRegistry()
     file = registry.get_step_session_file(report_id, step_id, session_id)
     file.parent.mkdir(parents=True, exist_ok=True)
-    file.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    materialize(file)
+    file.write_text(storage_codec.dumps(data, "conversation"), encoding="utf-8")
 
 
 def _build_rumination_extras(report_id: str, conversation: dict) -> dict:
@@ -1093,7 +1097,7 @@ async def clone_conversation(
         target_thread_id = str(uuid.uuid4())
 
     try:
-        data = json.loads(src_file.read_text(encoding="utf-8") or "{}")
+        data = storage_codec.loads(src_file.read_text(encoding="utf-8") or "{}", "conversation")
     except (OSError, json.JSONDecodeError):
         raise HTTPException(status_code=500, detail="源会话文件读取失败")
 
@@ -1704,6 +1708,8 @@ async def admin_run_generated_scenarios_batch(
             engine=req.engine,
             timeout_sec=req.timeout_sec,
             max_retries=req.max_retries,
+            workers=req.workers,
+            fail_fast=req.fail_fast,
         )
         return {"code": 200, "message": "success", "data": data}
     except ValueError as e:
@@ -1725,6 +1731,8 @@ async def admin_run_generated_scenarios_batch_async(
             engine=req.engine,
             timeout_sec=req.timeout_sec,
             max_retries=req.max_retries,
+            workers=req.workers,
+            fail_fast=req.fail_fast,
         )
         return {"code": 200, "message": "success", "data": data}
     except ValueError as e:
@@ -2012,25 +2020,6 @@ async def admin_list_users(
 
     from app.core.database import UserDB
 
-    manager = SimpleActivationManager()
-    all_activations = manager.list_activations()
-
-    # 按 user_id 分组激活码
-    user_activation_map: Dict[str, List[Dict[str, Any]]] = {}
-    for _code, rec in all_activations.items():
-        uid = (rec.owner_user_id or "").strip()
-        if not uid:
-            continue
-        user_activation_map.setdefault(uid, []).append(
-            {
-                "activation_code": rec.code,
-                "status": rec.status,
-                "created_at": rec.created_at,
-                "expires_at": rec.expires_at,
-                "claimed_at": rec.claimed_at,
-            }
-        )
-
     async with AsyncSessionLocal() as db:
         user_db = UserDB(db)
         users, total = await user_db.list_users(
@@ -2043,6 +2032,9 @@ async def admin_list_users(
             created_before=created_before,
         )
 
+        # 只查当前页用户的激活码（owner 索引，不扫描全部激活码）
+        user_activation_map = SimpleActivationManager().activations_by_owner(u.id for u in users)
+
         items = []
         for u in users:
             profile = u.profile
@@ -2085,14 +2077,10 @@ async def admin_get_user_detail(
     from app.core.database import UserDB
 
     manager = SimpleActivationManager()
-    all_activations = manager.list_activations()
 
     # 该用户绑定的激活码
     bound_activations = []
-    for _code, rec in all_activations.items():
-        uid = (rec.owner_user_id or "").strip()
-        if uid != user_id:
-            continue
+    for rec in manager.activations_by_owner([user_id]).get(user_id, []):
         bound_activations.append(
             {
                 "activation_code": rec.code,
@@ -2106,17 +2094,14 @@ async def admin_get_user_detail(
         )
 
     async with AsyncSessionLocal() as db:
-        user_db = UserDB(db)
-        user = await user_db.get_user_by_id(user_id)
-        if not user:
+        aggregate = await UserDB(db).load_user_aggregate(user_id)
+        if not aggregate:
             raise HTTPException(status_code=404, detail="用户不存在")
 
-        profile = await user_db.get_user_profile(user_id)
-        work_histories = await user_db.get_user_work_histories(user_id)
-
+        user, profile = aggregate.user, aggregate.profile
         wh_list = []
-        for wh in work_histories:
-            projects = await user_db.get_work_history_projects(wh.id)
+        for wh in aggregate.work_histories:
+            projects = aggregate.projects_of(wh.id)
             wh_list.append(
                 {
                     "id": wh.id,
@@ -2228,7 +2213,10 @@ class BatchExportRequest(BaseModel):
     """批量导出请求"""
 
     report_ids: List[str] = Field(..., description="报告 ID 列表")
-    format: str = Field("md", description="导出格式：md 或 txt")
+    format: str = Field("md", description="导出格式：md / txt / columnar")
+    columnar_format: str = Field(
+        "auto", description="format=columnar 时的文件格式：auto / parquet / arrow / csv（无 pyarrow 时回退 csv）"
+    )
 
 
 @router.post("/reports/export/batch")
@@ -2241,6 +2229,8 @@ async def export_reports_batch(
     - 仅 super_admin 可调用
     - 单次最多 50 个 report，超出返回 400
     - 每个 report 一个文件（md/txt），文件内按 5 phase 分章节
+    - format=columnar：所有 report 的 messages / turns / rumination 表按 phase、日期分区
+      写成 Parquet / Arrow / CSV（见 ColumnarExportService），供离线统计
     - 不存在的 report_id 跳过，不影响其他 report
     """
     if not _is_super_admin(current_user):
@@ -2248,8 +2238,8 @@ async def export_reports_batch(
 
     # 格式校验
     fmt = (request.format or "md").strip().lower()
-    if fmt not in ("md", "txt"):
-        raise HTTPException(status_code=400, detail="format 仅支持 md 或 txt")
+    if fmt not in ("md", "txt", "columnar"):
+        raise HTTPException(status_code=400, detail="format 仅支持 md、txt 或 columnar")
 
     # 数量上限校验
     report_ids = request.report_ids or []
@@ -2270,6 +2260,9 @@ async def export_reports_batch(
             seen.add(rid)
             unique_ids.append(rid)
 
+    if fmt == "columnar":
+        return await _export_reports_columnar(unique_ids, request.columnar_format)
+
     # 收集每个 report 的文件内容
     from app.services.batch_export_service import BatchExportService
 
@@ -2315,6 +2308,41 @@ async def export_reports_batch(
     )
 
 
+async def _export_reports_columnar(report_ids: List[str], columnar_format: str):
+    """列式导出：manifest.json + {table}/phase=*/date=*/part-0.* 打包为一个 zip。"""
+    from app.services.columnar_export_service import ColumnarExportService
+
+    try:
+        service = ColumnarExportService(columnar_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    files, skipped = await service.collect_export(report_ids)
+    if not files:
+        raise HTTPException(
+            status_code=404,
+            detail=f"所有 report_id 均不存在或无数据，跳过: {skipped}",
+        )
+
+    import io
+    import zipfile
+
+    from fastapi.responses import StreamingResponse
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for inner_path, data in files:
+            zf.writestr(inner_path, data)
+    buf.seek(0)
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    zip_filename = f"reports_columnar_export_{stamp}.zip"
+    return StreamingResponse(
+        buf,
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{zip_filename}"'},
+    )
+
+
 # ─── 每轮平均时间统计（T3） ─────────────────────────────────────
 
 
@@ -1,11 +1,14 @@
 """
 语音API（可选，AUDIO_MODE控制）
 """
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from app.api.v1.auth import get_current_user
 from app.config.audio_config import get_audio_config
+from app.config.settings import settings
 
 router = APIRouter(prefix="/audio", tags=["语音"])
 
@@ -15,6 +18,18 @@ class SynthesizeRequest(BaseModel):
     text: str
     voice: Optional[str] = "alloy"  # alloy, echo, fable, onyx, nova, shimmer
     speed: float = 1.0
+    format: Optional[str] = None  # mp3, opus, aac, flac, wav, pcm；None 则用 Provider 默认格式
+
+
+# 流式响应的 Content-Type
+AUDIO_MEDIA_TYPES = {
+    "mp3": "audio/mpeg",
+    "opus": "audio/ogg",
+    "aac": "audio/aac",
+    "flac": "audio/flac",
+    "wav": "audio/wav",
+    "pcm": "audio/L16",
+}
 
 
 class StandardResponse(BaseModel):
@@ -89,36 +104,44 @@ async def synthesize_speech(
         )
     
     try:
-        from app.core.tts import get_default_tts_provider
+        from app.core.tts.cache import get_tts_cache
         import base64
-        
-        tts = get_default_tts_provider()
-        if not tts:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="TTS服务不可用"
+
+        tts = _get_tts_provider()
+        voice, fmt, key, synth_kwargs = _synthesis_params(tts, request)
+        cache = get_tts_cache()
+
+        # 相同文本 / 声音 / 模型 / 格式 / 语速只合成一次；时长随缓存条目保存
+        # （流式接口写入的条目没有时长，命中时返回 None）
+        hit = await asyncio.to_thread(cache.read, key, fmt) if cache is not None else None
+        if hit is not None:
+            audio_data, meta = hit
+            duration = meta.get("duration")
+        else:
+            result = await tts.synthesize(
+                text=request.text,
+                voice=voice,
+                speed=request.speed,
+                **synth_kwargs
             )
-        
-        # 合成语音
-        result = await tts.synthesize(
-            text=request.text,
-            voice=request.voice,
-            speed=request.speed
-        )
-        
+            audio_data = result.audio_data
+            duration = result.duration
+            if cache is not None:
+                await asyncio.to_thread(cache.put, key, fmt, audio_data, {"duration": duration})
+
         # 将音频数据编码为base64
-        audio_base64 = base64.b64encode(result.audio_data).decode('utf-8')
-        
+        audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+
         return StandardResponse(
             code=200,
             message="合成成功",
             data={
                 "audio_data": audio_base64,
-                "format": result.format,
-                "duration": result.duration
+                "format": fmt,
+                "duration": duration
             }
         )
-    
+
     except HTTPException:
         raise
     except Exception as e:
@@ -126,3 +149,117 @@ async def synthesize_speech(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"合成失败: {str(e)}"
         )
+
+
+@router.post("/synthesize/stream")
+async def synthesize_speech_stream(
+    request: SynthesizeRequest,
+    current_user: Optional[dict] = Depends(get_current_user)
+):
+    """
+    流式合成语音：直接返回音频字节流（非 base64），客户端收到首块即可开始播放。
+
+    命中缓存时按块回放缓存文件；未命中时边转发 Provider 分块边写缓存，
+    完整结束才落盘，客户端中途断开或合成出错则丢弃半成品。响应头 X-TTS-Cache: hit | miss。
+    """
+    audio_config = get_audio_config()
+    if not audio_config.get("audio_mode", False):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="音频模式未启用"
+        )
+
+    from app.core.tts.cache import aiter_file_chunks, get_tts_cache
+
+    tts = _get_tts_provider()
+    voice, fmt, key, synth_kwargs = _synthesis_params(tts, request)
+    chunk_size = int(getattr(settings, "TTS_STREAM_CHUNK_BYTES", 16 * 1024))
+    media_type = AUDIO_MEDIA_TYPES.get(fmt, "application/octet-stream")
+    cache = get_tts_cache()
+
+    if cache is not None:
+        path = await asyncio.to_thread(cache.get, key, fmt)
+        if path is not None:
+            chunks = aiter_file_chunks(path, chunk_size)
+            try:
+                first = await chunks.__anext__()  # 先打开文件，被淘汰时退回未命中
+            except StopAsyncIteration:
+                first = b""
+            except OSError:
+                path = None
+            if path is not None:
+                async def replay():
+                    try:
+                        yield first
+                        async for chunk in chunks:
+                            yield chunk
+                    finally:
+                        await chunks.aclose()
+
+                return StreamingResponse(
+                    replay(), media_type=media_type, headers={"X-TTS-Cache": "hit"}
+                )
+
+    stream = tts.synthesize_stream(
+        request.text, voice=voice, speed=request.speed, chunk_size=chunk_size, **synth_kwargs
+    )
+    # 预取首块：参数错误 / 上游失败在响应头发出前就能以 500 返回
+    try:
+        first = await stream.__anext__()
+    except StopAsyncIteration:
+        first = b""
+    except Exception as e:
+        await stream.aclose()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"合成失败: {str(e)}"
+        )
+
+    async def relay():
+        # 缓存文件的打开 / 写入 / 提交都在线程里执行，不阻塞事件循环
+        writer = await asyncio.to_thread(cache.open_writer, key, fmt) if cache is not None else None
+        completed = False
+        try:
+            if first:
+                if writer:
+                    await asyncio.to_thread(writer.write, first)
+                yield first
+            async for chunk in stream:
+                if writer:
+                    await asyncio.to_thread(writer.write, chunk)
+                yield chunk
+            completed = True
+        finally:
+            await stream.aclose()
+            if writer:
+                if completed:
+                    await asyncio.to_thread(writer.commit)
+                else:
+                    await asyncio.to_thread(writer.discard)
+
+    return StreamingResponse(relay(), media_type=media_type, headers={"X-TTS-Cache": "miss"})
+
+
+def _get_tts_provider():
+    from app.core.tts import get_default_tts_provider
+
+    tts = get_default_tts_provider()
+    if not tts:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="TTS服务不可用"
+        )
+    return tts
+
+
+def _synthesis_params(tts, request: SynthesizeRequest):
+    """解析实际生效的声音 / 格式，返回 (voice, fmt, 缓存 key, 传给 Provider 的额外参数)。"""
+    from app.core.tts.cache import tts_cache_key
+
+    voice = request.voice or getattr(tts, "default_voice", None)
+    fmt = (request.format or tts.default_format).lower()
+    synth_kwargs = {"response_format": fmt} if fmt != tts.default_format else {}
+    key = tts_cache_key(
+        request.text, voice=voice, model=tts.model or "", fmt=fmt, speed=request.speed
+    )
+    return voice, fmt, key, synth_kwargs
@@ -9,22 +9,21 @@ import os
 import re
 import traceback
 from datetime import datetime, timezone
-from pathlib import Path
 from typing import Dict, Generator, Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from app.api.v1.auth import get_current_user
 from app.config.settings import settings
 from app.core.agent.config import AgentRunConfig
-from app.core.agent.graph import create_agent_graph, create_initial_state
 from app.domain import DEFAULT_CURRENT_STEP
 from app.services.analytics_service import AnalyticsService
 from app.services.session_service import SessionService
 from app.utils.conversation_file_manager import ConversationCategory, ConversationFileManager
-from app.utils.data_paths import get_debug_logs_dir, get_logs_dir, get_question_progress_dir
+from app.utils.data_paths import get_question_progress_dir
+from app.utils.debug_log_index import get_debug_log_index
 from app.utils.super_admin import is_super_admin_user
 
 logger = logging.getLogger(__name__)
@@ -146,6 +145,9 @@ async def send_message(
         # 加载已有的 question_progress
         saved_qp = _load_question_progress(request.session_id)
 
+        # LangGraph 较重，首次请求时再导入
+        from app.core.agent.graph import create_agent_graph, create_initial_state
+
         run_config = AgentRunConfig(use_user_agent_node=True)
         graph = create_agent_graph(run_config)
 
@@ -328,29 +330,18 @@ def _save_debug_logs(
             "response_preview": (response or "")[:500],
             "logs": logs,
             "tools_used": (final_state or {}).get("tools_used", []),
-            "context_keys": list((final_state or {}).get("context") or {}).keys(),
+            "context_keys": list(((final_state or {}).get("context") or {}).keys()),
             "token_usage": (final_state or {}).get("session_token_usage"),
         }
 
-        # 按 session 维度集中存储
-        debug_dir = get_debug_logs_dir()
-        debug_dir.mkdir(parents=True, exist_ok=True)
-        path = debug_dir / f"{session_id}.jsonl"
-        log_index = sum(1 for _ in open(path, encoding="utf-8")) if path.is_file() else 0
-        with open(path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
-
-        # 按用户 / 会话分目录存储
-        logs_base = get_logs_dir()
-        if user_id:
-            user_log_dir = logs_base / str(user_id) / str(session_id)
-        else:
-            user_log_dir = logs_base / "anonymous" / str(session_id)
-        user_log_dir.mkdir(parents=True, exist_ok=True)
-        user_log_path = user_log_dir / "runs.jsonl"
-        with open(user_log_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
-        return log_index
+        # 按 session 维度集中存储 + 按用户 / 会话分目录存储；同时更新 session 索引（行偏移）
+        index = get_debug_log_index()
+        written = index.append(
+            str(session_id),
+            entry,
+            [index.debug_log_path(session_id), index.user_log_path(session_id, user_id)],
+        )
+        return written[0]
     except Exception:
         return None
 
@@ -380,6 +371,8 @@ async def send_message_stream(
                     },
                 )
             user_id = current_user["user_id"] if current_user else None
+            from app.core.agent.graph import create_agent_graph, create_initial_state
+
             run_config = AgentRunConfig(use_user_agent_node=True)
             graph = create_agent_graph(run_config)
             queue = asyncio.Queue()
@@ -545,51 +538,27 @@ async def record_interrupt(
 @router.get("/debug-logs", response_model=StandardResponse)
 async def get_debug_logs(
     session_id: str,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=500),
     current_user: Optional[dict] = Depends(get_current_user),
 ):
-    """获取某会话的智能体调试日志（仅超级管理员）。含思考链、工具调用、logs 等。"""
+    """
+    获取某会话的智能体调试日志（仅超级管理员）。含思考链、工具调用、logs 等。
+    按 session 索引定位日志文件与行偏移，按时间排序分页（不传 limit 返回全部）。
+    """
     if not _is_super_admin(current_user):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="仅超级管理员可查看调试日志"
         )
     try:
-        entries = []
-        # 搜索所有可能的日志路径（项目根 data/ 下）
-        debug_path = get_debug_logs_dir() / f"{session_id}.jsonl"
-        candidate_paths = [str(debug_path)]
-        # 扫描 data/logs/ 下所有用户子目录
-        logs_root = get_logs_dir()
-        if logs_root.is_dir():
-            for user_dir in logs_root.iterdir():
-                if user_dir.is_dir():
-                    p = user_dir / session_id / "runs.jsonl"
-                    if p.is_file():
-                        candidate_paths.append(str(p))
-
-        seen_timestamps = set()
-        for path_str in candidate_paths:
-            p = Path(path_str)
-            if not p.is_file():
-                continue
-            with open(p, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        entry = json.loads(line)
-                        # 按 timestamp 去重（两个路径可能有相同记录）
-                        ts = entry.get("timestamp", "")
-                        if ts and ts in seen_timestamps:
-                            continue
-                        if ts:
-                            seen_timestamps.add(ts)
-                        entries.append(entry)
-                    except json.JSONDecodeError:
-                        continue
-        # 按时间排序
-        entries.sort(key=lambda x: x.get("timestamp", ""))
-        return StandardResponse(code=200, message="success", data={"entries": entries})
+        entries, total = await asyncio.to_thread(
+            get_debug_log_index().page, session_id, offset=offset, limit=limit
+        )
+        return StandardResponse(
+            code=200, message="success", data={"entries": entries, "total": total}
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -34,13 +34,6 @@ from app.api.v1.chat import (
     _save_question_progress,
 )
 from app.config.settings import settings
-
-# ===== 使用 graph 模块（已合并 graph_optimized）=====
-from app.core.agent.graph import (
-    create_agent_graph,
-    create_initial_state,
-    save_context_after_agent,
-)
 from app.core.agent.graph_cache import get_graph_cache, get_or_create_graph
 from app.services.session_service import SessionService
 from app.utils.enhanced_conversation_manager import (
@@ -182,6 +175,13 @@ async def send_message_stream_optimized(
             # 3. 创建或获取缓存的 Graph（核心优化）
             from app.core.agent.config import AgentRunConfig
 
+            # graph 模块（已合并 graph_optimized）依赖 LangGraph，首次请求时再导入
+            from app.core.agent.graph import (
+                create_agent_graph,
+                create_initial_state,
+                save_context_after_agent,
+            )
+
             config = AgentRunConfig(use_user_agent_node=True, max_iterations=10)
 
             if request.use_cache:
@@ -242,11 +242,13 @@ async def list_user_journeys(
             return registry.get_by_activation_user(rec.code, em)
         return None
 
-    # 合并生产 + 测试/沙箱索引（管理员 ADM/SBX、fork、resident 仅在 test 根）
+    # 合并生产 + 测试/沙箱索引（管理员 ADM/SBX、fork、resident 仅在 test 根）；按 owner 索引只取本人的激活码
     merged: dict[str, tuple] = {}  # code -> (last_activity_at str, ActivationRecord)
     for base_dir in (get_simple_base_dir(), get_simple_test_base_dir()):
         mgr = SimpleActivationManager(base_dir=str(base_dir))
-        for code, rec in mgr.list_activations().items():
+        owned = mgr.activations_by_owner([user_id] if user_id else [], [email] if email else [])
+        for rec in (r for recs in owned.values() for r in recs):
+            code = rec.code
             norm = (code or "").strip().upper()
             if not norm:
                 continue
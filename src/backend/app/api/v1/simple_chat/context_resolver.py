@@ -37,6 +37,7 @@ from app.utils.survey_storage import (
     load_prior_context,
 )
 from app.utils.id_codec import IDCodec
+from app.utils.storage_codec import CONVERSATION_SCHEMA
 
 logger = logging.getLogger(__name__)
 
@@ -56,7 +57,7 @@ def step_session_message_count(
     if not path.is_file():
         return 0
     try:
-        raw = json.loads(path.read_text(encoding="utf-8") or "{}")
+        raw = CONVERSATION_SCHEMA.loads(path.read_text(encoding="utf-8") or "{}", "conversation")
         data = IDCodec.normalize_conversation_data_on_read(raw, report_id)
         return len(data.get("messages") or [])
     except (OSError, json.JSONDecodeError, TypeError):
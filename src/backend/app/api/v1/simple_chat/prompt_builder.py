@@ -6,7 +6,7 @@ from typing import Optional
 
 from jinja2 import Environment
 
-from app.core.knowledge.loader import KnowledgeLoader
+from app.core.knowledge.snapshot import get_knowledge_snapshot
 from app.domain.conclusion_card_payload import build_state_json_draft_extension_protocol
 from app.domain.prompts import get_simple_chat_system_prompt
 from app.utils.conversation_file_manager import ConversationFileManager
@@ -30,10 +30,7 @@ def _phase_to_loader_category(phase: str) -> str:
 def get_random_questions_for_phase(phase: str, n: int = SIMPLE_QUESTION_SAMPLE_SIZE) -> str:
     """从 question.md 中按阶段加载问题，随机抽取 n 个。"""
     try:
-        loader = KnowledgeLoader()
-        all_questions = loader.load_questions()
-        category = _phase_to_loader_category(phase)
-        phase_questions = [q for q in all_questions if q.category == category]
+        phase_questions = get_knowledge_snapshot().questions_in(_phase_to_loader_category(phase))
         if not phase_questions:
             return "（暂无该阶段题库）"
         sampled = random.sample(phase_questions, min(n, len(phase_questions)))
@@ -8,6 +8,8 @@
 """
 
 import asyncio
+import functools
+import hashlib
 import json
 import logging
 import re
@@ -17,9 +19,8 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, AsyncIterator, Callable, Dict, List, Literal, Optional, Sequence, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from fastapi.responses import StreamingResponse
-from jinja2 import Environment
 from pydantic import BaseModel, ConfigDict
 
 from app.api.v1.auth import _is_debug_admin, get_current_user
@@ -100,8 +101,20 @@ from app.config.settings import settings
 from app.core.dimension_completion_checker import (
     check_dimension_complete,
 )
-from app.core.llmapi import LLMMessage, get_default_llm_provider
-from app.core.llmapi.factory import create_llm_provider
+from app.core.llmapi import (
+    PRIORITY_BACKGROUND,
+    LLMMessage,
+    get_default_llm_provider,
+    llm_call_site,
+    llm_priority,
+)
+from app.core.llmapi.factory import (
+    HEDGE_ROLE_DIALOG,
+    HEDGE_ROLE_REASONING,
+    create_llm_provider,
+    with_hedging,
+)
+from app.core.llmapi.response_cache import SITE_PENDING_JUDGE, cached_chat
 from app.domain.conclusion_card_goals import cap_strengths_keywords_list, get_conclusion_card_goal
 from app.domain.conclusion_card_payload import (
     REJECTED_DRAFT_SUPERSESSION_LINE,
@@ -110,7 +123,8 @@ from app.domain.conclusion_card_payload import (
     format_rejected_conclusion_injection,
     sanitize_pending_conclusion_draft,
 )
-from app.domain.prompts import get_simple_chat_system_prompt, get_step_copy
+from app.domain.prompts import get_step_copy
+from app.domain.prompts.assembly import assemble_simple_chat_system_prompt
 from app.domain.rumination_prompt_strings import (
     RUMINATION_CLOSING_SUMMARY_MAX_CHARS,
     RUMINATION_STEP2_ALL_UNMATCHED_TRANSITION_ZH,
@@ -140,8 +154,18 @@ from app.utils.context_refiner import (
     refine_and_save_rumination_step_anchor,
 )
 from app.utils.conversation_file_manager import ConversationFileManager
+from app.utils.coordination import get_coordination_backend
 from app.utils.helpers import parse_iso_to_utc
 from app.utils.id_codec import IDCodec
+from app.utils.sse_coalesce import FLUSH_DUE, SSEChunkCoalescer, iter_with_flush_deadline
+from app.utils import storage_codec
+from app.utils.post_turn_jobs import (
+    FINISHED_STATUSES,
+    JOB_STATUS_DONE,
+    enqueue_post_turn_job,
+    get_post_turn_job,
+    register_post_turn_handler,
+)
 from app.utils.purpose_progress import (
     apply_progress_update,
     build_progress_injection,
@@ -247,8 +271,8 @@ from app.utils.survey_storage import (
 SIMPLE_QUESTION_SAMPLE_SIZE = 6
 # 发送给 LLM 的历史消息最大轮数（减少 token、加快响应）
 MAX_HISTORY_TURNS = 30
-# 并发 LLM 调用限制（0=不限制）
-_LLM_SEM = None
+# 并发 LLM 调用限制（0=不限制），名额由协调后端分配（多 worker 共享）
+_LLM_SEM_NAME = "llm"
 PENDING_JUDGE_TIMEOUT_SECONDS = 20
 CONCLUSION_GEN_TIMEOUT_SECONDS = 25
 PENDING_HEARTBEAT_SECONDS = 2.0
@@ -288,11 +312,8 @@ def _count_user_messages(messages: Optional[List[dict]]) -> int:
 
 
 def _get_llm_semaphore():
-    global _LLM_SEM
-    if _LLM_SEM is None:
-        n = getattr(settings, "LLM_MAX_CONCURRENT", 0) or 0
-        _LLM_SEM = asyncio.Semaphore(n) if n > 0 else None
-    return _LLM_SEM
+    n = getattr(settings, "LLM_MAX_CONCURRENT", 0) or 0
+    return get_coordination_backend().semaphore(_LLM_SEM_NAME, n)
 
 
 def _resolve_provider_and_key_for_vip(vip_level: int) -> tuple[str, Optional[str], Optional[str]]:
@@ -363,11 +384,16 @@ def _get_dialogue_llm_provider(vip_level: int = 1):
     provider, api_key, base_url = _resolve_provider_and_key_for_vip(vip_level)
     dialog_model = _to_non_reasoning_model(getattr(llm, "model", "") or "deepseek-v4-pro")
     try:
-        return create_llm_provider(
-            provider=provider,
-            model=dialog_model,
-            api_key=api_key,
-            base_url=base_url,
+        return with_hedging(
+            create_llm_provider(
+                provider=provider,
+                model=dialog_model,
+                api_key=api_key,
+                base_url=base_url,
+            ),
+            vip_level,
+            primary=provider,
+            role=HEDGE_ROLE_DIALOG,
         )
     except Exception:
         # 降级：保持可用性，避免因切换失败阻断主对话
@@ -385,11 +411,16 @@ def _get_reasoning_llm_provider(vip_level: int = 1):
     provider, api_key, base_url = _resolve_provider_and_key_for_vip(vip_level)
     reasoning_model = _to_reasoning_model(getattr(llm, "model", "") or "deepseek-v4-pro")
     try:
-        return create_llm_provider(
-            provider=provider,
-            model=reasoning_model,
-            api_key=api_key,
-            base_url=base_url,
+        return with_hedging(
+            create_llm_provider(
+                provider=provider,
+                model=reasoning_model,
+                api_key=api_key,
+                base_url=base_url,
+            ),
+            vip_level,
+            primary=provider,
+            role=HEDGE_ROLE_REASONING,
         )
     except Exception:
         return llm
@@ -597,17 +628,18 @@ def _trigger_anchor_refiner(
 
     async def _run():
         try:
-            await refine_and_save_anchor(
-                report_id=report_id,
-                phase=phase,
-                category=category,
-                conv_manager=conv_manager,
-                base_dir=storage_root,
-                dimension_conclusion=dimension_conclusion,
-                prior_anchor=prior,
-                round_count=round_count,
-                vip_level=vip_level,
-            )
+            with llm_priority(PRIORITY_BACKGROUND), llm_call_site("anchor_refiner"):
+                await refine_and_save_anchor(
+                    report_id=report_id,
+                    phase=phase,
+                    category=category,
+                    conv_manager=conv_manager,
+                    base_dir=storage_root,
+                    dimension_conclusion=dimension_conclusion,
+                    prior_anchor=prior,
+                    round_count=round_count,
+                    vip_level=vip_level,
+                )
         except Exception as e:
             logger.warning("anchor refiner failed: %s", e)
 
@@ -663,7 +695,7 @@ async def _append_note_json(
         now = datetime.now(timezone.utc).isoformat()
         try:
             with open(fp, "r", encoding="utf-8") as f:
-                data = json.load(f)
+                data = storage_codec.NOTE_SCHEMA.load(f, "conversation_note")
         except (FileNotFoundError, json.JSONDecodeError):
             data = {
                 **IDCodec.build_note_container_root(session_id),
@@ -686,7 +718,7 @@ async def _append_note_json(
         meta["total_notes"] = len(notes)
         fp.parent.mkdir(parents=True, exist_ok=True)
         with open(fp, "w", encoding="utf-8") as f:
-            f.write(json.dumps(data, indent=2, ensure_ascii=False))
+            f.write(storage_codec.dumps(data, "conversation_note"))
 
     await conv_manager._with_file_lock(session_id, note_category, _do)
 
@@ -1158,8 +1190,10 @@ async def _decide_pending_action_by_llm(
 """
     resp = None
     try:
-        resp = await llm.chat(
+        resp = await cached_chat(
+            llm,
             [LLMMessage(role="user", content=prompt)],
+            site=SITE_PENDING_JUDGE,
             temperature=0.1,
             response_format={"type": "json_object"},
         )
@@ -1173,7 +1207,12 @@ async def _decide_pending_action_by_llm(
         )
     if resp is None:
         try:
-            resp = await llm.chat([LLMMessage(role="user", content=token_prompt)], temperature=0.1)
+            resp = await cached_chat(
+                llm,
+                [LLMMessage(role="user", content=token_prompt)],
+                site=SITE_PENDING_JUDGE,
+                temperature=0.1,
+            )
         except Exception as e:
             logger.warning(
                 "[pending_judge] reasoner plain mode failed model=%s err_type=%s err=%s",
@@ -1195,8 +1234,10 @@ async def _decide_pending_action_by_llm(
         dialog_model = str(getattr(dialog_llm, "model", "") or "")
         try:
             logger.info("[pending_judge] fallback_to_dialogue model=%s", dialog_model or "unknown")
-            dialog_resp = await dialog_llm.chat(
+            dialog_resp = await cached_chat(
+                dialog_llm,
                 [LLMMessage(role="user", content=token_prompt)],
+                site=SITE_PENDING_JUDGE,
                 temperature=0.1,
             )
             dialog_text = (dialog_resp.content or "").strip()
@@ -3201,11 +3242,8 @@ async def _generate_and_store_combo_guide(
 
         async def _call_llm_once() -> str:
             """单次调用 LLM；返回 content 字符串（可能为空）。"""
-            sem = _get_llm_semaphore()
-            if sem:
-                async with sem:
-                    resp = await llm.chat(llm_messages, temperature=0.65, max_tokens=600)
-            else:
+            # 后台优先级：只占自适应限制器的 background 份额，不再与交互流争抢全局 LLM 信号量
+            with llm_priority(PRIORITY_BACKGROUND), llm_call_site("combo_guide"):
                 resp = await llm.chat(llm_messages, temperature=0.65, max_tokens=600)
             content = getattr(resp, "content", resp) if resp else ""
             # 记录原始返回便于排查"短文案/空返回"类问题
@@ -4035,37 +4073,35 @@ def _build_system_prompt(
     rumination_neg_injection: str = "",
     purpose_progress_injection: str = "",
 ) -> str:
-    """根据阶段构建 system prompt（通过模板渲染，避免超长硬编码）。"""
+    """
+    根据阶段构建 system prompt。静态段（阶段模板、Prompt Lab 版本、子步 addon、输出协议）
+    按层预编译复用，每轮只填题库 / 基本信息 / 上轮结论等动态槽，见 app.domain.prompts.assembly。
+    """
     prior_block = (
         f"\n\n以下是该来访者在上一轮咨询中的谈话结果，供你参考：\n{prior_context}"
         if prior_context.strip()
         else ""
     )
-    context = {
-        "phase": phase,
-        "question_bank": question_bank,
-        "basic_info": basic_info,
-        "prior_block": prior_block,
-        "values_info": (values_info or "").strip(),
-        "rumination_step_addon": (rumination_step_addon or "").strip(),
-    }
-    if (template_override or "").strip():
-        env = Environment(trim_blocks=True, lstrip_blocks=True)
-        base_prompt = env.from_string(template_override).render(**context)
-    else:
-        base_prompt = get_simple_chat_system_prompt(context)
-    if (extra_goal_hint or "").strip():
-        base_prompt = f"{base_prompt}\n\n[管理员调试目标补充]\n{extra_goal_hint.strip()}"
+    phase_key = (phase or "").strip().lower()
     inj = (rumination_neg_injection or "").strip()
-    if inj:
-        base_prompt = f"{base_prompt}\n{inj}"
-    # 使命阶段进度注入
-    if (phase or "").strip().lower() == "purpose" and (purpose_progress_injection or "").strip():
-        base_prompt = f"{base_prompt}\n\n{purpose_progress_injection.strip()}"
-    # rumination 阶段不使用结论卡 pending 协议：仅保留自然对话与表格流程。
-    if (phase or "").strip().lower() == "rumination":
-        return base_prompt
-
+    ppi = (purpose_progress_injection or "").strip() if phase_key == "purpose" else ""
+    return assemble_simple_chat_system_prompt(
+        phase,
+        question_bank=question_bank,
+        basic_info=basic_info,
+        prior_block=prior_block,
+        values_info=(values_info or "").strip(),
+        rumination_step_addon=(rumination_step_addon or "").strip(),
+        template_override=template_override,
+        extra_goal_hint=extra_goal_hint,
+        dynamic_tail=(f"\n{inj}" if inj else "", f"\n\n{ppi}" if ppi else ""),
+        # rumination 阶段不使用结论卡 pending 协议：仅保留自然对话与表格流程。
+        static_suffix="" if phase_key == "rumination" else _state_json_protocol(phase),
+    ).text
+
+
+@functools.lru_cache(maxsize=16)
+def _state_json_protocol(phase: str) -> str:
     # 机器协议：每轮回复末尾输出状态 JSON，后端据此驱动 pending 状态机（不会展示给前端）。
     protocol = f"""
 
@@ -4087,7 +4123,7 @@ def _build_system_prompt(
 - 禁止用「系统将弹出结论卡」「即将输出 pending」「严格遵循协议」等元话术代替真实隐藏块；界面是否出卡仅由隐藏块触发，口头承诺无效。
 - 对用户只说话题本身（如价值观、优势、小结），就像没有后台协议存在。
 """
-    return f"{base_prompt}\n{protocol}"
+    return f"\n{protocol}"
 
 
 def _strip_hidden_blocks_for_stream(
@@ -4860,15 +4896,91 @@ async def list_threads(
     )
 
 
+# /history 分页单页上限；ETag 版本前缀（响应结构变化时递增，使旧缓存失效）
+HISTORY_PAGE_MAX = 500
+HISTORY_ETAG_VERSION = "h1"
+
+
+def _history_etag(*parts: Any) -> str:
+    """由文件版本（stat）与请求参数计算强 ETag，不读取对话文件内容。"""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return f'"{HISTORY_ETAG_VERSION}-{hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 按弱比较（忽略 W/ 前缀），支持逗号分隔多个值与 *。"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == etag:
+            return True
+    return False
+
+
+def _paginate_history(
+    messages: List[Dict[str, Any]],
+    *,
+    before: Optional[str],
+    after: Optional[str],
+    limit: Optional[int],
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    按消息 id 游标切片：
+    - before：该 id 之前的消息，取最靠近游标的 limit 条（向上翻页）
+    - after：该 id 之后的消息，取最早的 limit 条（断线重连补齐）
+    - 仅 limit：最新的 limit 条
+    游标 id 不存在时抛 400，由前端回退为全量拉取。
+    """
+
+    def _index_of(mid: str) -> int:
+        for i in range(len(messages) - 1, -1, -1):
+            m = messages[i]
+            if str(m.get("id") or m.get("message_id") or "") == mid:
+                return i
+        raise HTTPException(status_code=400, detail=f"无效的消息游标：{mid}")
+
+    start, end = 0, len(messages)
+    if after:
+        start = _index_of(after) + 1
+    if before:
+        end = _index_of(before)
+    if end < start:
+        end = start
+    if limit:
+        if after:
+            end = min(end, start + limit)
+        else:
+            start = max(start, end - limit)
+    page = messages[start:end]
+    return page, {
+        "total": len(messages),
+        "start": start,
+        "end": end,
+        "has_more_before": start > 0,
+        "has_more_after": end < len(messages),
+    }
+
+
 @router.get("/history", response_model=SimpleHistoryResponse)
 async def simple_history(
     activation_code: str,
     phase: str,
+    response: Response,
     thread_id: Optional[str] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=HISTORY_PAGE_MAX),
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user),
 ):
     """
-    获取某个激活码 + 阶段下的全部历史消息
+    获取某个激活码 + 阶段下的历史消息。
+
+    - 不带 before / after / limit 时返回全部消息（与旧版响应结构一致）；
+      带任一参数时按消息 id 游标分页，data 额外返回 page 信息。
+    - 响应带强 ETag（对话文件 + record.json 的 stat 版本 + 请求参数），
+      If-None-Match 命中时直接返回 304，不解析对话文件。
     """
     try:
         manager = get_activation_manager_for_code(activation_code)
@@ -4909,6 +5021,26 @@ async def simple_history(
         session_id = report["report_id"]
         root = get_effective_simple_root(rec)
         registry = ReportRegistry(base_dir=str(root))
+        activation_view = IDCodec.build_activation_client_view(rec, logical_session_id)
+        paginated = bool(before or after or limit)
+        etag = _history_etag(
+            conv_manager.get_file_version(session_id, category),
+            registry.get_record_version(session_id),
+            activation_view,
+            IDCodec.activation_session_id_from_rec(rec),
+            phase_step,
+            category,
+            before,
+            after,
+            limit,
+        )
+        if _etag_matches(if_none_match, etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+            )
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
 
         conv_data = await conv_manager.get_conversation_data(session_id, category)
         history_messages = conv_data.get("messages", [])
@@ -4916,11 +5048,17 @@ async def simple_history(
         cmeta = _read_conclusion_meta(metadata)
         record = registry.get_report_by_id(report["report_id"]) or {}
         step_payload = ((record.get("steps") or {}).get(phase_step)) or {}
+        page_info: Optional[Dict[str, Any]] = None
+        if paginated:
+            history_messages, page_info = _paginate_history(
+                history_messages, before=before, after=after, limit=limit
+            )
 
         return SimpleHistoryResponse(
             code=200,
             message="success",
             data={
+                **({"page": page_info} if page_info is not None else {}),
                 "messages": history_messages,
                 "metadata": {
                     **IDCodec.build_history_metadata_ids(
@@ -4939,7 +5077,7 @@ async def simple_history(
                     ),
                     "step_locked": bool(step_payload.get("locked", False)),
                 },
-                "activation": IDCodec.build_activation_client_view(rec, logical_session_id),
+                "activation": activation_view,
                 "report_id": report["report_id"],
                 "step_id": phase_step,
             },
@@ -5209,6 +5347,170 @@ async def _hyp_candidate_fallback_retry(
     return [], None
 
 
+# ── 轮次后置任务：可见回复结束后放入后台队列（app.utils.post_turn_jobs），SSE 不再等待 ──
+POST_TURN_KIND_PENDING_CONCLUSION = "simple_chat.pending_conclusion"
+POST_TURN_KIND_CHAT_TURN_ANALYTICS = "simple_chat.chat_turn_analytics"
+# 结论卡任务来源：模型输出 pending_ready / 否定后按轮次兜底重试
+POST_TURN_SOURCE_PENDING_READY = "pending_ready"
+POST_TURN_SOURCE_RETRIGGER = "retrigger_after_rejected"
+
+
+def _post_turn_job_event(job: Dict[str, Any]) -> str:
+    evt: Dict[str, Any] = {
+        "job_id": job.get("job_id"),
+        "kind": job.get("kind"),
+        "status": job.get("status"),
+    }
+    if job.get("status") == JOB_STATUS_DONE:
+        evt["result"] = job.get("result")
+    return "data: " + json.dumps({"post_turn_job": evt}, ensure_ascii=False) + "\n\n"
+
+
+def _new_post_turn_ctx(**fields: Any) -> Dict[str, Any]:
+    """
+    轮次后置任务公共上下文，附带本轮唯一的 turn_id。
+
+    幂等键不能用用户消息数：回退（delete_messages_from_filter_step）或不新增用户消息的轮次
+    会重复同一计数，INSERT OR IGNORE 会返回上一轮已完成的任务。
+    """
+    return {**fields, "turn_id": uuid.uuid4().hex}
+
+
+async def _enqueue_post_turn(
+    kind: str,
+    ctx: Dict[str, Any],
+    payload: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """按 (report, thread, turn_id, kind) 幂等入队；队列不可用时返回 None，由调用方降级为同步执行。"""
+    idem_key = f"{ctx.get('report_id')}:{ctx.get('thread_id')}:{ctx.get('turn_id')}:{kind}"
+    try:
+        return await enqueue_post_turn_job(kind, {**ctx, **payload}, idem_key=idem_key)
+    except Exception as e:
+        logger.warning("[post_turn] enqueue failed kind=%s key=%s err=%s", kind, idem_key, e)
+        return None
+
+
+async def _record_chat_turn_after_reply(ctx: Dict[str, Any], **fields: Any) -> None:
+    """对话轮次埋点：后台模式入队，否则（或入队失败）同步写入。"""
+    if settings.SIMPLE_CHAT_POST_TURN_BACKGROUND:
+        job = await _enqueue_post_turn(
+            POST_TURN_KIND_CHAT_TURN_ANALYTICS, ctx, {"analytics": fields}
+        )
+        if job is not None:
+            return
+    try:
+        await AnalyticsService.record_chat_turn(**fields)
+    except Exception:
+        pass
+
+
+async def _run_chat_turn_analytics_job(
+    payload: Dict[str, Any], *, final_attempt: bool
+) -> Dict[str, Any]:
+    await AnalyticsService.record_chat_turn(**(payload.get("analytics") or {}))
+    return {"recorded": True}
+
+
+async def _run_pending_conclusion_job(
+    payload: Dict[str, Any], *, final_attempt: bool
+) -> Dict[str, Any]:
+    """
+    后台结论卡生成：
+    - pending_ready：流内已按模型草案写入 pending，这里用推理模型精炼后覆盖草案
+    - retrigger_after_rejected：否定后满 N 轮，检测是否可再次出卡
+    写入前在文件锁内校验会话状态未变化（用户已继续对话 / 已确认等），否则标记 stale 不落盘。
+    """
+    phase_step = str(payload.get("phase") or "")
+    report_id = str(payload.get("report_id") or "")
+    category = str(payload.get("category") or "")
+    source = str(payload.get("source") or POST_TURN_SOURCE_PENDING_READY)
+    draft = payload.get("draft") if isinstance(payload.get("draft"), dict) else None
+    user_count = int(payload.get("user_count") or 0)
+    vip_level = int(payload.get("vip_level") or 1)
+    conv_manager = ConversationFileManager(
+        base_dir=str(Path(str(payload.get("storage_root") or "")) / "reports")
+    )
+
+    check_kwargs: Dict[str, Any] = {
+        "prior_conclusion": draft,
+        "vip_level": vip_level,
+        "llm_provider": _get_reasoning_llm_provider(vip_level=vip_level),
+        "basic_info": payload.get("basic_info"),
+        "prior_context": payload.get("prior_context"),
+    }
+    if source == POST_TURN_SOURCE_PENDING_READY:
+        check_kwargs["skip_completion_check"] = True
+    try:
+        generated = await asyncio.wait_for(
+            check_dimension_complete(phase_step, payload.get("conv_history") or [], **check_kwargs),
+            timeout=CONCLUSION_GEN_TIMEOUT_SECONDS,
+        )
+    except Exception:
+        # 非最后一次尝试交给队列退避重试；最后一次按旧逻辑降级（沿用模型草案 / 不出卡）
+        if not final_attempt:
+            raise
+        generated = None
+
+    if source == POST_TURN_SOURCE_PENDING_READY:
+        if draft is None:
+            return {"dimension_conclusion": None}
+        new_draft = (
+            sanitize_pending_conclusion_draft(phase_step, dict(generated))
+            if isinstance(generated, dict)
+            else draft
+        )
+        applied = await conv_manager.update_metadata_if(
+            report_id,
+            category,
+            {"conclusion_draft": new_draft},
+            lambda meta: meta.get("conclusion_state") == CONCLUSION_STATE_PENDING
+            and meta.get("conclusion_draft") == draft
+            and not meta.get("thread_completed"),
+        )
+    else:
+        if not isinstance(generated, dict):
+            return {"dimension_conclusion": None}
+        new_draft = sanitize_pending_conclusion_draft(phase_step, dict(generated))
+        applied = await conv_manager.update_metadata_if(
+            report_id,
+            category,
+            {
+                **_build_conclusion_meta_update(
+                    state=CONCLUSION_STATE_PENDING,
+                    draft=new_draft,
+                    final=payload.get("final"),
+                    shown_at=user_count,
+                    thread_completed=False,
+                ),
+                "conclusion_reject_baseline_user_count": None,
+            },
+            lambda meta: meta.get("conclusion_state") == CONCLUSION_STATE_REJECTED
+            and meta.get("conclusion_reject_baseline_user_count") == user_count
+            and not meta.get("thread_completed"),
+        )
+    if not applied:
+        return {"dimension_conclusion": None, "stale": True}
+
+    note: Dict[str, Any] = {
+        "phase": phase_step,
+        **IDCodec.build_thread_ref(str(payload.get("thread_id") or "")),
+        "pending_conclusion": new_draft,
+    }
+    if source == POST_TURN_SOURCE_RETRIGGER:
+        note["source"] = source
+    try:
+        await _append_note_json(
+            conv_manager, report_id, category, "pending_conclusion_created", note
+        )
+    except Exception:
+        pass
+    return {"dimension_conclusion": new_draft, "refined": isinstance(generated, dict)}
+
+
+register_post_turn_handler(POST_TURN_KIND_PENDING_CONCLUSION, _run_pending_conclusion_job)
+register_post_turn_handler(POST_TURN_KIND_CHAT_TURN_ANALYTICS, _run_chat_turn_analytics_job)
+
+
 @router.post("/message/stream")
 async def simple_chat_stream(
     request: SimpleChatStreamRequest,
@@ -5260,6 +5562,17 @@ async def simple_chat_stream(
             request.client_conclusion_ui,
         )
 
+    # 轮次后置任务公共上下文（任务 payload 需可 JSON 序列化，处理函数据此重建 conv_manager）
+    post_turn_ctx = _new_post_turn_ctx(
+        activation_code=rec.code,
+        report_id=session_id,
+        thread_id=logical_session_id,
+        category=category,
+        storage_root=storage_root,
+        phase=phase_step,
+        vip_level=vip_level,
+    )
+
     async def event_stream() -> AsyncIterator[str]:
         llm = _get_dialogue_llm_provider(vip_level=vip_level)
         reasoning_llm = _get_reasoning_llm_provider(vip_level=vip_level)
@@ -5766,7 +6079,8 @@ async def simple_chat_stream(
                     transition_msg = pending_msg or "收到你的确认，我将生成结论卡。"
                     yield f'data: {{"chunk": {json.dumps(transition_msg, ensure_ascii=False)} }}\n\n'
                     full_reply = transition_msg
-                    yield f"data: {json.dumps({'conclusion_loading': True}, ensure_ascii=False)}\n\n"
+                    loading = json.dumps({"conclusion_loading": True}, ensure_ascii=False)
+                    yield f"data: {loading}\n\n"
                     yield f'data: {{"dimension_conclusion": {json.dumps(dimension_conclusion, ensure_ascii=False)} }}\n\n'
                     try:
                         await conv_manager.append_message(
@@ -5832,17 +6146,15 @@ async def simple_chat_stream(
                         dimension_conclusion=dimension_conclusion,
                         vip_level=vip_level,
                     )
-                    try:
-                        await AnalyticsService.record_chat_turn(
-                            session_id=logical_session_id,
-                            dimension=phase_step,
-                            user_input_chars=len(user_content or ""),
-                            llm_input_tokens=0,
-                            llm_output_tokens=0,
-                            log_index=None,
-                        )
-                    except Exception:
-                        pass
+                    await _record_chat_turn_after_reply(
+                        post_turn_ctx,
+                        session_id=logical_session_id,
+                        dimension=phase_step,
+                        user_input_chars=len(user_content or ""),
+                        llm_input_tokens=0,
+                        llm_output_tokens=0,
+                        log_index=None,
+                    )
                     yield f'data: {{"done": true, "response": {json.dumps(full_reply, ensure_ascii=False)} }}\n\n'
                     return
 
@@ -5949,6 +6261,11 @@ async def simple_chat_stream(
 
         # 2) 无 pending 时，不再走额外同步完成检测；仅依赖模型输出的 STATE_JSON 驱动 pending。
 
+        # 可见文本合帧：首帧立即下发，其后按时间窗口 / 字节阈值合并（app.utils.sse_coalesce）
+        chunk_coalescer = SSEChunkCoalescer(
+            window_ms=settings.SIMPLE_CHAT_SSE_COALESCE_MS,
+            max_bytes=settings.SIMPLE_CHAT_SSE_COALESCE_BYTES,
+        )
         try:
             sem = _get_llm_semaphore()
             stream_coro = llm.chat_stream(llm_messages, temperature=0.7)
@@ -5975,6 +6292,10 @@ async def simple_chat_stream(
                 nonlocal full_reply, full_think
                 out = []
                 if isinstance(c, dict):
+                    # 思考事件前先下发已缓冲文本，保持事件顺序
+                    pending_frame = chunk_coalescer.flush()
+                    if pending_frame:
+                        out.append(pending_frame)
                     t = c.get("_t")
                     if t == "think_start":
                         out.append(f'data: {{"think_start": true}}\n\n')
@@ -5994,24 +6315,47 @@ async def simple_chat_stream(
                     full_reply += c
                     delta = stream_hidden_filter(full_reply)
                     if delta:
-                        out.append(
-                            f'data: {{"chunk": {json.dumps(delta, ensure_ascii=False)} }}\n\n'
-                        )
+                        frame = chunk_coalescer.push(delta)
+                        if frame:
+                            out.append(frame)
                 return out
 
+            async def _pump_stream():
+                async for chunk in iter_with_flush_deadline(stream_coro, chunk_coalescer):
+                    if chunk is FLUSH_DUE:
+                        frame = chunk_coalescer.flush()
+                        if frame:
+                            yield frame
+                        continue
+                    for ev in _process_chunk(chunk):
+                        yield ev
+                tail = chunk_coalescer.flush()
+                if tail:
+                    yield tail
+
             if sem:
                 async with sem:
-                    async for chunk in stream_coro:
-                        for ev in _process_chunk(chunk):
-                            yield ev
-            else:
-                async for chunk in stream_coro:
-                    for ev in _process_chunk(chunk):
+                    async for ev in _pump_stream():
                         yield ev
+            else:
+                async for ev in _pump_stream():
+                    yield ev
         except Exception as e:
             err = str(e)
+            tail = chunk_coalescer.flush()
+            if tail:
+                yield tail
             yield f'data: {{"error": {json.dumps(err, ensure_ascii=False)} }}\n\n'
             return
+        finally:
+            _sse_stats = chunk_coalescer.finish()
+            logger.info(
+                "[sse_coalesce] thread=%s deltas=%s frames=%s bytes=%s",
+                logical_session_id,
+                _sse_stats["deltas"],
+                _sse_stats["frames"],
+                _sse_stats["bytes"],
+            )
         stream_usage = _normalize_token_usage(getattr(llm, "_last_stream_usage", None))
         # 诊断 DeepSeek Context Cache：首 token 慢时查看 hit/miss
         if stream_usage and (
@@ -6281,31 +6625,34 @@ async def simple_chat_stream(
                             draft_to_save["experience_value_rows"] = meta_rows
                     except Exception:
                         pass
-                refined_conclusion = None
-                reasoning_llm = _get_reasoning_llm_provider(vip_level=vip_level)
-                try:
-                    refined_conclusion = await asyncio.wait_for(
-                        check_dimension_complete(
-                            phase_step,
-                            conv_history,
-                            prior_conclusion=draft_to_save,
-                            vip_level=vip_level,
-                            llm_provider=reasoning_llm,
-                            skip_completion_check=True,
-                            basic_info=basic_info,
-                            prior_context=prior_context,
-                        ),
-                        timeout=CONCLUSION_GEN_TIMEOUT_SECONDS,
-                    )
-                except asyncio.TimeoutError:
-                    refined_conclusion = None
-                except Exception:
+                run_in_background = settings.SIMPLE_CHAT_POST_TURN_BACKGROUND
+                if not run_in_background:
                     refined_conclusion = None
-                if isinstance(refined_conclusion, dict):
-                    draft_to_save = sanitize_pending_conclusion_draft(
-                        phase_step, dict(refined_conclusion)
-                    )
+                    reasoning_llm = _get_reasoning_llm_provider(vip_level=vip_level)
+                    try:
+                        refined_conclusion = await asyncio.wait_for(
+                            check_dimension_complete(
+                                phase_step,
+                                conv_history,
+                                prior_conclusion=draft_to_save,
+                                vip_level=vip_level,
+                                llm_provider=reasoning_llm,
+                                skip_completion_check=True,
+                                basic_info=basic_info,
+                                prior_context=prior_context,
+                            ),
+                            timeout=CONCLUSION_GEN_TIMEOUT_SECONDS,
+                        )
+                    except asyncio.TimeoutError:
+                        refined_conclusion = None
+                    except Exception:
+                        refined_conclusion = None
+                    if isinstance(refined_conclusion, dict):
+                        draft_to_save = sanitize_pending_conclusion_draft(
+                            phase_step, dict(refined_conclusion)
+                        )
                 yield f"data: {json.dumps({'conclusion_loading': True}, ensure_ascii=False)}\n\n"
+                # 后台模式：先以模型草案落 pending（下一轮可立即感知），推理模型精炼交给后台任务
                 await conv_manager.update_metadata(
                     session_id,
                     category,
@@ -6320,26 +6667,43 @@ async def simple_chat_stream(
                         "conclusion_reject_baseline_user_count": None,
                     },
                 )
-                try:
-                    await _append_note_json(
-                        conv_manager,
-                        session_id,
-                        category,
-                        "pending_conclusion_created",
+                post_job = None
+                if run_in_background:
+                    post_job = await _enqueue_post_turn(
+                        POST_TURN_KIND_PENDING_CONCLUSION,
+                        post_turn_ctx,
                         {
-                            "phase": phase_step,
-                            **IDCodec.build_thread_ref(logical_session_id),
-                            "pending_conclusion": draft_to_save,
+                            "source": POST_TURN_SOURCE_PENDING_READY,
+                            "draft": draft_to_save,
+                            "user_count": user_count,
+                            "conv_history": conv_history,
+                            "basic_info": basic_info,
+                            "prior_context": prior_context,
                         },
                     )
-                except Exception:
-                    pass
-                # 与「确认 pending」流一致：推送 dimension_conclusion，否则前端只收到纯文字，必须刷新才能看到卡
-                yield (
-                    "data: "
-                    + json.dumps({"dimension_conclusion": draft_to_save}, ensure_ascii=False)
-                    + "\n\n"
-                )
+                if post_job is not None:
+                    yield _post_turn_job_event(post_job)
+                else:
+                    try:
+                        await _append_note_json(
+                            conv_manager,
+                            session_id,
+                            category,
+                            "pending_conclusion_created",
+                            {
+                                "phase": phase_step,
+                                **IDCodec.build_thread_ref(logical_session_id),
+                                "pending_conclusion": draft_to_save,
+                            },
+                        )
+                    except Exception:
+                        pass
+                    # 与「确认 pending」流一致：推送 dimension_conclusion，否则前端只收到纯文字，必须刷新才能看到卡
+                    yield (
+                        "data: "
+                        + json.dumps({"dimension_conclusion": draft_to_save}, ensure_ascii=False)
+                        + "\n\n"
+                    )
                 pending_spawned_in_turn = True
             elif state_name == "continue":
                 # 无状态迁移，保持当前会话态
@@ -6352,64 +6716,83 @@ async def simple_chat_stream(
             and phase_step != "rumination"
             and not cmeta.get("thread_completed")
         ):
-            reasoning_llm = _get_reasoning_llm_provider(vip_level=vip_level)
-            try:
-                retrigger_conclusion = await asyncio.wait_for(
-                    check_dimension_complete(
-                        phase_step,
-                        conv_history,
-                        prior_conclusion=None,
-                        vip_level=vip_level,
-                        llm_provider=reasoning_llm,
-                        basic_info=basic_info,
-                        prior_context=prior_context,
-                    ),
-                    timeout=CONCLUSION_GEN_TIMEOUT_SECONDS,
-                )
-            except asyncio.TimeoutError:
-                retrigger_conclusion = None
-            except Exception:
-                retrigger_conclusion = None
-
-            if isinstance(retrigger_conclusion, dict):
-                draft_to_save = sanitize_pending_conclusion_draft(
-                    phase_step, dict(retrigger_conclusion)
-                )
-                yield f"data: {json.dumps({'conclusion_loading': True}, ensure_ascii=False)}\n\n"
-                await conv_manager.update_metadata(
-                    session_id,
-                    category,
+            retrigger_job = None
+            if settings.SIMPLE_CHAT_POST_TURN_BACKGROUND:
+                retrigger_job = await _enqueue_post_turn(
+                    POST_TURN_KIND_PENDING_CONCLUSION,
+                    post_turn_ctx,
                     {
-                        **_build_conclusion_meta_update(
-                            state=CONCLUSION_STATE_PENDING,
-                            draft=draft_to_save,
-                            final=cmeta.get("final"),
-                            shown_at=user_count,
-                            thread_completed=False,
-                        ),
-                        "conclusion_reject_baseline_user_count": None,
+                        "source": POST_TURN_SOURCE_RETRIGGER,
+                        "draft": None,
+                        "final": cmeta.get("final"),
+                        "user_count": user_count,
+                        "conv_history": conv_history,
+                        "basic_info": basic_info,
+                        "prior_context": prior_context,
                     },
                 )
+            if retrigger_job is not None:
+                yield _post_turn_job_event(retrigger_job)
+            else:
+                reasoning_llm = _get_reasoning_llm_provider(vip_level=vip_level)
                 try:
-                    await _append_note_json(
-                        conv_manager,
+                    retrigger_conclusion = await asyncio.wait_for(
+                        check_dimension_complete(
+                            phase_step,
+                            conv_history,
+                            prior_conclusion=None,
+                            vip_level=vip_level,
+                            llm_provider=reasoning_llm,
+                            basic_info=basic_info,
+                            prior_context=prior_context,
+                        ),
+                        timeout=CONCLUSION_GEN_TIMEOUT_SECONDS,
+                    )
+                except asyncio.TimeoutError:
+                    retrigger_conclusion = None
+                except Exception:
+                    retrigger_conclusion = None
+
+                if isinstance(retrigger_conclusion, dict):
+                    draft_to_save = sanitize_pending_conclusion_draft(
+                        phase_step, dict(retrigger_conclusion)
+                    )
+                    loading = json.dumps({"conclusion_loading": True}, ensure_ascii=False)
+                    yield f"data: {loading}\n\n"
+                    await conv_manager.update_metadata(
                         session_id,
                         category,
-                        "pending_conclusion_created",
                         {
-                            "phase": phase_step,
-                            **IDCodec.build_thread_ref(logical_session_id),
-                            "pending_conclusion": draft_to_save,
-                            "source": "retrigger_after_rejected",
+                            **_build_conclusion_meta_update(
+                                state=CONCLUSION_STATE_PENDING,
+                                draft=draft_to_save,
+                                final=cmeta.get("final"),
+                                shown_at=user_count,
+                                thread_completed=False,
+                            ),
+                            "conclusion_reject_baseline_user_count": None,
                         },
                     )
-                except Exception:
-                    pass
-                yield (
-                    "data: "
-                    + json.dumps({"dimension_conclusion": draft_to_save}, ensure_ascii=False)
-                    + "\n\n"
-                )
+                    try:
+                        await _append_note_json(
+                            conv_manager,
+                            session_id,
+                            category,
+                            "pending_conclusion_created",
+                            {
+                                "phase": phase_step,
+                                **IDCodec.build_thread_ref(logical_session_id),
+                                "pending_conclusion": draft_to_save,
+                                "source": "retrigger_after_rejected",
+                            },
+                        )
+                    except Exception:
+                        pass
+                    yield (
+                        "data: "
+                        + json.dumps({"dimension_conclusion": draft_to_save}, ensure_ascii=False)
+                        + "\n\n"
+                    )
 
         # 每 20 轮触发后台锚点摘要
         user_count_after = user_count + (1 if user_content else 0)
@@ -6425,17 +6808,15 @@ async def simple_chat_stream(
             )
 
         # 4) 埋点：记录对话轮次
-        try:
-            await AnalyticsService.record_chat_turn(
-                session_id=logical_session_id,
-                dimension=phase_step,
-                user_input_chars=len(user_content or ""),
-                llm_input_tokens=int(stream_usage.get("prompt_tokens") or 0),
-                llm_output_tokens=int(stream_usage.get("completion_tokens") or 0),
-                log_index=None,
-            )
-        except Exception:
-            pass
+        await _record_chat_turn_after_reply(
+            post_turn_ctx,
+            session_id=logical_session_id,
+            dimension=phase_step,
+            user_input_chars=len(user_content or ""),
+            llm_input_tokens=int(stream_usage.get("prompt_tokens") or 0),
+            llm_output_tokens=int(stream_usage.get("completion_tokens") or 0),
+            log_index=None,
+        )
 
         # 子步 3 hyp_candidates 已在 full_reply 落盘块中发送，此处不再重复
 
@@ -6455,6 +6836,36 @@ async def simple_chat_stream(
     )
 
 
+@router.get("/post-turn/jobs/{job_id}", response_model=SimpleChatResponse)
+async def get_post_turn_job_status(
+    job_id: str,
+    activation_code: str,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    轮次后置任务状态（message/stream 中 post_turn_job 事件下发 job_id，前端轮询至 done/failed）。
+    done 时 result.dimension_conclusion 非空即需要展示的结论卡。
+    """
+    manager = get_activation_manager_for_code(activation_code)
+    rec = _resolve_activation_for_user(manager, activation_code, current_user)
+    job = await get_post_turn_job((job_id or "").strip())
+    if not job or (job.get("payload") or {}).get("activation_code") != rec.code:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="任务不存在")
+    job_status = job.get("status")
+    return SimpleChatResponse(
+        code=200,
+        message="success",
+        data={
+            "job_id": job.get("job_id"),
+            "kind": job.get("kind"),
+            "status": job_status,
+            "finished": job_status in FINISHED_STATUSES,
+            "attempts": job.get("attempts"),
+            "result": job.get("result") if job_status == JOB_STATUS_DONE else None,
+        },
+    )
+
+
 @router.post("/thread/delete", response_model=SimpleChatResponse)
 async def delete_thread(
     request: ThreadDeleteRequest,
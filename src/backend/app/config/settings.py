@@ -76,6 +76,88 @@ class Settings(BaseSettings):
     # 并发限制：同时进行的 LLM 调用数（0=不限制）
     LLM_MAX_CONCURRENT: int = 0
 
+    # LLM 进程内自适应并发限制（按 provider 分桶）：429 / 超时 / 延迟劣化时乘性下调名额，顺畅且用满时加性回升
+    LLM_LIMITER_ENABLED: bool = True
+    LLM_LIMITER_MIN_CONCURRENT: int = 2
+    LLM_LIMITER_MAX_CONCURRENT: int = 32
+    LLM_LIMITER_INITIAL_CONCURRENT: int = 8
+    # 延迟超过基线（EWMA）该倍数视为过载
+    LLM_LIMITER_LATENCY_TOLERANCE: float = 2.0
+    # judge / background 优先级最多可占当前名额的比例（为交互流保留余量）
+    LLM_LIMITER_JUDGE_SHARE: float = 0.8
+    LLM_LIMITER_BACKGROUND_SHARE: float = 0.5
+
+    # LLM 跨 provider 对冲 / 故障转移（默认关）：主 provider 首包耗时超过其 TTFT 分位阈值仍未返回时
+    # 向备用 provider 补发，取先出首包者；连续失败的 provider 熔断
+    LLM_HEDGE_ENABLED: bool = False
+    # 备用 provider（逗号分隔：deepseek / openai / kimi / qwen）；留空则用另一 VIP 档位的 provider
+    LLM_HEDGE_PROVIDERS: str = ""
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    # 首包耗时样本不足时使用默认阈值
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS: float = 4.0
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 1.0
+    LLM_HEDGE_MAX_DELAY_SECONDS: float = 15.0
+    # 熔断：连续失败达到阈值后跳过该 provider，冷却期满放行一次试探
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    LLM_CIRCUIT_COOLDOWN_SECONDS: float = 30.0
+
+    # 多 worker 协调后端（LLM 并发名额 / combo guide 去重 / savepoint 批量任务）
+    # - local：进程内（默认，单 worker）
+    # - sqlite：同机多进程共享，uvicorn --workers N 时使用
+    COORDINATION_BACKEND: str = "local"
+    # sqlite 后端文件路径（默认 data/coordination.sqlite3）
+    COORDINATION_SQLITE_PATH: Optional[str] = None
+    # 占用记录租约（秒）：worker 异常退出且 pid 无法探测时，超过租约自动回收
+    COORDINATION_LEASE_SECONDS: int = 600
+
+    # 沙箱 Fork / savepoint 复制 report 目录的方式（app.utils.cow_copy）
+    # - auto：reflink → 硬链接（写前断链）→ 普通拷贝
+    # - reflink：仅 reflink，不支持时普通拷贝（不使用硬链接）
+    # - copy：始终普通拷贝
+    SANDBOX_COPY_MODE: str = "auto"
+
+    # savepoint 批量场景执行并发数（每个并发槽同时运行一个 run_scenario 子进程）
+    SAVEPOINT_BATCH_WORKERS: int = 4
+
+    # simple-chat 轮次后置任务（结论卡精炼 / 否定后重新出卡检测 / 埋点）放入后台队列，
+    # 可见回复结束即关闭 SSE；前端通过 /simple-chat/post-turn/jobs/{job_id} 轮询结果。
+    # 关闭后恢复旧行为：在同一条 SSE 内同步等待这些任务。
+    SIMPLE_CHAT_POST_TURN_BACKGROUND: bool = True
+    # 队列 SQLite 文件路径（默认 data/post_turn_jobs.sqlite3）
+    POST_TURN_QUEUE_PATH: Optional[str] = None
+    POST_TURN_JOB_MAX_ATTEMPTS: int = 3
+    # 重试退避基数（秒）：第 n 次失败后等待 base * 2^(n-1)
+    POST_TURN_JOB_RETRY_BASE_SECONDS: float = 2.0
+    POST_TURN_JOB_CONCURRENCY: int = 4
+    # 已完成 / 失败任务保留时长（小时），过期由 worker 清理
+    POST_TURN_JOB_RETENTION_HOURS: float = 24.0
+
+    # simple-chat 流式可见文本合帧（app.utils.sse_coalesce）：首个 delta 立即下发，
+    # 之后累计到时间窗口（毫秒）或字节阈值任一到达再合并为一帧；两者均为 0 时逐 delta 下发
+    SIMPLE_CHAT_SSE_COALESCE_MS: int = 40
+    SIMPLE_CHAT_SSE_COALESCE_BYTES: int = 512
+
+    # 低温度判定 / 抽取类 LLM 调用的响应缓存（app.core.llmapi.response_cache），默认关闭。
+    # 站点列表逗号分隔（* 表示全部）：dimension_check / step3_hypothesis_flag / pending_judge
+    LLM_RESPONSE_CACHE_ENABLED: bool = False
+    LLM_RESPONSE_CACHE_SITES: str = "dimension_check,step3_hypothesis_flag,pending_judge"
+    LLM_RESPONSE_CACHE_MAX_ENTRIES: int = 512
+    LLM_RESPONSE_CACHE_TTL_SECONDS: int = 3600
+    # 磁盘层（多 worker 共享）；目录默认 data/llm_cache
+    LLM_RESPONSE_CACHE_DISK: bool = True
+    LLM_RESPONSE_CACHE_DIR: Optional[str] = None
+    # 磁盘层容量上限；写入时最多每 SWEEP_SECONDS 秒清扫一次过期与超额文件
+    LLM_RESPONSE_CACHE_DISK_MAX_BYTES: int = 64 * 1024 * 1024
+    LLM_RESPONSE_CACHE_SWEEP_SECONDS: int = 300
+
+    # 进程内指标（GET /metrics，Prometheus 文本格式）
+    METRICS_ENABLED: bool = True
+    # 非空时 /metrics 需带 Authorization: Bearer <token>；为空时仅 DEBUG 下可匿名访问，否则返回 404
+    METRICS_TOKEN: Optional[str] = None
+    # 事件循环延迟采样间隔（秒，0=不采样）
+    METRICS_EVENT_LOOP_LAG_INTERVAL: float = 0.5
+
     # 子步 3：AI 回复后若假设已完整则自动 cursor+1（默认关，避免抢跑跳行）
     RUMINATION_STEP3_AUTO_UNLOCK_ENABLED: bool = False
 
@@ -101,8 +183,15 @@ class Settings(BaseSettings):
     OPENAI_WHISPER_API_KEY: Optional[str] = None
     
     # TTS配置
-    TTS_PROVIDER: str = "openai"
+    TTS_PROVIDER: str = "openai"  # openai | fake（本地离线，测试用）
     OPENAI_TTS_API_KEY: Optional[str] = None
+    TTS_MODEL: str = "tts-1"
+    # TTS 结果缓存：按 (文本哈希, 声音, 模型, 格式, 语速) 存盘，超过容量按最近使用淘汰
+    TTS_CACHE_ENABLED: bool = True
+    TTS_CACHE_DIR: Optional[str] = None  # 默认 data/tts_cache
+    TTS_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    # 流式音频响应的分块大小（字节）
+    TTS_STREAM_CHUNK_BYTES: int = 16 * 1024
     
     # 语音功能
     AUDIO_MODE: bool = False
@@ -112,6 +201,31 @@ class Settings(BaseSettings):
     GUIDE_QUIET_TIMEOUT: int = 900  # 15分钟（秒）
     GUIDE_SHORT_ANSWER_THRESHOLD: int = 20  # 字数阈值
 
+    # ========== 知识库快照 ==========
+    # 题库 / CSV 变更检查间隔（秒）：到期后 stat 源文件，变化才重新解析；<0 关闭自动重载
+    KNOWLEDGE_RELOAD_CHECK_SECONDS: float = 5.0
+
+    # ========== 批量导出片段缓存 ==========
+    # 按源文件内容哈希缓存各 phase 的 md/txt 片段、统计与 raw 产物，重新导出只渲染变化的 phase
+    EXPORT_FRAGMENT_CACHE_ENABLED: bool = True
+    EXPORT_FRAGMENT_CACHE_MAX_ENTRIES: int = 256
+    # 内存层总字节上限（按片段序列化后大小计），大报告较多时避免占用失控
+    EXPORT_FRAGMENT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    # 磁盘层（多 worker / 重启后共享）；目录默认 data/export_fragments
+    EXPORT_FRAGMENT_CACHE_DISK: bool = False
+    EXPORT_FRAGMENT_CACHE_DIR: Optional[str] = None
+
+    # ========== 对话统计 ==========
+    # 批量每轮时长统计走 NumPy 向量化实现（需安装 numpy，缺失时自动逐条计算）；
+    # 实测管理端规模下收益有限（约 1.0~1.25x），默认关闭，按需开启
+    TURN_STATS_VECTORIZED: bool = False
+
+    # ========== 文件存储 JSON 编解码 ==========
+    # 编码后端：auto（orjson > msgspec > stdlib）/ orjson / msgspec / stdlib；解码固定用标准库
+    STORAGE_JSON_BACKEND: str = "auto"
+    # 写盘时缩进（调试用）；默认紧凑输出，读取两种格式均兼容
+    STORAGE_JSON_PRETTY: bool = False
+
     # ========== Graph 缓存配置 ==========
     GRAPH_CACHE_ENABLED: bool = True
     GRAPH_CACHE_TTL_MINUTES: int = 15
@@ -1,14 +1,13 @@
 """
 智能体框架模块：双轨设计（思考链 + 用户侧输出），可配置调用。
+
+graph 相关符号按需导入（首次访问时才加载 LangGraph），导入本包不再拉起整套图依赖。
 """
 from app.core.agent.state import AgentState
-from app.core.agent.graph import (
-    create_agent_graph,
-    create_initial_state,
-    save_context_after_agent,
-)
 from app.core.agent.config import AgentRunConfig, DEFAULT_RUN_CONFIG
 
+_LAZY_GRAPH_ATTRS = ("create_agent_graph", "create_initial_state", "save_context_after_agent")
+
 __all__ = [
     "AgentState",
     "create_agent_graph",
@@ -17,3 +16,11 @@ __all__ = [
     "AgentRunConfig",
     "DEFAULT_RUN_CONFIG",
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY_GRAPH_ATTRS:
+        from app.core.agent import graph
+
+        return getattr(graph, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
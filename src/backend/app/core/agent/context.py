@@ -62,12 +62,13 @@ class ContextManager:
             return []
         
         async with AsyncSessionLocal() as db:
-            user_db = UserDB(db)
-            work_histories = await user_db.get_user_work_histories(self.user_id)
+            aggregate = await UserDB(db).load_user_aggregate(self.user_id)
+            if not aggregate:
+                return []
             
             result = []
-            for wh in work_histories:
-                projects = await user_db.get_work_history_projects(wh.id)
+            for wh in aggregate.work_histories:
+                projects = aggregate.projects_of(wh.id)
                 result.append({
                     "company": wh.company,
                     "position": wh.position,
@@ -18,7 +18,6 @@ from typing import Any, Dict, Optional
 
 from app.config.settings import settings
 from app.core.agent.config import AgentRunConfig
-from app.core.agent.graph import create_agent_graph
 
 
 class CachedGraph:
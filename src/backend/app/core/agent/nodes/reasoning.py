@@ -10,7 +10,6 @@ from app.core.agent.models import ReasoningDecision
 from app.core.agent.context_manager import get_context_manager
 from app.domain.prompts import get_reasoning_prompt
 from app.domain.knowledge_rules import should_force_knowledge_query, get_search_category_for_step
-from app.domain.knowledge_config import get_knowledge_config
 from app.core.llmapi import get_default_llm_provider, LLMMessage
 
 
@@ -52,10 +51,8 @@ async def reasoning_node(state: AgentState) -> AgentState:
         # 规则命中时预填知识库片段（domain 知识规则，解耦且集中）
         knowledge_snippets = context.get("knowledge_snippets", "")
         if should_force_knowledge_query(state):
-            from app.core.knowledge import KnowledgeLoader, KnowledgeSearcher
-            cfg = get_knowledge_config()
-            loader = KnowledgeLoader(config=cfg)
-            searcher = KnowledgeSearcher(loader=loader)
+            from app.core.knowledge import KnowledgeSearcher, SnapshotLoader
+            searcher = KnowledgeSearcher(loader=SnapshotLoader())
             category = get_search_category_for_step(current_step)
             if category == "values":
                 results = searcher.search_values(user_input, limit=8)
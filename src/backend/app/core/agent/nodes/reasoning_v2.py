@@ -31,7 +31,6 @@ from app.utils.survey_storage import (
 )
 from app.config.settings import settings
 from app.domain.knowledge_rules import should_force_knowledge_query, get_search_category_for_step
-from app.domain.knowledge_config import get_knowledge_config
 from app.domain.question_goals import get_question_goal
 from app.domain.step_guidance import COUNSELOR_RESPONSE_GUIDELINES
 from app.core.llmapi import get_default_llm_provider, LLMMessage
@@ -260,10 +259,8 @@ async def reasoning_node(state: AgentState) -> AgentState:
         # === 原有的LLM推理逻辑 ===
         knowledge_snippets = context.get("knowledge_snippets", "")
         if should_force_knowledge_query(state):
-            from app.core.knowledge import KnowledgeLoader, KnowledgeSearcher
-            cfg = get_knowledge_config()
-            loader = KnowledgeLoader(config=cfg)
-            searcher = KnowledgeSearcher(loader=loader)
+            from app.core.knowledge import KnowledgeSearcher, SnapshotLoader
+            searcher = KnowledgeSearcher(loader=SnapshotLoader())
             category = get_search_category_for_step(current_step)
             if category == "values":
                 results = searcher.search_values(user_input, limit=8)
@@ -4,8 +4,7 @@
 from typing import Dict, Any
 from app.core.agent.tools.base import BaseAgentTool
 from app.core.agent.state import AgentState
-from app.core.knowledge import KnowledgeLoader, KnowledgeSearcher
-from app.domain.knowledge_config import get_knowledge_config
+from app.core.knowledge import KnowledgeSearcher, SnapshotLoader
 
 
 class ExampleTool(BaseAgentTool):
@@ -16,8 +15,7 @@ class ExampleTool(BaseAgentTool):
             name="example_tool",
             description="根据用户输入推荐相似的价值观、兴趣或才能示例"
         )
-        loader = KnowledgeLoader(config=get_knowledge_config())
-        self.searcher = KnowledgeSearcher(loader=loader)
+        self.searcher = KnowledgeSearcher(loader=SnapshotLoader())
     
     async def execute(
         self,
@@ -4,9 +4,8 @@
 from typing import Dict, Any
 from app.core.agent.tools.base import BaseAgentTool
 from app.core.agent.state import AgentState
-from app.core.knowledge import KnowledgeLoader
+from app.core.knowledge import SnapshotLoader
 from app.domain import STEP_TO_CATEGORY, EXPLORATION_STEP_IDS, DEFAULT_CURRENT_STEP
-from app.domain.knowledge_config import get_knowledge_config
 
 
 class GuideTool(BaseAgentTool):
@@ -17,7 +16,7 @@ class GuideTool(BaseAgentTool):
             name="guide_tool",
             description="获取当前步骤的引导问题，帮助用户继续探索"
         )
-        self.loader = KnowledgeLoader(config=get_knowledge_config())
+        self.loader = SnapshotLoader()
     
     async def execute(
         self,
@@ -4,8 +4,7 @@
 from typing import Dict, Any
 from app.core.agent.tools.base import BaseAgentTool
 from app.core.agent.state import AgentState
-from app.core.knowledge import KnowledgeLoader, KnowledgeSearcher
-from app.domain.knowledge_config import get_knowledge_config
+from app.core.knowledge import KnowledgeSearcher, SnapshotLoader
 
 
 class SearchTool(BaseAgentTool):
@@ -16,8 +15,7 @@ class SearchTool(BaseAgentTool):
             name="search_tool",
             description="在知识库中搜索相关内容（价值观、兴趣、才能、问题）"
         )
-        loader = KnowledgeLoader(config=get_knowledge_config())
-        self.searcher = KnowledgeSearcher(loader=loader)
+        self.searcher = KnowledgeSearcher(loader=SnapshotLoader())
     
     async def execute(
         self,
@@ -2,10 +2,21 @@
 OpenAI Whisper ASR Provider实现
 """
 from typing import Optional, BinaryIO
-from openai import AsyncOpenAI
 from app.core.asr.base import BaseASRProvider, ASRResponse, ASRError
 from app.config.settings import settings
 
+# openai 包导入约 0.3s：首次实例化时再加载（保留模块级名字，测试可直接 patch）
+AsyncOpenAI = None
+
+
+def _async_openai_cls():
+    global AsyncOpenAI
+    if AsyncOpenAI is None:
+        from openai import AsyncOpenAI as _cls
+
+        AsyncOpenAI = _cls
+    return AsyncOpenAI
+
 
 class OpenAIWhisperProvider(BaseASRProvider):
     """OpenAI Whisper Provider实现"""
@@ -19,7 +30,7 @@ class OpenAIWhisperProvider(BaseASRProvider):
             **kwargs: 其他配置
         """
         super().__init__(api_key, **kwargs)
-        self.client = AsyncOpenAI(
+        self.client = _async_openai_cls()(
             api_key=api_key or settings.OPENAI_WHISPER_API_KEY or settings.OPENAI_API_KEY or "",
             timeout=kwargs.get("timeout", 60.0),
             max_retries=kwargs.get("max_retries", 3)
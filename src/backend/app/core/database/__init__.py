@@ -1,12 +1,13 @@
 """
 数据库操作模块
 """
-from app.core.database.user_db import UserDB
+from app.core.database.user_db import UserAggregate, UserDB
 from app.core.database.history_db import HistoryDB
 from app.core.database.knowledge_db import KnowledgeDB
 
 __all__ = [
     "UserDB",
+    "UserAggregate",
     "HistoryDB",
     "KnowledgeDB",
 ]
@@ -4,9 +4,30 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
-from typing import Optional, List
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, List
 from app.models.user import User, UserProfile, WorkHistory, ProjectExperience
 
+# IN 查询每批的 id 数（SQLite 默认最多 999 个绑定参数）
+_IN_CHUNK = 500
+
+
+def _chunks(ids: List[str]) -> Iterable[List[str]]:
+    for i in range(0, len(ids), _IN_CHUNK):
+        yield ids[i:i + _IN_CHUNK]
+
+
+@dataclass
+class UserAggregate:
+    """用户聚合：基本信息 + profile + 工作履历（start_date 倒序）+ 各履历的项目经历"""
+    user: User
+    profile: Optional[UserProfile] = None
+    work_histories: List[WorkHistory] = field(default_factory=list)
+    projects: Dict[str, List[ProjectExperience]] = field(default_factory=dict)
+
+    def projects_of(self, work_history_id: str) -> List[ProjectExperience]:
+        return self.projects.get(work_history_id, [])
+
 
 class UserDB:
     """用户数据操作类"""
@@ -238,3 +259,63 @@ class UserDB:
         result = await self.session.execute(base)
         users = list(result.scalars().all())
         return users, total
+
+    async def load_user_aggregates(
+        self,
+        user_ids: Iterable[str],
+        with_projects: bool = True,
+    ) -> Dict[str, UserAggregate]:
+        """
+        批量加载用户聚合，往返次数固定（users / profiles / work_history / projects 各一次 IN 查询，
+        id 超过 _IN_CHUNK 时按批拆分），替代逐用户、逐履历查询。
+        返回 {user_id: UserAggregate}，不存在的用户不出现在结果里。
+        """
+        ids = list(dict.fromkeys(uid for uid in user_ids if uid))
+        if not ids:
+            return {}
+
+        aggregates: Dict[str, UserAggregate] = {}
+        for chunk in _chunks(ids):
+            result = await self.session.execute(select(User).where(User.id.in_(chunk)))
+            for user in result.scalars().all():
+                aggregates[user.id] = UserAggregate(user=user)
+        found = list(aggregates)
+        if not found:
+            return {}
+
+        for chunk in _chunks(found):
+            result = await self.session.execute(
+                select(UserProfile).where(UserProfile.user_id.in_(chunk))
+            )
+            for profile in result.scalars().all():
+                aggregates[profile.user_id].profile = profile
+
+        wh_ids: List[str] = []
+        for chunk in _chunks(found):
+            # 与 get_user_work_histories 相同的排序，由数据库决定 NULL 的位置
+            result = await self.session.execute(
+                select(WorkHistory)
+                .where(WorkHistory.user_id.in_(chunk))
+                .order_by(WorkHistory.start_date.desc())
+            )
+            for wh in result.scalars().all():
+                aggregates[wh.user_id].work_histories.append(wh)
+                wh_ids.append(wh.id)
+
+        if with_projects and wh_ids:
+            owner = {wh.id: agg for agg in aggregates.values() for wh in agg.work_histories}
+            for chunk in _chunks(wh_ids):
+                result = await self.session.execute(
+                    select(ProjectExperience).where(ProjectExperience.work_history_id.in_(chunk))
+                )
+                for p in result.scalars().all():
+                    owner[p.work_history_id].projects.setdefault(p.work_history_id, []).append(p)
+
+        return aggregates
+
+    async def load_user_aggregate(
+        self, user_id: str, with_projects: bool = True
+    ) -> Optional[UserAggregate]:
+        """单个用户的聚合（load_user_aggregates 的便捷封装）"""
+        aggregates = await self.load_user_aggregates([user_id], with_projects=with_projects)
+        return aggregates.get(user_id)
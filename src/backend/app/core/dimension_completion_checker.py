@@ -6,6 +6,7 @@ import re
 from typing import Any, Dict, List, Optional
 
 from app.core.llmapi import get_default_llm_provider, LLMMessage
+from app.core.llmapi.response_cache import SITE_DIMENSION_CHECK, cached_chat
 from app.domain.conclusion_card_goals import (
     cap_strengths_keywords_list,
     get_conclusion_card_goal,
@@ -390,9 +391,15 @@ async def check_dimension_complete(
 
         messages = [LLMMessage(role="user", content=check_prompt)]
         try:
-            response = await llm.chat(messages, temperature=0.1, response_format={"type": "json_object"})
+            response = await cached_chat(
+                llm,
+                messages,
+                site=SITE_DIMENSION_CHECK,
+                temperature=0.1,
+                response_format={"type": "json_object"},
+            )
         except TypeError:
-            response = await llm.chat(messages, temperature=0.1)
+            response = await cached_chat(llm, messages, site=SITE_DIMENSION_CHECK, temperature=0.1)
         text = (response.content or "").strip()
         text_clean = text
         if "```json" in text:
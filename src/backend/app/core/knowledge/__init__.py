@@ -3,8 +3,18 @@
 """
 from app.core.knowledge.loader import KnowledgeLoader
 from app.core.knowledge.search import KnowledgeSearcher
+from app.core.knowledge.snapshot import (
+    KnowledgeSnapshot,
+    SnapshotLoader,
+    get_knowledge_snapshot,
+    reload_knowledge_snapshot,
+)
 
 __all__ = [
     "KnowledgeLoader",
     "KnowledgeSearcher",
+    "KnowledgeSnapshot",
+    "SnapshotLoader",
+    "get_knowledge_snapshot",
+    "reload_knowledge_snapshot",
 ]
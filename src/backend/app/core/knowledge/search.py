@@ -25,8 +25,8 @@ class KnowledgeSearcher:
         self._ensure_loaded()
     
     def _ensure_loaded(self):
-        """确保数据已加载"""
-        if self.loader._values_cache is None:
+        """确保数据已加载（快照视图 SnapshotLoader 无实例缓存，始终视为已加载）"""
+        if getattr(self.loader, "_values_cache", ()) is None:
             self.loader.load_all()
     
     def _extract_keywords(self, text: str) -> List[str]:
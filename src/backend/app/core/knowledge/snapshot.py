@@ -0,0 +1,243 @@
+"""
+进程级知识库快照：三张 CSV + question.md 只解析一次，所有服务共享同一份只读数据。
+
+- KnowledgeSnapshot：不可变快照，预建分类 / id / 星标索引，查询不再遍历或读文件
+- KnowledgeStore：持有当前快照；每 KNOWLEDGE_RELOAD_CHECK_SECONDS 比较一次源文件 (mtime, size) 签名，
+  变化则在锁内重建新快照后整体替换引用（读者要么拿到旧快照、要么拿到新快照）。
+  服务进程由 watch_knowledge_sources 在后台线程里检查，请求路径上只读内存；
+  没有 watcher 的场景（脚本、测试）退回到访问时按间隔检查
+- SnapshotLoader：KnowledgeLoader 接口的快照视图，供 KnowledgeSearcher 等沿用原接口
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from app.config.settings import settings
+from app.core.knowledge.loader import (
+    InterestItem,
+    KnowledgeLoader,
+    QuestionItem,
+    StrengthItem,
+    ValueItem,
+)
+from app.utils.cache_tiers import file_signature
+
+logger = logging.getLogger(__name__)
+
+# 每个源文件的 (mtime_ns, size)；文件不存在记为 None
+Signature = Tuple[Optional[Tuple[int, int]], ...]
+
+
+@dataclass(frozen=True)
+class KnowledgeSnapshot:
+    """一次加载得到的全部知识数据（只读）。"""
+
+    values: Tuple[ValueItem, ...]
+    interests: Tuple[InterestItem, ...]
+    strengths: Tuple[StrengthItem, ...]
+    questions: Tuple[QuestionItem, ...]
+    signature: Signature = ()
+    loaded_at: float = 0.0
+    questions_by_category: Mapping[str, Tuple[QuestionItem, ...]] = field(default_factory=dict)
+    question_by_id: Mapping[int, QuestionItem] = field(default_factory=dict)
+    starred_by_category: Mapping[str, Tuple[QuestionItem, ...]] = field(default_factory=dict)
+
+    @classmethod
+    def build(
+        cls,
+        values: List[ValueItem],
+        interests: List[InterestItem],
+        strengths: List[StrengthItem],
+        questions: List[QuestionItem],
+        signature: Signature = (),
+    ) -> "KnowledgeSnapshot":
+        by_category: Dict[str, List[QuestionItem]] = {}
+        starred: Dict[str, List[QuestionItem]] = {}
+        for q in questions:
+            by_category.setdefault(q.category, []).append(q)
+            if q.is_starred:
+                starred.setdefault(q.category, []).append(q)
+        return cls(
+            values=tuple(values),
+            interests=tuple(interests),
+            strengths=tuple(strengths),
+            questions=tuple(questions),
+            signature=signature,
+            loaded_at=time.time(),
+            questions_by_category=MappingProxyType({k: tuple(v) for k, v in by_category.items()}),
+            question_by_id=MappingProxyType({q.id: q for q in questions}),
+            starred_by_category=MappingProxyType({k: tuple(v) for k, v in starred.items()}),
+        )
+
+    def questions_in(self, category: str) -> Tuple[QuestionItem, ...]:
+        return self.questions_by_category.get(category, ())
+
+    def starred_in(self, category: str) -> Tuple[QuestionItem, ...]:
+        return self.starred_by_category.get(category, ())
+
+
+def _source_files(loader: KnowledgeLoader):
+    return (loader.values_file, loader.interests_file, loader.strengths_file, loader.questions_file)
+
+
+def _signature(loader: KnowledgeLoader) -> Signature:
+    return tuple(file_signature(path) for path in _source_files(loader))
+
+
+class KnowledgeStore:
+    """持有当前快照并按源文件签名热替换。"""
+
+    def __init__(
+        self, config: Optional[Dict[str, Any]] = None, check_interval: Optional[float] = None
+    ):
+        self._config = config
+        self._check_interval = check_interval
+        self._snapshot: Optional[KnowledgeSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.watched = False  # 有后台 watcher 时访问路径不再 stat 源文件
+
+    def _new_loader(self) -> KnowledgeLoader:
+        if self._config is None:
+            from app.domain.knowledge_config import get_knowledge_config
+
+            self._config = get_knowledge_config()
+        return KnowledgeLoader(config=self._config)
+
+    def _interval(self) -> float:
+        if self._check_interval is not None:
+            return self._check_interval
+        return float(getattr(settings, "KNOWLEDGE_RELOAD_CHECK_SECONDS", 5.0))
+
+    def get(self) -> KnowledgeSnapshot:
+        """返回当前快照；首次调用时加载，之后仅在检查间隔到期时 stat 源文件。"""
+        snap = self._snapshot
+        if snap is None:
+            return self.reload(only_if_changed=False)
+        interval = self._interval()
+        if not self.watched and interval >= 0 and time.monotonic() - self._checked_at >= interval:
+            try:
+                return self.reload(only_if_changed=True)
+            except Exception as e:  # 源文件写到一半等情况：保留旧快照，下个周期再试
+                logger.warning("knowledge snapshot reload failed: %s", e)
+        return snap
+
+    def reload(self, only_if_changed: bool = False) -> KnowledgeSnapshot:
+        """重新解析源文件并替换快照；only_if_changed=True 时签名未变则沿用旧快照。"""
+        with self._lock:
+            loader = self._new_loader()
+            sig = _signature(loader)
+            current = self._snapshot
+            self._checked_at = time.monotonic()
+            if only_if_changed and current is not None and current.signature == sig:
+                return current
+            snap = KnowledgeSnapshot.build(
+                loader.load_values(),
+                loader.load_interests(),
+                loader.load_strengths(),
+                loader.load_questions(),
+                signature=sig,
+            )
+            self._snapshot = snap
+            self.reloads += 1
+            return snap
+
+
+class SnapshotLoader:
+    """
+    KnowledgeLoader 的快照视图：load_* 返回当前快照的数据，不读文件。
+    每次调用都取 store 最新快照，长生命周期的持有者也能看到热替换后的内容。
+    """
+
+    def __init__(self, store: Optional[KnowledgeStore] = None):
+        self._store = store
+
+    @property
+    def snapshot(self) -> KnowledgeSnapshot:
+        return (self._store or get_knowledge_store()).get()
+
+    def load_values(self, force_reload: bool = False) -> List[ValueItem]:
+        return list(self.snapshot.values)
+
+    def load_interests(self, force_reload: bool = False) -> List[InterestItem]:
+        return list(self.snapshot.interests)
+
+    def load_strengths(self, force_reload: bool = False) -> List[StrengthItem]:
+        return list(self.snapshot.strengths)
+
+    def load_questions(self, force_reload: bool = False) -> List[QuestionItem]:
+        return list(self.snapshot.questions)
+
+    def load_all(self, force_reload: bool = False) -> Dict[str, Any]:
+        snap = self.snapshot
+        return {
+            "values": list(snap.values),
+            "interests": list(snap.interests),
+            "strengths": list(snap.strengths),
+            "questions": list(snap.questions),
+        }
+
+    def clear_cache(self):
+        (self._store or get_knowledge_store()).reload(only_if_changed=True)
+
+
+async def watch_knowledge_sources(
+    store: Optional[KnowledgeStore] = None, interval: Optional[float] = None
+) -> None:
+    """后台任务：先预热快照，再按间隔在线程池里检查源文件并热替换。"""
+    store = store or get_knowledge_store()
+    interval = store._interval() if interval is None else interval
+    try:
+        await asyncio.to_thread(store.get)
+    except Exception as e:
+        logger.warning("knowledge snapshot warm-up failed: %s", e)
+    if interval < 0:
+        return
+    store.watched = True
+    try:
+        while True:
+            await asyncio.sleep(max(interval, 0.5))
+            try:
+                await asyncio.to_thread(store.reload, True)
+            except Exception as e:
+                logger.warning("knowledge snapshot reload failed: %s", e)
+    finally:
+        store.watched = False
+
+
+_store: Optional[KnowledgeStore] = None
+_store_lock = threading.Lock()
+
+
+def get_knowledge_store() -> KnowledgeStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = KnowledgeStore()
+    return _store
+
+
+def get_knowledge_snapshot() -> KnowledgeSnapshot:
+    """进程内共享的知识库快照。"""
+    return get_knowledge_store().get()
+
+
+def reload_knowledge_snapshot() -> KnowledgeSnapshot:
+    """强制重新加载（管理端更新题库后调用）。"""
+    return get_knowledge_store().reload(only_if_changed=False)
+
+
+def set_knowledge_store(store: Optional[KnowledgeStore]) -> None:
+    """替换进程级 store（测试用；None 表示下次访问重新创建）。"""
+    global _store
+    with _store_lock:
+        _store = store
@@ -3,7 +3,24 @@ LLM API模块
 """
 from app.core.llmapi.base import BaseLLMProvider, LLMMessage, LLMResponse, LLMError
 from app.core.llmapi.openai_provider import OpenAIProvider
-from app.core.llmapi.factory import create_llm_provider, get_default_llm_provider, get_llm_provider_for_vip
+from app.core.llmapi.factory import (
+    HEDGE_ROLE_DIALOG,
+    HEDGE_ROLE_REASONING,
+    create_llm_provider,
+    get_default_llm_provider,
+    get_llm_provider_for_vip,
+    with_hedging,
+)
+from app.core.llmapi.hedging import HedgedLLMProvider, llm_routing_metrics
+from app.core.llmapi.response_cache import cached_chat, llm_cache_metrics
+from app.core.llmapi.instrumentation import llm_call_site
+from app.core.llmapi.limiter import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_JUDGE,
+    llm_limiter_metrics,
+    llm_priority,
+)
 
 __all__ = [
     "BaseLLMProvider",
@@ -14,4 +31,17 @@ __all__ = [
     "create_llm_provider",
     "get_default_llm_provider",
     "get_llm_provider_for_vip",
+    "with_hedging",
+    "HEDGE_ROLE_DIALOG",
+    "HEDGE_ROLE_REASONING",
+    "HedgedLLMProvider",
+    "llm_routing_metrics",
+    "cached_chat",
+    "llm_cache_metrics",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_JUDGE",
+    "PRIORITY_BACKGROUND",
+    "llm_priority",
+    "llm_limiter_metrics",
+    "llm_call_site",
 ]
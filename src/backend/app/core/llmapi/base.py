@@ -5,6 +5,9 @@ from abc import ABC, abstractmethod
 from typing import List, Dict, Optional, AsyncIterator
 from pydantic import BaseModel
 
+from app.core.llmapi.instrumentation import instrument_chat, instrument_chat_stream
+from app.core.llmapi.limiter import limit_chat, limit_chat_stream
+
 
 class LLMMessage(BaseModel):
     """LLM消息模型"""
@@ -28,6 +31,9 @@ class LLMError(Exception):
 
 class BaseLLMProvider(ABC):
     """LLM Provider基础类"""
+
+    # 为 False 时子类方法不包并发限制（路由层等自身不直接请求 API 的 provider）
+    limit_concurrency: bool = True
     
     def __init__(self, model: str, api_key: Optional[str] = None, **kwargs):
         """
@@ -41,6 +47,22 @@ class BaseLLMProvider(ABC):
         self.model = model
         self.api_key = api_key
         self.config = kwargs
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        子类实现的 chat / chat_stream 自动接入优先级自适应并发限制与耗时埋点
+        （见 limiter.py / instrumentation.py）。
+        """
+        super().__init_subclass__(**kwargs)
+        if not cls.limit_concurrency:
+            return
+        for name, limit, instrument in (
+            ("chat", limit_chat, instrument_chat),
+            ("chat_stream", limit_chat_stream, instrument_chat_stream),
+        ):
+            fn = cls.__dict__.get(name)
+            if fn is not None and not getattr(fn, "__llm_limited__", False):
+                setattr(cls, name, limit(instrument(fn)))
     
     @abstractmethod
     async def chat(
@@ -3,6 +3,7 @@ LLM Provider工厂
 
 支持 API 池与 VIP 模型：DeepSeek=VIP1（基础），Kimi/Qwen=VIP2（高级）。
 """
+import re
 from typing import Optional
 from app.core.llmapi.base import BaseLLMProvider
 from app.core.llmapi.openai_provider import OpenAIProvider
@@ -81,13 +82,109 @@ def _get_vip_provider_config(vip_level: int) -> tuple[str, Optional[str], Option
     )
 
 
+# with_hedging 的调用角色：备用 provider 与主调用一样换用对话 / 推理模型
+HEDGE_ROLE_DIALOG = "dialog"
+HEDGE_ROLE_REASONING = "reasoning"
+
+HedgeConfig = tuple[str, Optional[str], Optional[str], Optional[str]]
+
+
+def _model_for_role(model: Optional[str], role: Optional[str]) -> Optional[str]:
+    """
+    按调用角色换用同一 provider 的对话 / 推理模型名（命名约定同 simple_chat.llm_providers：
+    xxx-chat <-> xxx-reasoner，v4 系列通过参数控制思维链不换名）；无对应名称时原样返回。
+    """
+    m = (model or "").strip()
+    lower = m.lower()
+    if not m or role is None or "v4" in lower:
+        return model
+    if role == HEDGE_ROLE_DIALOG and "reasoner" in lower:
+        return re.sub(r"reasoner", "chat", m, flags=re.IGNORECASE)
+    if role == HEDGE_ROLE_REASONING and "reasoner" not in lower and "chat" in lower:
+        return re.sub(r"chat", "reasoner", m, flags=re.IGNORECASE)
+    return model
+
+
+def _hedge_fallback_configs(
+    vip_level: int, primary: str, role: Optional[str] = None
+) -> list[HedgeConfig]:
+    """
+    对冲 / 故障转移的备用 provider 配置 (provider, model, api_key, base_url)。
+    LLM_HEDGE_PROVIDERS 为空时取另一 VIP 档位的 provider；未配置 api_key 的跳过。
+    role 给定时模型按角色换名，与主调用保持同类（对话 / 推理）模型。
+    """
+    known: dict[str, HedgeConfig] = {
+        "deepseek": (
+            "deepseek",
+            getattr(settings, "LLM_VIP1_MODEL", None) or "deepseek-v4-pro",
+            settings.DEEPSEEK_API_KEY,
+            None,
+        ),
+        "openai": ("openai", settings.LLM_MODEL, settings.OPENAI_API_KEY, None),
+        "kimi": (
+            "kimi",
+            getattr(settings, "KIMI_MODEL", None),
+            getattr(settings, "KIMI_API_KEY", None),
+            None,
+        ),
+        "qwen": (
+            "qwen",
+            getattr(settings, "QWEN_MODEL", None),
+            getattr(settings, "QWEN_API_KEY", None),
+            None,
+        ),
+    }
+    raw = str(getattr(settings, "LLM_HEDGE_PROVIDERS", "") or "")
+    names = [n.strip().lower() for n in raw.split(",") if n.strip()]
+    if names:
+        configs = [known[n] for n in names if n in known]
+    else:
+        configs = [_get_vip_provider_config(1 if vip_level == 2 else 2)]
+    return [
+        (name, _model_for_role(model, role), api_key, base_url)
+        for name, model, api_key, base_url in configs
+        if name != primary and api_key
+    ]
+
+
+def with_hedging(
+    llm: BaseLLMProvider,
+    vip_level: int = 1,
+    primary: Optional[str] = None,
+    role: Optional[str] = None,
+) -> BaseLLMProvider:
+    """
+    LLM_HEDGE_ENABLED 时给 llm 套上跨 provider 对冲 / 故障转移路由（见 hedging.py），否则原样返回。
+
+    role 为 HEDGE_ROLE_DIALOG / HEDGE_ROLE_REASONING 时，备用 provider 换用对应的对话 / 推理模型。
+    """
+    if not getattr(settings, "LLM_HEDGE_ENABLED", False):
+        return llm
+    from app.core.llmapi.hedging import HedgedLLMProvider
+
+    if isinstance(llm, HedgedLLMProvider):
+        return llm
+    fallbacks = []
+    for name, model, api_key, base_url in _hedge_fallback_configs(
+        vip_level, (primary or "").lower(), role
+    ):
+        try:
+            fallbacks.append(
+                create_llm_provider(provider=name, model=model, api_key=api_key, base_url=base_url)
+            )
+        except Exception:
+            continue
+    return HedgedLLMProvider(llm, fallbacks) if fallbacks else llm
+
+
 def get_llm_provider_for_vip(vip_level: int = 1) -> BaseLLMProvider:
     """
     按 VIP 等级获取 LLM Provider。
     VIP1 = DeepSeek（基础），VIP2 = Kimi/Qwen（高级）。
     """
     provider, model, api_key, base_url = _get_vip_provider_config(vip_level)
-    return create_llm_provider(provider=provider, model=model, api_key=api_key, base_url=base_url)
+    llm = create_llm_provider(provider=provider, model=model, api_key=api_key, base_url=base_url)
+    return with_hedging(llm, vip_level, primary=provider)
 
 
 def get_default_llm_provider(vip_level: Optional[int] = None) -> BaseLLMProvider:
@@ -0,0 +1,377 @@
+"""
+跨 provider 的对冲（hedge）与故障转移路由
+
+HedgedLLMProvider 包住一个主 provider 和若干备用 provider（通常是另一 VIP 档位的模型）：
+
+- 对冲：主 provider 的首包耗时（流式）/ 整体耗时（非流式）超过其历史分位阈值
+  （LLM_HEDGE_PERCENTILE，夹在 MIN/MAX_DELAY 之间；样本不足 LLM_HEDGE_MIN_SAMPLES 时用 DEFAULT_DELAY）
+  仍未返回时，向下一个 provider 补发同一请求；先出首包者胜出，其余请求取消。
+- 故障转移：在途请求全部失败时立即改发下一个 provider；流已开始输出后出错不再切换（避免内容重复）。
+- 熔断：连续失败 LLM_CIRCUIT_FAILURE_THRESHOLD 次的 provider 在 LLM_CIRCUIT_COOLDOWN_SECONDS 内跳过，
+  冷却后放行一次试探，成功即恢复。
+
+首包耗时按 provider 记入对数分桶直方图（样本过多时整体减半，阈值随近期表现漂移）；
+被对冲取消的请求按已等待时长记为删失样本（真实耗时只会更长），否则慢 provider
+只留下快样本，分位阈值偏低、对冲越发越多。连同对冲 / 胜出 / 失败计数见 llm_routing_metrics()。路由层本身不占并发名额，下游 provider 各自排队。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.core.llmapi.base import BaseLLMProvider, LLMError, LLMMessage, LLMResponse
+from app.core.llmapi.limiter import provider_key
+
+logger = logging.getLogger(__name__)
+
+# 直方图分桶上界（秒）
+TTFT_BUCKETS: Tuple[float, ...] = (
+    0.1,
+    0.2,
+    0.3,
+    0.5,
+    0.75,
+    1.0,
+    1.5,
+    2.0,
+    3.0,
+    4.0,
+    6.0,
+    8.0,
+    12.0,
+    16.0,
+    24.0,
+    32.0,
+    48.0,
+    64.0,
+)
+
+
+class LatencyHistogram:
+    """对数分桶延迟直方图；总数超过 max_samples 时各桶减半（指数遗忘）。"""
+
+    def __init__(self, buckets: Tuple[float, ...] = TTFT_BUCKETS, max_samples: int = 1000) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 末桶为溢出
+        self.max_samples = max(2, int(max_samples))
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, seconds: float) -> None:
+        self._add(bisect.bisect_left(self.buckets, seconds))
+
+    def observe_censored(self, seconds: float) -> None:
+        """删失样本：只知道真实耗时超过 seconds，记入上界严格大于 seconds 的桶。"""
+        self._add(bisect.bisect_right(self.buckets, seconds))
+
+    def _add(self, index: int) -> None:
+        self.counts[index] += 1
+        if self.count > self.max_samples:
+            self.counts = [c // 2 for c in self.counts]
+
+    def percentile(self, q: float) -> Optional[float]:
+        """第 q 分位所在桶的上界（溢出桶返回最大上界）；无样本返回 None。"""
+        total = self.count
+        if total <= 0:
+            return None
+        need = max(1.0, q * total)
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= need:
+                return self.buckets[min(i, len(self.buckets) - 1)]
+        return self.buckets[-1]
+
+
+class CircuitBreaker:
+    """closed -> (连续失败达阈值) open -> (冷却期满) half_open，仅放行一次试探 -> 成功 closed / 失败 open"""
+
+    def __init__(self, failure_threshold: int = 5, cooldown_seconds: float = 30.0) -> None:
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown_seconds = float(cooldown_seconds)
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.opened_count = 0
+
+    def available(self, now: Optional[float] = None) -> bool:
+        """是否可以向该 provider 发请求（无副作用）。"""
+        now = time.monotonic() if now is None else now
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            return now - self.opened_at >= self.cooldown_seconds
+        return not self.trial_in_flight
+
+    def begin(self) -> None:
+        if self.state == "open" and self.available():
+            self.state = "half_open"
+        if self.state == "half_open":
+            self.trial_in_flight = True
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opened_count += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def record_abandoned(self) -> None:
+        """请求被对冲取消：不计成败，半开状态下允许下一次试探。"""
+        self.trial_in_flight = False
+
+
+class ProviderHealth:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.latency = {"stream": LatencyHistogram(), "chat": LatencyHistogram()}
+        self.breaker = CircuitBreaker(
+            failure_threshold=getattr(settings, "LLM_CIRCUIT_FAILURE_THRESHOLD", 5),
+            cooldown_seconds=getattr(settings, "LLM_CIRCUIT_COOLDOWN_SECONDS", 30.0),
+        )
+        self.stats = {
+            "requests": 0,
+            "wins": 0,
+            "failures": 0,
+            "abandoned": 0,
+            "censored": 0,
+            "hedges_fired": 0,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "circuit": self.breaker.state,
+            "circuit_opened": self.breaker.opened_count,
+            "latency": {
+                kind: {
+                    "samples": h.count,
+                    "p50": h.percentile(0.5),
+                    "p95": h.percentile(0.95),
+                }
+                for kind, h in self.latency.items()
+            },
+        }
+
+
+_health: Dict[str, ProviderHealth] = {}
+_health_lock = threading.Lock()
+
+
+def get_provider_health(provider: Any) -> ProviderHealth:
+    key = f"{provider_key(provider)}#{getattr(provider, 'model', '')}"
+    with _health_lock:
+        h = _health.get(key)
+        if h is None:
+            h = _health[key] = ProviderHealth(key)
+        return h
+
+
+def reset_provider_health() -> None:
+    with _health_lock:
+        _health.clear()
+
+
+def llm_routing_metrics() -> Dict[str, Dict[str, Any]]:
+    """{provider#model: requests / wins / failures / censored / hedges_fired / circuit / latency 分位}"""
+    with _health_lock:
+        items = list(_health.values())
+    return {h.name: h.snapshot() for h in items}
+
+
+def hedge_delay(health: ProviderHealth, kind: str) -> float:
+    """该 provider 的对冲等待阈值（秒）。"""
+    lo = float(getattr(settings, "LLM_HEDGE_MIN_DELAY_SECONDS", 1.0))
+    hi = float(getattr(settings, "LLM_HEDGE_MAX_DELAY_SECONDS", 15.0))
+    hist = health.latency[kind]
+    if hist.count < int(getattr(settings, "LLM_HEDGE_MIN_SAMPLES", 20)):
+        delay = float(getattr(settings, "LLM_HEDGE_DEFAULT_DELAY_SECONDS", 4.0))
+    else:
+        delay = hist.percentile(float(getattr(settings, "LLM_HEDGE_PERCENTILE", 0.95))) or hi
+    return min(hi, max(lo, delay))
+
+
+_EMPTY = object()
+
+
+class _Attempt:
+    __slots__ = ("provider", "health", "task", "stream", "started_at")
+
+    def __init__(self, provider, health, task, stream, started_at) -> None:
+        self.provider = provider
+        self.health = health
+        self.task = task
+        self.stream = stream
+        self.started_at = started_at
+
+
+class HedgedLLMProvider(BaseLLMProvider):
+    """主 provider + 备用 provider 的对冲 / 故障转移路由；对调用方表现为普通 provider。"""
+
+    limit_concurrency = False
+
+    def __init__(self, primary: BaseLLMProvider, fallbacks: List[BaseLLMProvider]) -> None:
+        super().__init__(primary.model, getattr(primary, "api_key", None))
+        self.primary = primary
+        self.fallbacks = list(fallbacks)
+        # 响应缓存 key 与日志沿用主 provider 的身份
+        self.client = getattr(primary, "client", None)
+        self._last_stream_usage = None
+
+    def _candidates(self) -> List[Tuple[BaseLLMProvider, ProviderHealth]]:
+        all_ = [(p, get_provider_health(p)) for p in [self.primary, *self.fallbacks]]
+        alive = [(p, h) for p, h in all_ if h.breaker.available()]
+        return alive or all_[:1]
+
+    async def _race(
+        self,
+        kind: str,
+        start: Callable[[BaseLLMProvider], Tuple[Awaitable[Any], Optional[AsyncIterator]]],
+    ) -> Tuple[_Attempt, Any]:
+        """
+        依次启动候选 provider，返回第一个成功的 (attempt, 首个结果)；
+        等待超过当前最后一个在途请求的对冲阈值时补发下一个，全部在途请求失败时立即改发下一个。
+        """
+        order = self._candidates()
+        pending: Dict[asyncio.Future, _Attempt] = {}
+        last_error: Optional[BaseException] = None
+        idx = 0
+
+        def launch() -> _Attempt:
+            nonlocal idx
+            provider, health = order[idx]
+            idx += 1
+            health.breaker.begin()
+            health.stats["requests"] += 1
+            aw, stream = start(provider)
+            att = _Attempt(provider, health, asyncio.ensure_future(aw), stream, time.monotonic())
+            pending[att.task] = att
+            return att
+
+        latest = launch()
+        try:
+            while pending:
+                timeout = None
+                if idx < len(order):
+                    elapsed = time.monotonic() - latest.started_at
+                    timeout = max(0.0, hedge_delay(latest.health, kind) - elapsed)
+                done, _ = await asyncio.wait(
+                    list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    latest.health.stats["hedges_fired"] += 1
+                    logger.info(
+                        "[llm_hedge] %s slow after %.2fs, hedging to next provider",
+                        latest.health.name,
+                        time.monotonic() - latest.started_at,
+                    )
+                    latest = launch()
+                    continue
+                for task in done:
+                    att = pending.pop(task)
+                    exc = task.exception()
+                    if exc is None or isinstance(exc, StopAsyncIteration):
+                        att.health.latency[kind].observe(time.monotonic() - att.started_at)
+                        att.health.stats["wins"] += 1
+                        return att, (_EMPTY if exc is not None else task.result())
+                    last_error = exc
+                    att.health.stats["failures"] += 1
+                    att.health.breaker.record_failure()
+                    logger.warning("[llm_hedge] %s failed: %s", att.health.name, exc)
+                if not pending and idx < len(order):
+                    latest = launch()
+            raise last_error or LLMError("没有可用的 LLM provider")
+        finally:
+            now = time.monotonic()
+            for att in pending.values():
+                att.task.cancel()
+                att.health.latency[kind].observe_censored(now - att.started_at)
+                att.health.stats["censored"] += 1
+            for att in pending.values():
+                try:
+                    await att.task
+                except BaseException:
+                    pass
+                if att.stream is not None:
+                    try:
+                        await att.stream.aclose()
+                    except Exception:
+                        pass
+                att.health.stats["abandoned"] += 1
+                att.health.breaker.record_abandoned()
+
+    async def chat(
+        self,
+        messages: List[LLMMessage],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> LLMResponse:
+        def start(provider):
+            return (
+                provider.chat(messages, temperature=temperature, max_tokens=max_tokens, **kwargs),
+                None,
+            )
+
+        att, resp = await self._race("chat", start)
+        att.health.breaker.record_success()
+        return resp
+
+    async def chat_stream(
+        self,
+        messages: List[LLMMessage],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncIterator[str | dict]:
+        self._last_stream_usage = None
+
+        def start(provider):
+            stream = provider.chat_stream(
+                messages, temperature=temperature, max_tokens=max_tokens, **kwargs
+            )
+            return stream.__anext__(), stream
+
+        att, first = await self._race("stream", start)
+        failed = False
+        try:
+            if first is not _EMPTY:
+                yield first
+                async for item in att.stream:
+                    yield item
+        except Exception:
+            failed = True
+            att.health.stats["failures"] += 1
+            att.health.breaker.record_failure()
+            raise
+        finally:
+            if not failed:
+                att.health.breaker.record_success()
+            self._last_stream_usage = getattr(att.provider, "_last_stream_usage", None)
+            await att.stream.aclose()
+
+    async def count_tokens(self, text: str) -> int:
+        return await self.primary.count_tokens(text)
+
+    async def estimate_cost(
+        self,
+        messages: List[LLMMessage],
+        response_tokens: Optional[int] = None,
+    ) -> Dict[str, float]:
+        return await self.primary.estimate_cost(messages, response_tokens)
@@ -0,0 +1,103 @@
+"""
+LLM 调用埋点：首包耗时、总耗时、token 用量（按 provider / model / 调用点）
+
+与并发限制一样由 BaseLLMProvider.__init_subclass__ 自动包到 chat / chat_stream 上（位于限流内层，
+耗时不含排队）。调用点用 `with llm_call_site("pending_judge"): ...` 标注，未标注为 "default"。
+"""
+
+from __future__ import annotations
+
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+from app.core.llmapi.limiter import (
+    OUTCOME_CANCELLED,
+    OUTCOME_ERROR,
+    OUTCOME_OK,
+    classify_error,
+    provider_key,
+)
+from app.utils.metrics import LLM_DURATION_SECONDS, LLM_TOKENS, LLM_TTFT_SECONDS
+
+_site_var: ContextVar[str] = ContextVar("llm_call_site", default="default")
+
+
+@contextmanager
+def llm_call_site(site: str) -> Iterator[None]:
+    token = _site_var.set(site)
+    try:
+        yield
+    finally:
+        _site_var.reset(token)
+
+
+def _labels(provider: Any) -> Dict[str, str]:
+    key = provider_key(provider)
+    host = urlparse(key).hostname if "://" in key else None
+    return {
+        "provider": host or key,
+        "model": str(getattr(provider, "model", "") or ""),
+        "site": _site_var.get(),
+    }
+
+
+def _count_tokens(labels: Dict[str, str], usage: Optional[Dict[str, Any]]) -> None:
+    if not isinstance(usage, dict):
+        return
+    for field, direction in (("prompt_tokens", "in"), ("completion_tokens", "out")):
+        n = usage.get(field)
+        if isinstance(n, (int, float)) and n > 0:
+            LLM_TOKENS.inc(n, direction=direction, **labels)
+
+
+def instrument_chat(fn):
+    @functools.wraps(fn)
+    async def wrapper(self, *args, **kwargs):
+        labels = _labels(self)
+        start = time.perf_counter()
+        outcome = OUTCOME_ERROR
+        try:
+            resp = await fn(self, *args, **kwargs)
+            outcome = OUTCOME_OK
+            _count_tokens(labels, getattr(resp, "usage", None))
+            return resp
+        except BaseException as e:
+            outcome = classify_error(e) if isinstance(e, Exception) else OUTCOME_CANCELLED
+            raise
+        finally:
+            LLM_DURATION_SECONDS.observe(
+                time.perf_counter() - start, kind="chat", outcome=outcome, **labels
+            )
+
+    return wrapper
+
+
+def instrument_chat_stream(fn):
+    @functools.wraps(fn)
+    async def wrapper(self, *args, **kwargs):
+        labels = _labels(self)
+        start = time.perf_counter()
+        first = True
+        outcome = OUTCOME_ERROR
+        try:
+            async for item in fn(self, *args, **kwargs):
+                if first:
+                    first = False
+                    LLM_TTFT_SECONDS.observe(time.perf_counter() - start, **labels)
+                yield item
+            outcome = OUTCOME_OK
+        except BaseException as e:
+            outcome = classify_error(e) if isinstance(e, Exception) else OUTCOME_CANCELLED
+            raise
+        finally:
+            LLM_DURATION_SECONDS.observe(
+                time.perf_counter() - start, kind="stream", outcome=outcome, **labels
+            )
+            if outcome == OUTCOME_OK:
+                _count_tokens(labels, getattr(self, "_last_stream_usage", None))
+
+    return wrapper
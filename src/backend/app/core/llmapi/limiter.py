@@ -0,0 +1,409 @@
+"""
+LLM 调用的优先级自适应并发限制（按 provider 分桶）
+
+BaseLLMProvider 的子类定义 chat / chat_stream 时会被自动包一层（见 base.py 的 __init_subclass__），
+调用方无需改动即可受限：
+
+- 优先级：interactive（用户正在等的流式回复）> judge（判定 / 抽取）> background（锚点提炼、
+  combo guide、轮次后置任务）。低优先级只能占用当前名额的一部分（LLM_LIMITER_*_SHARE），
+  为交互流保留余量；放行时总是先唤醒高优先级等待者。
+- AIMD：provider 返回 429 / 超时、或延迟超过基线 LLM_LIMITER_LATENCY_TOLERANCE 倍时乘性下调名额
+  （冷却期内只下调一次），名额用满且调用顺畅时加性回升（约每轮 +1）。
+- 指标：各优先级排队次数 / 总等待 / 最大等待、调用结果分布、下调原因，见 llm_limiter_metrics()。
+
+优先级默认按方法区分（chat_stream=interactive，chat=judge），后台任务用
+`with llm_priority(PRIORITY_BACKGROUND): ...` 覆盖。本限制为进程内；跨 worker 的总量上限仍由
+coordination 后端的 LLM_MAX_CONCURRENT 信号量负责。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterator, Optional
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_JUDGE = 1
+PRIORITY_BACKGROUND = 2
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_JUDGE: "judge",
+    PRIORITY_BACKGROUND: "background",
+}
+
+OUTCOME_OK = "ok"
+OUTCOME_THROTTLED = "throttled"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_ERROR = "error"
+OUTCOME_CANCELLED = "cancelled"
+
+_priority_var: ContextVar[Optional[int]] = ContextVar("llm_priority", default=None)
+# 当前任务已持有名额（子类 chat 调 super().chat 时不重复排队）
+_holding_var: ContextVar[bool] = ContextVar("llm_limiter_holding", default=False)
+
+
+@contextmanager
+def llm_priority(priority: int) -> Iterator[None]:
+    """在该上下文内发起的 LLM 调用使用指定优先级。"""
+    token = _priority_var.set(priority)
+    try:
+        yield
+    finally:
+        _priority_var.reset(token)
+
+
+def current_priority(default: int) -> int:
+    p = _priority_var.get()
+    return default if p is None else p
+
+
+def classify_error(exc: BaseException) -> str:
+    """把 provider 异常归为 throttled / timeout / error（LLMError 会沿 __cause__/__context__ 找原始异常）。"""
+    e: Optional[BaseException] = exc
+    for _ in range(5):
+        if e is None:
+            break
+        name = type(e).__name__.lower()
+        if getattr(e, "status_code", None) == 429 or "ratelimit" in name:
+            return OUTCOME_THROTTLED
+        if isinstance(e, TimeoutError) or "timeout" in name:
+            return OUTCOME_TIMEOUT
+        e = e.__cause__ or e.__context__
+    text = str(exc).lower()
+    if "429" in text or "rate limit" in text or "too many requests" in text:
+        return OUTCOME_THROTTLED
+    if "timed out" in text or "timeout" in text:
+        return OUTCOME_TIMEOUT
+    return OUTCOME_ERROR
+
+
+@dataclass
+class Permit:
+    priority: int
+    granted_at: float
+
+
+class _Waiter:
+    __slots__ = ("fut", "granted")
+
+    def __init__(self, fut: asyncio.Future) -> None:
+        self.fut = fut
+        self.granted = False
+
+
+def _wake(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+class AdaptiveLimiter:
+    """单个 provider 的优先级队列 + AIMD 名额；状态用线程锁保护，可被多个事件循环共用。"""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        initial_limit: Optional[int] = None,
+        latency_tolerance: float = 2.0,
+        judge_share: float = 0.8,
+        background_share: float = 0.5,
+        decrease_factor: float = 0.7,
+        latency_decrease_factor: float = 0.9,
+        cooldown_seconds: float = 1.0,
+        latency_alpha: float = 0.1,
+    ) -> None:
+        self.name = name
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        start = initial_limit if initial_limit else self.max_limit
+        self.limit = float(min(self.max_limit, max(self.min_limit, int(start))))
+        self.latency_tolerance = float(latency_tolerance)
+        self.shares = {
+            PRIORITY_INTERACTIVE: 1.0,
+            PRIORITY_JUDGE: float(judge_share),
+            PRIORITY_BACKGROUND: float(background_share),
+        }
+        self.decrease_factor = float(decrease_factor)
+        self.latency_decrease_factor = float(latency_decrease_factor)
+        self.cooldown_seconds = float(cooldown_seconds)
+        self.latency_alpha = float(latency_alpha)
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters: Dict[int, Deque[_Waiter]] = {p: deque() for p in PRIORITY_NAMES}
+        self._baseline: Dict[str, float] = {}
+        self._last_decrease = 0.0
+        self._wait_stats = {p: {"count": 0, "total_ms": 0.0, "max_ms": 0.0} for p in PRIORITY_NAMES}
+        self._outcomes = {
+            o: 0
+            for o in (
+                OUTCOME_OK,
+                OUTCOME_THROTTLED,
+                OUTCOME_TIMEOUT,
+                OUTCOME_ERROR,
+                OUTCOME_CANCELLED,
+            )
+        }
+        self._decreases = {OUTCOME_THROTTLED: 0, OUTCOME_TIMEOUT: 0, "latency": 0}
+        self._increases = 0
+
+    # ── 名额（调用方持锁）──
+
+    def _cap(self, priority: int) -> int:
+        return max(1, int(int(self.limit) * self.shares.get(priority, 1.0)))
+
+    def _admits(self, priority: int) -> bool:
+        return self._in_flight < self._cap(priority)
+
+    def _queued_at_or_above(self, priority: int) -> bool:
+        return any(self._waiters[p] for p in PRIORITY_NAMES if p <= priority)
+
+    def _dispatch(self) -> None:
+        for p in sorted(PRIORITY_NAMES):
+            q = self._waiters[p]
+            while q and self._admits(p):
+                w = q.popleft()
+                if w.fut.done():
+                    continue  # 等待方已取消
+                w.granted = True
+                self._in_flight += 1
+                w.fut.get_loop().call_soon_threadsafe(_wake, w.fut)
+            if q:
+                break  # 高优先级仍在排队时不放行低优先级
+
+    def _record_wait(self, priority: int, seconds: float) -> None:
+        st = self._wait_stats[priority]
+        ms = seconds * 1000.0
+        st["count"] += 1
+        st["total_ms"] += ms
+        st["max_ms"] = max(st["max_ms"], ms)
+
+    # ── 获取 / 归还 ──
+
+    async def acquire(self, priority: int) -> Permit:
+        if priority not in PRIORITY_NAMES:
+            priority = PRIORITY_JUDGE
+        start = time.monotonic()
+        with self._lock:
+            if not self._queued_at_or_above(priority) and self._admits(priority):
+                self._in_flight += 1
+                self._record_wait(priority, 0.0)
+                return Permit(priority, start)
+            waiter = _Waiter(asyncio.get_running_loop().create_future())
+            self._waiters[priority].append(waiter)
+        try:
+            await waiter.fut
+        except BaseException:
+            with self._lock:
+                if waiter.granted:
+                    self._in_flight -= 1
+                    self._dispatch()
+                else:
+                    try:
+                        self._waiters[priority].remove(waiter)
+                    except ValueError:
+                        pass
+            raise
+        now = time.monotonic()
+        with self._lock:
+            self._record_wait(priority, now - start)
+        return Permit(priority, now)
+
+    def release(
+        self,
+        permit: Permit,
+        outcome: str,
+        *,
+        latency: Optional[float] = None,
+        kind: str = "chat",
+    ) -> None:
+        """
+        归还名额并据结果调整 limit。
+        latency：chat 为整体耗时，chat_stream 为首包耗时；按 kind 分别维护基线。
+        """
+        with self._lock:
+            saturated = self._in_flight >= int(self.limit) or self._queued_at_or_above(
+                PRIORITY_BACKGROUND
+            )
+            self._in_flight = max(0, self._in_flight - 1)
+            self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+            self._adjust(outcome, latency, kind, saturated)
+            self._dispatch()
+
+    def _adjust(self, outcome: str, latency: Optional[float], kind: str, saturated: bool) -> None:
+        if outcome in (OUTCOME_THROTTLED, OUTCOME_TIMEOUT):
+            self._decrease(self.decrease_factor, outcome)
+            return
+        if outcome != OUTCOME_OK:
+            return  # 普通错误 / 取消不代表过载
+        if latency is not None:
+            base = self._baseline.get(kind)
+            if base is None:
+                self._baseline[kind] = latency
+            else:
+                self._baseline[kind] = (
+                    base * (1 - self.latency_alpha) + latency * self.latency_alpha
+                )
+                if latency > base * self.latency_tolerance:
+                    self._decrease(self.latency_decrease_factor, "latency")
+                    return
+        if saturated and self.limit < self.max_limit:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self._increases += 1
+
+    def _decrease(self, factor: float, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown_seconds:
+            return
+        before = self.limit
+        self.limit = max(float(self.min_limit), self.limit * factor)
+        self._last_decrease = now
+        self._decreases[reason] = self._decreases.get(reason, 0) + 1
+        logger.info(
+            "[llm_limiter] %s limit %.1f -> %.1f (%s)", self.name, before, self.limit, reason
+        )
+
+    # ── 指标 ──
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self._in_flight,
+                "queued": {PRIORITY_NAMES[p]: len(q) for p, q in self._waiters.items()},
+                "wait": {
+                    PRIORITY_NAMES[p]: {
+                        "count": st["count"],
+                        "total_ms": round(st["total_ms"], 1),
+                        "max_ms": round(st["max_ms"], 1),
+                    }
+                    for p, st in self._wait_stats.items()
+                },
+                "outcomes": dict(self._outcomes),
+                "decreases": dict(self._decreases),
+                "increases": self._increases,
+                "latency_baseline_ms": {k: round(v * 1000.0, 1) for k, v in self._baseline.items()},
+            }
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def provider_key(provider: Any) -> str:
+    """限流分桶：同一 API 地址共享名额（429 通常按账号 / 端点计），无 base_url 时按类名。"""
+    client = getattr(provider, "client", None)
+    base_url = str(getattr(client, "base_url", "") or "")
+    return base_url or type(provider).__name__
+
+
+def get_llm_limiter(key: str) -> Optional[AdaptiveLimiter]:
+    """按 provider key 取限制器；LLM_LIMITER_ENABLED=False 时返回 None（不限制）。"""
+    if not getattr(settings, "LLM_LIMITER_ENABLED", True):
+        return None
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = AdaptiveLimiter(
+                key,
+                min_limit=getattr(settings, "LLM_LIMITER_MIN_CONCURRENT", 2),
+                max_limit=getattr(settings, "LLM_LIMITER_MAX_CONCURRENT", 32),
+                initial_limit=getattr(settings, "LLM_LIMITER_INITIAL_CONCURRENT", 8),
+                latency_tolerance=getattr(settings, "LLM_LIMITER_LATENCY_TOLERANCE", 2.0),
+                judge_share=getattr(settings, "LLM_LIMITER_JUDGE_SHARE", 0.8),
+                background_share=getattr(settings, "LLM_LIMITER_BACKGROUND_SHARE", 0.5),
+            )
+        return limiter
+
+
+def reset_llm_limiters() -> None:
+    """丢弃全部限制器（测试 / 配置热更新用）。"""
+    with _limiters_lock:
+        _limiters.clear()
+
+
+def llm_limiter_metrics() -> Dict[str, Dict[str, Any]]:
+    """{provider key: limit / in_flight / queued / wait / outcomes / decreases ...}"""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {lim.name: lim.snapshot() for lim in limiters}
+
+
+# ── provider 方法包装 ──
+
+
+def limit_chat(fn):
+    """包装 provider.chat：排队取名额，按结果与整体耗时反馈 AIMD。"""
+
+    @functools.wraps(fn)
+    async def wrapper(self, *args, **kwargs):
+        limiter = None if _holding_var.get() else get_llm_limiter(provider_key(self))
+        if limiter is None:
+            return await fn(self, *args, **kwargs)
+        permit = await limiter.acquire(current_priority(PRIORITY_JUDGE))
+        token = _holding_var.set(True)
+        outcome, latency = OUTCOME_ERROR, None
+        try:
+            result = await fn(self, *args, **kwargs)
+            outcome, latency = OUTCOME_OK, time.monotonic() - permit.granted_at
+            return result
+        except asyncio.CancelledError:
+            outcome = OUTCOME_CANCELLED
+            raise
+        except Exception as e:
+            outcome = classify_error(e)
+            raise
+        finally:
+            _holding_var.reset(token)
+            limiter.release(permit, outcome, latency=latency, kind="chat")
+
+    wrapper.__llm_limited__ = True
+    return wrapper
+
+
+def limit_chat_stream(fn):
+    """
+    包装 provider.chat_stream：整个流持有一个名额，首包耗时作为延迟信号。
+    异步生成器在调用方上下文中执行，不能跨 yield 设置 _holding_var，因此流内嵌套调用会各自排队。
+    """
+
+    @functools.wraps(fn)
+    async def wrapper(self, *args, **kwargs):
+        limiter = None if _holding_var.get() else get_llm_limiter(provider_key(self))
+        if limiter is None:
+            async for item in fn(self, *args, **kwargs):
+                yield item
+            return
+        permit = await limiter.acquire(current_priority(PRIORITY_INTERACTIVE))
+        outcome, ttft = OUTCOME_ERROR, None
+        try:
+            async for item in fn(self, *args, **kwargs):
+                if ttft is None:
+                    ttft = time.monotonic() - permit.granted_at
+                yield item
+            outcome = OUTCOME_OK
+        except (asyncio.CancelledError, GeneratorExit):
+            # 调用方提前关闭：已出首包视为正常结束
+            outcome = OUTCOME_OK if ttft is not None else OUTCOME_CANCELLED
+            raise
+        except Exception as e:
+            outcome = classify_error(e)
+            raise
+        finally:
+            limiter.release(permit, outcome, latency=ttft, kind="stream")
+
+    wrapper.__llm_limited__ = True
+    return wrapper
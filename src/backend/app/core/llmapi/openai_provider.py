@@ -2,10 +2,20 @@
 OpenAI LLM Provider实现
 """
 from typing import List, Dict, Optional, AsyncIterator
-from openai import AsyncOpenAI
 from app.core.llmapi.base import BaseLLMProvider, LLMMessage, LLMResponse, LLMError
 from app.config.settings import settings
-import tiktoken
+
+# openai 包导入约 0.3s：首次实例化时再加载（保留模块级名字，测试可直接 patch）
+AsyncOpenAI = None
+
+
+def _async_openai_cls():
+    global AsyncOpenAI
+    if AsyncOpenAI is None:
+        from openai import AsyncOpenAI as _cls
+
+        AsyncOpenAI = _cls
+    return AsyncOpenAI
 
 
 class OpenAIProvider(BaseLLMProvider):
@@ -39,13 +49,15 @@ class OpenAIProvider(BaseLLMProvider):
         )
         if base_url:
             client_kwargs["base_url"] = base_url
-        self.client = AsyncOpenAI(**client_kwargs)
+        self.client = _async_openai_cls()(**client_kwargs)
         self._encoding = None
         self._last_stream_usage = None  # 流式调用结束后的 token 用量
     
     def _get_encoding(self):
-        """获取tiktoken编码器（延迟加载）"""
+        """获取tiktoken编码器（延迟加载，tiktoken 本身也在首次计数时才导入）"""
         if self._encoding is None:
+            import tiktoken
+
             try:
                 # 根据模型选择编码器
                 if "gpt-4" in self.model:
@@ -0,0 +1,293 @@
+"""
+确定性 LLM 调用的响应缓存（按调用点 opt-in）
+
+适用于低温度的判定 / 抽取类调用：输入相同则输出可视为相同，重试、断线重连、重复提交时
+直接复用上次结果，跳过 provider 往返。
+
+- key：sha256(规范化 JSON(model, base_url, messages, temperature, max_tokens, 其余参数))
+- 内存层：进程内 LRU（LLM_RESPONSE_CACHE_MAX_ENTRIES）
+- 磁盘层：data/llm_cache/ab/<key>.json，带 expires_at（LLM_RESPONSE_CACHE_TTL_SECONDS），多 worker 共享；
+  写入时最多每 LLM_RESPONSE_CACHE_SWEEP_SECONDS 清扫一次：删除按写入时间已过期的文件，
+  总大小超过 LLM_RESPONSE_CACHE_DISK_MAX_BYTES 时从最早写入的开始删
+- 同一 key 的并发请求只打一次 provider（single-flight）
+- 只缓存非空 content；命中时 usage 置空，避免重复计 token
+
+调用点通过 cached_chat(llm, messages, site=..., ...) 接入，是否启用由
+LLM_RESPONSE_CACHE_ENABLED 与 LLM_RESPONSE_CACHE_SITES 共同决定。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.core.llmapi.base import LLMMessage, LLMResponse
+from app.core.llmapi.instrumentation import llm_call_site
+from app.utils.cache_tiers import CacheSlot, MemoryLRU, ShardedDir, atomic_write
+from app.utils.data_paths import get_shared_data_dir
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+
+# 调用点标识（与 LLM_RESPONSE_CACHE_SITES 中的名称一致）
+SITE_DIMENSION_CHECK = "dimension_check"
+SITE_STEP3_HYPOTHESIS_FLAG = "step3_hypothesis_flag"
+SITE_PENDING_JUDGE = "pending_judge"
+
+
+def cache_key(
+    llm: Any,
+    messages: List[LLMMessage],
+    *,
+    temperature: float,
+    max_tokens: Optional[int] = None,
+    **kwargs: Any,
+) -> str:
+    """规范化请求后取 sha256；model / base_url 不同视为不同请求。"""
+    client = getattr(llm, "client", None)
+    payload = {
+        "v": CACHE_FORMAT_VERSION,
+        "model": str(getattr(llm, "model", "") or ""),
+        "base_url": str(getattr(client, "base_url", "") or ""),
+        "messages": [{"role": m.role, "content": m.content} for m in messages],
+        "temperature": round(float(temperature), 4),
+        "max_tokens": max_tokens,
+        "kwargs": kwargs,
+    }
+    raw = json.dumps(
+        payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """内存 LRU + 磁盘 TTL 两级缓存；统计按调用点分组。"""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 512,
+        ttl_seconds: float = 3600.0,
+        disk_dir: Optional[Path] = None,
+        disk_max_bytes: Optional[int] = None,
+        sweep_interval: float = 300.0,
+    ) -> None:
+        self.ttl_seconds = float(ttl_seconds)
+        self._mem: MemoryLRU[Tuple[float, Dict[str, Any]]] = MemoryLRU(max_entries=max_entries)
+        self._disk = ShardedDir(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self.sweep_interval = float(sweep_interval)
+        self._last_sweep = 0.0
+        self.swept = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    # ── 统计 ──
+
+    def _bump(self, site: str, field: str) -> None:
+        with self._lock:
+            st = self._stats.setdefault(
+                site, {"hits_memory": 0, "hits_disk": 0, "misses": 0, "stores": 0, "coalesced": 0}
+            )
+            st[field] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {site: dict(st) for site, st in self._stats.items()}
+
+    # ── 存取 ──
+
+    def _mem_get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        hit = self._mem.get(key)
+        if hit is None:
+            return None
+        expires_at, data = hit
+        if expires_at <= now:
+            self._mem.pop(key)
+            return None
+        return data
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[float, Dict[str, Any]]]:
+        if self._disk is None:
+            return None
+        p = self._disk.path(key)
+        try:
+            raw = json.loads(p.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        expires_at = float(raw.get("expires_at") or 0)
+        if expires_at <= now or not isinstance(raw.get("response"), dict):
+            p.unlink(missing_ok=True)
+            return None
+        return expires_at, raw["response"]
+
+    def _disk_put(self, key: str, expires_at: float, data: Dict[str, Any]) -> None:
+        if self._disk is None:
+            return
+        try:
+            atomic_write(
+                self._disk.path(key),
+                json.dumps({"expires_at": expires_at, "response": data}, ensure_ascii=False),
+            )
+        except OSError as e:
+            logger.warning("[llm_cache] disk write failed key=%s err=%s", key[:12], e)
+        self._maybe_sweep()
+
+    def _maybe_sweep(self) -> None:
+        now = time.time()
+        with self._lock:
+            if now - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = now
+        self.sweep_disk(now)
+
+    def sweep_disk(self, now: Optional[float] = None) -> int:
+        """清扫磁盘层：过期（文件 mtime 即写入时间 + TTL）与超出容量的条目；返回删除数。"""
+        if self._disk is None:
+            return 0
+        try:
+            removed = self._disk.sweep(
+                max_age=self.ttl_seconds, max_bytes=self.disk_max_bytes, now=now
+            )
+        except OSError as e:
+            logger.warning("[llm_cache] disk sweep failed err=%s", e)
+            return 0
+        with self._lock:
+            self.swept += removed
+        return removed
+
+    def get(self, key: str, site: str = "") -> Optional[LLMResponse]:
+        now = time.time()
+        data = self._mem_get(key, now)
+        if data is not None:
+            self._bump(site, "hits_memory")
+            return LLMResponse(**{**data, "usage": None})
+        disk = self._disk_get(key, now)
+        if disk is not None:
+            expires_at, data = disk
+            self._mem.put(key, (expires_at, data))
+            self._bump(site, "hits_disk")
+            return LLMResponse(**{**data, "usage": None})
+        return None
+
+    def put(self, key: str, resp: LLMResponse, site: str = "") -> None:
+        if not (resp.content or "").strip():
+            return
+        expires_at = time.time() + self.ttl_seconds
+        data = resp.model_dump()
+        self._mem.put(key, (expires_at, data))
+        self._disk_put(key, expires_at, data)
+        self._bump(site, "stores")
+
+    async def chat(
+        self,
+        llm: Any,
+        messages: List[LLMMessage],
+        *,
+        site: str,
+        temperature: float,
+        **kwargs: Any,
+    ) -> LLMResponse:
+        key = cache_key(llm, messages, temperature=temperature, **kwargs)
+        hit = await asyncio.to_thread(self.get, key, site)
+        if hit is not None:
+            return hit
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._bump(site, "coalesced")
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # 首个请求被其调用方取消（如 wait_for 超时）：本请求自行调用 provider
+        self._bump(site, "misses")
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            resp = await llm.chat(messages, temperature=temperature, **kwargs)
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # 无并发等待者时避免 "exception was never retrieved"
+            raise
+        else:
+            fut.set_result(resp)
+            await asyncio.to_thread(self.put, key, resp, site)
+            return resp
+        finally:
+            self._inflight.pop(key, None)
+
+
+def _enabled_sites() -> set:
+    raw = str(getattr(settings, "LLM_RESPONSE_CACHE_SITES", "") or "")
+    return {s.strip() for s in raw.split(",") if s.strip()}
+
+
+def is_cache_enabled(site: str) -> bool:
+    if not getattr(settings, "LLM_RESPONSE_CACHE_ENABLED", False):
+        return False
+    sites = _enabled_sites()
+    return "*" in sites or site in sites
+
+
+def _build_cache() -> LLMResponseCache:
+    disk_dir: Optional[Path] = None
+    if getattr(settings, "LLM_RESPONSE_CACHE_DISK", True):
+        disk_dir = Path(
+            getattr(settings, "LLM_RESPONSE_CACHE_DIR", None)
+            or (get_shared_data_dir() / "llm_cache")
+        )
+    return LLMResponseCache(
+        max_entries=getattr(settings, "LLM_RESPONSE_CACHE_MAX_ENTRIES", 512),
+        ttl_seconds=getattr(settings, "LLM_RESPONSE_CACHE_TTL_SECONDS", 3600),
+        disk_dir=disk_dir,
+        disk_max_bytes=getattr(settings, "LLM_RESPONSE_CACHE_DISK_MAX_BYTES", None),
+        sweep_interval=getattr(settings, "LLM_RESPONSE_CACHE_SWEEP_SECONDS", 300),
+    )
+
+
+_slot: CacheSlot[LLMResponseCache] = CacheSlot(_build_cache)
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    return _slot.get()
+
+
+def set_llm_response_cache(cache: Optional[LLMResponseCache]) -> None:
+    """替换进程级缓存实例（测试 / 配置热更新用）。"""
+    _slot.set(cache)
+
+
+def llm_cache_metrics() -> Dict[str, Dict[str, int]]:
+    """各调用点的 hits_memory / hits_disk / misses / stores / coalesced 计数。"""
+    cache = _slot.current
+    return cache.stats() if cache is not None else {}
+
+
+async def cached_chat(
+    llm: Any,
+    messages: List[LLMMessage],
+    *,
+    site: str,
+    temperature: float,
+    **kwargs: Any,
+) -> LLMResponse:
+    """site 启用缓存时走两级缓存，否则等价于 llm.chat(messages, temperature=..., **kwargs)。"""
+    with llm_call_site(site):
+        if not is_cache_enabled(site):
+            return await llm.chat(messages, temperature=temperature, **kwargs)
+        return await get_llm_response_cache().chat(
+            llm, messages, site=site, temperature=temperature, **kwargs
+        )
@@ -4,6 +4,8 @@ TTS (Text-to-Speech) API模块
 from app.core.tts.base import BaseTTSProvider, TTSResponse, TTSError
 from app.core.tts.openai_tts_provider import OpenAITTSProvider
 from app.core.tts.factory import create_tts_provider, get_default_tts_provider
+from app.core.tts.fake_tts_provider import FakeTTSProvider
+from app.core.tts.cache import TTSCache, get_tts_cache, tts_cache_key
 
 __all__ = [
     "BaseTTSProvider",
@@ -12,4 +14,8 @@ __all__ = [
     "OpenAITTSProvider",
     "create_tts_provider",
     "get_default_tts_provider",
+    "FakeTTSProvider",
+    "TTSCache",
+    "get_tts_cache",
+    "tts_cache_key",
 ]
@@ -2,7 +2,7 @@
 TTS API基础接口
 """
 from abc import ABC, abstractmethod
-from typing import Optional, BinaryIO
+from typing import AsyncIterator, Optional, BinaryIO
 from pydantic import BaseModel
 
 
@@ -31,6 +31,8 @@ class BaseTTSProvider(ABC):
         """
         self.api_key = api_key
         self.config = kwargs
+        self.model: Optional[str] = kwargs.get("model")
+        self.default_format: str = kwargs.get("default_format", "mp3")
     
     @abstractmethod
     async def synthesize(
@@ -77,3 +79,20 @@ class BaseTTSProvider(ABC):
             输出文件路径
         """
         pass
+
+    async def synthesize_stream(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        speed: float = 1.0,
+        chunk_size: int = 16 * 1024,
+        **kwargs
+    ) -> AsyncIterator[bytes]:
+        """
+        流式合成语音：按块产出音频字节，便于边合成边播放。
+        默认实现整段合成后切块；支持流式接口的 Provider 应覆盖。
+        """
+        result = await self.synthesize(text, voice=voice, speed=speed, **kwargs)
+        data = result.audio_data
+        for i in range(0, len(data), max(1, chunk_size)):
+            yield data[i : i + chunk_size]
@@ -0,0 +1,207 @@
+"""
+TTS 合成结果缓存（内容哈希 -> 磁盘文件，按最近使用淘汰）
+
+- key：sha256(text, voice, model, format, speed)；同一段问候语 / 步骤文案只合成一次
+- 文件：data/tts_cache/ab/<key>.<format>，命中时更新 mtime 作为最近使用时间；
+  元数据（时长等）存同目录隐藏文件 .<key>.<format>.meta.json，随音频一起淘汰
+- 容量：总字节数超过 TTS_CACHE_MAX_BYTES 时按 mtime 从旧到新删除
+- 流式写入：边把分块发给客户端边写临时文件，完整结束才原子 rename 进缓存，中途断开则丢弃
+- 本模块的方法都是同步文件 I/O，协程里经 asyncio.to_thread 调用（aiter_file_chunks 已自带）
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Dict, Optional, Tuple
+
+from app.config.settings import settings
+from app.utils.cache_tiers import CacheSlot, ShardedDir, atomic_write, temp_sibling
+from app.utils.data_paths import get_shared_data_dir
+
+
+def tts_cache_key(text: str, *, voice: str, model: str, fmt: str, speed: float) -> str:
+    raw = json.dumps(
+        {
+            "text": text,
+            "voice": voice,
+            "model": model,
+            "format": fmt,
+            "speed": round(float(speed), 3),
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """磁盘 LRU；大小索引在首次使用时扫描一次目录建立，之后随读写增量维护。"""
+
+    def __init__(self, cache_dir: Path, max_bytes: int) -> None:
+        self.cache_dir = Path(cache_dir)
+        self._dir = ShardedDir(self.cache_dir)
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        self._sizes: Optional[Dict[Path, int]] = None
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def _path(self, key: str, fmt: str) -> Path:
+        return self._dir.path(key, f".{fmt}")
+
+    @staticmethod
+    def _meta_path(path: Path) -> Path:
+        return path.with_name(f".{path.name}.meta.json")
+
+    def _index(self) -> Dict[Path, int]:
+        if self._sizes is None:
+            sizes: Dict[Path, int] = {}
+            if self.cache_dir.is_dir():
+                for p in self.cache_dir.glob("*/*"):
+                    if p.is_file() and not p.name.startswith("."):
+                        sizes[p] = p.stat().st_size
+            self._sizes = sizes
+        return self._sizes
+
+    def get(self, key: str, fmt: str) -> Optional[Path]:
+        """命中返回文件路径（并刷新最近使用时间），否则 None。"""
+        p = self._path(key, fmt)
+        with self._lock:
+            try:
+                os.utime(p)
+            except OSError:
+                self._index().pop(p, None)
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            return p
+
+    def metadata(self, key: str, fmt: str) -> Dict[str, Any]:
+        """条目元数据（写入时提供的 duration 等）；没有则返回空 dict。"""
+        try:
+            data = json.loads(self._meta_path(self._path(key, fmt)).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def read(self, key: str, fmt: str) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        """命中返回 (音频字节, 元数据)；读取前被淘汰按未命中处理。"""
+        p = self.get(key, fmt)
+        if p is None:
+            return None
+        try:
+            data = p.read_bytes()
+        except OSError:
+            return None
+        return data, self.metadata(key, fmt)
+
+    def _commit(
+        self, tmp: Path, key: str, fmt: str, metadata: Optional[Dict[str, Any]] = None
+    ) -> Path:
+        p = self._path(key, fmt)
+        meta = self._meta_path(p)
+        if metadata:
+            atomic_write(meta, json.dumps(metadata, ensure_ascii=False))
+        else:
+            meta.unlink(missing_ok=True)
+        with self._lock:
+            os.replace(tmp, p)
+            sizes = self._index()
+            sizes[p] = p.stat().st_size
+            self.stats["stores"] += 1
+            self._evict(keep=p)
+        return p
+
+    def _evict(self, keep: Path) -> None:
+        sizes = self._index()
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        by_age = []
+        for p in list(sizes):
+            try:
+                by_age.append((p.stat().st_mtime, p))
+            except OSError:
+                total -= sizes.pop(p, 0)
+        for _, p in sorted(by_age):
+            if total <= self.max_bytes:
+                break
+            if p == keep:
+                continue
+            total -= sizes.pop(p, 0)
+            p.unlink(missing_ok=True)
+            self._meta_path(p).unlink(missing_ok=True)
+            self.stats["evictions"] += 1
+
+    def put(
+        self, key: str, fmt: str, data: bytes, metadata: Optional[Dict[str, Any]] = None
+    ) -> Path:
+        w = self.open_writer(key, fmt)
+        try:
+            w.write(data)
+        except BaseException:
+            w.discard()
+            raise
+        return w.commit(metadata)
+
+    class _Writer:
+        def __init__(self, cache: "TTSCache", key: str, fmt: str) -> None:
+            self.cache, self.key, self.fmt = cache, key, fmt
+            final = cache._path(key, fmt)
+            final.parent.mkdir(parents=True, exist_ok=True)
+            self.tmp = temp_sibling(final)
+            self.f: BinaryIO = open(self.tmp, "wb")
+
+        def write(self, chunk: bytes) -> None:
+            self.f.write(chunk)
+
+        def commit(self, metadata: Optional[Dict[str, Any]] = None) -> Path:
+            self.f.close()
+            return self.cache._commit(self.tmp, self.key, self.fmt, metadata)
+
+        def discard(self) -> None:
+            self.f.close()
+            self.tmp.unlink(missing_ok=True)
+
+    def open_writer(self, key: str, fmt: str) -> "TTSCache._Writer":
+        """流式写入：调用方在完整写完后 commit()，失败 / 中断时 discard()。"""
+        return TTSCache._Writer(self, key, fmt)
+
+
+def _build_cache() -> TTSCache:
+    return TTSCache(
+        Path(getattr(settings, "TTS_CACHE_DIR", None) or (get_shared_data_dir() / "tts_cache")),
+        getattr(settings, "TTS_CACHE_MAX_BYTES", 256 * 1024 * 1024),
+    )
+
+
+_slot: CacheSlot[TTSCache] = CacheSlot(
+    _build_cache, enabled=lambda: bool(getattr(settings, "TTS_CACHE_ENABLED", True))
+)
+
+
+def get_tts_cache() -> Optional[TTSCache]:
+    """TTS_CACHE_ENABLED=False 时返回 None。"""
+    return _slot.get()
+
+
+def set_tts_cache(cache: Optional[TTSCache]) -> None:
+    """替换进程级缓存实例（测试用）。"""
+    _slot.set(cache)
+
+
+async def aiter_file_chunks(path: Path, chunk_size: int) -> AsyncIterator[bytes]:
+    """按块异步读取文件（打开与每次读取都在线程里执行，不阻塞事件循环）。"""
+    f = await asyncio.to_thread(open, path, "rb")
+    try:
+        while True:
+            chunk = await asyncio.to_thread(f.read, chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        await asyncio.to_thread(f.close)
@@ -37,6 +37,10 @@ def create_tts_provider(
     # 根据provider类型创建实例
     if provider.lower() == "openai":
         return OpenAITTSProvider(api_key=api_key)
+    elif provider.lower() == "fake":
+        from app.core.tts.fake_tts_provider import FakeTTSProvider
+
+        return FakeTTSProvider()
     else:
         raise ValueError(f"不支持的TTS Provider: {provider}")
 
@@ -0,0 +1,93 @@
+"""
+本地离线 TTS Provider（TTS_PROVIDER=fake）
+
+按文本生成确定性的 WAV（16kHz / 16bit / 单声道），时长与文本长度成正比；
+不访问网络，供测试与本地联调使用。calls 记录实际合成次数，便于验证缓存命中。
+"""
+
+import asyncio
+import hashlib
+import struct
+from typing import AsyncIterator, Optional
+
+from app.core.tts.base import BaseTTSProvider, TTSResponse
+
+SAMPLE_RATE = 16000
+
+
+def _wav_bytes(text: str, voice: str, speed: float) -> bytes:
+    seconds = max(0.2, len(text) * 0.05 / max(speed, 0.25))
+    n_samples = int(SAMPLE_RATE * seconds)
+    seed = hashlib.sha256(f"{voice}|{text}".encode("utf-8")).digest()
+    pattern = b"".join(struct.pack("<h", (b - 128) * 64) for b in seed)
+    reps, rest = divmod(n_samples * 2, len(pattern))
+    pcm = pattern * reps + pattern[:rest]
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        36 + len(pcm),
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,
+        1,
+        SAMPLE_RATE,
+        SAMPLE_RATE * 2,
+        2,
+        16,
+        b"data",
+        len(pcm),
+    )
+    return header + pcm
+
+
+def _check_format(kwargs: dict) -> None:
+    fmt = kwargs.get("response_format", "wav")
+    if fmt != "wav":
+        raise ValueError(f"FakeTTSProvider 仅支持 wav，收到: {fmt}")
+
+
+class FakeTTSProvider(BaseTTSProvider):
+    """确定性离线 TTS"""
+
+    def __init__(self, api_key: Optional[str] = None, **kwargs):
+        super().__init__(api_key, **kwargs)
+        self.model = kwargs.get("model") or "fake-tts"
+        self.default_voice = kwargs.get("default_voice", "alloy")
+        self.default_format = "wav"
+        self.chunk_delay = float(kwargs.get("chunk_delay", 0.0))
+        self.calls = 0
+
+    async def synthesize(
+        self, text: str, voice: Optional[str] = None, speed: float = 1.0, **kwargs
+    ) -> TTSResponse:
+        _check_format(kwargs)
+        self.calls += 1
+        audio = _wav_bytes(text, voice or self.default_voice, speed)
+        return TTSResponse(
+            audio_data=audio, format="wav", duration=(len(audio) - 44) / (SAMPLE_RATE * 2)
+        )
+
+    async def synthesize_stream(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        speed: float = 1.0,
+        chunk_size: int = 16 * 1024,
+        **kwargs,
+    ) -> AsyncIterator[bytes]:
+        _check_format(kwargs)
+        self.calls += 1
+        audio = _wav_bytes(text, voice or self.default_voice, speed)
+        for i in range(0, len(audio), max(1, chunk_size)):
+            if self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+            yield audio[i : i + chunk_size]
+
+    async def synthesize_to_file(
+        self, text: str, output_path: str, voice: Optional[str] = None, speed: float = 1.0, **kwargs
+    ) -> str:
+        result = await self.synthesize(text, voice, speed, **kwargs)
+        with open(output_path, "wb") as f:
+            f.write(result.audio_data)
+        return output_path
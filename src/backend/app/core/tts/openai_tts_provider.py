@@ -1,11 +1,22 @@
 """
 OpenAI TTS Provider实现
 """
-from typing import Optional
-from openai import AsyncOpenAI
+from typing import AsyncIterator, Optional
 from app.core.tts.base import BaseTTSProvider, TTSResponse, TTSError
 from app.config.settings import settings
 
+# openai 包导入约 0.3s：首次实例化时再加载（保留模块级名字，测试可直接 patch）
+AsyncOpenAI = None
+
+
+def _async_openai_cls():
+    global AsyncOpenAI
+    if AsyncOpenAI is None:
+        from openai import AsyncOpenAI as _cls
+
+        AsyncOpenAI = _cls
+    return AsyncOpenAI
+
 
 class OpenAITTSProvider(BaseTTSProvider):
     """OpenAI TTS Provider实现"""
@@ -22,12 +33,14 @@ class OpenAITTSProvider(BaseTTSProvider):
             **kwargs: 其他配置
         """
         super().__init__(api_key, **kwargs)
-        self.client = AsyncOpenAI(
+        self.client = _async_openai_cls()(
             api_key=api_key or settings.OPENAI_TTS_API_KEY or settings.OPENAI_API_KEY or "",
             timeout=kwargs.get("timeout", 60.0),
             max_retries=kwargs.get("max_retries", 3)
         )
         self.default_voice = kwargs.get("default_voice", "alloy")
+        self.default_format = "mp3"
+        self.model = kwargs.get("model") or getattr(settings, "TTS_MODEL", None) or "tts-1"
     
     async def synthesize(
         self,
@@ -63,7 +76,7 @@ class OpenAITTSProvider(BaseTTSProvider):
             
             # 调用OpenAI TTS API
             response = await self.client.audio.speech.create(
-                model="tts-1",  # 或 tts-1-hd（更高质量）
+                model=self.model,  # tts-1 或 tts-1-hd（更高质量）
                 voice=voice,
                 input=text,
                 speed=speed,
@@ -82,6 +95,36 @@ class OpenAITTSProvider(BaseTTSProvider):
         except Exception as e:
             raise TTSError(f"OpenAI TTS API调用失败: {str(e)}")
     
+    async def synthesize_stream(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        speed: float = 1.0,
+        chunk_size: int = 16 * 1024,
+        **kwargs
+    ) -> AsyncIterator[bytes]:
+        """
+        流式合成：OpenAI 边合成边返回音频分块（with_streaming_response），首块到达即可开始播放。
+        """
+        if not 0.25 <= speed <= 4.0:
+            raise ValueError("语速必须在0.25-4.0之间")
+        voice = voice or self.default_voice
+        if voice not in self.SUPPORTED_VOICES:
+            raise ValueError(f"不支持的声音类型: {voice}，支持的类型: {self.SUPPORTED_VOICES}")
+        try:
+            async with self.client.audio.speech.with_streaming_response.create(
+                model=self.model,
+                voice=voice,
+                input=text,
+                speed=speed,
+                **kwargs
+            ) as response:
+                async for chunk in response.iter_bytes(chunk_size):
+                    if chunk:
+                        yield chunk
+        except Exception as e:
+            raise TTSError(f"OpenAI TTS 流式调用失败: {str(e)}")
+
     async def synthesize_to_file(
         self,
         text: str,
@@ -0,0 +1,265 @@
+"""
+simple-chat system prompt 分层组装：静态段预编译，每轮只填动态槽。
+
+一轮对话的 system prompt 由以下几层依次拼接：
+  1. 阶段模板（simple_chat_system.yaml 或 Prompt Lab 覆盖模板），其中
+     question_bank / basic_info / prior_block 是动态槽，其余按 (模板版本, phase, values_info,
+     rumination_step_addon, 覆盖模板, extra_goal_hint) 预编译成静态段
+  2. 动态尾部（rumination 负向探索注入、使命进度注入），为空则跳过
+  3. 静态后缀（输出协议，每个 phase 固定）
+
+预编译做法：用哨兵字符串代替动态槽渲染一次模板，再按哨兵切开，得到"静态段 / 槽名"交替序列；
+之后每轮只做字符串拼接。静态段在进程内复用同一份字节，
+同一来访者连续几轮的 system prompt 前缀保持稳定，DeepSeek / Kimi 的上下文缓存才能命中。
+
+哨兵替换只对"槽值原样插入"的模板成立：模板若对槽值做过滤或判断（{{ basic_info|trim }}、
+{{ prior_block|length }}、{% if 'x' in question_bank %}），哨兵渲染与真实渲染不一致。
+因此只对内置 simple_chat_system.yaml 预编译，且编译时与本轮真实渲染比对，不一致则该 key 退回整段渲染；
+Prompt Lab 覆盖模板（template_override）内容不受控，每轮整段渲染。
+
+prefix-stable ratio：首个非空动态槽之前的字符数 / 总字符数（按 phase 累计，见 prompt_assembly_metrics）。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Mapping, Optional, Sequence, Tuple
+
+from jinja2 import Environment
+
+# 每轮都可能变化的模板变量；其余上下文变量视为静态，参与预编译
+DYNAMIC_SLOTS: Tuple[str, ...] = ("question_bank", "basic_info", "prior_block")
+
+_SENTINEL_RE = re.compile("\x00slot:(\\w+)\x00")
+
+
+def _sentinel(name: str) -> str:
+    return f"\x00slot:{name}\x00"
+
+
+@dataclass(frozen=True)
+class PromptLayers:
+    """预编译结果：statics[0] slot[0] statics[1] slot[1] ... statics[-1]"""
+
+    statics: Tuple[str, ...]
+    slots: Tuple[str, ...]
+    # False：模板对槽值做了变换，哨兵切分不可信，每轮整段渲染
+    exact: bool = True
+
+    def fill(self, values: Mapping[str, str]) -> Tuple[str, int]:
+        """填充动态槽，返回 (文本, 稳定前缀字符数)。"""
+        out = [self.statics[0]]
+        stable = len(self.statics[0])
+        prefix_open = True
+        for name, static in zip(self.slots, self.statics[1:]):
+            value = values.get(name) or ""
+            if value:
+                prefix_open = False
+            out.append(value)
+            out.append(static)
+            if prefix_open:
+                stable += len(static)
+        return "".join(out), stable
+
+
+def compile_layers(
+    render: Callable[[Dict[str, Any]], str],
+    context: Mapping[str, Any],
+    present: FrozenSet[str],
+    verify: Optional[Mapping[str, str]] = None,
+) -> PromptLayers:
+    """
+    用哨兵代替 present 中的动态槽渲染一次并切分。
+    不在 present 里的槽按空串渲染：模板里 {% if 槽 %} 之类的分支与真实渲染一致（present 是 key 的一部分）。
+
+    verify：本轮真实槽值；给出时用它做一次真实渲染比对，哨兵切分结果与之不一致（模板对槽值做了过滤 /
+    判断）则返回 exact=False 的层，调用方应整段渲染。
+    """
+    ctx = dict(context)
+    for name in DYNAMIC_SLOTS:
+        ctx[name] = _sentinel(name) if name in present else ""
+    text = render(ctx)
+    pieces = _SENTINEL_RE.split(text)
+    statics, slots = tuple(pieces[0::2]), tuple(pieces[1::2])
+    if any("\x00" in static for static in statics):
+        # 哨兵被截断 / 改写：切分结果不可用
+        return PromptLayers(statics=(), slots=(), exact=False)
+    layers = PromptLayers(statics=statics, slots=slots)
+    if verify is not None:
+        real = render({**context, **{name: verify.get(name) or "" for name in DYNAMIC_SLOTS}})
+        if layers.fill(verify)[0] != real:
+            return PromptLayers(statics=(), slots=(), exact=False)
+    return layers
+
+
+@dataclass(frozen=True)
+class AssembledPrompt:
+    text: str
+    stable_prefix_chars: int
+
+    @property
+    def stable_ratio(self) -> float:
+        return self.stable_prefix_chars / len(self.text) if self.text else 1.0
+
+
+class PromptAssembler:
+    """预编译层的 LRU 缓存 + 前缀稳定度统计。"""
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self.max_entries = max_entries
+        self._layers: "OrderedDict[Hashable, PromptLayers]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def layers(self, key: Hashable, build: Callable[[], PromptLayers]) -> Tuple[PromptLayers, bool]:
+        """返回 (层, 是否命中)。exact=False 的层同样缓存，避免每轮重复比对。"""
+        with self._lock:
+            hit = self._layers.get(key)
+            if hit is not None:
+                self._layers.move_to_end(key)
+                return hit, True
+        built = build()
+        with self._lock:
+            self._layers[key] = built
+            self._layers.move_to_end(key)
+            while len(self._layers) > self.max_entries:
+                self._layers.popitem(last=False)
+        return built, False
+
+    def record(self, phase: str, prompt: AssembledPrompt, hit: bool) -> None:
+        with self._lock:
+            st = self._stats.setdefault(
+                phase or "unknown",
+                {"assemblies": 0, "compiled": 0, "stable_chars": 0, "total_chars": 0},
+            )
+            st["assemblies"] += 1
+            st["compiled"] += 0 if hit else 1
+            st["stable_chars"] += prompt.stable_prefix_chars
+            st["total_chars"] += len(prompt.text)
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            out: Dict[str, Dict[str, float]] = {}
+            for phase, st in self._stats.items():
+                ratio = st["stable_chars"] / st["total_chars"] if st["total_chars"] else 0.0
+                out[phase] = {**st, "prefix_stable_ratio": round(ratio, 4)}
+            return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._layers.clear()
+            self._stats.clear()
+
+
+_assembler = PromptAssembler()
+_override_env = Environment(trim_blocks=True, lstrip_blocks=True)
+_override_templates: "OrderedDict[str, Any]" = OrderedDict()
+
+
+def _override_render(template_override: str) -> Callable[[Dict[str, Any]], str]:
+    """覆盖模板只缓存 Jinja 编译结果，不做分层预编译。"""
+    digest = hashlib.sha1(template_override.encode("utf-8")).hexdigest()
+    tpl = _override_templates.get(digest)
+    if tpl is None:
+        tpl = _override_env.from_string(template_override)
+        _override_templates[digest] = tpl
+        while len(_override_templates) > 32:
+            _override_templates.popitem(last=False)
+    return lambda ctx: tpl.render(**ctx)
+
+
+def _full_render(
+    render: Callable[[Dict[str, Any]], str],
+    static_ctx: Mapping[str, Any],
+    slot_values: Mapping[str, str],
+    hint: str,
+) -> Tuple[str, int]:
+    """整段渲染；稳定前缀无法确定，有非空动态槽时按 0 计。"""
+    body = render({**static_ctx, **slot_values})
+    if hint:
+        body = f"{body}\n\n[管理员调试目标补充]\n{hint}"
+    return body, 0 if any(slot_values.values()) else len(body)
+
+
+def assemble_simple_chat_system_prompt(
+    phase: str,
+    *,
+    question_bank: str = "",
+    basic_info: str = "",
+    prior_block: str = "",
+    values_info: str = "",
+    rumination_step_addon: str = "",
+    template_override: Optional[str] = None,
+    extra_goal_hint: str = "",
+    dynamic_tail: Sequence[str] = (),
+    static_suffix: str = "",
+) -> AssembledPrompt:
+    """
+    组装 simple-chat system prompt（与 _build_system_prompt 的逐段拼接结果一致）。
+
+    dynamic_tail：已带好分隔符的动态尾部段（空串跳过）；static_suffix：固定后缀（输出协议）。
+    """
+    from app.domain.prompts.loader import _get_loader
+
+    static_ctx = {
+        "phase": phase,
+        "values_info": values_info,
+        "rumination_step_addon": rumination_step_addon,
+    }
+    slot_values = {
+        "question_bank": question_bank,
+        "basic_info": basic_info,
+        "prior_block": prior_block,
+    }
+    present = frozenset(k for k, v in slot_values.items() if v)
+    hint = (extra_goal_hint or "").strip()
+
+    if (template_override or "").strip():
+        body, stable = _full_render(
+            _override_render(template_override), static_ctx, slot_values, hint
+        )
+        hit = False
+    else:
+        loader = _get_loader()
+        source = ("simple_chat_system", loader.template_version("simple_chat_system"))
+
+        def render(ctx: Dict[str, Any]) -> str:
+            return loader.render("simple_chat_system", ctx)
+
+        key = (source, phase, values_info, rumination_step_addon, hint, present)
+
+        def build() -> PromptLayers:
+            layers = compile_layers(render, static_ctx, present, verify=slot_values)
+            if hint and layers.exact:
+                tail = f"{layers.statics[-1]}\n\n[管理员调试目标补充]\n{hint}"
+                layers = PromptLayers(statics=layers.statics[:-1] + (tail,), slots=layers.slots)
+            return layers
+
+        layers, hit = _assembler.layers(key, build)
+        if layers.exact:
+            body, stable = layers.fill(slot_values)
+        else:
+            body, stable = _full_render(render, static_ctx, slot_values, hint)
+    tail = "".join(seg for seg in dynamic_tail if seg)
+    text = f"{body}{tail}{static_suffix}"
+    if stable == len(body) and not tail:
+        # 全程没有非空动态内容：固定后缀也算稳定前缀
+        stable = len(text)
+    prompt = AssembledPrompt(text=text, stable_prefix_chars=stable)
+    _assembler.record(phase, prompt, hit)
+    return prompt
+
+
+def prompt_assembly_metrics() -> Dict[str, Dict[str, float]]:
+    """{phase: {assemblies, compiled, stable_chars, total_chars, prefix_stable_ratio}}"""
+    return _assembler.metrics()
+
+
+def reset_prompt_assembly() -> None:
+    """清空预编译缓存与统计（测试用）。"""
+    _assembler.clear()
+    _override_templates.clear()
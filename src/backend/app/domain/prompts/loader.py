@@ -11,11 +11,13 @@
 - 用户写提示词时不需要考虑 YAML 转义问题
 """
 import os
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import yaml
 from jinja2 import Environment, FileSystemLoader
 
+from app.utils.cache_tiers import stat_signature
+
 
 class DomainPromptLoader:
     def __init__(self, templates_dir: Optional[str] = None):
@@ -27,22 +29,41 @@ class DomainPromptLoader:
             trim_blocks=True,
             lstrip_blocks=True,
         )
+        self._compiled_cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
 
-    def render(self, name: str, context: Optional[Dict[str, Any]] = None) -> str:
-        context = context or {}
+    def _compiled(self, name: str):
+        """
+        解析 + 编译后的 Jinja2 模板，按文件 (mtime, size) 缓存：
+        每次渲染只需一次 stat，不再重复读文件 / YAML 解析 / 模板编译。
+        """
         template_path = os.path.join(self.templates_dir, f"{name}.yaml")
+        version = stat_signature(os.stat(template_path))
+        hit = self._compiled_cache.get(name)
+        if hit is not None and hit[0] == version:
+            return hit[1]
 
         # 1. 先用 YAML 解析模板文件（此时 Jinja2 变量还是原样）
         with open(template_path, 'r', encoding='utf-8') as f:
             yaml_content = f.read()
         data = yaml.safe_load(yaml_content)
 
-        if not data or 'prompt' not in data:
-            return ""
+        # 2. 编译 prompt 字段；空模板记为 None
+        template = None
+        if data and 'prompt' in data:
+            template = self._jinja_env.from_string(data['prompt'])
+        self._compiled_cache[name] = (version, template)
+        return template
 
-        # 2. 再用 Jinja2 渲染 prompt 字段（插入动态内容）
-        prompt_template = data['prompt']
-        template = self._jinja_env.from_string(prompt_template)
+    def template_version(self, name: str) -> Tuple[int, int]:
+        """模板文件版本（mtime_ns, size），供上层缓存渲染结果时作为 key 的一部分。"""
+        return stat_signature(os.stat(os.path.join(self.templates_dir, f"{name}.yaml")))
+
+    def render(self, name: str, context: Optional[Dict[str, Any]] = None) -> str:
+        context = context or {}
+        template = self._compiled(name)
+        if template is None:
+            return ""
+        # 渲染 prompt 字段（插入动态内容）
         return template.render(**context)
 
 
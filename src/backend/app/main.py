@@ -6,10 +6,11 @@ import asyncio
 import logging
 import sys
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.middleware import AudioModeMiddleware, ErrorHandlerMiddleware
+from app.api.middleware import AudioModeMiddleware, ErrorHandlerMiddleware, MetricsMiddleware
 from app.api.v1 import admin_notifications  # 新增：通知邮件群发
 from app.api.v1 import chat_optimized  # 新增：优化的对话API
 from app.api.v1 import (  # 新增：简单模式激活与对话
@@ -80,11 +81,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 前端跨域读取 /simple-chat/history 的 ETag 做条件请求
+    expose_headers=["ETag"],
 )
 
 # 添加自定义中间件
 app.add_middleware(ErrorHandlerMiddleware)
 app.add_middleware(AudioModeMiddleware)
+if settings.METRICS_ENABLED:
+    # 最外层：耗时包含其余中间件
+    app.add_middleware(MetricsMiddleware)
 
 _recycle_cleanup_task: asyncio.Task | None = None
 
@@ -166,6 +172,87 @@ async def _recover_notification_tasks():
         logging.getLogger(__name__).warning("notification recover schedule failed: %s", e)
 
 
+@app.on_event("startup")
+async def _start_post_turn_worker():
+    """启动 simple-chat 轮次后置任务 worker（含上次进程遗留的未完成任务）。"""
+    try:
+        from app.utils.post_turn_jobs import get_post_turn_worker
+
+        get_post_turn_worker().start()
+    except Exception as e:
+        logging.getLogger(__name__).warning("post-turn worker start failed: %s", e)
+
+
+@app.on_event("shutdown")
+async def _stop_post_turn_worker():
+    try:
+        from app.utils.post_turn_jobs import get_post_turn_worker
+
+        await get_post_turn_worker().stop()
+    except Exception as e:
+        logging.getLogger(__name__).warning("post-turn worker stop failed: %s", e)
+
+
+_knowledge_watch_task: asyncio.Task | None = None
+
+
+@app.on_event("startup")
+async def _start_knowledge_watch():
+    """预热进程级知识库快照，并在后台检查题库 / CSV 变更。"""
+    global _knowledge_watch_task
+    from app.core.knowledge.snapshot import watch_knowledge_sources
+
+    _knowledge_watch_task = asyncio.create_task(watch_knowledge_sources())
+
+
+@app.on_event("shutdown")
+async def _stop_knowledge_watch():
+    global _knowledge_watch_task
+    if _knowledge_watch_task and not _knowledge_watch_task.done():
+        _knowledge_watch_task.cancel()
+    _knowledge_watch_task = None
+
+
+_event_loop_lag_task: asyncio.Task | None = None
+
+
+@app.on_event("startup")
+async def _start_event_loop_lag_monitor():
+    global _event_loop_lag_task
+    interval = float(settings.METRICS_EVENT_LOOP_LAG_INTERVAL or 0)
+    if settings.METRICS_ENABLED and interval > 0:
+        from app.utils.metrics import event_loop_lag_monitor
+
+        _event_loop_lag_task = asyncio.create_task(event_loop_lag_monitor(interval))
+
+
+@app.on_event("shutdown")
+async def _stop_event_loop_lag_monitor():
+    global _event_loop_lag_task
+    if _event_loop_lag_task and not _event_loop_lag_task.done():
+        _event_loop_lag_task.cancel()
+    _event_loop_lag_task = None
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(authorization: str | None = Header(default=None)):
+    """进程内指标（Prometheus 文本格式）"""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = settings.METRICS_TOKEN
+    if not token:
+        # 未配置 token 时仅在 DEBUG 下开放，生产环境不暴露匿名指标
+        if not settings.DEBUG:
+            raise HTTPException(status_code=404, detail="Not Found")
+    elif authorization != f"Bearer {token}":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    from app.utils.metrics import render_metrics
+
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.get("/")
 async def root():
     """根路径"""
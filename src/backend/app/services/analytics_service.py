@@ -2,6 +2,7 @@
 数据分析服务：埋点记录与 Admin 统计聚合
 """
 
+import asyncio
 import json
 import logging
 from datetime import datetime, timezone
@@ -15,9 +16,12 @@ from app.models.database import AsyncSessionLocal
 from app.models.session import Session
 from app.models.user import User
 from app.utils.data_paths import get_debug_logs_dir, get_logs_dir, get_project_data_dir
+from app.utils.debug_log_index import get_debug_log_index
 from app.utils.helpers import parse_iso_to_utc
+from app.utils import storage_codec
 from app.utils.report_registry import ReportRegistry
 from app.utils.simple_activation_manager import get_simple_base_dir
+from app.utils.storage_codec import CONVERSATION_SCHEMA
 
 logger = logging.getLogger(__name__)
 
@@ -294,7 +298,9 @@ class AnalyticsService:
             # 遍历该 session 下所有对话 JSON 文件
             for conv_file in simple_dir.glob("*.json"):
                 try:
-                    data = json.loads(conv_file.read_text(encoding="utf-8"))
+                    data = CONVERSATION_SCHEMA.loads(
+                        conv_file.read_text(encoding="utf-8"), "conversation"
+                    )
                 except (json.JSONDecodeError, OSError):
                     continue
                 messages = data.get("messages") or []
@@ -481,7 +487,9 @@ class AnalyticsService:
         try:
             activations_file = get_simple_base_dir() / "activations.json"
             if activations_file.is_file():
-                raw = json.loads(activations_file.read_text(encoding="utf-8") or "{}")
+                raw = storage_codec.loads(
+                    activations_file.read_text(encoding="utf-8") or "{}", "activations"
+                )
                 today = datetime.now(timezone.utc).date()
                 for rec in (raw or {}).values():
                     created = (rec or {}).get("created_at")
@@ -637,10 +645,7 @@ class AnalyticsService:
             "overview": data,
         }
         cache_file = AnalyticsService.get_dashboard_cache_file()
-        cache_file.write_text(
-            json.dumps(payload, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
+        cache_file.write_text(storage_codec.dumps(payload, "dashboard_cache"), encoding="utf-8")
         return payload
 
     @staticmethod
@@ -649,7 +654,9 @@ class AnalyticsService:
         if not cache_file.is_file():
             return await AnalyticsService.sync_dashboard_overview_to_static()
         try:
-            raw = json.loads(cache_file.read_text(encoding="utf-8") or "{}")
+            raw = storage_codec.loads(
+                cache_file.read_text(encoding="utf-8") or "{}", "dashboard_cache"
+            )
             if "overview" not in raw:
                 return await AnalyticsService.sync_dashboard_overview_to_static()
             return raw
@@ -818,7 +825,9 @@ class AnalyticsService:
                     ):
                         continue
                     try:
-                        data = json.loads(conv_file.read_text(encoding="utf-8"))
+                        data = CONVERSATION_SCHEMA.loads(
+                            conv_file.read_text(encoding="utf-8"), "conversation"
+                        )
                     except (json.JSONDecodeError, OSError):
                         continue
                     messages = data.get("messages") or []
@@ -903,7 +912,7 @@ class AnalyticsService:
         try:
             act_file = get_simple_base_dir() / "activations.json"
             if act_file.is_file():
-                raw = json.loads(act_file.read_text(encoding="utf-8"))
+                raw = storage_codec.loads(act_file.read_text(encoding="utf-8"), "activations")
                 for code, rec in (raw or {}).items():
                     sid = (
                         rec.get("session_id")
@@ -944,7 +953,7 @@ class AnalyticsService:
             try:
                 act_file = get_simple_base_dir() / "activations.json"
                 if act_file.is_file():
-                    raw = json.loads(act_file.read_text(encoding="utf-8"))
+                    raw = storage_codec.loads(act_file.read_text(encoding="utf-8"), "activations")
                     code = session_id.strip().upper()
                     for c, rec in (raw or {}).items():
                         if (c or "").upper() == code:
@@ -997,48 +1006,31 @@ class AnalyticsService:
     @staticmethod
     async def get_session_conversation_detail(session_id: str) -> Optional[Dict[str, Any]]:
         """获取 session 完整对话：优先 runs.jsonl，否则从 data/simple 读取"""
-        # 1. 尝试 data/debug_logs/{session_id}.jsonl
-        debug_path = get_debug_logs_dir() / f"{session_id}.jsonl"
-        if debug_path.is_file():
+        # 1/2. runs 日志：按 session 索引定位（data/debug_logs 优先，其次 logs/{user_id}/{session_id}）
+        try:
+            lines = await asyncio.to_thread(get_debug_log_index().read_primary, session_id)
+        except ValueError:
+            lines = None
+        if lines is not None:
             entries = []
-            with open(debug_path, "r", encoding="utf-8") as f:
-                for i, line in enumerate(f):
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        entries.append({"log_index": i, "entry": json.loads(line)})
-                    except json.JSONDecodeError:
-                        entries.append({"log_index": i, "entry": {"raw": line[:500]}})
+            for i, raw in lines:
+                try:
+                    entries.append({"log_index": i, "entry": json.loads(raw)})
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    entries.append(
+                        {"log_index": i, "entry": {"raw": raw.decode("utf-8", "replace")[:500]}}
+                    )
             return {"source": "runs", "session_id": session_id, "turns": entries}
 
-        # 2. 尝试 logs/{user_id}/{session_id}/runs.jsonl
-        logs_root = get_logs_dir()
-        if logs_root.is_dir():
-            for user_dir in logs_root.iterdir():
-                if not user_dir.is_dir():
-                    continue
-                runs_file = user_dir / session_id / "runs.jsonl"
-                if runs_file.is_file():
-                    entries = []
-                    with open(runs_file, "r", encoding="utf-8") as f:
-                        for i, line in enumerate(f):
-                            line = line.strip()
-                            if not line:
-                                continue
-                            try:
-                                entries.append({"log_index": i, "entry": json.loads(line)})
-                            except json.JSONDecodeError:
-                                entries.append({"log_index": i, "entry": {"raw": line[:500]}})
-                    return {"source": "runs", "session_id": session_id, "turns": entries}
-
         # 3. 尝试 data/simple/{session_id}/
         simple_dir = get_simple_base_dir() / session_id
         if simple_dir.is_dir():
             conversations: Dict[str, List[Dict]] = {}
             for conv_file in simple_dir.glob("*.json"):
                 try:
-                    data = json.loads(conv_file.read_text(encoding="utf-8"))
+                    data = CONVERSATION_SCHEMA.loads(
+                        conv_file.read_text(encoding="utf-8"), "conversation"
+                    )
                     conversations[conv_file.stem] = data.get("messages", [])
                 except (json.JSONDecodeError, OSError):
                     conversations[conv_file.stem] = []
@@ -19,14 +19,18 @@
 
 from __future__ import annotations
 
+import io
 import json
 import logging
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+from app.utils.export_fragment_cache import content_digest, fragment_key, get_export_fragment_cache
 from app.utils.report_registry import STEP_IDS, ReportRegistry
 from app.utils.helpers import parse_iso_to_utc
 from app.utils.rumination_export import (
+    PREREQUISITE_PHASES,
     build_rumination_tables,
     build_summary,
     load_raw_rumination_progress,
@@ -73,6 +77,25 @@ TOKEN_FIELDS = (
 SESSION_GAP_MAX_SECONDS = 1800
 
 
+class _MdBuffer:
+    """按行写入的文本缓冲（io.StringIO），渲染时直接流式写入，不再累积行列表再 join。"""
+
+    __slots__ = ("_buf",)
+
+    def __init__(self) -> None:
+        self._buf = io.StringIO()
+
+    def line(self, text: str = "") -> None:
+        self._buf.write(text)
+        self._buf.write("\n")
+
+    def write(self, text: str) -> None:
+        self._buf.write(text)
+
+    def getvalue(self) -> str:
+        return self._buf.getvalue()
+
+
 class BatchExportService:
     """批量导出服务：按 report 聚合各 phase 数据，产出 raw JSON + 纯净 Markdown + 统计。"""
 
@@ -105,25 +128,26 @@ class BatchExportService:
 
         files: List[Tuple[str, bytes]] = []
 
-        # 解析每个 step 实际要导出的 session（selected 优先，否则 session_ids 最后一个）
-        phase_sessions: List[Tuple[str, int, str, bool]] = []  # (step_id, seq, session_id, is_selected)
-        seq = 0
-        for step_id in STEP_IDS:
-            step = record.get("steps", {}).get(step_id) or {}
-            session_ids = step.get("session_ids") or []
-            selected = step.get("selected_session_id")
-            chosen = self._pick_session(selected, session_ids)
-            if not chosen:
-                continue
-            seq += 1
-            phase_sessions.append((step_id, seq, chosen, bool(selected)))
+        phase_sessions = self._phase_sessions(record)
+
+        # rumination 表格既是产物 4，也是 rumination 章节的渲染输入，只构建一次
+        rumination_tables = build_rumination_tables(report_id, registry=self.registry)
+
+        # 每个 phase 源文件只读一次：按内容哈希命中缓存则跳过解析与渲染
+        digests: Dict[Path, Optional[str]] = {}
+        fragments: List[Optional[dict]] = [
+            self._phase_fragment(
+                report_id, record, step_id, session_id, is_selected, rumination_tables, digests
+            )
+            for step_id, _, session_id, is_selected in phase_sessions
+        ]
 
         # —— 产物 1：各 phase 完整 JSON 源文件 ——
         # 用于统计的中间结果
         per_phase_stats: List[dict] = []
-        for step_id, _, session_id, is_selected in phase_sessions:
-            raw = self._load_step_session_json(report_id, step_id, session_id)
-            if raw is None:
+        for (step_id, _, session_id, is_selected), fragment in zip(phase_sessions, fragments):
+            inner_path = f"raw/{step_id}__{session_id}.json"
+            if fragment is None:
                 raw = {
                     "report_id": report_id,
                     "step_id": step_id,
@@ -133,28 +157,18 @@ class BatchExportService:
                 per_phase_stats.append(
                     self._empty_phase_stat(step_id, session_id, is_selected, missing=True)
                 )
+                raw_text = json.dumps(raw, ensure_ascii=False, indent=2)
+                files.append((inner_path, raw_text.encode("utf-8")))
             else:
-                raw.setdefault("report_id", report_id)
-                raw.setdefault("report_activation_code", record.get("activation_code"))
-                raw.setdefault("report_user_id", record.get("user_id"))
-                raw.setdefault(
-                    "report_anchor_summary",
-                    (record.get("steps", {}).get(step_id) or {}).get("anchor_summary"),
-                )
-                raw.setdefault("report_final_conclusion", record.get("final_conclusion"))
-                raw.setdefault("report_step_is_selected", is_selected)
-                per_phase_stats.append(
-                    self._compute_phase_stat(step_id, session_id, is_selected, raw)
-                )
-
-            inner_path = f"raw/{step_id}__{session_id}.json"
-            files.append((inner_path, json.dumps(raw, ensure_ascii=False, indent=2).encode("utf-8")))
+                per_phase_stats.append(dict(fragment["stat"]))
+                files.append((inner_path, fragment["raw_json"].encode("utf-8")))
 
         # —— 产物 2：纯净 Markdown ——
         md_content = self._build_clean_markdown(
             report_id=report_id,
             record=record,
             phase_sessions=phase_sessions,
+            fragments=fragments,
         )
         ext = "md" if fmt_norm == "md" else "txt"
         files.append((f"report_{report_id}.{ext}", md_content.encode("utf-8")))
@@ -164,7 +178,6 @@ class BatchExportService:
         files.append(("stats.json", json.dumps(stats, ensure_ascii=False, indent=2).encode("utf-8")))
 
         # —— 产物 4：rumination 表格 JSON（结构化 step1~7 表格 + 前置 keywords） ——
-        rumination_tables = build_rumination_tables(report_id, registry=self.registry)
         files.append((
             "rumination_tables.json",
             json.dumps(rumination_tables, ensure_ascii=False, indent=2).encode("utf-8"),
@@ -187,10 +200,149 @@ class BatchExportService:
 
         return files
 
+    # ------------------------------------------------------------------
+    # phase 片段（源文件 -> md 片段 + 统计 + raw 产物，按内容哈希缓存）
+    # ------------------------------------------------------------------
+
+    def _file_digest(self, path: Path, digests: Dict[Path, Optional[str]]) -> Optional[str]:
+        """源文件内容哈希（同一次导出内每个文件只读一次）；不存在返回 None。"""
+        if path not in digests:
+            try:
+                digests[path] = content_digest(path.read_bytes()) if path.is_file() else None
+            except OSError:
+                digests[path] = None
+        return digests[path]
+
+    def _rumination_dependencies(
+        self,
+        report_id: str,
+        record: dict,
+        digests: Dict[Path, Optional[str]],
+    ) -> Dict[str, Optional[str]]:
+        """rumination 章节依赖的其他文件：rumination_progress.json + 4 个前置 phase 的源文件。"""
+        deps: Dict[str, Optional[str]] = {
+            "rumination_progress": self._file_digest(
+                self.registry.reports_root / report_id / "rumination_progress.json", digests
+            ),
+        }
+        # 与 rumination_export.build_prerequisites 的选会话规则保持一致
+        for phase in PREREQUISITE_PHASES:
+            step = (record.get("steps") or {}).get(phase) or {}
+            session_ids = step.get("session_ids") or []
+            chosen = step.get("selected_session_id") or (session_ids[-1] if session_ids else None)
+            if not chosen:
+                deps[phase] = None
+                continue
+            path = self.registry.get_step_session_file(report_id, phase, chosen)
+            deps[phase] = f"{path.name}:{self._file_digest(path, digests)}"
+        return deps
+
+    def _phase_fragment(
+        self,
+        report_id: str,
+        record: dict,
+        step_id: str,
+        session_id: str,
+        is_selected: bool,
+        rumination_tables: dict,
+        digests: Dict[Path, Optional[str]],
+    ) -> Optional[dict]:
+        """
+        单个 phase 的导出片段：``{"body", "stat", "raw_json"}``。
+        body 为该 phase 标题之后的 md/txt 正文；源文件缺失或无法解析返回 None。
+        """
+        path = self.registry.get_step_session_file(report_id, step_id, session_id)
+        try:
+            data = path.read_bytes() if path.is_file() else None
+        except OSError:
+            data = None
+        if data is None:
+            return None
+        digests[path] = content_digest(data)
+
+        cache = get_export_fragment_cache()
+        key = None
+        if cache is not None:
+            parts = {
+                "report_id": report_id,
+                "step_id": step_id,
+                "session_id": session_id,
+                "is_selected": is_selected,
+                "activation_code": record.get("activation_code"),
+                "user_id": record.get("user_id"),
+                "anchor_summary": (record.get("steps", {}).get(step_id) or {}).get(
+                    "anchor_summary"
+                ),
+                "final_conclusion": record.get("final_conclusion"),
+                "source": digests[path],
+            }
+            if step_id == "rumination":
+                parts["deps"] = self._rumination_dependencies(report_id, record, digests)
+            key = fragment_key(parts)
+            hit = cache.get(key)
+            if hit is not None:
+                return hit
+
+        try:
+            raw = json.loads(data.decode("utf-8") or "{}")
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            logger.warning("批量导出：源 JSON 解析失败: %s err=%s", path, e)
+            return None
+
+        out = _MdBuffer()
+        if step_id == "rumination":
+            # rumination 走特殊渲染：前置结论 + 每个 step 的（表格 + 对话切片）
+            self._render_rumination_md(out, rumination_tables, raw)
+        else:
+            # 其他 phase：结论 + 完整对话
+            conclusion_text = self._extract_phase_conclusion(raw)
+            if conclusion_text:
+                out.line("### 结论")
+                out.line()
+                out.line(conclusion_text)
+                out.line()
+            out.line("### 对话记录")
+            out.line()
+            self._render_dialogue_md(out, raw.get("messages") or [])
+
+        raw.setdefault("report_id", report_id)
+        raw.setdefault("report_activation_code", record.get("activation_code"))
+        raw.setdefault("report_user_id", record.get("user_id"))
+        raw.setdefault(
+            "report_anchor_summary",
+            (record.get("steps", {}).get(step_id) or {}).get("anchor_summary"),
+        )
+        raw.setdefault("report_final_conclusion", record.get("final_conclusion"))
+        raw.setdefault("report_step_is_selected", is_selected)
+
+        fragment = {
+            "body": out.getvalue(),
+            "stat": self._compute_phase_stat(step_id, session_id, is_selected, raw),
+            "raw_json": json.dumps(raw, ensure_ascii=False, indent=2),
+        }
+        if key is not None:
+            cache.put(key, fragment)
+        return fragment
+
     # ------------------------------------------------------------------
     # 会话选取
     # ------------------------------------------------------------------
 
+    def _phase_sessions(self, record: dict) -> List[Tuple[str, int, str, bool]]:
+        """解析每个 step 实际要导出的 session：``[(step_id, seq, session_id, is_selected), ...]``。"""
+        phase_sessions: List[Tuple[str, int, str, bool]] = []
+        seq = 0
+        for step_id in STEP_IDS:
+            step = record.get("steps", {}).get(step_id) or {}
+            session_ids = step.get("session_ids") or []
+            selected = step.get("selected_session_id")
+            chosen = self._pick_session(selected, session_ids)
+            if not chosen:
+                continue
+            seq += 1
+            phase_sessions.append((step_id, seq, chosen, bool(selected)))
+        return phase_sessions
+
     @staticmethod
     def _pick_session(selected: Optional[str], session_ids: List[str]) -> Optional[str]:
         """优先 selected；否则取 session_ids 最后一个（最新会话）；都没有返回 None。"""
@@ -395,82 +547,55 @@ class BatchExportService:
     # Markdown
     # ------------------------------------------------------------------
 
-    def _load_step_session_json(self, report_id: str, step_id: str, session_id: str) -> Optional[dict]:
-        """读取 report 目录下 {step_id}__{session_id}.json 源文件。"""
-        file_path = self.registry.get_step_session_file(report_id, step_id, session_id)
-        if not file_path.is_file():
-            return None
-        try:
-            return json.loads(file_path.read_text(encoding="utf-8") or "{}")
-        except (OSError, json.JSONDecodeError) as e:
-            logger.warning("批量导出：源 JSON 解析失败: %s err=%s", file_path, e)
-            return None
-
     def _build_clean_markdown(
         self,
         report_id: str,
         record: dict,
         phase_sessions: List[Tuple[str, int, str, bool]],
+        fragments: List[Optional[dict]],
     ) -> str:
-        """生成纯净 Markdown：报告头 + 每个 phase 的「结论 + 对话」。"""
+        """生成纯净 Markdown：报告头 + 每个 phase 的「结论 + 对话」（phase 正文取自片段）。"""
         now_str = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S") + " UTC"
-        lines: List[str] = []
-        lines.append(f"# 寻录探索报告 - {report_id}")
-        lines.append("")
-        lines.append(f"- 用户ID: {record.get('user_id') or ''}")
-        lines.append(f"- 激活码: {record.get('activation_code') or ''}")
-        lines.append(f"- 报告状态: {record.get('status') or ''}")
-        lines.append(f"- 导出时间: {now_str}")
-        lines.append("")
+        out = _MdBuffer()
+        out.line(f"# 寻录探索报告 - {report_id}")
+        out.line()
+        out.line(f"- 用户ID: {record.get('user_id') or ''}")
+        out.line(f"- 激活码: {record.get('activation_code') or ''}")
+        out.line(f"- 报告状态: {record.get('status') or ''}")
+        out.line(f"- 导出时间: {now_str}")
+        out.line()
 
         final_conc = record.get("final_conclusion")
         if final_conc:
-            lines.append("## 报告最终结论")
-            lines.append("")
-            lines.append(self._stringify(final_conc))
-            lines.append("")
+            out.line("## 报告最终结论")
+            out.line()
+            out.line(self._stringify(final_conc))
+            out.line()
 
         if not phase_sessions:
-            lines.append("（本报告暂无已完成的探索阶段）")
-            return "\n".join(lines).rstrip() + "\n"
+            out.line("（本报告暂无已完成的探索阶段）")
+            return out.getvalue().rstrip() + "\n"
 
-        for step_id, seq, session_id, is_selected in phase_sessions:
+        for (step_id, seq, _, is_selected), fragment in zip(phase_sessions, fragments):
             label_cn = PHASE_LABEL_CN.get(step_id, step_id)
             title = f"## {seq}. {label_cn}（{step_id}）"
             if not is_selected:
                 # 标注该阶段为「进行中」（有会话但未确认选定）
                 title += "  ⚠️ 进行中（未确认）"
-            lines.append(title)
-            lines.append("")
+            out.line(title)
+            out.line()
 
-            raw = self._load_step_session_json(report_id, step_id, session_id)
-            if raw is None:
-                lines.append("> （该阶段对话源文件缺失）")
-                lines.append("")
+            if fragment is None:
+                out.line("> （该阶段对话源文件缺失）")
+                out.line()
                 continue
+            out.write(fragment["body"])
 
-            # rumination 走特殊渲染：前置结论 + 每个 step 的（表格 + 对话切片）
-            if step_id == "rumination":
-                self._render_rumination_md(lines, report_id, raw)
-                continue
+        return out.getvalue().rstrip() + "\n"
 
-            # 其他 phase：结论 + 完整对话
-            conclusion_text = self._extract_phase_conclusion(raw)
-            if conclusion_text:
-                lines.append("### 结论")
-                lines.append("")
-                lines.append(conclusion_text)
-                lines.append("")
-
-            lines.append("### 对话记录")
-            lines.append("")
-            self._render_dialogue_md(lines, raw.get("messages") or [])
-
-        return "\n".join(lines).rstrip() + "\n"
-
-    def _render_dialogue_md(self, lines: List[str], msgs: list) -> None:
-        """把消息列表渲染为 md 对话段落（就地追加到 lines）。"""
-        dialogue_lines: List[str] = []
+    def _render_dialogue_md(self, out: "_MdBuffer", msgs: list) -> None:
+        """把消息列表渲染为 md 对话段落（写入 out）。"""
+        wrote = False
         for m in msgs:
             if not isinstance(m, dict):
                 continue
@@ -484,13 +609,12 @@ class BatchExportService:
             if role == "conclusion_card":
                 continue
             speaker = ROLE_CN.get(role, role)
-            dialogue_lines.append(f"**{speaker}**：{text}")
-            dialogue_lines.append("")
-        if dialogue_lines:
-            lines.extend(dialogue_lines)
-        else:
-            lines.append("> （本阶段无对话记录）")
-            lines.append("")
+            out.line(f"**{speaker}**：{text}")
+            out.line()
+            wrote = True
+        if not wrote:
+            out.line("> （本阶段无对话记录）")
+            out.line()
 
     # rumination step 状态标注（md 用）
     _STEP_STATUS_MD = {
@@ -500,18 +624,16 @@ class BatchExportService:
         "not_reached": "— 未进行",
     }
 
-    def _render_rumination_md(self, lines: List[str], report_id: str, raw: dict) -> None:
+    def _render_rumination_md(self, out: "_MdBuffer", tables: dict, raw: dict) -> None:
         """渲染 rumination 章节：前置结论 + 每个 step（表格 + 对话切片）。
 
         rumination 全局结论不在此处（留在 md 顶部「报告最终结论」）。
         """
-        tables = build_rumination_tables(report_id, registry=self.registry)
-
         # —— 前置结论（4 phase keywords） ——
         prereq = tables.get("prerequisites") or {}
         if any(prereq.values()):
-            lines.append("### 前置结论")
-            lines.append("")
+            out.line("### 前置结论")
+            out.line()
             phase_label = {
                 "values": "价值观",
                 "strengths": "优势",
@@ -521,8 +643,8 @@ class BatchExportService:
             for ph in ("values", "strengths", "interests", "purpose"):
                 kws = prereq.get(ph) or []
                 if kws:
-                    lines.append(f"- {phase_label.get(ph, ph)}：{('、'.join(kws))}")
-            lines.append("")
+                    out.line(f"- {phase_label.get(ph, ph)}：{('、'.join(kws))}")
+            out.line()
 
         # —— step3 组合矩阵 / 讨论结论（若存在，放在 step3 之前作为元信息） ——
         combo_matrix = tables.get("combo_matrix")
@@ -541,68 +663,64 @@ class BatchExportService:
             status = sd.get("status") or "not_reached"
             row_count = sd.get("row_count", 0)
             status_cn = self._STEP_STATUS_MD.get(status, status)
-            title = f"### Step {step_no}（{row_count} 行，{status_cn}）"
-            lines.append(title)
-            lines.append("")
+            out.line(f"### Step {step_no}（{row_count} 行，{status_cn}）")
+            out.line()
 
             # 表格（submitted 有行才渲染）
             rows = sd.get("rows") or []
             cols = sd.get("columns") or []
             if rows and cols:
-                self._render_table_md(lines, cols, rows)
-                lines.append("")
+                self._render_table_md(out, cols, rows)
+                out.line()
 
             # step3 特殊：组合矩阵 + 讨论结论（仅 step3 且有数据时）
             if step_no == 3 and combo_matrix:
-                lines.append("**组合矩阵：**")
-                lines.append("")
+                out.line("**组合矩阵：**")
+                out.line()
                 self._render_table_md(
-                    lines,
+                    out,
                     ["combo_id", "passion_name", "strength_name"],
                     combo_matrix,
                 )
-                lines.append("")
+                out.line()
             if step_no == 3 and combo_conclusions:
-                lines.append("**组合讨论结论：**")
-                lines.append("")
-                lines.append(self._stringify(combo_conclusions))
-                lines.append("")
+                out.line("**组合讨论结论：**")
+                out.line()
+                out.line(self._stringify(combo_conclusions))
+                out.line()
 
             # 对话切片
-            lines.append("#### 对话记录")
-            lines.append("")
+            out.line("#### 对话记录")
+            out.line()
             step_msgs = sliced.get(sk) if not unified else None
             if unified:
                 # 老数据：首个有内容的 step 放完整对话，其余不再重复
                 if step_no == 1:
-                    lines.append("> 该会话为旧格式，对话未按步骤细分，完整对话如下：")
-                    lines.append("")
-                    self._render_dialogue_md(lines, unified)
+                    out.line("> 该会话为旧格式，对话未按步骤细分，完整对话如下：")
+                    out.line()
+                    self._render_dialogue_md(out, unified)
                 else:
-                    lines.append("> （完整对话见 Step 1）")
-                    lines.append("")
+                    out.line("> （完整对话见 Step 1）")
+                    out.line()
             elif step_msgs:
-                self._render_dialogue_md(lines, step_msgs)
+                self._render_dialogue_md(out, step_msgs)
             else:
-                lines.append("> （本步骤无对话记录）")
-                lines.append("")
+                out.line("> （本步骤无对话记录）")
+                out.line()
 
-    def _render_table_md(self, lines: List[str], columns: List[str], rows: List[dict]) -> None:
-        """把行数据渲染成 markdown 表格（就地追加到 lines）。
+    def _render_table_md(self, out: "_MdBuffer", columns: List[str], rows: List[dict]) -> None:
+        """把行数据渲染成 markdown 表格（写入 out）。
 
         长文本单元格内的换行替换为空格，避免破坏 md 表格格式。
         """
         if not columns or not rows:
             return
-        header = "| " + " | ".join(self._md_cell(c) for c in columns) + " |"
-        sep = "| " + " | ".join("---" for _ in columns) + " |"
-        lines.append(header)
-        lines.append(sep)
+        out.line("| " + " | ".join(self._md_cell(c) for c in columns) + " |")
+        out.line("| " + " | ".join("---" for _ in columns) + " |")
         for row in rows:
             if not isinstance(row, dict):
                 continue
-            cells = [self._md_cell(row.get(c)) for c in columns]
-            lines.append("| " + " | ".join(cells) + " |")
+            out.line("| " + " | ".join(self._md_cell(row.get(c)) for c in columns) + " |")
 
     @staticmethod
     def _md_cell(value) -> str:
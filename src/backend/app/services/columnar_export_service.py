@@ -0,0 +1,384 @@
+"""
+列式批量导出（admin 离线分析用）
+
+与 BatchExportService 的 md/txt zip 不同，这里把所选 report 的数据拆成三张表，
+按 phase / 日期分区写成列式文件，离线统计可以直接按列读取，不再用正则解析 Markdown：
+
+  - ``messages``   —— 每条消息一行：角色、时间、正文、字数、filter_step、token 消耗
+  - ``turns``      —— 每轮一行：按 conversation_stats_service.split_turns 的冻结规则切轮
+  - ``rumination`` —— rumination step1~7 提交的表格行与组合矩阵（行内容存 JSON 文本）
+
+目录布局（Hive 风格分区）::
+
+    manifest.json
+    {table}/phase={step_id}/date={YYYY-MM-DD}/part-0.{parquet|arrow|csv}
+
+文件格式：安装了 pyarrow 时默认 Parquet（也可选 Arrow IPC），否则回退纯 CSV。
+各表的列名与类型写在 manifest.json 中，CSV 读回时据此还原类型（见 decode_table）；
+CSV 中的空值写作 \\N（与 PostgreSQL / MySQL 的文本导出一致），与空字符串区分。
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import logging
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.services.batch_export_service import TOKEN_FIELDS, BatchExportService
+from app.services.conversation_stats_service import split_turns
+from app.utils.helpers import parse_iso_to_utc
+from app.utils.rumination_export import build_rumination_tables
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_FORMATS = ("auto", "parquet", "arrow", "csv")
+
+FILE_SUFFIX = {"parquet": "parquet", "arrow": "arrow", "csv": "csv"}
+
+# 无法确定日期的行归入该分区
+UNKNOWN_DATE = "unknown"
+
+# CSV 空值标记；恰为若干反斜杠加 N 的字符串值写出时多加一个反斜杠转义
+CSV_NULL = "\\N"
+_CSV_NULL_ESCAPED = re.compile(r"\\+N")
+
+# 列定义：(列名, 类型)，类型取 string / int / float / bool
+MESSAGE_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("report_id", "string"),
+    ("user_id", "string"),
+    ("activation_code", "string"),
+    ("step_id", "string"),
+    ("session_id", "string"),
+    ("is_selected", "bool"),
+    ("msg_index", "int"),
+    ("role", "string"),
+    ("created_at", "string"),
+    ("filter_step", "int"),
+    ("content", "string"),
+    ("chars", "int"),
+) + tuple((f, "int") for f in TOKEN_FIELDS)
+
+TURN_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("report_id", "string"),
+    ("user_id", "string"),
+    ("step_id", "string"),
+    ("session_id", "string"),
+    ("turn_index", "int"),
+    ("user_msg_index", "int"),
+    ("started_at", "string"),
+    ("ended_at", "string"),
+    ("duration_seconds", "float"),
+    ("status", "string"),
+)
+
+RUMINATION_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("report_id", "string"),
+    ("user_id", "string"),
+    ("kind", "string"),  # step_rows / combo_matrix
+    ("filter_step", "int"),
+    ("step_status", "string"),
+    ("row_index", "int"),
+    ("row_json", "string"),
+)
+
+TABLE_COLUMNS: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "messages": MESSAGE_COLUMNS,
+    "turns": TURN_COLUMNS,
+    "rumination": RUMINATION_COLUMNS,
+}
+
+
+def resolve_columnar_format(requested: Optional[str]) -> str:
+    """
+    把请求的格式解析为实际写出的格式。
+
+    Raises:
+        ValueError: 不支持的格式名
+    """
+    fmt = (requested or "auto").strip().lower()
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f"columnar_format 仅支持 {'/'.join(COLUMNAR_FORMATS)}")
+    if fmt == "csv":
+        return "csv"
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        if fmt != "auto":
+            logger.warning("列式导出：未安装 pyarrow，%s 回退为 csv", fmt)
+        return "csv"
+    return "parquet" if fmt == "auto" else fmt
+
+
+def _arrow_schema(columns: Sequence[Tuple[str, str]]):
+    import pyarrow as pa
+
+    types = {"string": pa.string(), "int": pa.int64(), "float": pa.float64(), "bool": pa.bool_()}
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+
+def encode_table(rows: List[Dict[str, Any]], columns: Sequence[Tuple[str, str]], fmt: str) -> bytes:
+    """把行写成单个列式文件（parquet / arrow / csv）。"""
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        writer.writerow([name for name, _ in columns])
+        for row in rows:
+            out = []
+            for name, kind in columns:
+                v = row.get(name)
+                if v is None:
+                    out.append(CSV_NULL)
+                elif kind == "bool":
+                    out.append("true" if v else "false")
+                elif isinstance(v, str) and _CSV_NULL_ESCAPED.fullmatch(v):
+                    out.append("\\" + v)
+                else:
+                    out.append(v)
+            writer.writerow(out)
+        return buf.getvalue().encode("utf-8")
+
+    import pyarrow as pa
+
+    schema = _arrow_schema(columns)
+    table = pa.Table.from_pylist(rows, schema=schema)
+    sink = io.BytesIO()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_file(sink, schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue()
+
+
+def decode_table(data: bytes, columns: Sequence[Tuple[str, str]], fmt: str) -> List[Dict[str, Any]]:
+    """encode_table 的逆操作；CSV 按列类型还原（\\N 与非字符串列的空串还原为 None）。"""
+    if fmt == "csv":
+        casts = {
+            "string": str,
+            "int": int,
+            "float": float,
+            "bool": lambda v: v == "true",
+        }
+        kinds = dict(columns)
+        rows: List[Dict[str, Any]] = []
+        for raw in csv.DictReader(io.StringIO(data.decode("utf-8"))):
+            row: Dict[str, Any] = {}
+            for name, value in raw.items():
+                kind = kinds.get(name, "string")
+                if value == CSV_NULL or (value == "" and kind != "string"):
+                    row[name] = None
+                elif kind == "string" and _CSV_NULL_ESCAPED.fullmatch(value):
+                    row[name] = value[1:]
+                else:
+                    row[name] = casts[kind](value)
+            rows.append(row)
+        return rows
+
+    import pyarrow as pa
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(pa.BufferReader(data))
+    else:
+        table = pa.ipc.open_file(pa.BufferReader(data)).read_all()
+    return table.to_pylist()
+
+
+def _date_of(ts: Any) -> str:
+    if not isinstance(ts, str) or not ts:
+        return UNKNOWN_DATE
+    try:
+        return parse_iso_to_utc(ts).date().isoformat()
+    except (ValueError, TypeError):
+        return UNKNOWN_DATE
+
+
+def _iso(dt: Optional[datetime]) -> Optional[str]:
+    return dt.isoformat() if dt is not None else None
+
+
+def _int_or_none(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+        return int(value)
+    return None
+
+
+class ColumnarExportService:
+    """按 report 收集 messages / turns / rumination 三张表，按 (phase, date) 分区写成列式文件。"""
+
+    def __init__(self, columnar_format: Optional[str] = "auto") -> None:
+        self.format = resolve_columnar_format(columnar_format)
+        self.batch = BatchExportService()
+
+    @property
+    def registry(self):
+        return self.batch.registry
+
+    async def collect_export(
+        self, report_ids: List[str]
+    ) -> Tuple[List[Tuple[str, bytes]], List[str]]:
+        """
+        收集多个 report 的列式导出文件。
+
+        Returns:
+            ``([(zip_inner_path, file_bytes), ...], skipped_report_ids)``；
+            全部 report 都不存在时文件列表为空。
+        """
+        # (table, phase, date) -> rows
+        partitions: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = defaultdict(list)
+        exported: List[str] = []
+        skipped: List[str] = []
+        for report_id in report_ids:
+            record = self.registry.get_report_by_id(report_id)
+            if not record:
+                logger.warning("列式导出：report 不存在，跳过: %s", report_id)
+                skipped.append(report_id)
+                continue
+            exported.append(report_id)
+            self._collect_report(report_id, record, partitions)
+
+        if not exported:
+            return [], skipped
+
+        suffix = FILE_SUFFIX[self.format]
+        files: List[Tuple[str, bytes]] = []
+        tables: Dict[str, dict] = {
+            name: {"columns": [list(c) for c in cols], "partitions": []}
+            for name, cols in TABLE_COLUMNS.items()
+        }
+        for (table, phase, date), rows in sorted(partitions.items()):
+            path = f"{table}/phase={phase}/date={date}/part-0.{suffix}"
+            files.append((path, encode_table(rows, TABLE_COLUMNS[table], self.format)))
+            tables[table]["partitions"].append(
+                {"path": path, "phase": phase, "date": date, "rows": len(rows)}
+            )
+
+        manifest = {
+            "format": self.format,
+            "exported_at": datetime.now(timezone.utc).isoformat(),
+            "reports": exported,
+            "skipped": skipped,
+            "tables": tables,
+        }
+        if self.format == "csv":
+            manifest["csv_null"] = CSV_NULL
+        files.insert(
+            0, ("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"))
+        )
+        return files, skipped
+
+    def _collect_report(
+        self,
+        report_id: str,
+        record: dict,
+        partitions: Dict[Tuple[str, str, str], List[Dict[str, Any]]],
+    ) -> None:
+        user_id = record.get("user_id")
+        rumination_date = UNKNOWN_DATE
+        phase_sessions = self.batch._phase_sessions(record)
+        for step_id, _, session_id, is_selected in phase_sessions:
+            path = self.registry.get_step_session_file(report_id, step_id, session_id)
+            try:
+                raw = (
+                    json.loads(path.read_text(encoding="utf-8") or "{}") if path.is_file() else None
+                )
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning("列式导出：源 JSON 解析失败: %s err=%s", path, e)
+                raw = None
+            msgs = [m for m in ((raw or {}).get("messages") or []) if isinstance(m, dict)]
+
+            for idx, m in enumerate(msgs):
+                created_at = m.get("created_at") or m.get("timestamp")
+                usage = m.get("token_usage") if isinstance(m.get("token_usage"), dict) else {}
+                row = {
+                    "report_id": report_id,
+                    "user_id": user_id,
+                    "activation_code": record.get("activation_code"),
+                    "step_id": step_id,
+                    "session_id": session_id,
+                    "is_selected": is_selected,
+                    "msg_index": idx,
+                    "role": m.get("role") or "unknown",
+                    "created_at": created_at if isinstance(created_at, str) else None,
+                    "filter_step": _int_or_none(m.get("filter_step")),
+                    "content": BatchExportService._content_to_text(m.get("content")),
+                }
+                row["chars"] = len(row["content"])
+                for f in TOKEN_FIELDS:
+                    row[f] = _int_or_none(usage.get(f))
+                date = _date_of(created_at)
+                partitions[("messages", step_id, date)].append(row)
+                if step_id == "rumination" and date != UNKNOWN_DATE:
+                    rumination_date = date
+
+            for n, turn in enumerate(split_turns(msgs)):
+                started = _iso(turn["started_at"])
+                partitions[("turns", step_id, _date_of(started))].append(
+                    {
+                        "report_id": report_id,
+                        "user_id": user_id,
+                        "step_id": step_id,
+                        "session_id": session_id,
+                        "turn_index": n,
+                        "user_msg_index": turn["user_index"],
+                        "started_at": started,
+                        "ended_at": _iso(turn["ended_at"]),
+                        "duration_seconds": turn["duration_seconds"],
+                        "status": turn["status"],
+                    }
+                )
+
+        if not any(step_id == "rumination" for step_id, *_ in phase_sessions):
+            return
+        tables = build_rumination_tables(report_id, registry=self.registry)
+        rows = partitions[("rumination", "rumination", rumination_date)]
+        base = {"report_id": report_id, "user_id": user_id}
+        for sk, sd in sorted((tables.get("steps") or {}).items(), key=lambda kv: int(kv[0])):
+            step_rows = [r for r in (sd.get("rows") or []) if isinstance(r, dict)]
+            status = sd.get("status")
+            if not step_rows:
+                # 没有行的 step 也保留一行，便于按状态统计
+                rows.append(
+                    {
+                        **base,
+                        "kind": "step_rows",
+                        "filter_step": int(sk),
+                        "step_status": status,
+                        "row_index": None,
+                        "row_json": None,
+                    }
+                )
+            for i, r in enumerate(step_rows):
+                rows.append(
+                    {
+                        **base,
+                        "kind": "step_rows",
+                        "filter_step": int(sk),
+                        "step_status": status,
+                        "row_index": i,
+                        "row_json": json.dumps(r, ensure_ascii=False),
+                    }
+                )
+        for i, r in enumerate(tables.get("combo_matrix") or []):
+            rows.append(
+                {
+                    **base,
+                    "kind": "combo_matrix",
+                    "filter_step": 3,
+                    "step_status": None,
+                    "row_index": i,
+                    "row_json": json.dumps(r, ensure_ascii=False),
+                }
+            )
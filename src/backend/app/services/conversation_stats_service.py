@@ -7,6 +7,8 @@
   （ExportService.collect_export_data），不经过 T1 导出文件的正则解析。
 - 离线部分（scripts/conversation_stats.py）：解析 T1 导出的 md/txt 文件，供批量/历史分析。
   两处的"切轮 + 时长计算"逻辑抽公共函数 compute_turn_stats_from_messages，保证一致。
+- 批量：compute_turn_stats_many 一次计算多个会话，安装 numpy 时走向量化实现
+  （app.services.turn_stats_vectorized），结果与逐个调用标量版逐位一致。
 
 【"一轮"界定规则（冻结）】
 1. 按"用户消息"切轮：每出现一条 role=user 的消息算一轮的开始。
@@ -24,6 +26,7 @@ import logging
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
+from app.config.settings import settings
 from app.services.export_service import ExportService
 from app.utils.report_registry import ReportRegistry, STEP_IDS
 
@@ -71,114 +74,153 @@ def _parse_timestamp(ts: Optional[str]) -> Optional[datetime]:
         return None
 
 
-def compute_turn_stats_from_messages(
-    messages: List[Dict[str, Any]],
-) -> Dict[str, Any]:
+def split_turns(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
-    从消息列表计算每轮时长统计（核心公共函数，在线/离线共用）。
+    按冻结的"一轮"规则把消息切成逐轮明细（统计与列式导出的 turns 表共用）。
 
     Args:
-        messages: 消息列表，每条含 role / created_at(或 timestamp) / content。
-                  消息顺序应按时间先后排列。
+        messages: 消息列表，每条含 role / created_at(或 timestamp)，按时间先后排列。
 
     Returns:
-        统计字典：
-        - turns: 计入时长的轮数
-        - total_seconds: 计入的总时长（秒）
-        - avg_seconds: 平均每轮时长（秒）
-        - skipped_no_ts: 因缺时间戳跳过的轮数
-        - skipped_long_turns: 因时长异常(>2h)跳过的轮数
-        - total_turns_seen: 实际识别到的 user 消息总数（含跳过的）
+        每条 user 消息一轮，按消息顺序：
+        - user_index: 该轮 user 消息在 messages 中的下标
+        - started_at / ended_at: 轮次起止时间（datetime；无法确定为 None）
+        - duration_seconds: 轮次时长（秒；无法确定为 None）
+        - duration_us: 轮次时长（整数微秒，汇总时用于精确累加；无法确定为 None）
+        - status: counted / skipped_no_ts / skipped_long / skipped_negative / no_end
     """
     # 按 created_at 或 timestamp 字段取时间戳
     def _get_ts(msg: Dict[str, Any]) -> Optional[str]:
         return msg.get("created_at") or msg.get("timestamp")
 
     # 第一步：识别所有 user 消息的时间戳，构成"轮次起点"列表
-    user_turn_starts: List[Tuple[int, datetime]] = []
-    skipped_no_ts = 0
+    turns: List[Dict[str, Any]] = []
+    timed: List[Dict[str, Any]] = []
     for idx, msg in enumerate(messages):
         role = (msg.get("role") or "").strip().lower()
         if role != "user":
             continue
         ts_str = _get_ts(msg)
         dt = _parse_timestamp(ts_str)
+        turn = {
+            "user_index": idx,
+            "started_at": dt,
+            "ended_at": None,
+            "duration_seconds": None,
+            "duration_us": None,
+        }
+        turns.append(turn)
         if dt is None:
             # 缺时间戳 -> 跳过该轮且 warning
-            skipped_no_ts += 1
+            turn["status"] = "skipped_no_ts"
             logger.warning("user 消息缺少有效时间戳，跳过该轮: idx=%s ts=%s", idx, ts_str)
             continue
-        user_turn_starts.append((idx, dt))
-
-    if not user_turn_starts:
-        return {
-            "turns": 0,
-            "total_seconds": 0.0,
-            "avg_seconds": 0.0,
-            "skipped_no_ts": skipped_no_ts,
-            "skipped_long_turns": 0,
-            "total_turns_seen": skipped_no_ts,
-        }
-
-    total_turns_seen = len(user_turn_starts) + skipped_no_ts
+        turn["status"] = "counted"
+        timed.append(turn)
 
     # 第二步：计算每轮时长
-    valid_durations: List[float] = []
-    skipped_long_turns = 0
-
-    for i, (idx, start_dt) in enumerate(user_turn_starts):
-        if i + 1 < len(user_turn_starts):
+    for i, turn in enumerate(timed):
+        idx, start_dt = turn["user_index"], turn["started_at"]
+        if i + 1 < len(timed):
             # 有下一轮 -> 时长 = 下一轮起点 - 本轮起点
-            _, next_dt = user_turn_starts[i + 1]
-            duration = (next_dt - start_dt).total_seconds()
+            end_dt: Optional[datetime] = timed[i + 1]["started_at"]
         else:
-            # 最后一轮 -> 用本轮最后一条 assistant 消息时间戳收尾
-            end_dt: Optional[datetime] = None
-            # 从当前 user 消息往后扫到下一个 user 消息（或列表末尾）之间的 assistant 消息
-            next_user_idx = (
-                user_turn_starts[i + 1][0] if i + 1 < len(user_turn_starts) else len(messages)
-            )
-            for j in range(idx, next_user_idx):
+            # 最后一轮 -> 用本轮之后最后一条有时间戳的 assistant 消息收尾
+            end_dt = None
+            for j in range(idx, len(messages)):
                 m = messages[j]
                 if (m.get("role") or "").strip().lower() == "assistant":
                     dt = _parse_timestamp(_get_ts(m))
                     if dt:
-                        end_dt = dt  # 取最后一条有时间戳的 assistant
+                        end_dt = dt
             if end_dt is None:
-                # 无 assistant 消息或无时间戳 -> 不计入时长（但轮数在 total_turns_seen 中已体现）
+                # 无 assistant 消息或无时间戳 -> 不计入时长（但计入 total_turns_seen）
+                turn["status"] = "no_end"
                 continue
-            duration = (end_dt - start_dt).total_seconds()
+        delta = end_dt - start_dt
+        duration = delta.total_seconds()
+        turn["ended_at"] = end_dt
+        turn["duration_seconds"] = duration
+        turn["duration_us"] = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
 
         # 异常时长过滤
         if duration > ABNORMAL_TURN_THRESHOLD_SECONDS:
-            skipped_long_turns += 1
+            turn["status"] = "skipped_long"
             logger.warning(
                 "单轮时长异常(>2h)，跳过: idx=%s duration=%.0f秒", idx, duration
             )
-            continue
-
         # 负时长（时钟回拨等）也跳过
-        if duration < 0:
-            skipped_long_turns += 1
+        elif duration < 0:
+            turn["status"] = "skipped_negative"
             logger.warning("单轮时长为负(时钟回拨?)，跳过: idx=%s duration=%.0f秒", idx, duration)
-            continue
 
-        valid_durations.append(duration)
+    return turns
+
+
+def compute_turn_stats_from_messages(
+    messages: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    从消息列表计算每轮时长统计（核心公共函数，在线/离线共用）。
 
-    turns = len(valid_durations)
-    total_seconds = sum(valid_durations) if valid_durations else 0.0
-    avg_seconds = (total_seconds / turns) if turns > 0 else 0.0
+    Args:
+        messages: 消息列表，每条含 role / created_at(或 timestamp) / content。
+                  消息顺序应按时间先后排列。
+
+    Returns:
+        统计字典：
+        - turns: 计入时长的轮数
+        - total_seconds: 计入的总时长（秒）
+        - avg_seconds: 平均每轮时长（秒）
+        - skipped_no_ts: 因缺时间戳跳过的轮数
+        - skipped_long_turns: 因时长异常(>2h)跳过的轮数
+        - total_turns_seen: 实际识别到的 user 消息总数（含跳过的）
+    """
+    turns = split_turns(messages)
+    valid_durations = [t["duration_us"] for t in turns if t["status"] == "counted"]
+    skipped_no_ts = sum(1 for t in turns if t["status"] == "skipped_no_ts")
+    skipped_long_turns = sum(
+        1 for t in turns if t["status"] in ("skipped_long", "skipped_negative")
+    )
+
+    # 按整数微秒累加再换算成秒：没有浮点累积误差，也与向量化实现逐位一致
+    count = len(valid_durations)
+    total_seconds = sum(valid_durations) / 1_000_000
+    avg_seconds = (total_seconds / count) if count > 0 else 0.0
 
     return {
-        "turns": turns,
+        "turns": count,
         "total_seconds": round(total_seconds, 2),
         "avg_seconds": round(avg_seconds, 2),
         "skipped_no_ts": skipped_no_ts,
         "skipped_long_turns": skipped_long_turns,
-        "total_turns_seen": total_turns_seen,
+        "total_turns_seen": len(turns),
     }
 
 
+def compute_turn_stats_many(
+    threads: List[List[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """
+    批量计算多个会话的每轮时长统计，结果与逐个调用 compute_turn_stats_from_messages 一致。
+
+    安装了 numpy 且 TURN_STATS_VECTORIZED 开启时走向量化实现
+    （app.services.turn_stats_vectorized），否则逐个计算。
+
+    Args:
+        threads: 会话列表，每个会话是按时间排列的消息列表
+
+    Returns:
+        与输入顺序对应的统计字典列表
+    """
+    if settings.TURN_STATS_VECTORIZED and threads:
+        from app.services import turn_stats_vectorized
+
+        if turn_stats_vectorized.HAS_NUMPY:
+            return turn_stats_vectorized.compute_turn_stats_batch(threads)
+    return [compute_turn_stats_from_messages(messages) for messages in threads]
+
+
 def _aggregate_phase_stats(
     per_phase: List[Dict[str, Any]],
 ) -> Dict[str, Any]:
@@ -263,9 +305,9 @@ class ConversationStatsService:
                 continue
             report_count += 1
             report_id = report.get("report_id") or ""
-            phase_stats = await self._collect_report_phase_stats(report_id)
-            all_phase_stats.extend(phase_stats)
-
+            # 逐 report 加载并批量计算，内存中只保留当前 report 的消息
+            phases = await self._load_report_phases(report_id)
+            all_phase_stats.extend(self._build_phase_stats(phases))
         aggregated = _aggregate_phase_stats(all_phase_stats)
         aggregated["per_phase"] = all_phase_stats
         aggregated["report_count"] = report_count
@@ -334,31 +376,42 @@ class ConversationStatsService:
         Returns:
             per_phase 统计列表，每项含 phase_id / phase_name / turns / avg_minutes 等
         """
-        result: List[Dict[str, Any]] = []
+        return self._build_phase_stats(await self._load_report_phases(report_id))
+
+    async def _load_report_phases(
+        self,
+        report_id: str,
+    ) -> List[Tuple[str, str, List[Dict[str, Any]]]]:
+        """
+        加载单个 report 各已完成 phase 的对话消息。
+
+        Returns:
+            [(step_id, session_id, messages), ...]，未完成 phase 跳过
+        """
+        result: List[Tuple[str, str, List[Dict[str, Any]]]] = []
         for step_id in STEP_IDS:
             session_id = self.registry.get_selected_session(report_id, step_id)
             if not session_id:
                 # 未完成 phase，跳过
                 continue
-            phase_stat = await self._compute_single_phase(
+            messages = await self._load_phase_messages(
                 report_id=report_id,
                 step_id=step_id,
                 session_id=session_id,
             )
-            result.append(phase_stat)
+            result.append((step_id, session_id, messages))
         return result
 
-    async def _compute_single_phase(
+    async def _load_phase_messages(
         self,
         report_id: str,
         step_id: str,
         session_id: str,
-    ) -> Dict[str, Any]:
+    ) -> List[Dict[str, Any]]:
         """
-        计算单个 phase（单个 session）的对话统计。
+        加载单个 phase（单个 session）的对话消息。
 
-        复用 ExportService.collect_export_data 加载对话历史，
-        再调 compute_turn_stats_from_messages 计算统计。
+        复用 ExportService.collect_export_data 加载对话历史，合并各 category 后按时间排序。
 
         Args:
             report_id: 报告 ID（用于查 user_id）
@@ -366,9 +419,8 @@ class ConversationStatsService:
             session_id: 会话 ID
 
         Returns:
-            单 phase 统计字典
+            消息列表；加载失败返回空列表
         """
-        phase_name = PHASE_LABEL_CN.get(step_id, step_id)
         # 取 user_id（record 中）
         record = self.registry.get_report_by_id(report_id)
         user_id = (record or {}).get("user_id") or ""
@@ -399,21 +451,38 @@ class ConversationStatsService:
                 step_id,
                 e,
             )
+        return messages
 
-        stats = compute_turn_stats_from_messages(messages)
-        avg_minutes = stats["avg_seconds"] / 60.0
-        total_minutes = stats["total_seconds"] / 60.0
-        return {
-            "phase_id": step_id,
-            "phase_name": phase_name,
-            "session_id": session_id,
-            "turns": stats["turns"],
-            "avg_seconds": stats["avg_seconds"],
-            "total_seconds": stats["total_seconds"],
-            "avg_minutes": round(avg_minutes, 1),
-            "total_minutes": round(total_minutes, 1),
-            "skipped_no_ts": stats["skipped_no_ts"],
-            "skipped_long_turns": stats["skipped_long_turns"],
-            "total_turns_seen": stats["total_turns_seen"],
-            "message_count": len(messages),
-        }
+    @staticmethod
+    def _build_phase_stats(
+        loaded: List[Tuple[str, str, List[Dict[str, Any]]]],
+    ) -> List[Dict[str, Any]]:
+        """
+        批量计算已加载 phase 的统计（compute_turn_stats_many）。
+
+        Args:
+            loaded: [(step_id, session_id, messages), ...]
+
+        Returns:
+            单 phase 统计字典列表，顺序与输入一致
+        """
+        all_stats = compute_turn_stats_many([messages for _, _, messages in loaded])
+        result: List[Dict[str, Any]] = []
+        for (step_id, session_id, messages), stats in zip(loaded, all_stats):
+            avg_minutes = stats["avg_seconds"] / 60.0
+            total_minutes = stats["total_seconds"] / 60.0
+            result.append({
+                "phase_id": step_id,
+                "phase_name": PHASE_LABEL_CN.get(step_id, step_id),
+                "session_id": session_id,
+                "turns": stats["turns"],
+                "avg_seconds": stats["avg_seconds"],
+                "total_seconds": stats["total_seconds"],
+                "avg_minutes": round(avg_minutes, 1),
+                "total_minutes": round(total_minutes, 1),
+                "skipped_no_ts": stats["skipped_no_ts"],
+                "skipped_long_turns": stats["skipped_long_turns"],
+                "total_turns_seen": stats["total_turns_seen"],
+                "message_count": len(messages),
+            })
+        return result
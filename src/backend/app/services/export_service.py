@@ -10,8 +10,7 @@ from typing import Dict, List, Optional
 from sqlalchemy import select
 
 from app.core.database import HistoryDB, UserDB
-from app.core.knowledge import KnowledgeLoader
-from app.domain.knowledge_config import get_knowledge_config
+from app.core.knowledge import SnapshotLoader
 from app.models.database import AsyncSessionLocal
 from app.utils.conversation_file_manager import ConversationFileManager
 
@@ -22,7 +21,7 @@ class ExportService:
     def __init__(self):
         """初始化导出服务"""
         self.conversation_manager = ConversationFileManager()
-        self.knowledge_loader = KnowledgeLoader(config=get_knowledge_config())
+        self.knowledge_loader = SnapshotLoader()
 
     async def collect_export_data(self, user_id: str, session_id: str) -> Dict:
         """
@@ -40,9 +39,10 @@ class ExportService:
             history_db = HistoryDB(db)
 
             # 获取用户信息
-            user = await user_db.get_user_by_id(user_id)
-            profile = await user_db.get_user_profile(user_id)
-            work_histories = await user_db.get_user_work_histories(user_id)
+            aggregate = await user_db.load_user_aggregate(user_id, with_projects=False)
+            user = aggregate.user if aggregate else None
+            profile = aggregate.profile if aggregate else None
+            work_histories = aggregate.work_histories if aggregate else []
 
             # 获取会话信息
             session = await history_db.get_session(session_id)
@@ -1,17 +1,27 @@
 """
-问题服务（知识源配置从 domain 注入）
+问题服务（读取进程级知识库快照，请求内不做文件 I/O）
 """
 from typing import List, Dict, Optional
-from app.core.knowledge import KnowledgeLoader
-from app.domain.knowledge_config import get_knowledge_config
+from app.core.knowledge.loader import QuestionItem
+from app.core.knowledge.snapshot import SnapshotLoader
+
+
+def _question_dict(q: QuestionItem) -> Dict:
+    return {
+        "id": q.id,
+        "category": q.category,
+        "question_number": q.question_number,
+        "content": q.content,
+        "is_starred": q.is_starred
+    }
 
 
 class QuestionService:
     """问题服务"""
     
     def __init__(self):
-        """初始化问题服务"""
-        self.loader = KnowledgeLoader(config=get_knowledge_config())
+        """初始化问题服务（构造无开销，数据来自共享快照）"""
+        self.loader = SnapshotLoader()
     
     def get_questions_by_category(self, category: str) -> List[Dict]:
         """
@@ -23,19 +33,7 @@ class QuestionService:
         Returns:
             问题列表
         """
-        questions = self.loader.load_questions()
-        category_questions = [q for q in questions if q.category == category]
-        
-        return [
-            {
-                "id": q.id,
-                "category": q.category,
-                "question_number": q.question_number,
-                "content": q.content,
-                "is_starred": q.is_starred
-            }
-            for q in category_questions
-        ]
+        return [_question_dict(q) for q in self.loader.snapshot.questions_in(category)]
     
     def get_question_by_id(self, question_id: int) -> Optional[Dict]:
         """
@@ -47,17 +45,8 @@ class QuestionService:
         Returns:
             问题字典，如果不存在则返回None
         """
-        questions = self.loader.load_questions()
-        for q in questions:
-            if q.id == question_id:
-                return {
-                    "id": q.id,
-                    "category": q.category,
-                    "question_number": q.question_number,
-                    "content": q.content,
-                    "is_starred": q.is_starred
-                }
-        return None
+        q = self.loader.snapshot.question_by_id.get(question_id)
+        return _question_dict(q) if q is not None else None
     
     def get_starred_questions(self, category: str) -> List[Dict]:
         """
@@ -69,19 +58,7 @@ class QuestionService:
         Returns:
             带星号的问题列表
         """
-        questions = self.loader.load_questions()
-        starred = [q for q in questions if q.category == category and q.is_starred]
-        
-        return [
-            {
-                "id": q.id,
-                "category": q.category,
-                "question_number": q.question_number,
-                "content": q.content,
-                "is_starred": q.is_starred
-            }
-            for q in starred
-        ]
+        return [_question_dict(q) for q in self.loader.snapshot.starred_in(category)]
     
     def get_guide_questions(
         self,
@@ -117,15 +94,4 @@ class QuestionService:
         Returns:
             所有问题列表
         """
-        questions = self.loader.load_questions()
-        
-        return [
-            {
-                "id": q.id,
-                "category": q.category,
-                "question_number": q.question_number,
-                "content": q.content,
-                "is_starred": q.is_starred
-            }
-            for q in questions
-        ]
+        return [_question_dict(q) for q in self.loader.snapshot.questions]
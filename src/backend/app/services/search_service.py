@@ -1,18 +1,16 @@
 """
 知识检索服务
-包装 KnowledgeLoader + KnowledgeSearcher，供 API 层统一调用。
+包装知识库快照 + KnowledgeSearcher，供 API 层统一调用。
 """
 from typing import Optional, List, Dict
-from app.core.knowledge import KnowledgeLoader, KnowledgeSearcher
-from app.domain.knowledge_config import get_knowledge_config
+from app.core.knowledge import KnowledgeSearcher, SnapshotLoader
 
 
 class SearchService:
     """知识检索服务"""
 
     def __init__(self):
-        loader = KnowledgeLoader(config=get_knowledge_config())
-        self._searcher = KnowledgeSearcher(loader=loader)
+        self._searcher = KnowledgeSearcher(loader=SnapshotLoader())
 
     def search(
         self,
@@ -0,0 +1,249 @@
+"""
+对话每轮时长统计的向量化实现（NumPy，可选依赖）
+
+与 conversation_stats_service.compute_turn_stats_from_messages 的冻结切轮规则逐项一致，
+一次处理多个会话（thread）：
+
+- 时间戳：常见的 ISO 字符串（无时区 / Z / ±HH:MM）按码点矩阵校验格式后整批交给 numpy
+  解析为 int64 epoch 微秒；其余写法或整批解析失败时逐个回退到 _parse_timestamp（同一字符串只解析一次）
+- 切轮：把所有会话的消息拼成一条数组，用掩码找出有效 user 起点、下一轮起点与末轮收尾 assistant
+- 过滤：>2h 与负时长通过数组掩码剔除
+- 聚合：按会话偏移量 np.add.reduceat 分段求和，总时长按整数微秒累加（与标量版一致）
+
+未安装 numpy 时 HAS_NUMPY 为 False，调用方应回退到逐条计算（见 compute_turn_stats_many）。
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # 可选依赖：缺失时走标量实现
+    np = None
+
+from app.services.conversation_stats_service import (
+    ABNORMAL_TURN_THRESHOLD_SECONDS,
+    _parse_timestamp,
+)
+
+HAS_NUMPY = np is not None
+
+_US = 1_000_000
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ABNORMAL_US = ABNORMAL_TURN_THRESHOLD_SECONDS * _US
+
+# numpy 与 datetime.fromisoformat 解析结果一致的格式：
+# YYYY-MM-DDTHH:MM:SS[.f{1,6}]，可带 Z 或 ±HH:MM 偏移；按定长码点矩阵逐列校验
+_FAST_WIDTH = 32  # 正文最长 26 + 偏移最长 6
+_SHAPE_CODES = [ord(c) for c in "0000-00-00T00:00:00"]
+
+
+def _epoch_us_scalar(raw: str) -> Optional[int]:
+    dt = _parse_timestamp(raw)
+    if dt is None:
+        return None
+    delta = dt - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * _US + delta.microseconds
+
+
+def _fast_iso_text(strs: List[str]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    按码点矩阵批量识别可交给 numpy 解析的 ISO 时间戳（可带 Z / ±HH:MM 后缀）。
+
+    Returns:
+        (去掉后缀的文本数组, 命中掩码, 时区偏移微秒数)
+    """
+    n = len(strs)
+    lengths = np.fromiter(map(len, strs), dtype=np.int64, count=n)
+    # 超过 _FAST_WIDTH 的字符串会被截断，但长度条件会把它们排除
+    cp = np.array(strs, dtype=f"U{_FAST_WIDTH}").view(np.uint32).reshape(n, _FAST_WIDTH)
+
+    # 末 6 位：Z 或 ±HH:MM
+    tail_idx = np.clip(lengths - 6, 0, _FAST_WIDTH - 6)[:, None] + np.arange(6)
+    tail = np.take_along_axis(cp, tail_idx, axis=1).astype(np.int64)
+    tail_digits = (tail >= ord("0")) & (tail <= ord("9"))
+    zulu = tail[:, 5] == ord("Z")
+    has_offset = (
+        ((tail[:, 0] == ord("+")) | (tail[:, 0] == ord("-")))
+        & tail_digits[:, 1]
+        & tail_digits[:, 2]
+        & (tail[:, 3] == ord(":"))
+        & tail_digits[:, 4]
+        & tail_digits[:, 5]
+    )
+    hours = (tail[:, 1] - ord("0")) * 10 + tail[:, 2] - ord("0")
+    minutes = (tail[:, 4] - ord("0")) * 10 + tail[:, 5] - ord("0")
+    sign = np.where(tail[:, 0] == ord("-"), -1, 1)
+    offset_us = np.where(has_offset, sign * (hours * 3600 + minutes * 60) * _US, 0)
+    body = lengths - zulu - 6 * has_offset
+
+    # 数字统一替换成 '0' 后与模板逐位比较；uint32 减法下溢后同样 >= 10
+    digits = (cp[:, :26] - ord("0")) < 10
+    shape = np.where(digits[:, :19], ord("0"), cp[:, :19])
+    ok = (lengths <= _FAST_WIDTH) & ((body == 19) | ((body >= 21) & (body <= 26)))
+    ok &= ~has_offset | ((hours < 24) & (minutes < 60))  # fromisoformat 要求偏移严格小于 24h
+    ok &= (shape == _SHAPE_CODES).all(axis=1)
+    ok &= (cp[:, :4] != ord("0")).any(axis=1)  # numpy 接受 0000 年，fromisoformat 不接受
+    # 小数秒：第 19 位为 '.'，其后到正文末尾均为数字
+    in_body = np.arange(_FAST_WIDTH) < body[:, None]
+    ok &= (body == 19) | (
+        (cp[:, 19] == ord(".")) & (digits[:, 20:26] | ~in_body[:, 20:26]).all(axis=1)
+    )
+
+    # 去掉后缀：正文之后的码点清零（U 类型以 \0 结尾）
+    cp *= in_body
+    return cp.view(f"U{_FAST_WIDTH}").reshape(n), ok, offset_us
+
+
+def _parse_epoch_us(values: List[Any], wanted: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    批量把时间戳字符串解析为 (epoch 微秒 int64 数组, 有效掩码)。
+
+    wanted 为 False 的位置不走逐个回退解析（与标量版一样不会为其记 warning）。
+    """
+    # 非字符串与空串在标量版中同样视为缺失
+    strs = [v if isinstance(v, str) else "" for v in values]
+    out = np.zeros(len(strs), dtype=np.int64)
+    valid = np.zeros(len(strs), dtype=bool)
+    if not strs:
+        return out, valid
+
+    text, fast, offset_us = _fast_iso_text(strs)
+    fast_idx = np.flatnonzero(fast)
+    try:
+        local = text[fast_idx].astype("datetime64[us]").astype(np.int64)
+    except ValueError:
+        # 含越界日期（如 2026-02-30）等非法值：按去重后的字符串逐个转换，
+        # 只把转换失败的位置交给下方的逐个解析，其余仍走快路径
+        uniq, inverse = np.unique(text[fast_idx], return_inverse=True)
+        uniq_us = np.zeros(len(uniq), dtype=np.int64)
+        uniq_ok = np.ones(len(uniq), dtype=bool)
+        for j, item in enumerate(uniq.tolist()):
+            try:
+                uniq_us[j] = np.datetime64(item, "us").astype(np.int64)
+            except ValueError:
+                uniq_ok[j] = False
+        fast[fast_idx[~uniq_ok[inverse]]] = False
+        local = uniq_us[inverse][uniq_ok[inverse]]
+        fast_idx = np.flatnonzero(fast)
+    out[fast_idx] = local - offset_us[fast_idx]
+    valid[fast_idx] = True
+
+    # 其余格式（秒级偏移、首尾空白、非法值等）逐个解析，相同字符串只解析一次
+    parsed: Dict[str, Optional[int]] = {}
+    for i in np.flatnonzero(~fast & wanted).tolist():
+        raw = strs[i]
+        if not raw:
+            continue
+        if raw not in parsed:
+            parsed[raw] = _epoch_us_scalar(raw)
+        epoch = parsed[raw]
+        if epoch is not None:
+            out[i] = epoch
+            valid[i] = True
+    return out, valid
+
+
+def _segment_sum(values: "np.ndarray", starts: "np.ndarray", lengths: "np.ndarray") -> "np.ndarray":
+    """按 (starts, lengths) 分段求和；空段为 0。"""
+    # 末尾补一个 0，保证 starts 可以等于 len(values)（尾部空段）
+    padded = np.append(values, np.zeros(1, dtype=values.dtype))
+    sums = np.add.reduceat(padded, starts)
+    sums[lengths == 0] = 0
+    return sums
+
+
+def compute_turn_stats_batch(threads: Sequence[Sequence[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    批量计算多个会话的每轮时长统计。
+
+    Args:
+        threads: 会话列表，每个会话是按时间排列的消息列表
+
+    Returns:
+        与输入顺序对应的统计字典列表，字段与 compute_turn_stats_from_messages 相同
+    """
+    if np is None:
+        raise RuntimeError("compute_turn_stats_batch 需要 numpy")
+    n_threads = len(threads)
+    if n_threads == 0:
+        return []
+
+    lengths = np.fromiter((len(t) for t in threads), dtype=np.int64, count=n_threads)
+    starts = np.cumsum(lengths) - lengths
+    thread_of = np.repeat(np.arange(n_threads, dtype=np.int64), lengths)
+    msgs = [m for t in threads for m in t]
+
+    # 角色：绝大多数已是规范写法，整批比较；其余再按标量版规则 strip + lower
+    roles = np.array([m.get("role") for m in msgs], dtype=object)
+    is_user = roles == "user"
+    is_asst = roles == "assistant"
+    for i in np.flatnonzero(~(is_user | is_asst)).tolist():
+        role = (roles[i] or "").strip().lower()
+        is_user[i] = role == "user"
+        is_asst[i] = role == "assistant"
+
+    ts_values = [m.get("created_at") or m.get("timestamp") for m in msgs]
+    # 只有 user / assistant 的时间戳参与计算
+    epoch, valid = _parse_epoch_us(ts_values, is_user | is_asst)
+    valid &= is_user | is_asst
+
+    # 消息级计数：total_turns_seen / skipped_no_ts
+    seen = _segment_sum(is_user.astype(np.int64), starts, lengths)
+    no_ts = _segment_sum((is_user & ~valid).astype(np.int64), starts, lengths)
+
+    # 有效 user 起点（全局位置，天然按会话分组且组内有序）
+    ut = np.flatnonzero(is_user & valid)
+    th = thread_of[ut]
+    is_last = np.ones(ut.size, dtype=bool)
+    is_last[:-1] = th[1:] != th[:-1]
+
+    # 非末轮：下一轮起点 - 本轮起点
+    dur = np.zeros(ut.size, dtype=np.int64)
+    has_end = ~is_last
+    nxt = np.flatnonzero(~is_last)
+    dur[nxt] = epoch[ut[nxt + 1]] - epoch[ut[nxt]]
+
+    # 末轮：本会话最后一条有时间戳的 assistant，且位于该 user 之后
+    last_asst = np.full(n_threads, -1, dtype=np.int64)
+    av = np.flatnonzero(is_asst & valid)
+    if av.size:
+        av_th = thread_of[av]
+        tail = np.ones(av.size, dtype=bool)
+        tail[:-1] = av_th[1:] != av_th[:-1]
+        last_asst[av_th[tail]] = av[tail]
+    last = np.flatnonzero(is_last)
+    end_pos = last_asst[th[last]]
+    ok = end_pos > ut[last]
+    has_end[last[ok]] = True
+    dur[last[ok]] = epoch[end_pos[ok]] - epoch[ut[last[ok]]]
+
+    # 异常过滤：>2h 或负时长计入 skipped_long_turns
+    abnormal = has_end & ((dur > _ABNORMAL_US) | (dur < 0))
+    counted = has_end & ~abnormal
+
+    turn_lengths = np.bincount(th, minlength=n_threads).astype(np.int64)
+    turn_starts = np.cumsum(turn_lengths) - turn_lengths
+    turns = _segment_sum(counted.astype(np.int64), turn_starts, turn_lengths)
+    total_us = _segment_sum(np.where(counted, dur, 0), turn_starts, turn_lengths)
+    skipped_long = _segment_sum(abnormal.astype(np.int64), turn_starts, turn_lengths)
+
+    results: List[Dict[str, Any]] = []
+    for count, us, no, long_, total in zip(
+        turns.tolist(), total_us.tolist(), no_ts.tolist(), skipped_long.tolist(), seen.tolist()
+    ):
+        total_seconds = us / _US
+        avg_seconds = (total_seconds / count) if count > 0 else 0.0
+        results.append(
+            {
+                "turns": count,
+                "total_seconds": round(total_seconds, 2),
+                "avg_seconds": round(avg_seconds, 2),
+                "skipped_no_ts": no,
+                "skipped_long_turns": long_,
+                "total_turns_seen": total,
+            }
+        )
+    return results
@@ -3,7 +3,7 @@
 """
 from typing import Optional, Dict, List
 from datetime import date
-from app.core.database import UserDB
+from app.core.database import UserAggregate, UserDB
 from app.models.database import AsyncSessionLocal
 
 
@@ -141,31 +141,18 @@ class UserService:
             }
     
     @staticmethod
-    async def get_user_profile(user_id: str) -> Optional[Dict]:
-        """
-        获取用户完整信息（包括工作履历和项目经历）
-        
-        Args:
-            user_id: 用户ID
-        
-        Returns:
-            用户完整信息字典
-        """
-        async with AsyncSessionLocal() as db:
-            user_db = UserDB(db)
-            
-            user = await user_db.get_user_by_id(user_id)
-            if not user:
-                return None
-            
-            profile = await user_db.get_user_profile(user_id)
-            work_histories = await user_db.get_user_work_histories(user_id)
-            
-            # 构建工作履历列表（包含项目经历）
-            work_history_list = []
-            for wh in work_histories:
-                projects = await user_db.get_work_history_projects(wh.id)
-                work_history_list.append({
+    def _aggregate_to_dict(agg: UserAggregate) -> Dict:
+        user, profile = agg.user, agg.profile
+        return {
+            "user_id": user.id,
+            "email": user.email,
+            "phone": user.phone,
+            "username": user.username,
+            "gender": profile.gender if profile else None,
+            "age": profile.age if profile else None,
+            "profile_completed": profile.profile_completed if profile else False,
+            "work_histories": [
+                {
                     "id": wh.id,
                     "company": wh.company,
                     "position": wh.position,
@@ -180,20 +167,40 @@ class UserService:
                             "role": p.role,
                             "achievements": p.achievements
                         }
-                        for p in projects
+                        for p in agg.projects_of(wh.id)
                     ]
-                })
-            
-            return {
-                "user_id": user.id,
-                "email": user.email,
-                "phone": user.phone,
-                "username": user.username,
-                "gender": profile.gender if profile else None,
-                "age": profile.age if profile else None,
-                "profile_completed": profile.profile_completed if profile else False,
-                "work_histories": work_history_list
-            }
+                }
+                for wh in agg.work_histories
+            ]
+        }
+
+    @staticmethod
+    async def get_user_profiles(user_ids: List[str]) -> Dict[str, Dict]:
+        """
+        批量获取用户完整信息（查询次数与用户数、履历数无关）
+        
+        Args:
+            user_ids: 用户ID列表
+        
+        Returns:
+            {用户ID: 用户完整信息字典}，不存在的用户不出现在结果里
+        """
+        async with AsyncSessionLocal() as db:
+            aggregates = await UserDB(db).load_user_aggregates(user_ids)
+            return {uid: UserService._aggregate_to_dict(agg) for uid, agg in aggregates.items()}
+
+    @staticmethod
+    async def get_user_profile(user_id: str) -> Optional[Dict]:
+        """
+        获取用户完整信息（包括工作履历和项目经历）
+        
+        Args:
+            user_id: 用户ID
+        
+        Returns:
+            用户完整信息字典
+        """
+        return (await UserService.get_user_profiles([user_id])).get(user_id)
     
     @staticmethod
     async def mark_profile_completed(user_id: str) -> bool:
@@ -5,17 +5,21 @@ Admin Prompt Lab（sandbox_only）
 - 管理员维护多份提示词配置（profile）
 - 每个 profile 支持多版本（versions）
 - 将 profile 绑定到调试工作区激活码（ADM/SBX）
-- simple-chat 运行时按 activation_code 读取绑定配置
+- simple-chat 运行时按 activation_code 读取绑定配置（内存索引，见 _OverrideIndex）
 """
 
 from __future__ import annotations
 
 import json
+import threading
+import time
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+from app.utils import storage_codec
+from app.utils.cache_tiers import file_signature
 from app.utils.simple_activation_manager import get_simple_test_base_dir
 
 
@@ -23,32 +27,38 @@ def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def _lab_dir() -> Path:
+    """当前上下文的 prompt-lab 目录（随 data_root_override 变化，不创建目录）。"""
+    return get_simple_test_base_dir() / "admin_prompt_lab"
+
+
 def _lab_root() -> Path:
-    root = get_simple_test_base_dir() / "admin_prompt_lab"
+    root = _lab_dir()
     root.mkdir(parents=True, exist_ok=True)
     return root
 
 
-def _profiles_file() -> Path:
-    return _lab_root() / "profiles.json"
+def _profiles_file(root: Optional[Path] = None) -> Path:
+    return (root or _lab_root()) / "profiles.json"
 
 
-def _bindings_file() -> Path:
-    return _lab_root() / "activation_bindings.json"
+def _bindings_file(root: Optional[Path] = None) -> Path:
+    return (root or _lab_root()) / "activation_bindings.json"
 
 
 def _load_json(file: Path, default: Any) -> Any:
     if not file.is_file():
         return default
     try:
-        return json.loads(file.read_text(encoding="utf-8") or "null")
+        return storage_codec.loads(file.read_text(encoding="utf-8") or "null", "prompt_lab")
     except (OSError, json.JSONDecodeError, TypeError):
         return default
 
 
 def _save_json(file: Path, payload: Any) -> None:
     file.parent.mkdir(parents=True, exist_ok=True)
-    file.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    file.write_text(storage_codec.dumps(payload, "prompt_lab"), encoding="utf-8")
+    _override_index.invalidate(file.parent)
 
 
 def list_profiles() -> List[Dict[str, Any]]:
@@ -261,22 +271,10 @@ def list_bindings() -> List[Dict[str, Any]]:
     return out
 
 
-def resolve_simple_chat_prompt_override(
-    activation_code: str,
+def _resolve_current_version(
+    profile: Dict[str, Any],
 ) -> Optional[Tuple[str, str, Dict[str, Any]]]:
-    """
-    根据 activation_code 返回当前生效的 simple-chat 覆盖配置：
-      (template, extra_goal_hint, meta)
-    """
-    bind = get_binding_by_activation(activation_code)
-    if not bind:
-        return None
-    profile_id = bind.get("profile_id")
-    if not profile_id:
-        return None
-    profile = get_profile(profile_id)
-    if not profile:
-        return None
+    profile_id = profile.get("profile_id")
     current_vid = profile.get("current_version_id")
     versions = profile.get("versions")
     if not current_vid or not isinstance(versions, list):
@@ -298,6 +296,104 @@ def resolve_simple_chat_prompt_override(
     return template, extra, meta
 
 
+class _IndexEntry:
+    __slots__ = ("by_code", "signature", "checked_at")
+
+    def __init__(
+        self, by_code: Dict[str, Tuple[str, str, Dict[str, Any]]], signature: Tuple[Any, ...]
+    ) -> None:
+        self.by_code = by_code
+        self.signature = signature
+        self.checked_at = 0.0
+
+
+class _OverrideIndex:
+    """
+    activation_code -> 当前生效版本 (template, extra_goal_hint, meta) 的内存索引。
+
+    按 prompt-lab 目录分别建索引：目录在查询时解析，data_root_override 下并发运行的
+    场景各自读到自己的绑定。本进程写入（_save_json）时作废对应目录的索引；其他进程
+    改文件靠 (mtime, size) 签名发现，签名最多每 _STAT_INTERVAL 秒检查一次。
+    未绑定的激活码只花一次 dict 查找。
+    """
+
+    _STAT_INTERVAL = 2.0
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[Path, _IndexEntry] = {}
+        self.builds = 0
+
+    def invalidate(self, root: Optional[Path] = None) -> None:
+        """作废 root 目录的索引；root 为 None 时全部作废。"""
+        with self._lock:
+            if root is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(root, None)
+
+    def _current_signature(self, root: Path) -> Tuple[Any, ...]:
+        return file_signature(_bindings_file(root)), file_signature(_profiles_file(root))
+
+    def _build(self, root: Path) -> Dict[str, Tuple[str, str, Dict[str, Any]]]:
+        profiles_raw = _load_json(_profiles_file(root), {"items": []}) or {"items": []}
+        profile_items = profiles_raw.get("items") if isinstance(profiles_raw, dict) else []
+        profiles = {
+            item.get("profile_id"): item
+            for item in (profile_items if isinstance(profile_items, list) else [])
+            if isinstance(item, dict) and item.get("profile_id")
+        }
+        bindings_raw = _load_json(_bindings_file(root), {"items": []}) or {"items": []}
+        binding_items = bindings_raw.get("items") if isinstance(bindings_raw, dict) else []
+        by_code: Dict[str, Tuple[str, str, Dict[str, Any]]] = {}
+        seen = set()
+        for item in binding_items if isinstance(binding_items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            code = (item.get("activation_code") or "").upper()
+            if not code or code in seen:
+                continue
+            # 与 get_binding_by_activation 一致：同一激活码以文件中第一条绑定为准
+            seen.add(code)
+            profile = profiles.get(item.get("profile_id"))
+            resolved = _resolve_current_version(profile) if profile else None
+            if resolved:
+                by_code[code] = resolved
+        return by_code
+
+    def lookup(self, activation_code: str) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        root = _lab_dir()
+        entry = self._entries.get(root)
+        now = time.monotonic()
+        if entry is None or now - entry.checked_at >= self._STAT_INTERVAL:
+            with self._lock:
+                entry = self._entries.get(root)
+                sig = self._current_signature(root)
+                if entry is None or sig != entry.signature:
+                    entry = _IndexEntry(self._build(root), sig)
+                    self._entries[root] = entry
+                    self.builds += 1
+                entry.checked_at = now
+        return entry.by_code.get((activation_code or "").strip().upper())
+
+
+_override_index = _OverrideIndex()
+
+
+def resolve_simple_chat_prompt_override(
+    activation_code: str,
+) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+    """
+    根据 activation_code 返回当前生效的 simple-chat 覆盖配置：
+      (template, extra_goal_hint, meta)
+    """
+    resolved = _override_index.lookup(activation_code)
+    if not resolved:
+        return None
+    template, extra, meta = resolved
+    return template, extra, dict(meta)
+
+
 def export_current_profile_payload(profile_id: str) -> Dict[str, Any]:
     """
     导出 profile 当前生效版本，便于人工回填到代码模板文件。
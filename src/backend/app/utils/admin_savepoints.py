@@ -9,19 +9,36 @@ Admin Savepoint 管理（仅调试工作区）。
 
 from __future__ import annotations
 
+import contextvars
 import json
+import os
 import re
 import shutil
+import signal
 import subprocess
 import sys
 import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
+from filelock import FileLock
+
+from app.config.settings import settings
+from app.utils import storage_codec
+from app.utils.coordination import get_coordination_backend
+from app.utils.cow_copy import cow_copytree, materialize
 from app.utils.report_registry import STEP_IDS, ReportRegistry
+from app.utils.savepoint_store import (
+    MANIFEST_NAME,
+    BlobStore,
+    release_manifest,
+    restore_tree,
+    snapshot_tree,
+)
 from app.utils.helpers import parse_iso_to_utc
 from app.utils.simple_activation_manager import (
     ActivationRecord,
@@ -37,13 +54,52 @@ REPLAY_LOG_REL_PATH = Path("savepoints") / "replay_logs.jsonl"
 GENERATED_INDEX_REL_PATH = Path("test_agent") / "scenarios" / "generated" / "generated_index.json"
 JOB_HISTORY_REL_PATH = Path("savepoints") / "batch_job_history.jsonl"
 BATCH_JOB_STATE_REL_PATH = Path("savepoints") / "batch_jobs_state.json"
+BATCH_RUNS_REL_PATH = Path("batch_runs")
+# savepoints/ 下的内容寻址 blob 池与创建时的临时裁剪目录
+SAVEPOINT_STORE_DIRNAME = "_store"
+SAVEPOINT_STAGING_DIRNAME = "_staging"
+# 指标中的存储文件类型；项目目录下供评审 / 提交的文件（镜像、generated index、case fixture）固定缩进写盘
+_FILE_TYPE = "savepoints"
+# 子进程 replay 脚本读取该环境变量作为 seed 根目录，实现每个场景独立沙箱
+REPLAY_RUNS_ROOT_ENV = "SIMPLE_REPLAY_RUNS_ROOT"
+MAX_BATCH_WORKERS = 16
+# 批量执行时进度写回 job 状态的最小间隔（秒）
+_PROGRESS_FLUSH_SEC = 1.0
 AI_ROLES = {"assistant", "table_widget", "conclusion_card"}
-_BATCH_JOB_LOCK = threading.Lock()
-_BATCH_JOBS: Dict[str, Dict[str, Any]] = {}
-_RUNNING_SAVEPOINTS: set[str] = set()
+# 批量任务与 savepoint 执行互斥由协调后端承载（sqlite 后端时多 worker 共享）
+_BATCH_JOBS = get_coordination_backend().job_registry("savepoint_batch_jobs")
+_RUNNING_SAVEPOINTS = get_coordination_backend().inflight_set("savepoint_running")
+_BATCH_STATE_LOCK = threading.Lock()
 _BATCH_STATE_LOADED = False
 
 
+class _ScenarioRunContext:
+    """批量执行中单个场景的运行上下文：独立沙箱目录 + 输出回调 + 取消检查。"""
+
+    def __init__(
+        self,
+        *,
+        sandbox_root: Path,
+        on_output: Optional[Callable[[str], None]] = None,
+        should_cancel: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        self.sandbox_root = sandbox_root
+        self.on_output = on_output
+        self.should_cancel = should_cancel or (lambda: False)
+
+
+_SCENARIO_RUN_CTX: contextvars.ContextVar[Optional[_ScenarioRunContext]] = contextvars.ContextVar(
+    "savepoint_scenario_run_ctx", default=None
+)
+
+
+class _ScenarioCancelled(Exception):
+    def __init__(self, stdout: str, stderr: str) -> None:
+        super().__init__("cancelled")
+        self.stdout = stdout
+        self.stderr = stderr
+
+
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -58,6 +114,24 @@ def _savepoints_root() -> Path:
     return root
 
 
+def _blob_store() -> BlobStore:
+    return BlobStore(_savepoints_root() / SAVEPOINT_STORE_DIRNAME)
+
+
+def _restore_savepoint_snapshot(
+    meta: Dict[str, Any], dst_dir: Path, *, allow_hardlink: bool = True
+) -> None:
+    """把 savepoint 快照还原到 dst_dir（不得已存在）：新格式走 manifest + blob，旧格式为完整 report 目录。"""
+    manifest_path = Path(str(meta.get("manifest_path") or ""))
+    if manifest_path.name == MANIFEST_NAME and manifest_path.is_file():
+        restore_tree(manifest_path, dst_dir)
+        return
+    snapshot_dir = Path(str(meta.get("report_snapshot_path") or ""))
+    if not snapshot_dir.is_dir():
+        raise ValueError("savepoint 快照缺失")
+    cow_copytree(snapshot_dir, dst_dir, allow_hardlink=allow_hardlink)
+
+
 def _index_path() -> Path:
     p = get_simple_test_base_dir() / INDEX_REL_PATH
     p.parent.mkdir(parents=True, exist_ok=True)
@@ -99,7 +173,7 @@ def _load_batch_job_state_file() -> Dict[str, Any]:
     if not p.is_file():
         return {"version": 1, "jobs": {}}
     try:
-        data = json.loads(p.read_text(encoding="utf-8") or "{}")
+        data = storage_codec.loads(p.read_text(encoding="utf-8") or "{}", _FILE_TYPE)
     except (OSError, json.JSONDecodeError):
         return {"version": 1, "jobs": {}}
     if not isinstance(data, dict):
@@ -113,7 +187,7 @@ def _load_batch_job_state_file() -> Dict[str, Any]:
 
 def _save_batch_job_state_file(state_obj: Dict[str, Any]) -> None:
     p = _batch_job_state_path()
-    p.write_text(json.dumps(state_obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    p.write_text(storage_codec.dumps(state_obj, _FILE_TYPE), encoding="utf-8")
 
 
 def _load_index() -> Dict[str, Any]:
@@ -121,7 +195,7 @@ def _load_index() -> Dict[str, Any]:
     if not p.is_file():
         return {"version": 1, "items": []}
     try:
-        data = json.loads(p.read_text(encoding="utf-8") or "{}")
+        data = storage_codec.loads(p.read_text(encoding="utf-8") or "{}", _FILE_TYPE)
     except (OSError, json.JSONDecodeError):
         return {"version": 1, "items": []}
     if not isinstance(data, dict):
@@ -138,7 +212,7 @@ def _load_generated_index() -> Dict[str, Any]:
     if not p.is_file():
         return {"version": 1, "items": []}
     try:
-        data = json.loads(p.read_text(encoding="utf-8") or "{}")
+        data = storage_codec.loads(p.read_text(encoding="utf-8") or "{}", _FILE_TYPE)
     except (OSError, json.JSONDecodeError):
         return {"version": 1, "items": []}
     if not isinstance(data, dict):
@@ -152,14 +226,21 @@ def _load_generated_index() -> Dict[str, Any]:
 
 def _save_generated_index(index_obj: Dict[str, Any]) -> None:
     p = _generated_index_path()
-    p.write_text(json.dumps(index_obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    p.write_text(storage_codec.dumps(index_obj, _FILE_TYPE, pretty=True), encoding="utf-8")
+
+
+def _index_file_lock(path: Path) -> FileLock:
+    """索引文件读改写锁（批量并发执行时多线程/多进程共享）。"""
+    return FileLock(str(path) + ".lock", timeout=30)
 
 
 def _save_index(index_obj: Dict[str, Any]) -> None:
     index_path = _index_path()
-    index_path.write_text(json.dumps(index_obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    index_path.write_text(storage_codec.dumps(index_obj, _FILE_TYPE), encoding="utf-8")
     # 评审镜像固定同步
-    _mirror_path().write_text(json.dumps(index_obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    _mirror_path().write_text(
+        storage_codec.dumps(index_obj, _FILE_TYPE, pretty=True), encoding="utf-8"
+    )
 
 
 def _ensure_unique_display_name(display_name: str, items: List[Dict[str, Any]]) -> None:
@@ -211,7 +292,7 @@ def _extract_keywords(content: str) -> List[str]:
 
 def _write_meta(path: Path, meta: Dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    path.write_text(storage_codec.dumps(meta, _FILE_TYPE), encoding="utf-8")
 
 
 def _safe_name(raw: str) -> str:
@@ -225,7 +306,7 @@ def _load_json(path: Path, default: Any) -> Any:
     if not path.is_file():
         return default
     try:
-        return json.loads(path.read_text(encoding="utf-8") or "null")
+        return storage_codec.loads(path.read_text(encoding="utf-8") or "null", _FILE_TYPE)
     except (OSError, json.JSONDecodeError):
         return default
 
@@ -233,17 +314,17 @@ def _load_json(path: Path, default: Any) -> Any:
 def _append_replay_log(entry: Dict[str, Any]) -> None:
     p = _replay_log_path()
     with p.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        f.write(storage_codec.dumps(entry, _FILE_TYPE, pretty=False) + "\n")
 
 
 def _append_job_history(entry: Dict[str, Any]) -> None:
     p = _job_history_path()
     with p.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        f.write(storage_codec.dumps(entry, _FILE_TYPE, pretty=False) + "\n")
 
 
-def _persist_batch_jobs_locked() -> None:
-    state = {"version": 1, "jobs": _BATCH_JOBS}
+def _persist_batch_jobs_locked(jobs: Dict[str, Dict[str, Any]]) -> None:
+    state = {"version": 1, "jobs": dict(jobs)}
     _save_batch_job_state_file(state)
 
 
@@ -251,18 +332,28 @@ def _ensure_batch_jobs_loaded() -> None:
     global _BATCH_STATE_LOADED
     if _BATCH_STATE_LOADED:
         return
-    with _BATCH_JOB_LOCK:
+    backend = get_coordination_backend()
+    with _BATCH_STATE_LOCK, _BATCH_JOBS.transaction() as jobs:
         if _BATCH_STATE_LOADED:
             return
-        state = _load_batch_job_state_file()
-        raw_jobs = state.get("jobs")
-        loaded_jobs = raw_jobs if isinstance(raw_jobs, dict) else {}
+        if not jobs:
+            # 共享注册表为空时（local 后端或首次启用 sqlite）从状态文件恢复
+            state = _load_batch_job_state_file()
+            raw_jobs = state.get("jobs")
+            loaded_jobs = raw_jobs if isinstance(raw_jobs, dict) else {}
+            for jid, job in loaded_jobs.items():
+                if isinstance(job, dict):
+                    jobs[str(jid)] = job
         now = _now_iso()
-        for jid, job in loaded_jobs.items():
+        for jid, job in list(jobs.items()):
             if not isinstance(job, dict):
                 continue
             status = str(job.get("status") or "")
-            if status == "running":
+            owner = str(job.get("owner") or "")
+            # 其他 worker 仍在执行的任务保持 running；本进程刚启动，不可能持有旧任务
+            if status == "running" and (
+                owner == backend.owner_id or not backend.owner_alive(owner)
+            ):
                 # 服务重启后无法恢复线程，显式标记为 interrupted，供追踪
                 job["status"] = "interrupted"
                 job["finished_at"] = now
@@ -284,8 +375,8 @@ def _ensure_batch_jobs_loaded() -> None:
                         "interrupted_reason": "service_restarted",
                     }
                 )
-            _BATCH_JOBS[str(jid)] = job
-        _persist_batch_jobs_locked()
+            jobs[str(jid)] = job
+        _persist_batch_jobs_locked(jobs)
         _BATCH_STATE_LOADED = True
 
 
@@ -302,7 +393,7 @@ def list_replay_logs(limit: int = 200) -> List[Dict[str, Any]]:
         if not line.strip():
             continue
         try:
-            obj = json.loads(line)
+            obj = storage_codec.loads(line, _FILE_TYPE)
         except json.JSONDecodeError:
             continue
         if isinstance(obj, dict):
@@ -339,7 +430,7 @@ def list_batch_job_history(limit: int = 50) -> List[Dict[str, Any]]:
         if not line.strip():
             continue
         try:
-            obj = json.loads(line)
+            obj = storage_codec.loads(line, _FILE_TYPE)
         except json.JSONDecodeError:
             continue
         if isinstance(obj, dict):
@@ -372,7 +463,7 @@ def cleanup_batch_job_history(
         if not line.strip():
             continue
         try:
-            obj = json.loads(line)
+            obj = storage_codec.loads(line, _FILE_TYPE)
         except json.JSONDecodeError:
             continue
         if isinstance(obj, dict):
@@ -402,7 +493,8 @@ def cleanup_batch_job_history(
     # 重新按时间正序落盘，便于 append
     filtered.sort(key=lambda x: x.get("finished_at") or x.get("created_at") or "")
     p.write_text(
-        "\n".join(json.dumps(x, ensure_ascii=False) for x in filtered) + ("\n" if filtered else ""),
+        "\n".join(storage_codec.dumps(x, _FILE_TYPE, pretty=False) for x in filtered)
+        + ("\n" if filtered else ""),
         encoding="utf-8",
     )
     removed = max(0, len(entries) - len(filtered))
@@ -411,12 +503,83 @@ def cleanup_batch_job_history(
 
 def list_batch_jobs(limit: int = 50) -> List[Dict[str, Any]]:
     _ensure_batch_jobs_loaded()
-    with _BATCH_JOB_LOCK:
-        jobs = [dict(v) for v in _BATCH_JOBS.values() if isinstance(v, dict)]
+    jobs = list(_BATCH_JOBS.snapshot().values())
     jobs.sort(key=lambda x: x.get("created_at") or "", reverse=True)
     return jobs[: max(1, int(limit))]
 
 
+def _kill_process_tree(proc: subprocess.Popen) -> None:
+    # run_scenario.py 会再拉起 replay 子进程，需按进程组整体结束
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (OSError, ProcessLookupError):
+        pass
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        pass
+
+
+def _run_scenario_subprocess(
+    cmd: List[str], *, timeout_sec: int, ctx: _ScenarioRunContext
+) -> subprocess.CompletedProcess:
+    """
+    批量模式下执行单个场景：逐行转发 stdout 供进度展示，并支持超时/取消时结束整个进程组。
+    超时抛 subprocess.TimeoutExpired，取消抛 _ScenarioCancelled（均带已收集的输出）。
+    """
+    ctx.sandbox_root.mkdir(parents=True, exist_ok=True)
+    env = {**os.environ, "PYTHONUNBUFFERED": "1", REPLAY_RUNS_ROOT_ENV: str(ctx.sandbox_root)}
+    proc = subprocess.Popen(
+        cmd,
+        cwd=str(_project_root()),
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+        start_new_session=(os.name == "posix"),
+    )
+    out_lines: List[str] = []
+    err_lines: List[str] = []
+
+    def _pump(stream, sink: List[str], notify: Optional[Callable[[str], None]]) -> None:
+        for line in stream:
+            sink.append(line)
+            if notify is not None:
+                try:
+                    notify(line.rstrip("\n"))
+                except Exception:
+                    pass
+
+    pumps = [
+        threading.Thread(target=_pump, args=(proc.stdout, out_lines, ctx.on_output), daemon=True),
+        threading.Thread(target=_pump, args=(proc.stderr, err_lines, None), daemon=True),
+    ]
+    for t in pumps:
+        t.start()
+
+    def _collected() -> tuple:
+        for t in pumps:
+            t.join(timeout=5)
+        return "".join(out_lines), "".join(err_lines)
+
+    deadline = time.monotonic() + timeout_sec
+    while proc.poll() is None:
+        if ctx.should_cancel():
+            _kill_process_tree(proc)
+            raise _ScenarioCancelled(*_collected())
+        if time.monotonic() > deadline:
+            _kill_process_tree(proc)
+            stdout, stderr = _collected()
+            raise subprocess.TimeoutExpired(cmd, timeout_sec, output=stdout, stderr=stderr)
+        time.sleep(0.2)
+    stdout, stderr = _collected()
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+
 def run_generated_scenario(
     *,
     savepoint_id: str,
@@ -436,10 +599,8 @@ def run_generated_scenario(
     if max_retries < 0 or max_retries > 3:
         raise ValueError("max_retries 必须在 0~3")
 
-    with _BATCH_JOB_LOCK:
-        if spid in _RUNNING_SAVEPOINTS:
-            raise ValueError("该 savepoint 正在执行中，请稍后重试")
-        _RUNNING_SAVEPOINTS.add(spid)
+    if not _RUNNING_SAVEPOINTS.try_add(spid):
+        raise ValueError("该 savepoint 正在执行中，请稍后重试")
 
     try:
         idx_obj = _load_generated_index()
@@ -482,19 +643,25 @@ def run_generated_scenario(
         report_file = ""
         attempts = 0
         max_attempts = 1 + max_retries
+        run_ctx = _SCENARIO_RUN_CTX.get()
         with log_file.open("w", encoding="utf-8") as logf:
             logf.write(f"command={cmd_pretty}\n")
+            if run_ctx is not None:
+                logf.write(f"sandbox_root={run_ctx.sandbox_root}\n")
             for attempt in range(1, max_attempts + 1):
                 attempts = attempt
                 logf.write(f"\n===== attempt {attempt}/{max_attempts} =====\n")
                 try:
-                    proc = subprocess.run(
-                        cmd,
-                        cwd=str(_project_root()),
-                        capture_output=True,
-                        text=True,
-                        timeout=timeout_sec,
-                    )
+                    if run_ctx is not None:
+                        proc = _run_scenario_subprocess(cmd, timeout_sec=timeout_sec, ctx=run_ctx)
+                    else:
+                        proc = subprocess.run(
+                            cmd,
+                            cwd=str(_project_root()),
+                            capture_output=True,
+                            text=True,
+                            timeout=timeout_sec,
+                        )
                     final_stdout = proc.stdout or ""
                     final_stderr = proc.stderr or ""
                     last_exit_code = proc.returncode
@@ -522,7 +689,20 @@ def run_generated_scenario(
                     if final_stderr:
                         logf.write("\n[stderr-partial]\n")
                         logf.write(final_stderr)
+                except _ScenarioCancelled as e:
+                    final_stdout = e.stdout
+                    final_stderr = e.stderr
+                    last_exit_code = 130
+                    status = "cancelled"
+                    run_code = "cancelled"
+                    logf.write("[cancelled]\n")
+                    break
                 if attempt < max_attempts:
+                    if run_ctx is not None and run_ctx.should_cancel():
+                        status = "cancelled"
+                        run_code = "cancelled"
+                        logf.write("\n[cancelled] skip retry\n")
+                        break
                     logf.write("\n[retry] next attempt\n")
 
         report_match = re.search(r"\[L2\] report=(.+)", final_stdout)
@@ -533,21 +713,30 @@ def run_generated_scenario(
             f"attempts={attempts}, report={report_file or '-'}, dry_run={str(bool(dry_run)).lower()}"
         )
 
-        hit["last_run_at"] = now
-        hit["last_run_status"] = status
-        hit["last_run_code"] = run_code
-        hit["last_run_engine"] = eng
-        hit["last_run_exit_code"] = last_exit_code
-        hit["last_run_report_file"] = report_file or None
-        hit["last_run_summary"] = summary[:500]
-        hit["last_run_attempts"] = attempts
-        hit["last_run_log_file"] = str(log_file)
-        hit["last_run_stdout_tail"] = final_stdout[-3000:] if final_stdout else ""
-        hit["last_run_stderr_tail"] = final_stderr[-3000:] if final_stderr else ""
-        idx_obj["items"] = sorted(items, key=lambda x: x.get("exported_at") or "", reverse=True)
-        _save_generated_index(idx_obj)
-
-        if not dry_run:
+        # 被取消的执行不覆盖上次结果，保证 only_failed 重跑的筛选口径不变
+        if status != "cancelled":
+            with _index_file_lock(_generated_index_path()):
+                idx_obj = _load_generated_index()
+                items = [x for x in idx_obj.get("items", []) if isinstance(x, dict)]
+                hit = next((x for x in items if (x.get("savepoint_id") or "") == spid), None)
+                if hit is not None:
+                    hit["last_run_at"] = now
+                    hit["last_run_status"] = status
+                    hit["last_run_code"] = run_code
+                    hit["last_run_engine"] = eng
+                    hit["last_run_exit_code"] = last_exit_code
+                    hit["last_run_report_file"] = report_file or None
+                    hit["last_run_summary"] = summary[:500]
+                    hit["last_run_attempts"] = attempts
+                    hit["last_run_log_file"] = str(log_file)
+                    hit["last_run_stdout_tail"] = final_stdout[-3000:] if final_stdout else ""
+                    hit["last_run_stderr_tail"] = final_stderr[-3000:] if final_stderr else ""
+                    idx_obj["items"] = sorted(
+                        items, key=lambda x: x.get("exported_at") or "", reverse=True
+                    )
+                    _save_generated_index(idx_obj)
+
+        if not dry_run and status != "cancelled":
             try:
                 replay_status = "passed" if status == "passed" else "failed"
                 record_savepoint_replay_result(
@@ -576,8 +765,122 @@ def run_generated_scenario(
             "last_run_at": now,
         }
     finally:
-        with _BATCH_JOB_LOCK:
-            _RUNNING_SAVEPOINTS.discard(spid)
+        _RUNNING_SAVEPOINTS.discard(spid)
+
+
+def _resolve_batch_workers(workers: Optional[int]) -> int:
+    if workers is None:
+        workers = getattr(settings, "SAVEPOINT_BATCH_WORKERS", 1) or 1
+    n = int(workers)
+    if n < 1 or n > MAX_BATCH_WORKERS:
+        raise ValueError(f"workers 必须在 1~{MAX_BATCH_WORKERS}")
+    return n
+
+
+def _batch_exception_result(spid: str, engine: str, e: Exception) -> Dict[str, Any]:
+    return {
+        "savepoint_id": spid,
+        "engine": engine,
+        "dry_run": False,
+        "command": "",
+        "exit_code": 1,
+        "status": "failed",
+        "run_code": "batch_exception",
+        "summary": f"batch-run exception: {type(e).__name__}: {e}",
+        "report_file": None,
+        "stdout_tail": "",
+        "stderr_tail": "",
+        "last_run_at": _now_iso(),
+    }
+
+
+def _execute_scenario_batch(
+    target_ids: List[str],
+    *,
+    run_key: str,
+    engine: str,
+    timeout_sec: int,
+    max_retries: int,
+    workers: int,
+    fail_fast: bool,
+    is_cancelled: Callable[[], bool],
+    on_started: Optional[Callable[[str], None]] = None,
+    on_output: Optional[Callable[[str, str], None]] = None,
+    on_finished: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> str:
+    """
+    以 workers 个并发槽执行场景（每个槽同一时刻一个 run_scenario 子进程）。
+    - 每个场景使用 batch_runs/{run_key}/{savepoint_id} 独立沙箱目录，通过后删除，失败保留供排查
+    - fail_fast：首个失败后停止派发，并结束仍在执行的场景
+    - is_cancelled：外部取消检查（节流轮询），命中后同 fail_fast 处理
+    返回停止原因：""（正常跑完）| "cancelled" | "fail_fast"
+    """
+    stop = threading.Event()
+    state_lock = threading.Lock()
+    state = {"reason": "", "checked_at": 0.0}
+
+    def _should_stop() -> bool:
+        if stop.is_set():
+            return True
+        with state_lock:
+            now = time.monotonic()
+            if now - state["checked_at"] < 0.5:
+                return False
+            state["checked_at"] = now
+        if is_cancelled():
+            with state_lock:
+                state["reason"] = state["reason"] or "cancelled"
+            stop.set()
+            return True
+        return False
+
+    batch_root = get_simple_test_base_dir() / BATCH_RUNS_REL_PATH / _safe_name(run_key)
+
+    def _one(spid: str) -> None:
+        if _should_stop():
+            return
+        if on_started is not None:
+            on_started(spid)
+        sandbox_root = batch_root / _safe_name(spid)
+        ctx = _ScenarioRunContext(
+            sandbox_root=sandbox_root,
+            on_output=(lambda line: on_output(spid, line)) if on_output is not None else None,
+            should_cancel=_should_stop,
+        )
+        token = _SCENARIO_RUN_CTX.set(ctx)
+        try:
+            ret = run_generated_scenario(
+                savepoint_id=spid,
+                engine=engine,
+                dry_run=False,
+                timeout_sec=timeout_sec,
+                max_retries=max_retries,
+            )
+        except Exception as e:
+            ret = _batch_exception_result(spid, engine, e)
+        finally:
+            _SCENARIO_RUN_CTX.reset(token)
+        st = str(ret.get("status") or "")
+        if st == "passed":
+            shutil.rmtree(sandbox_root, ignore_errors=True)
+        elif sandbox_root.exists():
+            ret["sandbox_root"] = str(sandbox_root)
+        if fail_fast and st not in {"passed", "cancelled"}:
+            with state_lock:
+                state["reason"] = state["reason"] or "fail_fast"
+            stop.set()
+        if on_finished is not None:
+            on_finished(ret)
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, workers), thread_name_prefix=f"savepoint-{run_key}"
+    ) as pool:
+        list(pool.map(_one, target_ids))
+    try:
+        batch_root.rmdir()
+    except OSError:
+        pass
+    return str(state["reason"])
 
 
 def run_generated_scenarios_batch(
@@ -587,66 +890,59 @@ def run_generated_scenarios_batch(
     engine: str = "auto",
     timeout_sec: int = 600,
     max_retries: int = 1,
+    workers: Optional[int] = None,
+    fail_fast: bool = False,
 ) -> Dict[str, Any]:
-    idx_obj = _load_generated_index()
-    items = [x for x in idx_obj.get("items", []) if isinstance(x, dict)]
-    selected_ids = [str(x or "").strip() for x in (savepoint_ids or []) if str(x or "").strip()]
-    target_ids: List[str]
-    if selected_ids:
-        target_ids = selected_ids
-    else:
-        pool = items
-        if only_failed:
-            pool = [x for x in pool if (x.get("last_run_status") or "") == "failed"]
-        target_ids = [
-            str(x.get("savepoint_id") or "").strip()
-            for x in pool
-            if str(x.get("savepoint_id") or "").strip()
-        ]
-
+    n_workers = _resolve_batch_workers(workers)
+    target_ids = _resolve_generated_target_ids(savepoint_ids=savepoint_ids, only_failed=only_failed)
     if not target_ids:
         return {
             "total": 0,
             "passed": 0,
             "failed": 0,
+            "cancelled": 0,
+            "skipped": 0,
             "items": [],
             "message": "无可执行场景",
         }
 
     out: List[Dict[str, Any]] = []
-    for spid in target_ids:
-        try:
-            ret = run_generated_scenario(
-                savepoint_id=spid,
-                engine=engine,
-                dry_run=False,
-                timeout_sec=timeout_sec,
-                max_retries=max_retries,
-            )
-        except Exception as e:
-            ret = {
-                "savepoint_id": spid,
-                "engine": engine,
-                "dry_run": False,
-                "command": "",
-                "exit_code": 1,
-                "status": "failed",
-                "summary": f"batch-run exception: {type(e).__name__}: {e}",
-                "report_file": None,
-                "stdout_tail": "",
-                "stderr_tail": "",
-                "last_run_at": _now_iso(),
-            }
-        out.append(ret)
-
-    passed = sum(1 for x in out if str(x.get("status") or "") == "passed")
-    failed = len(out) - passed
-    return {
+    out_lock = threading.Lock()
+
+    def _collect(ret: Dict[str, Any]) -> None:
+        with out_lock:
+            out.append(ret)
+
+    stopped_reason = _execute_scenario_batch(
+        target_ids,
+        run_key=f"sync_{uuid.uuid4().hex[:12]}",
+        engine=engine,
+        timeout_sec=timeout_sec,
+        max_retries=max_retries,
+        workers=n_workers,
+        fail_fast=fail_fast,
+        is_cancelled=lambda: False,
+        on_finished=_collect,
+    )
+    # 并发完成顺序不稳定，按目标顺序输出
+    order = {spid: i for i, spid in enumerate(target_ids)}
+    out.sort(key=lambda x: order.get(str(x.get("savepoint_id") or ""), len(order)))
+
+    # fail_fast / 取消时被中止的场景计入 cancelled，尚未派发的计入 skipped，都不算失败
+    statuses = [str(x.get("status") or "") for x in out]
+    passed = statuses.count("passed")
+    cancelled = statuses.count("cancelled")
+    ret: Dict[str, Any] = {
         "total": len(out),
         "passed": passed,
-        "failed": failed,
+        "failed": len(out) - passed - cancelled,
+        "cancelled": cancelled,
+        "skipped": len(target_ids) - len(out),
         "items": out,
     }
+    if stopped_reason:
+        ret["stopped_reason"] = stopped_reason
+    return ret
 
 
 def _resolve_generated_target_ids(
@@ -674,6 +970,8 @@ def start_generated_scenarios_batch_job(
     engine: str = "auto",
     timeout_sec: int = 600,
     max_retries: int = 1,
+    workers: Optional[int] = None,
+    fail_fast: bool = False,
 ) -> Dict[str, Any]:
     _ensure_batch_jobs_loaded()
     eng = (engine or "auto").strip().lower()
@@ -683,6 +981,7 @@ def start_generated_scenarios_batch_job(
         raise ValueError("timeout_sec 必须在 5~3600 秒")
     if max_retries < 0 or max_retries > 3:
         raise ValueError("max_retries 必须在 0~3")
+    n_workers = _resolve_batch_workers(workers)
 
     target_ids = _resolve_generated_target_ids(savepoint_ids=savepoint_ids, only_failed=only_failed)
     job_id = f"job_{uuid.uuid4().hex[:12]}"
@@ -697,72 +996,123 @@ def start_generated_scenarios_batch_job(
         "timeout_sec": timeout_sec,
         "max_retries": max_retries,
         "only_failed": bool(only_failed),
+        "workers": n_workers,
+        "fail_fast": bool(fail_fast),
         "total": len(target_ids),
         "processed": 0,
         "passed": 0,
         "failed": 0,
+        "cancelled": 0,
         "cancel_requested": False,
+        "in_progress": {},
         "items": [],
         "target_ids": target_ids,
+        "owner": get_coordination_backend().owner_id,
     }
-    with _BATCH_JOB_LOCK:
+    with _BATCH_JOBS.transaction() as jobs:
         running = next(
-            (x for x in _BATCH_JOBS.values() if (x.get("status") or "") == "running"), None
+            (x for x in jobs.values() if (x.get("status") or "") == "running"), None
         )
         if running:
             raise ValueError(f"已有批量任务运行中: {running.get('job_id')}")
-        _BATCH_JOBS[job_id] = job
-        _persist_batch_jobs_locked()
+        jobs[job_id] = job
+        _persist_batch_jobs_locked(jobs)
 
-    def _runner() -> None:
-        final_status = "completed"
-        for spid in target_ids:
-            with _BATCH_JOB_LOCK:
-                cur = _BATCH_JOBS.get(job_id)
-                if not cur:
-                    return
-                if bool(cur.get("cancel_requested")):
-                    final_status = "cancelled"
-                    break
-            try:
-                ret = run_generated_scenario(
-                    savepoint_id=spid,
-                    engine=eng,
-                    dry_run=False,
-                    timeout_sec=timeout_sec,
-                    max_retries=max_retries,
-                )
-            except Exception as e:
-                ret = {
-                    "savepoint_id": spid,
-                    "status": "failed",
-                    "exit_code": 1,
-                    "run_code": "batch_exception",
-                    "summary": f"batch-async exception: {type(e).__name__}: {e}",
-                    "report_file": None,
-                }
-            with _BATCH_JOB_LOCK:
-                cur = _BATCH_JOBS.get(job_id)
-                if not cur:
-                    return
-                cur_items = cur.get("items") or []
-                cur_items.append(ret)
-                cur["items"] = cur_items
+    progress_lock = threading.Lock()
+    last_flush: Dict[str, float] = {}
+    pending_lines: Dict[str, int] = {}
+
+    def _is_cancelled() -> bool:
+        cur = _BATCH_JOBS.snapshot().get(job_id)
+        return cur is None or bool(cur.get("cancel_requested"))
+
+    def _on_started(spid: str) -> None:
+        with _BATCH_JOBS.transaction() as jobs:
+            cur = jobs.get(job_id)
+            if not cur:
+                return
+            in_progress = cur.get("in_progress") or {}
+            in_progress[spid] = {"started_at": _now_iso(), "output_lines": 0, "last_output": ""}
+            cur["in_progress"] = in_progress
+            _persist_batch_jobs_locked(jobs)
+
+    def _on_output(spid: str, line: str) -> None:
+        # 子进程逐行输出，节流写回 job 状态，前端轮询即可看到实时进度
+        with progress_lock:
+            pending_lines[spid] = pending_lines.get(spid, 0) + 1
+            now_ts = time.monotonic()
+            if now_ts - last_flush.get(spid, 0.0) < _PROGRESS_FLUSH_SEC:
+                return
+            last_flush[spid] = now_ts
+            pending = pending_lines.pop(spid)
+        with _BATCH_JOBS.transaction() as jobs:
+            cur = jobs.get(job_id)
+            if not cur:
+                return
+            info = (cur.get("in_progress") or {}).get(spid)
+            if not isinstance(info, dict):
+                return
+            info["output_lines"] = int(info.get("output_lines") or 0) + pending
+            info["last_output"] = line[-300:]
+            info["updated_at"] = _now_iso()
+            _persist_batch_jobs_locked(jobs)
+
+    def _on_finished(ret: Dict[str, Any]) -> None:
+        spid = str(ret.get("savepoint_id") or "")
+        with _BATCH_JOBS.transaction() as jobs:
+            cur = jobs.get(job_id)
+            if not cur:
+                return
+            (cur.get("in_progress") or {}).pop(spid, None)
+            cur_items = cur.get("items") or []
+            cur_items.append(ret)
+            cur["items"] = cur_items
+            st = str(ret.get("status") or "")
+            if st == "cancelled":
+                cur["cancelled"] = int(cur.get("cancelled") or 0) + 1
+            else:
                 cur["processed"] = int(cur.get("processed") or 0) + 1
-                if str(ret.get("status") or "") == "passed":
+                if st == "passed":
                     cur["passed"] = int(cur.get("passed") or 0) + 1
                 else:
                     cur["failed"] = int(cur.get("failed") or 0) + 1
-                _BATCH_JOBS[job_id] = cur
-                _persist_batch_jobs_locked()
-        with _BATCH_JOB_LOCK:
-            cur = _BATCH_JOBS.get(job_id)
+            jobs[job_id] = cur
+            _persist_batch_jobs_locked(jobs)
+
+    def _runner() -> None:
+        try:
+            stopped_reason = _execute_scenario_batch(
+                target_ids,
+                run_key=job_id,
+                engine=eng,
+                timeout_sec=timeout_sec,
+                max_retries=max_retries,
+                workers=n_workers,
+                fail_fast=bool(fail_fast),
+                is_cancelled=_is_cancelled,
+                on_started=_on_started,
+                on_output=_on_output,
+                on_finished=_on_finished,
+            )
+        except Exception as e:
+            stopped_reason = f"runner_error: {type(e).__name__}: {e}"
+        with _BATCH_JOBS.transaction() as jobs:
+            cur = jobs.get(job_id)
             if not cur:
                 return
-            cur["status"] = final_status
+            cur["status"] = "cancelled" if stopped_reason == "cancelled" else "completed"
+            if stopped_reason and stopped_reason != "cancelled":
+                cur["stopped_reason"] = stopped_reason
             cur["finished_at"] = _now_iso()
-            _BATCH_JOBS[job_id] = cur
-            _persist_batch_jobs_locked()
+            cur["in_progress"] = {}
+            cur["skipped"] = max(
+                0,
+                int(cur.get("total") or 0)
+                - int(cur.get("processed") or 0)
+                - int(cur.get("cancelled") or 0),
+            )
+            jobs[job_id] = cur
+            _persist_batch_jobs_locked(jobs)
             _append_job_history(
                 {
                     "job_id": cur.get("job_id"),
@@ -773,10 +1123,15 @@ def start_generated_scenarios_batch_job(
                     "engine": cur.get("engine"),
                     "max_retries": cur.get("max_retries"),
                     "only_failed": cur.get("only_failed"),
+                    "workers": cur.get("workers"),
+                    "fail_fast": cur.get("fail_fast"),
                     "total": cur.get("total"),
                     "processed": cur.get("processed"),
                     "passed": cur.get("passed"),
                     "failed": cur.get("failed"),
+                    "cancelled": cur.get("cancelled"),
+                    "skipped": cur.get("skipped"),
+                    "stopped_reason": cur.get("stopped_reason"),
                 }
             )
 
@@ -791,6 +1146,8 @@ def start_generated_scenarios_batch_job(
         "passed": 0,
         "failed": 0,
         "max_retries": max_retries,
+        "workers": n_workers,
+        "fail_fast": bool(fail_fast),
     }
 
 
@@ -799,14 +1156,14 @@ def get_generated_scenarios_batch_job(*, job_id: str) -> Dict[str, Any]:
     jid = (job_id or "").strip()
     if not jid:
         raise ValueError("job_id 不能为空")
-    with _BATCH_JOB_LOCK:
-        job = _BATCH_JOBS.get(jid)
+    with _BATCH_JOBS.transaction() as jobs:
+        job = jobs.get(jid)
         if not job:
             raise ValueError("任务不存在")
         # 避免无限增长：已完成且超过 24h 自动清理旧任务
         now_ts = time.time()
         stale: List[str] = []
-        for k, v in _BATCH_JOBS.items():
+        for k, v in jobs.items():
             if (v.get("status") or "") != "completed":
                 continue
             finished = str(v.get("finished_at") or "")
@@ -817,9 +1174,9 @@ def get_generated_scenarios_batch_job(*, job_id: str) -> Dict[str, Any]:
             if now_ts - dt.timestamp() > 24 * 3600:
                 stale.append(k)
         for k in stale:
-            _BATCH_JOBS.pop(k, None)
+            jobs.pop(k, None)
         if stale:
-            _persist_batch_jobs_locked()
+            _persist_batch_jobs_locked(jobs)
         return dict(job)
 
 
@@ -828,15 +1185,15 @@ def cancel_generated_scenarios_batch_job(*, job_id: str) -> Dict[str, Any]:
     jid = (job_id or "").strip()
     if not jid:
         raise ValueError("job_id 不能为空")
-    with _BATCH_JOB_LOCK:
-        job = _BATCH_JOBS.get(jid)
+    with _BATCH_JOBS.transaction() as jobs:
+        job = jobs.get(jid)
         if not job:
             raise ValueError("任务不存在")
         if (job.get("status") or "") != "running":
             return {"job_id": jid, "cancel_requested": False, "status": job.get("status")}
         job["cancel_requested"] = True
-        _BATCH_JOBS[jid] = job
-        _persist_batch_jobs_locked()
+        jobs[jid] = job
+        _persist_batch_jobs_locked(jobs)
         return {"job_id": jid, "cancel_requested": True, "status": job.get("status")}
 
 
@@ -874,17 +1231,20 @@ def _trim_report_snapshot(
         raise ValueError(f"检查点目标线程文件不存在: {target_thread_file.name}")
 
     # 1) 截断目标线程
-    conv = json.loads(target_thread_file.read_text(encoding="utf-8") or "{}")
+    conv = storage_codec.loads(
+        target_thread_file.read_text(encoding="utf-8") or "{}", "conversation"
+    )
     msgs = conv.get("messages") or []
     conv["messages"] = msgs[:cut_idx]
     meta = conv.setdefault("metadata", {})
     meta["updated_at"] = now
     meta["total_messages"] = len(conv["messages"])
-    target_thread_file.write_text(json.dumps(conv, ensure_ascii=False, indent=2), encoding="utf-8")
+    materialize(target_thread_file)
+    target_thread_file.write_text(storage_codec.dumps(conv, "conversation"), encoding="utf-8")
 
     # 2) 清理后续 phase 全量状态
     record_file = report_dir / "record.json"
-    record = json.loads(record_file.read_text(encoding="utf-8") or "{}")
+    record = storage_codec.loads(record_file.read_text(encoding="utf-8") or "{}", "report_record")
     steps = record.get("steps") or {}
     phase_idx = STEP_IDS.index(phase)
     for sid in STEP_IDS[phase_idx + 1 :]:
@@ -904,7 +1264,8 @@ def _trim_report_snapshot(
     record["updated_at"] = now
     # 后续被清理，统一重置可疑终态标记
     record["final_conclusion"] = None
-    record_file.write_text(json.dumps(record, ensure_ascii=False, indent=2), encoding="utf-8")
+    materialize(record_file)
+    record_file.write_text(storage_codec.dumps(record, "report_record"), encoding="utf-8")
 
     # 3) 若不是 rumination 起点，移除 rumination_progress，避免残留
     if phase != "rumination":
@@ -960,7 +1321,7 @@ def create_savepoint(
     if not src_thread_file.is_file():
         raise ValueError("目标线程不存在")
 
-    conv = json.loads(src_thread_file.read_text(encoding="utf-8") or "{}")
+    conv = storage_codec.loads(src_thread_file.read_text(encoding="utf-8") or "{}", "conversation")
     messages = conv.get("messages") or []
     if target_message_index >= len(messages):
         raise ValueError("target_message_index 超出范围")
@@ -978,9 +1339,15 @@ def create_savepoint(
 
     savepoint_id = f"sp_{uuid.uuid4().hex[:12]}"
     savepoint_dir = _savepoints_root() / savepoint_id
-    report_snapshot_dir = savepoint_dir / "report"
-    shutil.copytree(src_report_dir, report_snapshot_dir)
-    _trim_report_snapshot(report_snapshot_dir, phase=phase_n, thread_id=tid, cut_idx=cut_idx)
+    manifest_path = savepoint_dir / MANIFEST_NAME
+    # 先在暂存目录完成裁剪，再录入内容寻址存储；未改动的文件只增加引用计数
+    staging_dir = _savepoints_root() / SAVEPOINT_STAGING_DIRNAME / savepoint_id
+    try:
+        cow_copytree(src_report_dir, staging_dir)
+        _trim_report_snapshot(staging_dir, phase=phase_n, thread_id=tid, cut_idx=cut_idx)
+        manifest = snapshot_tree(staging_dir, _blob_store(), manifest_path)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
 
     content = str(target_msg.get("content") or "")
     auto_keywords = _extract_keywords(content)
@@ -1007,7 +1374,10 @@ def create_savepoint(
         "rewind_mode": "global_rewind",
         "expected_hint": final_hint,
         "expected_keywords": final_keywords,
-        "report_snapshot_path": str(report_snapshot_dir),
+        "manifest_path": str(manifest_path),
+        "snapshot_files": len(manifest["files"]),
+        "snapshot_bytes": manifest["total_bytes"],
+        "snapshot_new_blobs": manifest["new_blobs"],
     }
     _write_meta(savepoint_dir / "meta.json", meta)
 
@@ -1022,7 +1392,8 @@ def create_savepoint(
             "phase": phase_n,
             "thread_id": tid,
             "rewind_mode": "global_rewind",
-            "fixture_path": str(report_snapshot_dir),
+            # replay_simple_chat 的 --seed-report-dir 可直接指向含 manifest.json 的 savepoint 目录
+            "fixture_path": str(savepoint_dir),
             "meta_path": str(savepoint_dir / "meta.json"),
             "last_replay_status": None,
             "last_replay_at": None,
@@ -1072,18 +1443,20 @@ def record_savepoint_replay_result(
     if st not in {"passed", "failed"}:
         raise ValueError("status 必须是 passed 或 failed")
 
-    idx_obj = _load_index()
-    items = [x for x in idx_obj.get("items", []) if isinstance(x, dict)]
-    hit = next((x for x in items if (x.get("savepoint_id") or "") == spid), None)
-    if hit is None:
-        raise ValueError("savepoint 不存在")
-    hit["last_replay_status"] = st
-    hit["last_replay_at"] = _now_iso()
-    hit["last_replay_summary"] = (summary or "").strip()[:500]
-    if command:
-        hit["last_replay_command"] = command
-    idx_obj["items"] = items
-    _save_index(idx_obj)
+    # 并行批量执行时，父进程与各 replay 子进程都会回写该索引
+    with _index_file_lock(_index_path()):
+        idx_obj = _load_index()
+        items = [x for x in idx_obj.get("items", []) if isinstance(x, dict)]
+        hit = next((x for x in items if (x.get("savepoint_id") or "") == spid), None)
+        if hit is None:
+            raise ValueError("savepoint 不存在")
+        hit["last_replay_status"] = st
+        hit["last_replay_at"] = _now_iso()
+        hit["last_replay_summary"] = (summary or "").strip()[:500]
+        if command:
+            hit["last_replay_command"] = command
+        idx_obj["items"] = items
+        _save_index(idx_obj)
     _append_replay_log(
         {
             "at": hit.get("last_replay_at"),
@@ -1117,12 +1490,14 @@ def delete_savepoint(*, savepoint_id: str) -> Dict[str, Any]:
 
     meta_path = Path(str(hit.get("meta_path") or ""))
     sp_dir = meta_path.parent if meta_path.name == "meta.json" else (_savepoints_root() / spid)
+    # 先释放 blob 引用再删目录：中途失败时 manifest 仍在，可重试删除
+    gc_stats = release_manifest(sp_dir / MANIFEST_NAME)
     if sp_dir.is_dir():
         shutil.rmtree(sp_dir, ignore_errors=True)
 
     idx_obj["items"] = [x for x in items if (x.get("savepoint_id") or "") != spid]
     _save_index(idx_obj)
-    return {"deleted": True, "savepoint_id": spid}
+    return {"deleted": True, "savepoint_id": spid, **gc_stats}
 
 
 def export_savepoint_assets(*, savepoint_id: str) -> Dict[str, Any]:
@@ -1143,8 +1518,9 @@ def export_savepoint_assets(*, savepoint_id: str) -> Dict[str, Any]:
     if not isinstance(meta, dict):
         raise ValueError("savepoint meta 无效")
 
-    snapshot_dir = Path(str(meta.get("report_snapshot_path") or ""))
-    if not snapshot_dir.is_dir():
+    manifest_path = Path(str(meta.get("manifest_path") or ""))
+    legacy_dir = Path(str(meta.get("report_snapshot_path") or ""))
+    if not manifest_path.is_file() and not legacy_dir.is_dir():
         raise ValueError("savepoint snapshot 不存在")
 
     output_name = _safe_name(f"{hit.get('display_name')}_{spid}")
@@ -1153,7 +1529,8 @@ def export_savepoint_assets(*, savepoint_id: str) -> Dict[str, Any]:
     target_fixture_dir = fixture_root / output_name
     if target_fixture_dir.exists():
         raise ValueError("导出失败：目标 fixture 已存在，请先重命名 savepoint 再导出")
-    shutil.copytree(snapshot_dir, target_fixture_dir)
+    # fixture 会被编辑器/git 直接改写，不能与快照共享 inode
+    _restore_savepoint_snapshot(meta, target_fixture_dir, allow_hardlink=False)
 
     # 导出 case 到 batch_savepoints_general.json
     cases_file = (
@@ -1191,7 +1568,7 @@ def export_savepoint_assets(*, savepoint_id: str) -> Dict[str, Any]:
     )
     cases_obj["cases"] = cases
     cases_file.parent.mkdir(parents=True, exist_ok=True)
-    cases_file.write_text(json.dumps(cases_obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    cases_file.write_text(storage_codec.dumps(cases_obj, _FILE_TYPE, pretty=True), encoding="utf-8")
 
     # 导出 scenario 到 test_agent/scenarios/generated（默认 Playwright）
     scenario_dir = _project_root() / "test_agent" / "scenarios" / "generated"
@@ -1313,9 +1690,10 @@ def load_savepoint(*, activation_code: str, savepoint_id: str) -> Dict[str, Any]
     meta_path = Path(str(hit.get("meta_path") or ""))
     if not meta_path.is_file():
         raise ValueError("savepoint 元数据缺失")
-    meta = json.loads(meta_path.read_text(encoding="utf-8") or "{}")
-    snapshot_dir = Path(str(meta.get("report_snapshot_path") or ""))
-    if not snapshot_dir.is_dir():
+    meta = storage_codec.loads(meta_path.read_text(encoding="utf-8") or "{}", _FILE_TYPE)
+    manifest_path = Path(str(meta.get("manifest_path") or ""))
+    legacy_dir = Path(str(meta.get("report_snapshot_path") or ""))
+    if not manifest_path.is_file() and not legacy_dir.is_dir():
         raise ValueError("savepoint 快照目录缺失")
 
     root = get_effective_simple_root(rec)
@@ -1325,7 +1703,7 @@ def load_savepoint(*, activation_code: str, savepoint_id: str) -> Dict[str, Any]
     target_report_dir = root / "reports" / report_id
     if target_report_dir.exists():
         shutil.rmtree(target_report_dir, ignore_errors=True)
-    shutil.copytree(snapshot_dir, target_report_dir)
+    _restore_savepoint_snapshot(meta, target_report_dir)
 
     # 保持激活码 report 索引一致
     rec.report_id = report_id
@@ -0,0 +1,191 @@
+"""
+缓存通用件：内存 LRU、按 key 分片的磁盘目录、原子写、进程级实例槽与文件签名
+
+LLMResponseCache（app.core.llmapi.response_cache）、TTSCache（app.core.tts.cache）、
+ExportFragmentCache（app.utils.export_fragment_cache）共用这里的实现；
+各处按 (mtime_ns, size) 判断源文件是否变化的地方共用 file_signature。
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Generic, Optional, Tuple, TypeVar, Union
+
+T = TypeVar("T")
+
+FileSignature = Tuple[int, int]
+
+
+def stat_signature(st: os.stat_result) -> FileSignature:
+    """stat 结果的 (mtime_ns, size)。"""
+    return st.st_mtime_ns, st.st_size
+
+
+def file_signature(path: Union[str, Path]) -> Optional[FileSignature]:
+    """文件的 (mtime_ns, size)；文件不存在或无法访问时返回 None。"""
+    try:
+        return stat_signature(os.stat(path))
+    except OSError:
+        return None
+
+
+def temp_sibling(path: Path) -> Path:
+    """同目录下的隐藏临时文件名，写完后 os.replace 到 path 即为原子替换。"""
+    return path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}")
+
+
+def atomic_write(path: Path, data: Union[bytes, str]) -> None:
+    """先写临时文件再 os.replace；父目录不存在时创建。失败抛 OSError，且不留下临时文件。"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = temp_sibling(path)
+    try:
+        if isinstance(data, str):
+            tmp.write_text(data, encoding="utf-8")
+        else:
+            tmp.write_bytes(data)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+class ShardedDir:
+    """按 key 前两位分子目录存放：<root>/ab/<key><suffix>，避免单目录文件过多。"""
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+
+    def path(self, key: str, suffix: str = ".json") -> Path:
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    def sweep(
+        self,
+        *,
+        max_age: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        now: Optional[float] = None,
+    ) -> int:
+        """
+        删除 mtime 早于 now - max_age 的条目，再按 mtime 从旧到新删到总字节数不超过 max_bytes。
+        隐藏文件（写入中的临时文件等）不参与。返回删除的条目数。
+        """
+        now = time.time() if now is None else now
+        entries = []
+        for p in self.root.glob("*/*"):
+            if p.name.startswith("."):
+                continue
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort(key=lambda e: e[0])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, p in entries:
+            expired = max_age is not None and mtime <= now - max_age
+            if not expired and (max_bytes is None or total <= max_bytes):
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+class MemoryLRU(Generic[T]):
+    """
+    线程安全的内存 LRU，可同时按条目数与字节数限额（None 为不限）。
+
+    任一限额为 0 时不保存任何条目；单条超过 max_bytes 的值不进入内存层。
+    字节数由调用方在 put 时给出（通常是序列化后的长度）。
+    """
+
+    def __init__(
+        self, *, max_entries: Optional[int] = None, max_bytes: Optional[int] = None
+    ) -> None:
+        self.max_entries = None if max_entries is None else max(0, int(max_entries))
+        self.max_bytes = None if max_bytes is None else max(0, int(max_bytes))
+        self._items: "OrderedDict[str, Tuple[T, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: str) -> Optional[T]:
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is None:
+                return None
+            self._items.move_to_end(key)
+            return hit[0]
+
+    def put(self, key: str, value: T, size: int = 0) -> None:
+        if self.max_entries == 0 or self.max_bytes == 0:
+            return
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.pop(key)
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._items[key] = (value, size)
+            self._bytes += size
+            while (self.max_entries is not None and len(self._items) > self.max_entries) or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                _, (_, evicted) = self._items.popitem(last=False)
+                self._bytes -= evicted
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+
+class CacheSlot(Generic[T]):
+    """
+    进程级缓存实例槽：get() 首次调用时用 factory 创建，set() 替换（测试 / 配置热更新用）。
+
+    enabled 返回 False 时 get() 返回 None（不创建实例）。
+    """
+
+    def __init__(
+        self, factory: Callable[[], T], enabled: Optional[Callable[[], bool]] = None
+    ) -> None:
+        self._factory = factory
+        self._enabled = enabled
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> Optional[T]:
+        """当前实例（不触发创建）。"""
+        return self._instance
+
+    def get(self) -> Optional[T]:
+        if self._enabled is not None and not self._enabled():
+            return None
+        with self._lock:
+            if self._instance is None:
+                self._instance = self._factory()
+            return self._instance
+
+    def set(self, instance: Optional[T]) -> None:
+        with self._lock:
+            self._instance = instance
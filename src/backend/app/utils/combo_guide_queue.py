@@ -1,39 +1,41 @@
 """
 Per-user async queue for combo guide generation.
 
-In-memory, single-process. Enforces per-user concurrency limit
-and deduplicates in-flight combo_ids.
+Enforces per-user concurrency limit and deduplicates in-flight combo_ids.
+State lives in the coordination backend (app.utils.coordination), so with
+COORDINATION_BACKEND=sqlite the limit and dedup hold across uvicorn workers.
 """
 from __future__ import annotations
 
 import asyncio
 import logging
-import time
-from typing import Dict, Optional, Set
+from typing import Optional
+
+from app.utils.coordination import CoordinationBackend, get_coordination_backend
 
 logger = logging.getLogger(__name__)
 
 _MAX_CONCURRENT_PER_USER = 3
 _TASK_TIMEOUT = 60  # seconds
+_IN_FLIGHT_NAMESPACE = "combo_guide"
 
 
 class ComboGuideQueue:
     """Per-user queue with semaphore-based concurrency + in-flight dedup."""
 
-    def __init__(self) -> None:
-        self._sems: Dict[str, asyncio.Semaphore] = {}
-        self._in_flight: Dict[str, Set[str]] = {}
-        self._lock = asyncio.Lock()
+    def __init__(self, backend: Optional[CoordinationBackend] = None) -> None:
+        self._backend = backend
+
+    @property
+    def backend(self) -> CoordinationBackend:
+        return self._backend or get_coordination_backend()
 
-    def _get_sem(self, user_id: str) -> asyncio.Semaphore:
-        if user_id not in self._sems:
-            self._sems[user_id] = asyncio.Semaphore(_MAX_CONCURRENT_PER_USER)
-        return self._sems[user_id]
+    @staticmethod
+    def _key(user_id: str, combo_id: str) -> str:
+        return f"{user_id}:{combo_id}"
 
-    def _get_in_flight(self, user_id: str) -> Set[str]:
-        if user_id not in self._in_flight:
-            self._in_flight[user_id] = set()
-        return self._in_flight[user_id]
+    def _get_sem(self, user_id: str):
+        return self.backend.semaphore(f"combo_guide:{user_id}", _MAX_CONCURRENT_PER_USER)
 
     async def enqueue(
         self,
@@ -42,29 +44,27 @@ class ComboGuideQueue:
         generate_fn,
     ) -> bool:
         """Enqueue a generation task. Returns True if actually executed, False if dedup'd."""
-        async with self._lock:
-            in_flight = self._get_in_flight(user_id)
-            if combo_id in in_flight:
-                return False
-            in_flight.add(combo_id)
-
-        sem = self._get_sem(user_id)
-        await sem.acquire()
+        in_flight = self.backend.inflight_set(_IN_FLIGHT_NAMESPACE)
+        key = self._key(user_id, combo_id)
+        # sqlite 后端的读写是同步的，放到线程里执行，避免锁等待阻塞事件循环
+        if not await in_flight.try_add_async(key):
+            return False
+
         try:
-            await asyncio.wait_for(generate_fn(), timeout=_TASK_TIMEOUT)
-        except asyncio.TimeoutError:
-            logger.warning("combo guide timed out: user=%s combo=%s", user_id, combo_id)
-        except Exception:
-            logger.exception("combo guide failed: user=%s combo=%s", user_id, combo_id)
+            async with self._get_sem(user_id):
+                try:
+                    await asyncio.wait_for(generate_fn(), timeout=_TASK_TIMEOUT)
+                except asyncio.TimeoutError:
+                    logger.warning("combo guide timed out: user=%s combo=%s", user_id, combo_id)
+                except Exception:
+                    logger.exception("combo guide failed: user=%s combo=%s", user_id, combo_id)
         finally:
-            async with self._lock:
-                self._get_in_flight(user_id).discard(combo_id)
-            sem.release()
+            await in_flight.discard_async(key)
         return True
 
     async def is_in_flight(self, user_id: str, combo_id: str) -> bool:
-        async with self._lock:
-            return combo_id in self._get_in_flight(user_id)
+        in_flight = self.backend.inflight_set(_IN_FLIGHT_NAMESPACE)
+        return await in_flight.contains_async(self._key(user_id, combo_id))
 
 
 _queue = ComboGuideQueue()
@@ -15,8 +15,15 @@ from typing import Any, Callable, Dict, List, Optional
 import aiofiles
 from filelock import FileLock
 
+from app.utils import storage_codec
+from app.utils.cow_copy import materialize
 from app.utils.data_paths import get_conversation_dir
 from app.utils.id_codec import IDCodec
+from app.utils.metrics import timed_lock
+from app.utils.storage_codec import CONVERSATION_SCHEMA
+
+# 指标中的存储文件类型 / 锁名
+_FILE_TYPE = "conversation"
 
 
 class ConversationCategory(str, Enum):
@@ -65,6 +72,7 @@ class ConversationFileManager:
         """
         在文件锁保护下执行 fn(file_path)。
         锁粒度：按 (session_id, category) 即按文件，不同 report/thread 互不阻塞。
+        fn 可能覆盖写文件，执行前先断开沙箱 Fork 产生的硬链接（见 app.utils.cow_copy）。
         """
         file_path = self._get_file_path(session_id, category)
         lock_path = self._get_lock_path(file_path)
@@ -72,7 +80,8 @@ class ConversationFileManager:
 
         def _do():
             file_lock = FileLock(str(lock_path), timeout=30)
-            with file_lock:
+            with timed_lock(file_lock, _FILE_TYPE):
+                materialize(file_path)
                 result = fn(file_path)
             # 释放锁后清理 lock 文件，避免磁盘残留
             try:
@@ -93,7 +102,7 @@ class ConversationFileManager:
         def _do_append(fp: Path) -> Dict:
             try:
                 with open(fp, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                    data = CONVERSATION_SCHEMA.load(f, _FILE_TYPE)
             except FileNotFoundError:
                 data = {
                     **IDCodec.build_conversation_file_root_ids(session_id),
@@ -136,11 +145,22 @@ class ConversationFileManager:
 
             fp.parent.mkdir(parents=True, exist_ok=True)
             with open(fp, "w", encoding="utf-8") as f:
-                f.write(json.dumps(data, indent=2, ensure_ascii=False))
+                f.write(storage_codec.dumps(data, _FILE_TYPE))
             return message
 
         return await self._with_file_lock(session_id, category, _do_append)
 
+    def get_file_version(self, session_id: str, category: str) -> Optional[str]:
+        """
+        对话文件版本标识（mtime_ns / size / inode），只 stat 不读内容；文件不存在返回 None。
+        用于 /history 的 ETag：任何写入（含写前断开硬链接）都会改变该值。
+        """
+        try:
+            st = self._get_file_path(session_id, category).stat()
+        except OSError:
+            return None
+        return f"{st.st_mtime_ns:x}-{st.st_size:x}-{st.st_ino:x}"
+
     async def get_conversation_data(
         self,
         session_id: str,
@@ -153,7 +173,7 @@ class ConversationFileManager:
         try:
             async with aiofiles.open(file_path, mode="r", encoding="utf-8") as f:
                 content = await f.read()
-                raw = json.loads(content)
+                raw = CONVERSATION_SCHEMA.loads(content, _FILE_TYPE)
                 return IDCodec.normalize_conversation_data_on_read(raw, session_id)
         except (FileNotFoundError, json.JSONDecodeError, OSError, IOError):
             return {
@@ -177,7 +197,7 @@ class ConversationFileManager:
         def _do_update(fp: Path) -> None:
             try:
                 with open(fp, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                    data = CONVERSATION_SCHEMA.load(f, _FILE_TYPE)
             except (FileNotFoundError, json.JSONDecodeError):
                 return
             meta = data.setdefault("metadata", {})
@@ -185,10 +205,36 @@ class ConversationFileManager:
             meta["updated_at"] = datetime.now(timezone.utc).isoformat()
             fp.parent.mkdir(parents=True, exist_ok=True)
             with open(fp, "w", encoding="utf-8") as f:
-                f.write(json.dumps(data, indent=2, ensure_ascii=False))
+                f.write(storage_codec.dumps(data, _FILE_TYPE))
 
         await self._with_file_lock(session_id, category, _do_update)
 
+    async def update_metadata_if(
+        self,
+        session_id: str,
+        category: str,
+        updates: Dict,
+        predicate: Callable[[Dict], bool],
+    ) -> bool:
+        """文件锁内先用 predicate(metadata) 校验当前状态，通过才合并 updates。返回是否写入。"""
+
+        def _do_update(fp: Path) -> bool:
+            try:
+                with open(fp, "r", encoding="utf-8") as f:
+                    data = CONVERSATION_SCHEMA.load(f, _FILE_TYPE)
+            except (FileNotFoundError, json.JSONDecodeError):
+                return False
+            meta = data.setdefault("metadata", {})
+            if not predicate(meta):
+                return False
+            meta.update(updates)
+            meta["updated_at"] = datetime.now(timezone.utc).isoformat()
+            with open(fp, "w", encoding="utf-8") as f:
+                f.write(storage_codec.dumps(data, _FILE_TYPE))
+            return True
+
+        return await self._with_file_lock(session_id, category, _do_update)
+
     async def update_last_conclusion_card_payload(
         self,
         session_id: str,
@@ -200,7 +246,7 @@ class ConversationFileManager:
         def _do(fp: Path) -> bool:
             try:
                 with open(fp, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                    data = CONVERSATION_SCHEMA.load(f, _FILE_TYPE)
             except (FileNotFoundError, json.JSONDecodeError, OSError):
                 return False
             msgs = data.get("messages") or []
@@ -215,7 +261,7 @@ class ConversationFileManager:
                 meta["updated_at"] = datetime.now(timezone.utc).isoformat()
                 meta["total_messages"] = len(msgs)
                 with open(fp, "w", encoding="utf-8") as f:
-                    f.write(json.dumps(data, indent=2, ensure_ascii=False))
+                    f.write(storage_codec.dumps(data, _FILE_TYPE))
                 return True
             return False
 
@@ -227,7 +273,7 @@ class ConversationFileManager:
         def _do(fp: Path) -> bool:
             try:
                 with open(fp, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                    data = CONVERSATION_SCHEMA.load(f, _FILE_TYPE)
             except (FileNotFoundError, json.JSONDecodeError, OSError):
                 return False
             msgs = data.get("messages") or []
@@ -240,7 +286,7 @@ class ConversationFileManager:
                 meta["updated_at"] = datetime.now(timezone.utc).isoformat()
                 meta["total_messages"] = len(msgs)
                 with open(fp, "w", encoding="utf-8") as f:
-                    f.write(json.dumps(data, indent=2, ensure_ascii=False))
+                    f.write(storage_codec.dumps(data, _FILE_TYPE))
                 return True
             return False
 
@@ -263,7 +309,7 @@ class ConversationFileManager:
                 async with aiofiles.open(file_path, mode="r", encoding="utf-8") as f:
                     content = await f.read()
                     data = IDCodec.normalize_conversation_data_on_read(
-                        json.loads(content), session_id
+                        CONVERSATION_SCHEMA.loads(content, _FILE_TYPE), session_id
                     )
                     return data.get("messages", [])
             except (FileNotFoundError, json.JSONDecodeError):
@@ -278,7 +324,7 @@ class ConversationFileManager:
                         async with aiofiles.open(file_path, mode="r", encoding="utf-8") as f:
                             content = await f.read()
                             data = IDCodec.normalize_conversation_data_on_read(
-                                json.loads(content), session_id
+                                CONVERSATION_SCHEMA.loads(content, _FILE_TYPE), session_id
                             )
                             messages.extend(data.get("messages", []))
                     except (FileNotFoundError, json.JSONDecodeError):
@@ -308,7 +354,7 @@ class ConversationFileManager:
                     async with aiofiles.open(file_path, mode="r", encoding="utf-8") as f:
                         content = await f.read()
                         data = IDCodec.normalize_conversation_data_on_read(
-                            json.loads(content), session_id
+                            CONVERSATION_SCHEMA.loads(content, _FILE_TYPE), session_id
                         )
                         result[category] = data.get("messages", [])
                 except (FileNotFoundError, json.JSONDecodeError):
@@ -343,7 +389,7 @@ class ConversationFileManager:
         def _do(fp: Path) -> int:
             try:
                 with open(fp, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                    data = CONVERSATION_SCHEMA.load(f, _FILE_TYPE)
             except (FileNotFoundError, json.JSONDecodeError, OSError):
                 return 0
             msgs = data.get("messages") or []
@@ -404,7 +450,7 @@ class ConversationFileManager:
             meta["total_messages"] = len(data["messages"])
             fp.parent.mkdir(parents=True, exist_ok=True)
             with open(fp, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+                f.write(storage_codec.dumps(data, _FILE_TYPE))
             return deleted
 
         return await self._with_file_lock(session_id, category, _do)
@@ -0,0 +1,609 @@
+"""
+多 worker 协调后端（信号量 / 在途去重集合 / 任务注册表）。
+
+- local：进程内实现（默认），与旧版 asyncio.Semaphore / set / dict 行为一致。
+- sqlite：同机多进程共享（uvicorn --workers N），基于 WAL 模式的 SQLite 文件；
+  每条占用记录带 owner（host:pid）与租约过期时间，worker 崩溃后由
+  「pid 已退出」或「租约过期」两条规则回收，避免名额永久泄漏。
+  持有者进程内的心跳线程每 1/3 租约续期一次本进程仍持有的记录，
+  运行时间超过租约的任务不会被其他 worker 当作过期回收。
+
+sqlite 后端的读写是同步的（BEGIN IMMEDIATE，锁等待最长 30s），协程里应使用
+InFlightSet 的 *_async 方法或 asyncio.to_thread，避免阻塞事件循环。
+
+通过 settings.COORDINATION_BACKEND 选择，调用方只依赖 get_coordination_backend()。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    MutableMapping,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from app.utils.data_paths import get_shared_data_dir
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_LEASE_SECONDS = 600
+_POLL_MIN_SECONDS = 0.02
+_POLL_MAX_SECONDS = 0.5
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+async def _acquire_in_thread(acquire: Callable[[], T], undo: Callable[[T], None]) -> T:
+    """
+    在线程中执行获取操作；调用方在等待期间被取消时，线程仍会跑完，
+    其获取到的资源（结果为真值）交给 undo 在线程中归还，再向上抛出 CancelledError。
+    """
+    fut = asyncio.ensure_future(asyncio.to_thread(acquire))
+    try:
+        return await asyncio.shield(fut)
+    except asyncio.CancelledError:
+
+        def _undo(result: T) -> None:
+            try:
+                undo(result)
+            except Exception:
+                logger.exception("coordination: rollback after cancelled acquire failed")
+
+        def _rollback(done: "asyncio.Future[T]") -> None:
+            if done.cancelled() or done.exception() is not None or not done.result():
+                return
+            asyncio.get_running_loop().run_in_executor(None, _undo, done.result())
+
+        fut.add_done_callback(_rollback)
+        raise
+
+
+# ---------------------------------------------------------------------------
+# 抽象接口
+# ---------------------------------------------------------------------------
+
+
+class InFlightSet:
+    """在途 key 集合：try_add 成功者获得执行权，其余调用方视为重复请求。"""
+
+    def try_add(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def add(self, key: str) -> None:
+        self.try_add(key)
+
+    def discard(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __contains__(self, key: object) -> bool:
+        raise NotImplementedError
+
+    async def try_add_async(self, key: str) -> bool:
+        return await _acquire_in_thread(lambda: self.try_add(key), lambda _: self.discard(key))
+
+    async def discard_async(self, key: str) -> None:
+        await asyncio.to_thread(self.discard, key)
+
+    async def contains_async(self, key: str) -> bool:
+        return await asyncio.to_thread(self.__contains__, key)
+
+
+class JobRegistry:
+    """job_id -> job dict 的注册表；复合读写必须放在 transaction() 内。"""
+
+    def transaction(self) -> ContextManager[MutableMapping[str, Dict[str, Any]]]:
+        raise NotImplementedError
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self.transaction() as jobs:
+            return {k: dict(v) for k, v in jobs.items() if isinstance(v, dict)}
+
+    def clear(self) -> None:
+        with self.transaction() as jobs:
+            jobs.clear()
+
+
+class CoordinationBackend:
+    name = "base"
+
+    def __init__(self) -> None:
+        self.host = socket.gethostname()
+        self.pid = os.getpid()
+
+    @property
+    def owner_id(self) -> str:
+        return f"{self.host}:{self.pid}"
+
+    def owner_alive(self, owner: Optional[str]) -> bool:
+        """owner 对应的进程是否仍可能持有资源（仅本进程可确认时返回 True）。"""
+        return bool(owner) and owner == self.owner_id
+
+    def semaphore(self, name: str, limit: int):
+        """返回可 `async with` 的信号量；limit<=0 表示不限制，返回 None。"""
+        raise NotImplementedError
+
+    def inflight_set(self, namespace: str) -> InFlightSet:
+        raise NotImplementedError
+
+    def job_registry(self, namespace: str) -> JobRegistry:
+        raise NotImplementedError
+
+
+# ---------------------------------------------------------------------------
+# local：进程内
+# ---------------------------------------------------------------------------
+
+
+class _LocalInFlightSet(InFlightSet):
+    def __init__(self) -> None:
+        self._keys: set[str] = set()
+        self._lock = threading.Lock()
+
+    def try_add(self, key: str) -> bool:
+        with self._lock:
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            return True
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._keys.discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            return key in self._keys
+
+    # 进程内实现不会阻塞，免去线程切换
+    async def try_add_async(self, key: str) -> bool:
+        return self.try_add(key)
+
+    async def discard_async(self, key: str) -> None:
+        self.discard(key)
+
+    async def contains_async(self, key: str) -> bool:
+        return key in self
+
+
+class _LocalJobRegistry(JobRegistry):
+    def __init__(self) -> None:
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def transaction(self) -> Iterator[MutableMapping[str, Dict[str, Any]]]:
+        with self._lock:
+            yield self._jobs
+
+
+class LocalCoordinationBackend(CoordinationBackend):
+    name = "local"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._sems: Dict[str, asyncio.Semaphore] = {}
+        self._sets: Dict[str, _LocalInFlightSet] = {}
+        self._registries: Dict[str, _LocalJobRegistry] = {}
+        self._lock = threading.Lock()
+
+    def semaphore(self, name: str, limit: int):
+        if limit <= 0:
+            return None
+        with self._lock:
+            sem = self._sems.get(name)
+            if sem is None:
+                sem = asyncio.Semaphore(limit)
+                self._sems[name] = sem
+            return sem
+
+    def inflight_set(self, namespace: str) -> InFlightSet:
+        with self._lock:
+            return self._sets.setdefault(namespace, _LocalInFlightSet())
+
+    def job_registry(self, namespace: str) -> JobRegistry:
+        with self._lock:
+            return self._registries.setdefault(namespace, _LocalJobRegistry())
+
+
+# ---------------------------------------------------------------------------
+# sqlite：同机多进程共享
+# ---------------------------------------------------------------------------
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sem_slots (
+    name TEXT NOT NULL,
+    token TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sem_slots_name ON sem_slots(name);
+CREATE TABLE IF NOT EXISTS inflight (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    namespace TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (namespace, job_id)
+);
+"""
+
+
+class _SqliteSemaphore:
+    """跨进程计数信号量：每个持有者占一行 sem_slots，行数 < limit 时可获取。"""
+
+    def __init__(self, backend: "SqliteCoordinationBackend", name: str, limit: int) -> None:
+        self._backend = backend
+        self._name = name
+        self._limit = limit
+        self._tokens: list[str] = []
+
+    def _try_acquire(self) -> Optional[str]:
+        token = uuid.uuid4().hex
+        with self._backend._tx() as conn:
+            self._backend._purge_stale(conn, "sem_slots", "name", self._name)
+            (held,) = conn.execute(
+                "SELECT COUNT(*) FROM sem_slots WHERE name = ?", (self._name,)
+            ).fetchone()
+            if held >= self._limit:
+                return None
+            conn.execute(
+                "INSERT INTO sem_slots(name, token, owner, expires_at) VALUES (?, ?, ?, ?)",
+                (self._name, token, self._backend.owner_id, self._backend._lease_deadline()),
+            )
+        self._backend._track(("sem_slots", token))
+        return token
+
+    def _release(self, token: str) -> None:
+        self._backend._untrack(("sem_slots", token))
+        with self._backend._tx() as conn:
+            conn.execute("DELETE FROM sem_slots WHERE token = ?", (token,))
+
+    async def acquire(self) -> bool:
+        delay = _POLL_MIN_SECONDS
+        while True:
+            token = await _acquire_in_thread(self._try_acquire, self._release)
+            if token:
+                self._tokens.append(token)
+                return True
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _POLL_MAX_SECONDS)
+
+    def release(self) -> None:
+        if not self._tokens:
+            return
+        token = self._tokens.pop()
+        try:
+            self._release(token)
+        except sqlite3.Error:
+            logger.exception("coordination: release semaphore slot failed name=%s", self._name)
+
+    async def __aenter__(self) -> "_SqliteSemaphore":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await asyncio.to_thread(self.release)
+
+
+class _SqliteInFlightSet(InFlightSet):
+    def __init__(self, backend: "SqliteCoordinationBackend", namespace: str) -> None:
+        self._backend = backend
+        self._namespace = namespace
+
+    def try_add(self, key: str) -> bool:
+        with self._backend._tx() as conn:
+            self._backend._purge_stale(
+                conn, "inflight", "namespace", self._namespace, extra=("key", key)
+            )
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO inflight(namespace, key, owner, expires_at) VALUES (?, ?, ?, ?)",
+                (self._namespace, key, self._backend.owner_id, self._backend._lease_deadline()),
+            )
+            added = cur.rowcount == 1
+        if added:
+            self._backend._track(("inflight", self._namespace, key))
+        return added
+
+    def discard(self, key: str) -> None:
+        self._backend._untrack(("inflight", self._namespace, key))
+        with self._backend._tx() as conn:
+            conn.execute(
+                "DELETE FROM inflight WHERE namespace = ? AND key = ?", (self._namespace, key)
+            )
+
+    def clear(self) -> None:
+        self._backend._untrack_where(lambda h: h[0] == "inflight" and h[1] == self._namespace)
+        with self._backend._tx() as conn:
+            conn.execute("DELETE FROM inflight WHERE namespace = ?", (self._namespace,))
+
+    def __contains__(self, key: object) -> bool:
+        with self._backend._tx() as conn:
+            self._backend._purge_stale(
+                conn, "inflight", "namespace", self._namespace, extra=("key", str(key))
+            )
+            row = conn.execute(
+                "SELECT 1 FROM inflight WHERE namespace = ? AND key = ?",
+                (self._namespace, str(key)),
+            ).fetchone()
+            return row is not None
+
+
+class _SqliteJobRegistry(JobRegistry):
+    def __init__(self, backend: "SqliteCoordinationBackend", namespace: str) -> None:
+        self._backend = backend
+        self._namespace = namespace
+
+    @contextmanager
+    def transaction(self) -> Iterator[MutableMapping[str, Dict[str, Any]]]:
+        with self._backend._tx() as conn:
+            rows = conn.execute(
+                "SELECT job_id, payload FROM jobs WHERE namespace = ?", (self._namespace,)
+            ).fetchall()
+            original: Dict[str, str] = {}
+            jobs: Dict[str, Dict[str, Any]] = {}
+            for job_id, payload in rows:
+                original[job_id] = payload
+                try:
+                    obj = json.loads(payload)
+                except (TypeError, ValueError):
+                    continue
+                if isinstance(obj, dict):
+                    jobs[job_id] = obj
+            yield jobs
+            now = time.time()
+            for job_id in set(original) - set(jobs):
+                conn.execute(
+                    "DELETE FROM jobs WHERE namespace = ? AND job_id = ?",
+                    (self._namespace, job_id),
+                )
+            for job_id, job in jobs.items():
+                payload = json.dumps(job, ensure_ascii=False, sort_keys=True)
+                if original.get(job_id) == payload:
+                    continue
+                conn.execute(
+                    "INSERT OR REPLACE INTO jobs(namespace, job_id, payload, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (self._namespace, str(job_id), payload, now),
+                )
+
+
+class SqliteCoordinationBackend(CoordinationBackend):
+    name = "sqlite"
+
+    def __init__(self, db_path: Path, lease_seconds: int = DEFAULT_LEASE_SECONDS) -> None:
+        super().__init__()
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = max(1, int(lease_seconds))
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+        # 本进程持有的记录：("sem_slots", token) / ("inflight", namespace, key)，由心跳线程续期
+        self._held: Dict[Tuple[str, ...], None] = {}
+        self._held_lock = threading.Lock()
+        self._heartbeat: Optional[threading.Thread] = None
+        self._heartbeat_pid: Optional[int] = None
+        self._stop = threading.Event()
+
+    @property
+    def heartbeat_interval(self) -> float:
+        return max(0.2, self.lease_seconds / 3)
+
+    def _track(self, held: Tuple[str, ...]) -> None:
+        with self._held_lock:
+            self._held[held] = None
+            if self._heartbeat_pid != os.getpid() or self._heartbeat is None:
+                # 首次持有，或 fork 后子进程里没有父进程的线程
+                self._stop = threading.Event()
+                self._heartbeat = threading.Thread(
+                    target=self._heartbeat_loop,
+                    args=(self._stop,),
+                    name="coordination-heartbeat",
+                    daemon=True,
+                )
+                self._heartbeat_pid = os.getpid()
+                self._heartbeat.start()
+
+    def _untrack(self, held: Tuple[str, ...]) -> None:
+        with self._held_lock:
+            self._held.pop(held, None)
+
+    def _untrack_where(self, pred) -> None:
+        with self._held_lock:
+            for held in [h for h in self._held if pred(h)]:
+                del self._held[held]
+
+    def renew_leases(self) -> int:
+        """把本进程仍持有的记录的租约延长到 now + lease_seconds，返回续期行数。"""
+        with self._held_lock:
+            held = list(self._held)
+        if not held:
+            return 0
+        deadline, owner, renewed = self._lease_deadline(), self.owner_id, 0
+        with self._tx() as conn:
+            for item in held:
+                if item[0] == "sem_slots":
+                    cur = conn.execute(
+                        "UPDATE sem_slots SET expires_at = ? WHERE token = ? AND owner = ?",
+                        (deadline, item[1], owner),
+                    )
+                else:
+                    cur = conn.execute(
+                        "UPDATE inflight SET expires_at = ? "
+                        "WHERE namespace = ? AND key = ? AND owner = ?",
+                        (deadline, item[1], item[2], owner),
+                    )
+                renewed += cur.rowcount
+        return renewed
+
+    def _heartbeat_loop(self, stop: threading.Event) -> None:
+        while not stop.wait(self.heartbeat_interval):
+            try:
+                self.renew_leases()
+            except sqlite3.Error:
+                logger.warning("coordination: lease renewal failed", exc_info=True)
+
+    def close(self) -> None:
+        """停止心跳线程（不删除已持有的记录）。"""
+        self._stop.set()
+        with self._held_lock:
+            self._heartbeat = None
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def _lease_deadline(self) -> float:
+        return time.time() + self.lease_seconds
+
+    def owner_alive(self, owner: Optional[str]) -> bool:
+        if not owner:
+            return False
+        if owner == self.owner_id:
+            return True
+        host, _, pid_raw = owner.rpartition(":")
+        if host != self.host:
+            # 非本机 owner 无法探测，交给租约过期回收
+            return True
+        try:
+            return _pid_alive(int(pid_raw))
+        except ValueError:
+            return False
+
+    def _purge_stale(
+        self,
+        conn: sqlite3.Connection,
+        table: str,
+        scope_col: str,
+        scope_val: str,
+        extra: Optional[tuple[str, str]] = None,
+    ) -> None:
+        where = f"{scope_col} = ?"
+        params: list[Any] = [scope_val]
+        if extra:
+            where += f" AND {extra[0]} = ?"
+            params.append(extra[1])
+        conn.execute(
+            f"DELETE FROM {table} WHERE {where} AND expires_at < ?", (*params, time.time())
+        )
+        owners = [
+            r[0] for r in conn.execute(f"SELECT DISTINCT owner FROM {table} WHERE {where}", params)
+        ]
+        for owner in owners:
+            if not self.owner_alive(owner):
+                conn.execute(f"DELETE FROM {table} WHERE {where} AND owner = ?", (*params, owner))
+
+    def semaphore(self, name: str, limit: int):
+        if limit <= 0:
+            return None
+        return _SqliteSemaphore(self, name, limit)
+
+    def inflight_set(self, namespace: str) -> InFlightSet:
+        return _SqliteInFlightSet(self, namespace)
+
+    def job_registry(self, namespace: str) -> JobRegistry:
+        return _SqliteJobRegistry(self, namespace)
+
+
+# ---------------------------------------------------------------------------
+# 全局实例
+# ---------------------------------------------------------------------------
+
+_backend: Optional[CoordinationBackend] = None
+_backend_lock = threading.Lock()
+
+
+def create_coordination_backend(
+    kind: Optional[str] = None,
+    *,
+    db_path: Optional[str] = None,
+    lease_seconds: Optional[int] = None,
+) -> CoordinationBackend:
+    from app.config.settings import settings
+
+    k = (kind or getattr(settings, "COORDINATION_BACKEND", "local") or "local").strip().lower()
+    if k == "local":
+        return LocalCoordinationBackend()
+    if k == "sqlite":
+        raw = db_path or getattr(settings, "COORDINATION_SQLITE_PATH", None)
+        path = Path(raw) if raw else get_shared_data_dir() / "coordination.sqlite3"
+        lease = lease_seconds or getattr(settings, "COORDINATION_LEASE_SECONDS", None)
+        return SqliteCoordinationBackend(path, lease_seconds=lease or DEFAULT_LEASE_SECONDS)
+    raise ValueError(f"未知的 COORDINATION_BACKEND: {k}（可选 local/sqlite）")
+
+
+def get_coordination_backend() -> CoordinationBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_coordination_backend()
+    return _backend
+
+
+def set_coordination_backend(backend: Optional[CoordinationBackend]) -> None:
+    """替换全局后端（测试或启动时显式指定）；None 表示下次按配置重建。"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
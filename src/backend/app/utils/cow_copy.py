@@ -0,0 +1,168 @@
+"""
+文件级写时复制（copy-on-write）拷贝：沙箱 Fork / savepoint 复制 report 目录时使用。
+
+按顺序尝试，失败自动降级：
+1. reflink：文件系统级 COW（btrfs / xfs 等，Linux FICLONE），与源完全独立
+2. hardlink：共享 inode，零拷贝零额外占用；任何一侧覆盖写之前必须调用 materialize()
+3. copy：普通 shutil.copy2
+
+约定：对 simple 数据目录做覆盖写 / 追加写的函数（对话、进度、record、问卷等），
+写盘前统一调用 materialize(path)；仅当文件存在多个硬链接时才会真正复制，其余情况只是一次 stat。
+"""
+
+from __future__ import annotations
+
+import errno
+import logging
+import os
+import shutil
+import stat
+import sys
+import uuid
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+# linux/fs.h: #define FICLONE _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+# 这些错误表示当前文件系统/跨设备不支持该方式，直接降级且本次拷贝不再尝试
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    getattr(errno, "ENOTSUP", errno.EOPNOTSUPP),
+    errno.EMLINK,
+}
+
+COPY_MODES = ("auto", "reflink", "copy")
+
+
+def _resolve_mode(mode: Optional[str]) -> str:
+    m = (mode or getattr(settings, "SANDBOX_COPY_MODE", "auto") or "auto").strip().lower()
+    if m not in COPY_MODES:
+        raise ValueError(f"不支持的拷贝模式: {m}（可选 {'/'.join(COPY_MODES)}）")
+    return m
+
+
+def _try_reflink(src: Path, dst: Path) -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+
+    with open(src, "rb") as fs, open(dst, "wb") as fd:
+        try:
+            fcntl.ioctl(fd.fileno(), _FICLONE, fs.fileno())
+        except OSError:
+            fd.close()
+            dst.unlink(missing_ok=True)
+            raise
+    shutil.copystat(src, dst)
+    return True
+
+
+class _CowCopier:
+    """单次目录拷贝的状态：记住已失败的方式，避免每个文件重复试错。"""
+
+    def __init__(self, mode: str, allow_hardlink: bool) -> None:
+        self.reflink_ok = mode in {"auto", "reflink"}
+        self.hardlink_ok = mode == "auto" and allow_hardlink
+        self.stats: Dict[str, int] = {"reflinked": 0, "linked": 0, "copied": 0}
+
+    def copy(self, src: Path, dst: Path) -> str:
+        if self.reflink_ok:
+            try:
+                if _try_reflink(src, dst):
+                    self.stats["reflinked"] += 1
+                    return "reflink"
+                self.reflink_ok = False
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+                self.reflink_ok = False
+        if self.hardlink_ok:
+            try:
+                os.link(src, dst)
+                self.stats["linked"] += 1
+                return "hardlink"
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+                self.hardlink_ok = False
+        shutil.copy2(src, dst)
+        self.stats["copied"] += 1
+        return "copy"
+
+
+def copy_file_cow(
+    src: PathLike,
+    dst: PathLike,
+    *,
+    allow_hardlink: bool = True,
+    mode: Optional[str] = None,
+) -> str:
+    """拷贝单个文件（dst 不得已存在），返回实际使用的方式：reflink | hardlink | copy。"""
+    return _CowCopier(_resolve_mode(mode), allow_hardlink).copy(Path(src), Path(dst))
+
+
+def cow_copytree(
+    src: PathLike,
+    dst: PathLike,
+    *,
+    allow_hardlink: bool = True,
+    mode: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    等价于 shutil.copytree(src, dst)（dst 不得已存在，符号链接按内容拷贝），
+    但文件优先 reflink / 硬链接。返回 {"reflinked", "linked", "copied"} 计数。
+
+    allow_hardlink=False：目标会被仓库外工具直接编辑（如导出到 fixtures）时使用，只做 reflink/copy。
+    """
+    src_p, dst_p = Path(src), Path(dst)
+    if not src_p.is_dir():
+        raise FileNotFoundError(f"源目录不存在: {src_p}")
+    dst_p.mkdir(parents=True, exist_ok=False)
+    copier = _CowCopier(_resolve_mode(mode), allow_hardlink)
+    for root, dirs, files in os.walk(src_p):
+        rel = Path(root).relative_to(src_p)
+        out_dir = dst_p / rel
+        for d in dirs:
+            (out_dir / d).mkdir(exist_ok=True)
+        for name in files:
+            s = Path(root) / name
+            if s.is_symlink():
+                s = s.resolve()
+                if not s.is_file():
+                    continue
+            copier.copy(s, out_dir / name)
+        shutil.copystat(root, out_dir)
+    if copier.stats["linked"] or copier.stats["reflinked"]:
+        logger.debug("cow_copytree %s -> %s stats=%s", src_p, dst_p, copier.stats)
+    return dict(copier.stats)
+
+
+def materialize(path: PathLike) -> bool:
+    """
+    写前断开硬链接：文件存在且 st_nlink > 1 时，复制为独立文件并原子替换。
+    返回是否发生了复制。不存在 / 已独立的文件直接返回 False。
+    """
+    p = Path(path)
+    try:
+        st = p.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+    if not stat.S_ISREG(st.st_mode) or st.st_nlink <= 1:
+        return False
+    tmp = p.with_name(f".{p.name}.cow-{uuid.uuid4().hex[:8]}")
+    try:
+        shutil.copy2(p, tmp)
+        os.replace(tmp, p)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return True
@@ -3,8 +3,18 @@
 
 所有日志、对话、题目进度等数据存储在项目根 ./data/ 下，
 不依赖当前工作目录，避免数据落在 src/backend/ 内。
+
+data_root_override 可在当前上下文（协程 / 线程池任务）里把 data/ 换成另一个目录，
+供进程内并发执行的测试场景各用一份独立数据根；只影响调用时才解析路径的代码。
+进程级单例（后置任务队列、协调后端、LLM / TTS 缓存）用 get_shared_data_dir()，
+不会被首个场景的临时数据根固定住。
 """
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
+from typing import Iterator, Optional, Union
+
+_data_root_override: ContextVar[Optional[Path]] = ContextVar("data_root_override", default=None)
 
 
 def get_project_root() -> Path:
@@ -14,10 +24,29 @@ def get_project_root() -> Path:
 
 
 def get_project_data_dir() -> Path:
-    """项目根目录下的 data/"""
+    """项目根目录下的 data/（当前上下文设置了 data_root_override 时返回覆盖目录）"""
+    override = _data_root_override.get()
+    if override is not None:
+        return override
+    return get_shared_data_dir()
+
+
+def get_shared_data_dir() -> Path:
+    """项目根目录下的 data/，忽略 data_root_override；供整个进程共用一份的资源使用。"""
     return get_project_root() / "data"
 
 
+@contextmanager
+def data_root_override(root: Union[str, Path]) -> Iterator[Path]:
+    """在当前上下文内把 data/ 替换为 root（退出时恢复）。"""
+    path = Path(root)
+    token = _data_root_override.set(path)
+    try:
+        yield path
+    finally:
+        _data_root_override.reset(token)
+
+
 def get_user_data_dir() -> Path:
     """data/user/ - 用户级数据（basic_info 等）"""
     return get_project_data_dir() / "user"
@@ -0,0 +1,354 @@
+"""
+智能体调试日志（runs.jsonl）的 session 索引。
+
+日志本体仍按原布局追加写：
+- data/debug_logs/{session_id}.jsonl
+- data/logs/{user_id|anonymous}/{session_id}/runs.jsonl
+
+索引位于 data/debug_logs/_index/{session_id}.json，记录该 session 的全部日志文件
+（相对 data/ 的路径）以及每个文件逐行的字节偏移与 timestamp：
+
+    {"version": 1, "scanned": true,
+     "files": {"debug_logs/s1.jsonl": {"size": 1234, "offsets": [0, 617], "ts": ["...", "..."]}}}
+
+追加写不重写整份索引：新行的 [相对路径, 起始偏移, 结束偏移, timestamp] 追加到旁路日志
+_index/{session_id}.journal，读取时并入；记录数达到 JOURNAL_COMPACT_RECORDS 时合并进索引并删除旁路日志。
+
+读取方按索引直接打开对应文件并 seek 到所需行，不再遍历 data/logs 下所有用户目录。
+历史数据首次读取时扫描一次目录回填（之后不再扫描）；由本写入方新建、且写入前日志文件都不存在的
+session 不需要回填。文件被外部追加（size 大于索引记录）时只增量索引尾部。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from filelock import FileLock
+
+from app.utils.data_paths import get_debug_logs_dir, get_logs_dir
+
+INDEX_DIRNAME = "_index"
+INDEX_VERSION = 1
+RUNS_FILENAME = "runs.jsonl"
+# 旁路日志累积到这么多条记录时合并进索引
+JOURNAL_COMPACT_RECORDS = 256
+
+
+def _safe_session_id(session_id: str) -> str:
+    sid = str(session_id or "").strip()
+    if not sid or "/" in sid or "\\" in sid or sid in (".", ".."):
+        raise ValueError(f"无效的 session_id: {session_id!r}")
+    return sid
+
+
+def _entry_ts(raw: bytes) -> Optional[str]:
+    """行的 timestamp；空行 / 非 JSON 对象返回 None（读取时跳过，与旧逻辑一致）。"""
+    if not raw:
+        return None
+    try:
+        entry = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return str(entry.get("timestamp") or "") if isinstance(entry, dict) else None
+
+
+class DebugLogIndex:
+    """session_id -> 日志文件 + 行偏移；写入与索引更新在同一把文件锁内完成。"""
+
+    def __init__(self, debug_dir: Optional[Path] = None, logs_dir: Optional[Path] = None) -> None:
+        self.debug_dir = Path(debug_dir) if debug_dir else get_debug_logs_dir()
+        self.logs_dir = Path(logs_dir) if logs_dir else get_logs_dir()
+        # 索引内路径相对两者的公共父目录（默认即 data/）
+        self.root = Path(os.path.commonpath([self.debug_dir.resolve(), self.logs_dir.resolve()]))
+        self.index_dir = self.debug_dir / INDEX_DIRNAME
+
+    # ── 路径 ──
+
+    def debug_log_path(self, session_id: str) -> Path:
+        return self.debug_dir / f"{_safe_session_id(session_id)}.jsonl"
+
+    def user_log_path(self, session_id: str, user_id: Optional[str]) -> Path:
+        return (
+            self.logs_dir
+            / str(user_id or "anonymous")
+            / _safe_session_id(session_id)
+            / RUNS_FILENAME
+        )
+
+    def _index_path(self, session_id: str) -> Path:
+        return self.index_dir / f"{_safe_session_id(session_id)}.json"
+
+    def _journal_path(self, session_id: str) -> Path:
+        return self.index_dir / f"{_safe_session_id(session_id)}.journal"
+
+    def _lock(self, session_id: str) -> FileLock:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        return FileLock(str(self._index_path(session_id)) + ".lock", timeout=30)
+
+    def _rel(self, path: Path) -> str:
+        return path.resolve().relative_to(self.root).as_posix()
+
+    def _abs(self, rel: str) -> Path:
+        return self.root / rel
+
+    # ── 索引读写（调用方持锁）──
+
+    def _load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        p = self._index_path(session_id)
+        try:
+            data = json.loads(p.read_text(encoding="utf-8") or "{}")
+        except (OSError, json.JSONDecodeError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return None
+        if not isinstance(data.get("files"), dict):
+            return None
+        return data
+
+    def _save(self, session_id: str, data: Dict[str, Any]) -> None:
+        p = self._index_path(session_id)
+        tmp = p.with_name(p.name + ".tmp")
+        tmp.write_text(
+            json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8"
+        )
+        os.replace(tmp, p)
+        # 旁路日志已全部并入
+        self._journal_path(session_id).unlink(missing_ok=True)
+
+    def _replay_journal(self, session_id: str, data: Dict[str, Any]) -> int:
+        """
+        把旁路日志并入 data，返回记录数。只接续与索引末尾相连的记录：已合并过的（写完索引、
+        删除旁路日志前中断）与中间有缺口的都跳过，交给 _index_tail 从文件本身补齐。
+        """
+        try:
+            raw = self._journal_path(session_id).read_bytes()
+        except OSError:
+            return 0
+        records = 0
+        for line in raw.splitlines(keepends=True):
+            records += 1
+            try:
+                rel, start, end, ts = json.loads(line)
+            except (ValueError, TypeError):
+                # 残缺行（写入中断）：尽快合并，避免后续记录都接在坏行后面
+                return max(records, JOURNAL_COMPACT_RECORDS)
+            meta = data["files"].setdefault(rel, {"size": 0, "offsets": [], "ts": []})
+            if start != meta.get("size"):
+                continue
+            meta["offsets"].append(start)
+            meta["ts"].append(ts)
+            meta["size"] = end
+        return records
+
+    def _append_journal(self, session_id: str, records: List[Tuple[str, int, int, Any]]) -> None:
+        payload = b"".join(
+            json.dumps(list(r), ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+            for r in records
+        )
+        with open(self._journal_path(session_id), "ab") as f:
+            f.write(payload)
+
+    def _scan_candidates(self, session_id: str) -> List[Path]:
+        """回填用：旧逻辑的全目录扫描，仅在索引缺失时执行一次。"""
+        found = []
+        debug_path = self.debug_log_path(session_id)
+        if debug_path.is_file():
+            found.append(debug_path)
+        if self.logs_dir.is_dir():
+            for user_dir in sorted(self.logs_dir.iterdir()):
+                p = user_dir / session_id / RUNS_FILENAME
+                if user_dir.is_dir() and p.is_file():
+                    found.append(p)
+        return found
+
+    @staticmethod
+    def _index_tail(path: Path, meta: Dict[str, Any]) -> None:
+        """把 meta["size"] 之后新增的完整行补进 offsets / ts（截断过则整文件重建）。"""
+        try:
+            size = path.stat().st_size
+        except OSError:
+            meta.update(size=0, offsets=[], ts=[])
+            return
+        start = int(meta.get("size") or 0)
+        if size < start:
+            meta.update(size=0, offsets=[], ts=[])
+            start = 0
+        if size == start:
+            return
+        offsets: List[int] = meta.setdefault("offsets", [])
+        ts: List[Optional[str]] = meta.setdefault("ts", [])
+        pos = start
+        with open(path, "rb") as f:
+            f.seek(start)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # 尾部半行：等写完后再索引
+                offsets.append(pos)
+                ts.append(_entry_ts(raw.strip()))
+                pos += len(raw)
+        meta["size"] = pos
+
+    def _refresh(
+        self, session_id: str, *, scan: bool, write_paths: Iterable[Path] = ()
+    ) -> Tuple[Dict[str, Any], int]:
+        """
+        同步索引到磁盘现状，返回 (索引, 未合并的旁路日志记录数)。
+        scan=True 时若该 session 尚未做过全目录回填则执行一次；写入路径传 False 与本次要写的
+        文件，新建索引时这些文件都还不存在即说明日志全部出自本写入方，直接标记为已回填。
+        """
+        data = self._load(session_id)
+        changed = False
+        if data is None:
+            data = {"version": INDEX_VERSION, "files": {}, "scanned": False}
+            if not scan and write_paths and not any(p.exists() for p in write_paths):
+                data["scanned"] = True
+            changed = True
+        journal = self._replay_journal(session_id, data)
+        if scan and not data.get("scanned"):
+            for p in self._scan_candidates(session_id):
+                data["files"].setdefault(self._rel(p), {"size": 0, "offsets": [], "ts": []})
+            data["scanned"] = True
+            changed = True
+        for rel, meta in list(data["files"].items()):
+            before = (meta.get("size"), len(meta.get("offsets") or []))
+            self._index_tail(self._abs(rel), meta)
+            if (meta.get("size"), len(meta.get("offsets") or [])) != before:
+                changed = True
+        if changed or journal >= JOURNAL_COMPACT_RECORDS:
+            self._save(session_id, data)
+            journal = 0
+        return data, journal
+
+    # ── 写入 ──
+
+    def append(self, session_id: str, entry: Dict[str, Any], paths: Iterable[Path]) -> List[int]:
+        """
+        把同一条 entry 追加到 paths 中每个文件并更新索引。
+        按 paths 顺序返回该行在各文件中的行号（0-based，与 enumerate(文件) 一致，用作 log_index）。
+        """
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        ts = str(entry.get("timestamp") or "")
+        paths = list(paths)
+        result: List[int] = []
+        with self._lock(session_id):
+            data, journal = self._refresh(session_id, scan=False, write_paths=paths)
+            records: List[Tuple[str, int, int, Any]] = []
+            for path in paths:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                rel = self._rel(path)
+                meta = data["files"].setdefault(rel, {"size": 0, "offsets": [], "ts": []})
+                self._index_tail(path, meta)
+                with open(path, "ab") as f:
+                    pos = f.seek(0, os.SEEK_END)
+                    if pos != meta["size"]:
+                        # 尾部有未换行的半行：先补换行，保持逐行偏移有效
+                        f.write(b"\n")
+                        records.append((rel, meta["size"], pos + 1, None))
+                        meta["offsets"].append(meta["size"])
+                        meta["ts"].append(None)
+                        pos += 1
+                    f.write(line)
+                meta["offsets"].append(pos)
+                meta["ts"].append(ts)
+                meta["size"] = pos + len(line)
+                records.append((rel, pos, meta["size"], ts))
+                result.append(len(meta["offsets"]) - 1)
+            if journal + len(records) >= JOURNAL_COMPACT_RECORDS:
+                self._save(session_id, data)
+            else:
+                self._append_journal(session_id, records)
+        return result
+
+    # ── 读取 ──
+
+    def files(self, session_id: str) -> Dict[str, Dict[str, Any]]:
+        """{相对路径: {"size", "offsets", "ts"}}；已同步到磁盘最新状态。"""
+        with self._lock(session_id):
+            return self._refresh(session_id, scan=True)[0]["files"]
+
+    def _ordered(self, session_id: str, files: Dict[str, Dict[str, Any]]) -> List[Path]:
+        debug_rel = self._rel(self.debug_log_path(session_id))
+        rels = sorted(files, key=lambda r: (r != debug_rel, r))
+        return [self._abs(r) for r in rels if self._abs(r).is_file()]
+
+    def locate(self, session_id: str) -> List[Path]:
+        """该 session 的日志文件（debug_logs 优先，其后为 logs/{user}/...）。"""
+        return self._ordered(session_id, self.files(session_id))
+
+    @staticmethod
+    def _read_at(f, offset: int) -> bytes:
+        f.seek(offset)
+        return f.readline().strip()
+
+    def read_line(self, session_id: str, line_no: int) -> Optional[bytes]:
+        """按 locate 顺序返回第一个含该行号的文件中的那一行（直接 seek，不逐行扫描）。"""
+        files = self.files(session_id)
+        for path in self._ordered(session_id, files):
+            meta = files[self._rel(path)]
+            if 0 <= line_no < len(meta["offsets"]):
+                with open(path, "rb") as f:
+                    return self._read_at(f, meta["offsets"][line_no])
+        return None
+
+    def read_primary(self, session_id: str) -> Optional[List[Tuple[int, bytes]]]:
+        """主日志文件（debug_logs 优先）的全部非空行 [(行号, 内容)]；无日志返回 None。"""
+        files = self.files(session_id)
+        for path in self._ordered(session_id, files):
+            meta = files[self._rel(path)]
+            out: List[Tuple[int, bytes]] = []
+            with open(path, "rb") as f:
+                for i, off in enumerate(meta["offsets"]):
+                    raw = self._read_at(f, off)
+                    if raw:
+                        out.append((i, raw))
+            return out
+        return None
+
+    def page(
+        self, session_id: str, *, offset: int = 0, limit: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        合并该 session 全部日志文件，按 timestamp 排序、按 timestamp 去重（两处日志写的是同一条）后分页。
+        排序与去重只用索引里的 ts，分页之外的行不读取。返回 (entries, 去重后总数)。
+        """
+        files = self.files(session_id)
+        refs: List[Tuple[str, str, int]] = []
+        seen = set()
+        for rel in sorted(files):
+            meta = files[rel]
+            for off, ts in zip(meta["offsets"], meta["ts"]):
+                if ts is None:
+                    continue
+                if ts:
+                    if ts in seen:
+                        continue
+                    seen.add(ts)
+                refs.append((ts, rel, off))
+        refs.sort(key=lambda r: r[0])
+        total = len(refs)
+        window = refs[offset:] if limit is None else refs[offset : offset + limit]
+        entries: List[Dict[str, Any]] = []
+        handles: Dict[str, Any] = {}
+        try:
+            for _ts, rel, off in window:
+                f = handles.get(rel)
+                if f is None:
+                    f = handles[rel] = open(self._abs(rel), "rb")
+                raw = self._read_at(f, off)
+                if not raw:
+                    continue
+                try:
+                    entries.append(json.loads(raw))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+        finally:
+            for f in handles.values():
+                f.close()
+        return entries, total
+
+
+def get_debug_log_index() -> DebugLogIndex:
+    return DebugLogIndex()
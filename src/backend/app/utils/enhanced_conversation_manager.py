@@ -22,6 +22,7 @@ from typing import Any, Dict, List, Optional
 
 import aiofiles
 
+from app.utils import storage_codec
 from app.utils.data_paths import get_conversation_dir
 
 
@@ -81,7 +82,7 @@ class EnhancedConversationFileManager:
             if file_path.exists():
                 async with aiofiles.open(file_path, mode="r", encoding="utf-8") as f:
                     content = await f.read()
-                data = json.loads(content)
+                data = storage_codec.loads(content, "conversation")
             else:
                 # 创建新文件结构
                 data = {
@@ -114,7 +115,7 @@ class EnhancedConversationFileManager:
 
         # 保存文件
         async with aiofiles.open(file_path, mode="w", encoding="utf-8") as f:
-            await f.write(json.dumps(data, indent=2, ensure_ascii=False))
+            await f.write(storage_codec.dumps(data, "conversation"))
 
         return message
 
@@ -197,7 +198,7 @@ class EnhancedConversationFileManager:
         if file_path.exists():
             async with aiofiles.open(file_path, mode="r", encoding="utf-8") as f:
                 content = await f.read()
-                data = json.loads(content)
+                data = storage_codec.loads(content, "conversation")
                 existing_notes = data.get("notes", [])
         else:
             # 创建新笔记文件
@@ -225,7 +226,7 @@ class EnhancedConversationFileManager:
 
         # 保存
         async with aiofiles.open(file_path, mode="w", encoding="utf-8") as f:
-            await f.write(json.dumps(data, indent=2, ensure_ascii=False))
+            await f.write(storage_codec.dumps(data, "conversation"))
 
     async def get_all_flow_messages(
         self, session_id: str, limit: Optional[int] = None
@@ -235,7 +236,7 @@ class EnhancedConversationFileManager:
         try:
             async with aiofiles.open(file_path, mode="r", encoding="utf-8") as f:
                 content = await f.read()
-                data = json.loads(content)
+                data = storage_codec.loads(content, "conversation")
                 messages = data.get("messages", [])
                 if limit:
                     return messages[-limit:]
@@ -251,7 +252,7 @@ class EnhancedConversationFileManager:
         try:
             async with aiofiles.open(file_path, mode="r", encoding="utf-8") as f:
                 content = await f.read()
-                data = json.loads(content)
+                data = storage_codec.loads(content, "conversation")
                 messages = data.get("messages", [])
                 if limit:
                     return messages[-limit:]
@@ -265,7 +266,7 @@ class EnhancedConversationFileManager:
         try:
             async with aiofiles.open(file_path, mode="r", encoding="utf-8") as f:
                 content = await f.read()
-                data = json.loads(content)
+                data = storage_codec.loads(content, "conversation")
                 return data.get("notes", [])
         except (FileNotFoundError, json.JSONDecodeError):
             return []
@@ -296,7 +297,7 @@ class EnhancedConversationFileManager:
         if file_path.exists():
             async with aiofiles.open(file_path, mode="r", encoding="utf-8") as f:
                 content = await f.read()
-                data = json.loads(content)
+                data = storage_codec.loads(content, "conversation")
                 existing_notes = data.get("notes", [])
         else:
             # 创建新笔记文件
@@ -337,7 +338,7 @@ class EnhancedConversationFileManager:
 
         # 保存
         async with aiofiles.open(file_path, mode="w", encoding="utf-8") as f:
-            await f.write(json.dumps(data, indent=2, ensure_ascii=False))
+            await f.write(storage_codec.dumps(data, "conversation"))
 
     async def get_answer_cards(
         self,
@@ -501,7 +502,7 @@ class ConversationFileManager:
         if note_path.exists():
             async with aiofiles.open(note_path, mode="r", encoding="utf-8") as f:
                 content = await f.read()
-                data = json.loads(content)
+                data = storage_codec.loads(content, "conversation")
                 result["note"] = data.get("notes", [])
 
         return result
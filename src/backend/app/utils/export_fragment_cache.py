@@ -0,0 +1,126 @@
+"""
+批量导出的 phase 片段缓存（app.services.batch_export_service 使用）
+
+同一份报告常被反复导出，而大多数 phase 的源文件早已不再变化。按源文件内容哈希缓存
+每个 phase 的渲染结果，重新导出时只重新解析 / 渲染内容变化了的 phase。
+
+- key：sha256(格式版本, report/step/session, 选定状态, 报告元信息, 源文件内容哈希[, 依赖文件哈希])
+  rumination 章节还依赖 rumination_progress.json 与 4 个前置 phase 的源文件，一并计入 key
+- 值：{"body": md/txt 片段（不含阶段标题）, "stat": phase 统计, "raw_json": raw/ 产物文本}
+- 内存层：进程内 LRU，按序列化字节数（EXPORT_FRAGMENT_CACHE_MAX_BYTES）与条目数双重限额
+- 磁盘层（可选）：data/export_fragments/ab/<key>.json，多 worker / 重启后共享
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.config.settings import settings
+from app.utils.cache_tiers import CacheSlot, MemoryLRU, ShardedDir, atomic_write
+from app.utils.data_paths import get_project_data_dir
+
+logger = logging.getLogger(__name__)
+
+# 渲染规则变化时递增，使旧片段整体失效
+FRAGMENT_FORMAT_VERSION = 1
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def fragment_key(parts: Dict[str, Any]) -> str:
+    payload = {"v": FRAGMENT_FORMAT_VERSION, **parts}
+    raw = json.dumps(
+        payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ExportFragmentCache:
+    """内存 LRU + 可选磁盘两级缓存；key 已包含内容哈希，条目不会过期，只按容量淘汰。"""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_dir: Optional[Path] = None,
+    ) -> None:
+        self._mem: MemoryLRU[Dict[str, Any]] = MemoryLRU(
+            max_entries=max_entries, max_bytes=max_bytes
+        )
+        self._disk = ShardedDir(disk_dir) if disk_dir else None
+        self._lock = threading.Lock()
+        self.stats = {"hits_memory": 0, "hits_disk": 0, "misses": 0, "stores": 0}
+
+    def _bump(self, field: str) -> None:
+        with self._lock:
+            self.stats[field] += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        fragment = self._mem.get(key)
+        if fragment is not None:
+            self._bump("hits_memory")
+            return fragment
+        if self._disk is not None:
+            try:
+                raw = self._disk.path(key).read_text(encoding="utf-8")
+                fragment = json.loads(raw)
+            except (OSError, json.JSONDecodeError):
+                fragment = None
+            if isinstance(fragment, dict) and {"body", "stat", "raw_json"} <= fragment.keys():
+                self._mem.put(key, fragment, len(raw.encode("utf-8")))
+                self._bump("hits_disk")
+                return fragment
+        self._bump("misses")
+        return None
+
+    def put(self, key: str, fragment: Dict[str, Any]) -> None:
+        # 内存层按序列化后的字节数计额，与磁盘层文件大小一致
+        raw = json.dumps(fragment, ensure_ascii=False)
+        self._mem.put(key, fragment, len(raw.encode("utf-8")))
+        self._bump("stores")
+        if self._disk is None:
+            return
+        try:
+            atomic_write(self._disk.path(key), raw)
+        except OSError as e:
+            logger.warning("[export_fragments] disk write failed key=%s err=%s", key[:12], e)
+
+    def clear(self) -> None:
+        self._mem.clear()
+
+
+def _build_cache() -> ExportFragmentCache:
+    disk_dir = None
+    if getattr(settings, "EXPORT_FRAGMENT_CACHE_DISK", False):
+        disk_dir = Path(
+            getattr(settings, "EXPORT_FRAGMENT_CACHE_DIR", None)
+            or (get_project_data_dir() / "export_fragments")
+        )
+    return ExportFragmentCache(
+        max_entries=getattr(settings, "EXPORT_FRAGMENT_CACHE_MAX_ENTRIES", 256),
+        max_bytes=getattr(settings, "EXPORT_FRAGMENT_CACHE_MAX_BYTES", 64 * 1024 * 1024),
+        disk_dir=disk_dir,
+    )
+
+
+_slot: CacheSlot[ExportFragmentCache] = CacheSlot(
+    _build_cache, enabled=lambda: bool(getattr(settings, "EXPORT_FRAGMENT_CACHE_ENABLED", True))
+)
+
+
+def get_export_fragment_cache() -> Optional[ExportFragmentCache]:
+    """EXPORT_FRAGMENT_CACHE_ENABLED=False 时返回 None。"""
+    return _slot.get()
+
+
+def set_export_fragment_cache(cache: Optional[ExportFragmentCache]) -> None:
+    """替换进程级缓存实例（测试用）。"""
+    _slot.set(cache)
@@ -0,0 +1,153 @@
+"""
+启动导入耗时报告（基于 python -X importtime，按路由模块汇总）
+
+    cd src/backend && python -m app.utils.import_profile            # 汇总 import app.main
+    python -m app.utils.import_profile --top 15 --budget-ms 3000     # 超预算时退出码 1
+
+-X importtime 按"首次导入"记录每个模块的自身耗时与累计耗时。这里把每个模块的自身耗时
+归到最近的路由祖先（app.api.v1.<name>）名下，得到"每个路由实际带进来多少导入成本"；
+未挂在任何路由下的（fastapi、settings 等）记为 "<base>"。
+
+DEFERRED_MODULES 列出应当按需导入的重依赖，启动时出现在导入树里即视为回归（见 test_startup_imports）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+ROUTER_PREFIX = "app.api.v1."
+BASE_BUCKET = "<base>"
+
+# 启动时不应导入的重依赖（首次使用时再加载）
+DEFERRED_MODULES = ("langgraph", "openai", "tiktoken")
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$")
+
+
+@dataclass
+class ImportNode:
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+    children: List["ImportNode"] = field(default_factory=list)
+
+
+@dataclass
+class ImportProfile:
+    target: str
+    roots: List[ImportNode]
+    nodes: List[ImportNode]
+
+    @property
+    def total_us(self) -> int:
+        return sum(n.cumulative_us for n in self.roots)
+
+    def loaded(self, top_level: str) -> bool:
+        """top_level 包（或其子模块）是否在导入树中。"""
+        return any(n.name == top_level or n.name.startswith(top_level + ".") for n in self.nodes)
+
+    def by_router(self) -> Dict[str, int]:
+        """{路由模块: 归属于它的自身耗时之和（微秒）}，按耗时降序。"""
+        buckets: Dict[str, int] = {}
+
+        def walk(node: ImportNode, owner: str) -> None:
+            if _is_router(node.name):
+                owner = node.name
+            buckets[owner] = buckets.get(owner, 0) + node.self_us
+            for child in node.children:
+                walk(child, owner)
+
+        for root in self.roots:
+            walk(root, BASE_BUCKET)
+        return dict(sorted(buckets.items(), key=lambda kv: kv[1], reverse=True))
+
+
+def _is_router(name: str) -> bool:
+    return name.startswith(ROUTER_PREFIX) and name.count(".") == 3
+
+
+def parse_importtime(stderr: str, target: str = "") -> ImportProfile:
+    """
+    解析 -X importtime 输出。输出为后序（子模块先于父模块打印），缩进每 2 格一层：
+    读到深度 d 的行时，此前挂起的深度 d+1 行都是它的子节点。
+    """
+    pending: Dict[int, List[ImportNode]] = {}
+    nodes: List[ImportNode] = []
+    for line in stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        self_us, cum_us, indent, name = m.groups()
+        depth = max(0, (len(indent) - 1) // 2)
+        node = ImportNode(name, int(self_us), int(cum_us), depth)
+        node.children = pending.pop(depth + 1, [])
+        pending.setdefault(depth, []).append(node)
+        nodes.append(node)
+    roots = pending.get(0, [])
+    return ImportProfile(target=target, roots=roots, nodes=nodes)
+
+
+def measure_import(
+    target: str = "app.main",
+    *,
+    python: Optional[str] = None,
+    cwd: Optional[Path] = None,
+    env: Optional[Dict[str, str]] = None,
+) -> ImportProfile:
+    """在全新子进程中 import target 并返回导入树（不受当前进程已导入模块影响）。"""
+    run_env = {**os.environ, **(env or {})}
+    run_env["PYTHONPATH"] = os.pathsep.join(
+        p for p in (str(cwd or BACKEND_DIR), run_env.get("PYTHONPATH", "")) if p
+    )
+    proc = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=str(cwd or BACKEND_DIR),
+        env=run_env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.splitlines()[-20:])
+        raise RuntimeError(f"import {target} 失败（exit {proc.returncode}）:\n{tail}")
+    return parse_importtime(proc.stderr, target)
+
+
+def format_report(profile: ImportProfile, *, top: int = 20) -> str:
+    lines = [f"import {profile.target}: {profile.total_us / 1000:.0f} ms"]
+    lines.append(f"{'ms':>8}  {'share':>6}  bucket")
+    total = max(1, profile.total_us)
+    for name, us in list(profile.by_router().items())[:top]:
+        lines.append(f"{us / 1000:8.1f}  {us * 100 / total:5.1f}%  {name}")
+    loaded = [m for m in DEFERRED_MODULES if profile.loaded(m)]
+    lines.append("deferred modules loaded at startup: " + (", ".join(loaded) if loaded else "none"))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="按路由汇总启动导入耗时")
+    parser.add_argument("target", nargs="?", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument(
+        "--budget-ms", type=float, default=0, help="总耗时预算，超出时退出码 1（0=不检查）"
+    )
+    args = parser.parse_args(argv)
+
+    profile = measure_import(args.target)
+    print(format_report(profile, top=args.top))
+    over_budget = args.budget_ms > 0 and profile.total_us / 1000 > args.budget_ms
+    regressed = any(profile.loaded(m) for m in DEFERRED_MODULES)
+    return 1 if over_budget or regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,430 @@
+"""
+进程内指标注册表（Prometheus 文本格式，GET /metrics 输出）
+
+- Counter / Gauge / Histogram：按标签值元组分桶，记录只做一次加锁 + 加法，可常开
+- 热点埋点：HTTP 路由耗时（MetricsMiddleware）、LLM 首包 / 总耗时 / token（llmapi.instrumentation）、
+  对话文件与 report 配对锁的等待 / 持有时间、各类存储文件的 JSON 解析 / 序列化耗时、事件循环延迟
+- 已有的进程内统计（SSE 合并、LLM 响应缓存、自适应限流、对冲路由、system prompt 分层组装）在渲染时通过 collector 转为指标，
+  不改变它们原有的接口
+
+不依赖 prometheus_client 等外部库；多 worker 部署时每个进程各自暴露，由抓取端聚合。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 秒级延迟的默认分桶
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+Sample = Tuple[str, Dict[str, str], float]  # (后缀, 标签, 值)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    if float(v).is_integer():
+        return str(int(v))
+    return repr(float(v))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        return [("", dict(zip(self.labelnames, k)), v) for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签 -> [各桶计数（非累计，末位为 +Inf）, sum]
+        self._values: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            st = self._values.get(key)
+            if st is None:
+                st = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            st[0][idx] += 1
+            st[1] += value
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels: Any) -> Tuple[int, float]:
+        """(count, sum)；测试与调试用。"""
+        with self._lock:
+            st = self._values.get(self._key(labels))
+            return (sum(st[0]), st[1]) if st else (0, 0.0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            items = [(k, list(st[0]), st[1]) for k, st in self._values.items()]
+        out: List[Sample] = []
+        for key, counts, total in items:
+            base = dict(zip(self.labelnames, key))
+            acc = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                acc += c
+                out.append(("_bucket", {**base, "le": _fmt_value(bound)}, acc))
+            out.append(("_sum", base, total))
+            out.append(("_count", base, acc))
+        return out
+
+
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help: str, labelnames: Sequence[str], **kw) -> Any:
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = cls(name, help, labelnames, **kw)
+            return m
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def register_collector(self, fn: Collector) -> None:
+        """fn() 产出 (name, type, help, [(labels, value)])，每次渲染时调用。"""
+        with self._lock:
+            self._collectors.append(fn)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+            collectors = list(self._collectors)
+        lines: List[str] = []
+        for m in metrics:
+            samples = m.samples()
+            if not samples:
+                continue
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{m.name}{suffix}{_fmt_labels(labels)} {_fmt_value(value)}")
+        for fn in collectors:
+            try:
+                families = list(fn())
+            except Exception as e:
+                logger.warning("[metrics] collector %s failed: %s", getattr(fn, "__name__", fn), e)
+                continue
+            for name, kind, help, samples in families:
+                if not samples:
+                    continue
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_fmt_labels(labels)} {_fmt_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+# ── 热点指标 ──
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP 请求耗时（至响应体发送完毕；SSE 为整条流时长）",
+    ("method", "route", "status"),
+)
+LLM_TTFT_SECONDS = REGISTRY.histogram(
+    "llm_time_to_first_token_seconds",
+    "LLM 流式调用首包耗时（自取得并发名额起）",
+    ("provider", "model", "site"),
+    buckets=(0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 12.0, 20.0, 30.0, 60.0),
+)
+LLM_DURATION_SECONDS = REGISTRY.histogram(
+    "llm_request_duration_seconds",
+    "LLM 调用总耗时",
+    ("provider", "model", "site", "kind", "outcome"),
+    buckets=(0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 12.0, 20.0, 30.0, 60.0, 120.0),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total",
+    "LLM token 用量（direction=in 为 prompt，out 为 completion）",
+    ("provider", "model", "site", "direction"),
+)
+FILE_LOCK_WAIT_SECONDS = REGISTRY.histogram("file_lock_wait_seconds", "文件锁等待时间", ("store",))
+FILE_LOCK_HOLD_SECONDS = REGISTRY.histogram("file_lock_hold_seconds", "文件锁持有时间", ("store",))
+STORAGE_JSON_SECONDS = REGISTRY.histogram(
+    "storage_json_seconds",
+    "存储文件 JSON 解析 / 序列化耗时",
+    ("file_type", "op"),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+EVENT_LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "event_loop_lag_seconds",
+    "事件循环调度延迟（定时唤醒的实际超时部分）",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+
+@contextmanager
+def timed_lock(lock: Any, store: str) -> Iterator[Any]:
+    """with timed_lock(FileLock(...), "conversation"): 记录等待与持有时间。"""
+    t0 = time.perf_counter()
+    with lock as held:
+        t1 = time.perf_counter()
+        FILE_LOCK_WAIT_SECONDS.observe(t1 - t0, store=store)
+        try:
+            yield held
+        finally:
+            FILE_LOCK_HOLD_SECONDS.observe(time.perf_counter() - t1, store=store)
+
+
+async def event_loop_lag_monitor(interval: float = 0.5) -> None:
+    """常驻任务：每 interval 秒唤醒一次，把超出部分记为事件循环延迟。"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG_SECONDS.observe(max(0.0, loop.time() - start - interval))
+
+
+# ── 已有进程内统计的 collector ──
+
+
+def _collect_sse() -> Iterable:
+    from app.utils.sse_coalesce import sse_stream_metrics
+
+    for field, value in sse_stream_metrics().items():
+        yield (f"sse_{field}_total", "counter", f"simple-chat SSE 累计 {field}", [({}, value)])
+
+
+def _collect_llm_cache() -> Iterable:
+    from app.core.llmapi.response_cache import llm_cache_metrics
+
+    samples = [
+        ({"site": site, "event": event}, n)
+        for site, st in llm_cache_metrics().items()
+        for event, n in st.items()
+    ]
+    yield (
+        "llm_cache_events_total",
+        "counter",
+        "LLM 响应缓存命中 / 未命中 / 写入 / 合并次数",
+        samples,
+    )
+
+
+def _collect_llm_limiter() -> Iterable:
+    from app.core.llmapi.limiter import llm_limiter_metrics
+
+    snaps = llm_limiter_metrics()
+    yield (
+        "llm_limiter_limit",
+        "gauge",
+        "自适应并发名额",
+        [({"provider": k}, s["limit"]) for k, s in snaps.items()],
+    )
+    yield (
+        "llm_limiter_in_flight",
+        "gauge",
+        "在途 LLM 调用数",
+        [({"provider": k}, s["in_flight"]) for k, s in snaps.items()],
+    )
+    yield (
+        "llm_limiter_queued",
+        "gauge",
+        "排队中的 LLM 调用数",
+        [
+            ({"provider": k, "priority": p}, n)
+            for k, s in snaps.items()
+            for p, n in s["queued"].items()
+        ],
+    )
+    yield (
+        "llm_limiter_queue_wait_seconds_total",
+        "counter",
+        "LLM 调用排队等待总时长",
+        [
+            ({"provider": k, "priority": p}, w["total_ms"] / 1000.0)
+            for k, s in snaps.items()
+            for p, w in s["wait"].items()
+        ],
+    )
+    yield (
+        "llm_limiter_acquired_total",
+        "counter",
+        "取得名额的 LLM 调用数",
+        [
+            ({"provider": k, "priority": p}, w["count"])
+            for k, s in snaps.items()
+            for p, w in s["wait"].items()
+        ],
+    )
+    yield (
+        "llm_limiter_decreases_total",
+        "counter",
+        "名额下调次数",
+        [
+            ({"provider": k, "reason": r}, n)
+            for k, s in snaps.items()
+            for r, n in s["decreases"].items()
+        ],
+    )
+
+
+_CIRCUIT_STATE = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _collect_llm_routing() -> Iterable:
+    from app.core.llmapi.hedging import llm_routing_metrics
+
+    snaps = llm_routing_metrics()
+    for field in ("requests", "wins", "failures", "abandoned", "hedges_fired"):
+        yield (
+            f"llm_routing_{field}_total",
+            "counter",
+            f"对冲路由 {field} 计数",
+            [({"provider": k}, s[field]) for k, s in snaps.items()],
+        )
+    yield (
+        "llm_routing_circuit_state",
+        "gauge",
+        "熔断状态（0=closed，1=half_open，2=open）",
+        [({"provider": k}, _CIRCUIT_STATE.get(s["circuit"], 0)) for k, s in snaps.items()],
+    )
+
+
+def _collect_prompt_assembly() -> Iterable:
+    from app.domain.prompts.assembly import prompt_assembly_metrics
+
+    snaps = prompt_assembly_metrics()
+    yield (
+        "prompt_assembly_total",
+        "counter",
+        "simple-chat system prompt 组装次数（compiled=需重新预编译静态层）",
+        [
+            ({"phase": p, "event": e}, s[e])
+            for p, s in snaps.items()
+            for e in ("assemblies", "compiled")
+        ],
+    )
+    yield (
+        "prompt_prefix_stable_ratio",
+        "gauge",
+        "system prompt 稳定前缀字符占比（累计）",
+        [({"phase": p}, s["prefix_stable_ratio"]) for p, s in snaps.items()],
+    )
+
+
+for _fn in (
+    _collect_sse,
+    _collect_llm_cache,
+    _collect_llm_limiter,
+    _collect_llm_routing,
+    _collect_prompt_assembly,
+):
+    REGISTRY.register_collector(_fn)
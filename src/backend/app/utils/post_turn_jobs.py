@@ -0,0 +1,404 @@
+"""
+对话轮次结束后的后台任务队列（结论卡精炼 / 否定后重新出卡检测 / 埋点等）。
+
+- 持久化：SQLite（WAL）文件，进程重启后未完成的任务继续执行；多 worker 共享同一文件，
+  领取任务走 BEGIN IMMEDIATE + 租约，worker 崩溃后租约过期自动被其他 worker 接管
+- 幂等：每个任务带 idem_key（通常为 report:thread:turn:kind），重复入队直接返回已有任务
+- 重试：处理函数抛异常时按指数退避重新排队，达到 max_attempts 后标记 failed
+- 前端通过 GET /simple-chat/post-turn/jobs/{job_id} 轮询结果
+
+处理函数通过 register_post_turn_handler(kind, fn) 注册，签名：
+    async def fn(payload: dict, *, final_attempt: bool) -> Optional[dict]
+返回值作为 result 持久化；final_attempt=True 时处理函数应尽量给出降级结果而非抛异常。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Set
+
+from app.config.settings import settings
+from app.core.llmapi.instrumentation import llm_call_site
+from app.core.llmapi.limiter import PRIORITY_BACKGROUND, llm_priority
+from app.utils.data_paths import get_shared_data_dir
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_DONE = "done"
+JOB_STATUS_FAILED = "failed"
+FINISHED_STATUSES = {JOB_STATUS_DONE, JOB_STATUS_FAILED}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS post_turn_jobs (
+    job_id TEXT PRIMARY KEY,
+    idem_key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    next_run_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_until REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_post_turn_jobs_due ON post_turn_jobs (status, next_run_at);
+"""
+
+PostTurnHandler = Callable[..., Awaitable[Optional[Dict[str, Any]]]]
+_HANDLERS: Dict[str, PostTurnHandler] = {}
+
+
+def register_post_turn_handler(kind: str, fn: PostTurnHandler) -> None:
+    _HANDLERS[kind] = fn
+
+
+def _row_to_job(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+    if row is None:
+        return None
+    job = dict(row)
+    for key in ("payload", "result"):
+        raw = job.get(key)
+        job[key] = json.loads(raw) if raw else None
+    return job
+
+
+class PostTurnJobQueue:
+    """SQLite 持久化队列；所有方法都是同步阻塞调用，异步代码中请经 asyncio.to_thread 调用。"""
+
+    def __init__(self, db_path: Path, *, lease_seconds: int = 120) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = max(1, int(lease_seconds))
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _tx(self) -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        *,
+        idem_key: str,
+        max_attempts: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """入队；idem_key 已存在时返回已有任务（不重复执行）。"""
+        now = time.time()
+        attempts_cap = max(1, int(max_attempts or settings.POST_TURN_JOB_MAX_ATTEMPTS))
+        with self._tx() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO post_turn_jobs "
+                "(job_id, idem_key, kind, payload, status, attempts, max_attempts, next_run_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?, ?)",
+                (
+                    f"ptj_{uuid.uuid4().hex[:16]}",
+                    idem_key,
+                    kind,
+                    json.dumps(payload, ensure_ascii=False, default=str),
+                    JOB_STATUS_QUEUED,
+                    attempts_cap,
+                    now,
+                    now,
+                    now,
+                ),
+            )
+            row = conn.execute(
+                "SELECT * FROM post_turn_jobs WHERE idem_key = ?", (idem_key,)
+            ).fetchone()
+        return _row_to_job(row) or {}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = (
+            self._conn()
+            .execute("SELECT * FROM post_turn_jobs WHERE job_id = ?", (job_id,))
+            .fetchone()
+        )
+        return _row_to_job(row)
+
+    def claim(self, kinds: Optional[Set[str]] = None) -> Optional[Dict[str, Any]]:
+        """领取一个到期任务（含租约过期的 running 任务），attempts +1。"""
+        now = time.time()
+        with self._tx() as conn:
+            rows = conn.execute(
+                "SELECT job_id, kind FROM post_turn_jobs "
+                "WHERE (status = ? AND next_run_at <= ?) OR (status = ? AND lease_until < ?) "
+                "ORDER BY next_run_at LIMIT 20",
+                (JOB_STATUS_QUEUED, now, JOB_STATUS_RUNNING, now),
+            ).fetchall()
+            hit = next((r for r in rows if kinds is None or r["kind"] in kinds), None)
+            if hit is None:
+                return None
+            conn.execute(
+                "UPDATE post_turn_jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, "
+                "lease_until = ?, updated_at = ? WHERE job_id = ?",
+                (JOB_STATUS_RUNNING, self.owner_id, now + self.lease_seconds, now, hit["job_id"]),
+            )
+            row = conn.execute(
+                "SELECT * FROM post_turn_jobs WHERE job_id = ?", (hit["job_id"],)
+            ).fetchone()
+        return _row_to_job(row)
+
+    def complete(self, job_id: str, result: Optional[Dict[str, Any]]) -> bool:
+        """
+        标记完成；只有租约仍归本 worker 时才写入。
+
+        租约过期后任务可能已被其他 worker 重新领取，此时返回 False，不覆盖对方的状态。
+        """
+        now = time.time()
+        with self._tx() as conn:
+            cur = conn.execute(
+                "UPDATE post_turn_jobs SET status = ?, result = ?, error = NULL, lease_owner = NULL, "
+                "lease_until = NULL, updated_at = ? WHERE job_id = ? AND lease_owner = ?",
+                (
+                    JOB_STATUS_DONE,
+                    json.dumps(result or {}, ensure_ascii=False, default=str),
+                    now,
+                    job_id,
+                    self.owner_id,
+                ),
+            )
+            return cur.rowcount > 0
+
+    def fail(self, job_id: str, error: str) -> str:
+        """
+        记录失败：未达上限则按指数退避重新排队，返回新状态。
+
+        与 complete 一样只处理租约仍归本 worker 的任务，否则原样返回当前状态。
+        """
+        now = time.time()
+        base = max(0.0, float(settings.POST_TURN_JOB_RETRY_BASE_SECONDS))
+        with self._tx() as conn:
+            row = conn.execute(
+                "SELECT status, attempts, max_attempts, lease_owner FROM post_turn_jobs "
+                "WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+            if row is None:
+                return JOB_STATUS_FAILED
+            if row["lease_owner"] != self.owner_id:
+                return str(row["status"])
+            attempts = int(row["attempts"])
+            if attempts >= int(row["max_attempts"]):
+                status, next_run_at = JOB_STATUS_FAILED, now
+            else:
+                status, next_run_at = JOB_STATUS_QUEUED, now + base * (2 ** max(0, attempts - 1))
+            conn.execute(
+                "UPDATE post_turn_jobs SET status = ?, error = ?, next_run_at = ?, lease_owner = NULL, "
+                "lease_until = NULL, updated_at = ? WHERE job_id = ?",
+                (status, (error or "")[:2000], next_run_at, now, job_id),
+            )
+        return status
+
+    def purge_finished(self, older_than_seconds: float) -> int:
+        cutoff = time.time() - max(0.0, older_than_seconds)
+        with self._tx() as conn:
+            cur = conn.execute(
+                "DELETE FROM post_turn_jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (JOB_STATUS_DONE, JOB_STATUS_FAILED, cutoff),
+            )
+            return int(cur.rowcount or 0)
+
+
+class PostTurnJobWorker:
+    """进程内异步 worker：领取任务并调用已注册的处理函数，最多 concurrency 个并发。"""
+
+    def __init__(
+        self,
+        queue: PostTurnJobQueue,
+        *,
+        concurrency: int = 4,
+        poll_seconds: float = 1.0,
+    ) -> None:
+        self.queue = queue
+        self.concurrency = max(1, int(concurrency))
+        self.poll_seconds = max(0.05, float(poll_seconds))
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+        self._last_purge = 0.0
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        # 执行中的任务保持 running，租约过期后由下次启动的 worker 重新领取
+        for t in list(self._running):
+            t.cancel()
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        self._running.clear()
+
+    async def run_once(self) -> int:
+        """领取并执行当前所有到期任务直至队列为空（测试/脚本可直接调用），返回执行数。"""
+        count = 0
+        while True:
+            job = await asyncio.to_thread(self.queue.claim, set(_HANDLERS))
+            if job is None:
+                return count
+            await self._execute(job)
+            count += 1
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self._fill_slots()
+                await self._maybe_purge()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("[post_turn] worker loop error: %s", e)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _fill_slots(self) -> None:
+        while len(self._running) < self.concurrency:
+            job = await asyncio.to_thread(self.queue.claim, set(_HANDLERS))
+            if job is None:
+                return
+            task = asyncio.create_task(self._execute(job))
+            self._running.add(task)
+            task.add_done_callback(self._on_task_done)
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        # 空出槽位后立即尝试领取下一个
+        self._wakeup.set()
+
+    async def _execute(self, job: Dict[str, Any]) -> None:
+        job_id = str(job.get("job_id") or "")
+        handler = _HANDLERS.get(str(job.get("kind") or ""))
+        final_attempt = int(job.get("attempts") or 0) >= int(job.get("max_attempts") or 1)
+        try:
+            if handler is None:
+                raise RuntimeError(f"未注册的任务类型: {job.get('kind')}")
+            # 后置任务不阻塞用户：LLM 调用走 background 优先级
+            with llm_priority(PRIORITY_BACKGROUND), llm_call_site(f"post_turn:{job.get('kind')}"):
+                result = await handler(job.get("payload") or {}, final_attempt=final_attempt)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            status = await asyncio.to_thread(self.queue.fail, job_id, f"{type(e).__name__}: {e}")
+            logger.warning(
+                "[post_turn] job failed kind=%s job=%s attempt=%s status=%s err=%s",
+                job.get("kind"),
+                job_id,
+                job.get("attempts"),
+                status,
+                e,
+            )
+            return
+        if not await asyncio.to_thread(self.queue.complete, job_id, result):
+            logger.warning(
+                "[post_turn] lease lost before completion kind=%s job=%s", job.get("kind"), job_id
+            )
+
+    async def _maybe_purge(self) -> None:
+        now = time.time()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        hours = float(settings.POST_TURN_JOB_RETENTION_HOURS)
+        if hours > 0:
+            await asyncio.to_thread(self.queue.purge_finished, hours * 3600)
+
+
+_queue: Optional[PostTurnJobQueue] = None
+_worker: Optional[PostTurnJobWorker] = None
+_lock = threading.Lock()
+
+
+def get_post_turn_queue() -> PostTurnJobQueue:
+    global _queue
+    if _queue is None:
+        with _lock:
+            if _queue is None:
+                raw = (settings.POST_TURN_QUEUE_PATH or "").strip()
+                path = Path(raw) if raw else get_shared_data_dir() / "post_turn_jobs.sqlite3"
+                _queue = PostTurnJobQueue(path)
+    return _queue
+
+
+def set_post_turn_queue(queue: Optional[PostTurnJobQueue]) -> None:
+    """替换全局队列（测试用）；None 表示下次按配置重建。"""
+    global _queue, _worker
+    with _lock:
+        _queue = queue
+        _worker = None
+
+
+def get_post_turn_worker() -> PostTurnJobWorker:
+    global _worker
+    if _worker is None:
+        _worker = PostTurnJobWorker(
+            get_post_turn_queue(),
+            concurrency=settings.POST_TURN_JOB_CONCURRENCY,
+        )
+    return _worker
+
+
+async def enqueue_post_turn_job(
+    kind: str,
+    payload: Dict[str, Any],
+    *,
+    idem_key: str,
+) -> Dict[str, Any]:
+    job = await asyncio.to_thread(get_post_turn_queue().enqueue, kind, payload, idem_key=idem_key)
+    if _worker is not None:
+        _worker.notify()
+    return job
+
+
+async def get_post_turn_job(job_id: str) -> Optional[Dict[str, Any]]:
+    return await asyncio.to_thread(get_post_turn_queue().get, job_id)
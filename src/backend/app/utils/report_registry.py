@@ -29,6 +29,9 @@ try:
 except ImportError:  # 精简 venv 时仍可跑通（如仅跑部分测试）
     _FileLock = None  # type: ignore[misc, assignment]
 
+from app.utils import storage_codec
+from app.utils.cow_copy import materialize
+from app.utils.metrics import timed_lock
 from app.utils.simple_activation_manager import (
     ActivationRecord,
     SimpleActivationManager,
@@ -239,7 +242,7 @@ class ReportRegistry:
         if not file.is_file():
             return None
         try:
-            data = json.loads(file.read_text(encoding="utf-8") or "{}")
+            data = storage_codec.loads(file.read_text(encoding="utf-8") or "{}", "report_record")
         except (OSError, json.JSONDecodeError):
             return None
         if not isinstance(data, dict):
@@ -280,7 +283,8 @@ class ReportRegistry:
         report_dir.mkdir(parents=True, exist_ok=True)
         record["updated_at"] = self._now_iso()
         file = self._record_file(report_id)
-        file.write_text(json.dumps(record, ensure_ascii=False, indent=2), encoding="utf-8")
+        materialize(file)
+        file.write_text(storage_codec.dumps(record, "report_record"), encoding="utf-8")
 
     def _iter_records_raw(self) -> List[dict]:
         items: List[dict] = []
@@ -448,7 +452,7 @@ class ReportRegistry:
             raise ValueError("activation_code 与 user_id 不能为空")
 
         lock = _pair_file_lock(self._pair_lock_path(code, uid))
-        with lock:
+        with timed_lock(lock, "report_pair"):
             indexed = self._get_record_via_activation_index(code, uid)
             if indexed:
                 rid = indexed.get("report_id")
@@ -603,6 +607,14 @@ class ReportRegistry:
     def get_report_by_id(self, report_id: str) -> Optional[dict]:
         return self._load_record(report_id)
 
+    def get_record_version(self, report_id: str) -> Optional[str]:
+        """record.json 版本标识（mtime_ns / size / inode），只 stat 不解析；不存在返回 None。"""
+        try:
+            st = self._record_file(report_id).stat()
+        except OSError:
+            return None
+        return f"{st.st_mtime_ns:x}-{st.st_size:x}-{st.st_ino:x}"
+
     def find_report_step_by_session(self, session_id: str) -> Optional[Tuple[dict, str]]:
         sess = (session_id or "").strip()
         if not sess:
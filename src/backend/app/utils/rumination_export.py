@@ -20,6 +20,7 @@ import logging
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from app.utils import storage_codec
 from app.utils.report_registry import ReportRegistry, STEP_IDS
 from app.utils.rumination_progress import (
     FILTER_STEPS,
@@ -53,7 +54,7 @@ def _load_step_session_json(registry: ReportRegistry, report_id: str, step_id: s
     if not file.is_file():
         return None
     try:
-        return json.loads(file.read_text(encoding="utf-8") or "{}")
+        return storage_codec.loads(file.read_text(encoding="utf-8") or "{}", "conversation")
     except (OSError, json.JSONDecodeError):
         return None
 
@@ -208,7 +209,7 @@ def load_raw_rumination_progress(report_id: str, registry: Optional[ReportRegist
     if not path.is_file():
         return None
     try:
-        return json.loads(path.read_text(encoding="utf-8") or "{}")
+        return storage_codec.loads(path.read_text(encoding="utf-8") or "{}", "rumination_progress")
     except (OSError, json.JSONDecodeError):
         return None
 
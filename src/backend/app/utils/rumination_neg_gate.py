@@ -17,6 +17,7 @@ import re
 from typing import Any, Dict, List, Optional, Tuple
 
 from app.core.llmapi.base import LLMMessage
+from app.core.llmapi.response_cache import SITE_STEP3_HYPOTHESIS_FLAG, cached_chat
 from app.domain.rumination_step_guidance import get_deep_chat_step_system
 
 logger = logging.getLogger(__name__)
@@ -204,7 +205,12 @@ async def llm_flag_step3_hypotheses(llm: Any, rows: List[Dict[str, Any]]) -> Tup
             LLMMessage(role="user", content=user),
         ]
         # 该质检用于闸门辅助，超时后自动降级；45s 留足 LLM 响应余量
-        resp = await asyncio.wait_for(llm.chat(msgs, temperature=0.2, max_tokens=800), timeout=45.0)
+        resp = await asyncio.wait_for(
+            cached_chat(
+                llm, msgs, site=SITE_STEP3_HYPOTHESIS_FLAG, temperature=0.2, max_tokens=800
+            ),
+            timeout=45.0,
+        )
         raw = (resp.content or "").strip()
         start = raw.find("[")
         end = raw.rfind("]")
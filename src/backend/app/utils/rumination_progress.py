@@ -10,6 +10,9 @@ import logging
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from app.utils import storage_codec
+from app.utils.cow_copy import materialize
+
 logger = logging.getLogger(__name__)
 
 MAIN_SECTIONS = ("opening", "review", "filter", "final_choice", "recommend", "end")
@@ -277,7 +280,7 @@ def load_rumination_progress(reports_root: Path, report_id: str) -> Dict[str, An
     if not path.is_file():
         return dict(DEFAULT_PROGRESS)
     try:
-        data = json.loads(path.read_text(encoding="utf-8") or "{}")
+        data = storage_codec.loads(path.read_text(encoding="utf-8") or "{}", "rumination_progress")
         if not isinstance(data, dict):
             return dict(DEFAULT_PROGRESS)
         return _normalize_loaded(data)
@@ -327,8 +330,9 @@ def save_rumination_progress(
     path = _rumination_progress_file(reports_root, report_id)
     path.parent.mkdir(parents=True, exist_ok=True)
     try:
+        materialize(path)
         path.write_text(
-            json.dumps(current, ensure_ascii=False, indent=2, default=str),
+            storage_codec.dumps(current, "rumination_progress", default=str),
             encoding="utf-8",
         )
     except (TypeError, ValueError, OSError) as e:
@@ -346,8 +350,9 @@ def merge_rumination_progress_fields(
         current[k] = v
     path = _rumination_progress_file(reports_root, report_id)
     path.parent.mkdir(parents=True, exist_ok=True)
+    materialize(path)
     path.write_text(
-        json.dumps(current, ensure_ascii=False, indent=2, default=str),
+        storage_codec.dumps(current, "rumination_progress", default=str),
         encoding="utf-8",
     )
     return current
@@ -370,8 +375,9 @@ def mark_neg_gate_triggered(
         current["neg_gate_triggered_steps"] = triggered
         path = _rumination_progress_file(reports_root, report_id)
         path.parent.mkdir(parents=True, exist_ok=True)
+        materialize(path)
         path.write_text(
-            json.dumps(current, ensure_ascii=False, indent=2, default=str),
+            storage_codec.dumps(current, "rumination_progress", default=str),
             encoding="utf-8",
         )
     return current
@@ -388,8 +394,9 @@ def clear_neg_gate_triggered_step(
         current["neg_gate_triggered_steps"] = triggered
         path = _rumination_progress_file(reports_root, report_id)
         path.parent.mkdir(parents=True, exist_ok=True)
+        materialize(path)
         path.write_text(
-            json.dumps(current, ensure_ascii=False, indent=2, default=str),
+            storage_codec.dumps(current, "rumination_progress", default=str),
             encoding="utf-8",
         )
     return current
@@ -405,8 +412,9 @@ def clear_neg_gate_triggered_from_step(reports_root: Path, report_id: str, from_
         current["neg_gate_triggered_steps"] = triggered
         path = _rumination_progress_file(reports_root, report_id)
         path.parent.mkdir(parents=True, exist_ok=True)
+        materialize(path)
         path.write_text(
-            json.dumps(current, ensure_ascii=False, indent=2, default=str),
+            storage_codec.dumps(current, "rumination_progress", default=str),
             encoding="utf-8",
         )
     return current
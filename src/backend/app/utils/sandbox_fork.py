@@ -20,7 +20,10 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+from app.utils import storage_codec
+from app.utils.cow_copy import cow_copytree, materialize
 from app.utils.report_registry import ReportRegistry
+from app.utils.storage_codec import CONVERSATION_SCHEMA
 from app.utils.helpers import parse_iso_to_utc
 from app.utils.simple_activation_manager import (
     ActivationRecord,
@@ -93,7 +96,7 @@ def _conversation_json_message_count(path: Path) -> int:
     if not path.is_file():
         return 0
     try:
-        data = json.loads(path.read_text(encoding="utf-8") or "{}")
+        data = CONVERSATION_SCHEMA.loads(path.read_text(encoding="utf-8") or "{}", "conversation")
         return len(data.get("messages") or [])
     except (OSError, json.JSONDecodeError, TypeError):
         return 0
@@ -130,6 +133,8 @@ def merge_legacy_session_dir_into_report_dir(
         c_src = _conversation_json_message_count(src)
         c_dst = _conversation_json_message_count(dst)
         if c_src > c_dst:
+            # dst 可能是 Fork 时与正式数据共享的硬链接，先断链再覆盖
+            materialize(dst)
             shutil.copy2(src, dst)
             replaced.append(src.name)
         else:
@@ -197,7 +202,8 @@ def fork_activation_from_source(
 
     dst_report_dir = sandbox_base / "reports" / new_report_id
     dst_report_dir.parent.mkdir(parents=True, exist_ok=True)
-    shutil.copytree(src_report_dir, dst_report_dir)
+    # 文件级写时复制：reflink / 硬链接优先，沙箱写入时才真正复制（见 app.utils.cow_copy）
+    copy_stats = cow_copytree(src_report_dir, dst_report_dir)
 
     # 合并遗留目录中的对话文件（与 migrate 脚本同源路径，避免只克隆 reports 时丢线程）
     legacy_merge = merge_legacy_session_dir_into_report_dir(
@@ -212,7 +218,9 @@ def fork_activation_from_source(
         raise ValueError("Fork 后缺少 record.json")
 
     try:
-        record_data = json.loads(record_file.read_text(encoding="utf-8") or "{}")
+        record_data = storage_codec.loads(
+            record_file.read_text(encoding="utf-8") or "{}", "report_record"
+        )
     except (json.JSONDecodeError, OSError):
         shutil.rmtree(sandbox_base, ignore_errors=True)
         raise ValueError("record.json 解析失败")
@@ -236,16 +244,16 @@ def fork_activation_from_source(
     record_data["forked_at"] = now
     record_data["is_sandbox_fork"] = True
 
-    record_file.write_text(
-        json.dumps(record_data, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    materialize(record_file)
+    record_file.write_text(storage_codec.dumps(record_data, "report_record"), encoding="utf-8")
 
     # 复制问卷 / prior 等：data/simple/{源 activation session_id}/
     src_sess_dir = main_base / src_act.session_id
     dst_sess_dir = sandbox_base / new_session_id
     if src_sess_dir.is_dir():
-        shutil.copytree(src_sess_dir, dst_sess_dir)
+        sess_stats = cow_copytree(src_sess_dir, dst_sess_dir)
+        for k, v in sess_stats.items():
+            copy_stats[k] = copy_stats.get(k, 0) + v
 
     # 新激活记录（已绑定管理员，无需再 claim）
     new_rec = ActivationRecord(
@@ -287,6 +295,7 @@ def fork_activation_from_source(
         "legacy_merge_merged_files": legacy_merge.get("merged") or [],
         "legacy_merge_replaced_files": legacy_merge.get("replaced") or [],
         "legacy_merge_skipped_files": legacy_merge.get("skipped") or [],
+        "copy_stats": copy_stats,
     }
 
     append_fork_audit(
@@ -0,0 +1,224 @@
+"""
+Savepoint 内容寻址快照存储：目录快照 = manifest（相对路径 -> sha256）+ 全局去重 blob 池。
+
+布局（root 默认为 data/test/simple/savepoints/_store）：
+- objects/ab/cdef...     zlib 压缩后的文件内容，文件名为原文内容的 sha256
+- refs.json              {sha256: 引用次数}，只在 .lock 文件锁内读写
+- 每个 savepoint 目录下的 manifest.json 记录 store 相对路径与文件清单
+
+同一激活码的多个 savepoint 大部分会话文件相同，只有变化的文件会新增 blob；
+删除 savepoint 时按引用计数回收不再被任何 manifest 引用的 blob。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import uuid
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from filelock import FileLock
+
+from app.utils import storage_codec
+
+PathLike = Union[str, Path]
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+_COMPRESS_LEVEL = 6
+_READ_CHUNK = 1 << 20
+_FILE_TYPE = "savepoints"  # 指标中的存储文件类型
+
+# (st_dev, st_ino, st_size, st_mtime_ns) -> sha256
+# 快照前用 cow_copytree 硬链接暂存时，未改动文件的 inode 与源一致，可跳过重复哈希
+_STAT_CACHE_MAX = 8192
+_stat_cache: "OrderedDict[Tuple[int, int, int, int], str]" = OrderedDict()
+_stat_cache_lock = threading.Lock()
+
+
+def _file_digest(path: Path) -> str:
+    st = path.stat()
+    key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    with _stat_cache_lock:
+        hit = _stat_cache.get(key)
+        if hit:
+            _stat_cache.move_to_end(key)
+            return hit
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(_READ_CHUNK), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _stat_cache_lock:
+        _stat_cache[key] = digest
+        while len(_stat_cache) > _STAT_CACHE_MAX:
+            _stat_cache.popitem(last=False)
+    return digest
+
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp-{uuid.uuid4().hex[:8]}")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+class BlobStore:
+    """sha256 -> zlib 压缩内容；引用计数持久化在 refs.json。"""
+
+    def __init__(self, root: PathLike) -> None:
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.refs_path = self.root / "refs.json"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = FileLock(str(self.root / ".lock"), timeout=30)
+
+    def blob_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def has(self, digest: str) -> bool:
+        return self.blob_path(digest).is_file()
+
+    def _write_blob(self, digest: str, src: Path) -> None:
+        _atomic_write_bytes(
+            self.blob_path(digest), zlib.compress(src.read_bytes(), _COMPRESS_LEVEL)
+        )
+
+    def read(self, digest: str) -> bytes:
+        data = zlib.decompress(self.blob_path(digest).read_bytes())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"blob 内容校验失败: {digest}")
+        return data
+
+    def _load_refs(self) -> Dict[str, int]:
+        if not self.refs_path.is_file():
+            return {}
+        try:
+            raw = storage_codec.loads(self.refs_path.read_bytes() or b"{}", _FILE_TYPE)
+        except Exception:
+            return {}
+        return {str(k): int(v) for k, v in raw.items() if isinstance(v, int) and v > 0}
+
+    def _save_refs(self, refs: Dict[str, int]) -> None:
+        _atomic_write_bytes(
+            self.refs_path, storage_codec.dumps_bytes(refs, _FILE_TYPE, sort_keys=True)
+        )
+
+    def add_files(self, files: Dict[str, Path]) -> Tuple[Dict[str, Dict[str, Any]], int]:
+        """
+        写入若干文件并各加一次引用，返回 ({rel_path: {"sha256", "size"}}, 新增 blob 数)。
+        压缩在锁外进行；锁内再确认一次 blob 仍存在（可能刚被并发 delete 回收）。
+        """
+        entries: Dict[str, Dict[str, Any]] = {}
+        new_blobs = 0
+        for rel, src in files.items():
+            digest = _file_digest(src)
+            if not self.has(digest):
+                self._write_blob(digest, src)
+                new_blobs += 1
+            entries[rel] = {"sha256": digest, "size": src.stat().st_size}
+        with self._lock:
+            refs = self._load_refs()
+            for rel, entry in entries.items():
+                digest = entry["sha256"]
+                if not self.has(digest):
+                    self._write_blob(digest, files[rel])
+                refs[digest] = refs.get(digest, 0) + 1
+            self._save_refs(refs)
+        return entries, new_blobs
+
+    def release(self, digests: Iterable[str]) -> Dict[str, int]:
+        """每个 digest 减一次引用，归零即删除 blob。"""
+        removed = 0
+        freed = 0
+        with self._lock:
+            refs = self._load_refs()
+            for digest in digests:
+                n = refs.get(digest, 0) - 1
+                if n > 0:
+                    refs[digest] = n
+                    continue
+                refs.pop(digest, None)
+                p = self.blob_path(digest)
+                if p.is_file():
+                    freed += p.stat().st_size
+                    p.unlink(missing_ok=True)
+                    removed += 1
+            self._save_refs(refs)
+        return {"blobs_removed": removed, "bytes_freed": freed}
+
+    def stats(self) -> Dict[str, int]:
+        blobs = [p for p in self.objects_dir.glob("*/*") if p.is_file()]
+        return {"blobs": len(blobs), "bytes": sum(p.stat().st_size for p in blobs)}
+
+
+def _iter_tree_files(src_dir: Path) -> Dict[str, Path]:
+    files: Dict[str, Path] = {}
+    for root, _dirs, names in os.walk(src_dir):
+        for name in names:
+            p = Path(root) / name
+            if p.is_symlink():
+                p = p.resolve()
+                if not p.is_file():
+                    continue
+            files[(Path(root) / name).relative_to(src_dir).as_posix()] = p
+    return dict(sorted(files.items()))
+
+
+def snapshot_tree(src_dir: PathLike, store: BlobStore, manifest_path: PathLike) -> Dict[str, Any]:
+    """把 src_dir 录入 store 并写 manifest，返回 manifest（含本次新增 blob 数）。"""
+    src = Path(src_dir)
+    if not src.is_dir():
+        raise FileNotFoundError(f"源目录不存在: {src}")
+    mpath = Path(manifest_path)
+    entries, new_blobs = store.add_files(_iter_tree_files(src))
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "store": os.path.relpath(store.root, mpath.parent),
+        "files": entries,
+        "total_bytes": sum(int(e["size"]) for e in entries.values()),
+        "new_blobs": new_blobs,
+    }
+    _atomic_write_bytes(mpath, storage_codec.dumps_bytes(manifest, _FILE_TYPE))
+    return manifest
+
+
+def load_manifest(manifest_path: PathLike) -> Tuple[Dict[str, Any], BlobStore]:
+    mpath = Path(manifest_path)
+    manifest = storage_codec.loads(mpath.read_bytes() or b"{}", _FILE_TYPE)
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("files"), dict):
+        raise ValueError(f"manifest 无效: {mpath}")
+    store = BlobStore((mpath.parent / str(manifest.get("store") or "")).resolve())
+    return manifest, store
+
+
+def restore_tree(manifest_path: PathLike, dst_dir: PathLike) -> List[str]:
+    """按 manifest 从 blob 重建目录（dst_dir 不得已存在），返回写出的相对路径。"""
+    manifest, store = load_manifest(manifest_path)
+    dst = Path(dst_dir)
+    dst.mkdir(parents=True, exist_ok=False)
+    written: List[str] = []
+    for rel, entry in manifest["files"].items():
+        target = (dst / rel).resolve()
+        if dst.resolve() not in target.parents:
+            raise ValueError(f"manifest 路径越界: {rel}")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(store.read(str(entry["sha256"])))
+        written.append(rel)
+    return written
+
+
+def release_manifest(manifest_path: PathLike) -> Dict[str, int]:
+    """减少 manifest 引用的所有 blob 的计数（同一 blob 在清单中出现几次就减几次）。"""
+    mpath = Path(manifest_path)
+    if not mpath.is_file():
+        return {"blobs_removed": 0, "bytes_freed": 0}
+    manifest, store = load_manifest(mpath)
+    return store.release(str(e["sha256"]) for e in manifest["files"].values())
@@ -19,15 +19,21 @@
 from __future__ import annotations
 
 import json
+import os
 import shutil
+import threading
 import uuid
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, replace
 from datetime import datetime, timedelta, timezone
 from enum import Enum
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
+from app.utils import storage_codec
+from app.utils.cache_tiers import file_signature
+from app.utils.data_paths import get_project_data_dir
 from app.utils.helpers import parse_iso_to_utc
+from app.utils.storage_codec import DataclassSchema
 
 
 class ActivationStatus(str, Enum):
@@ -103,16 +109,30 @@ class ActivationRecycleRecord:
     deleted_by_email: Optional[str] = None
 
 
+def _prepare_activation_record(data: Dict) -> Dict:
+    # strict IDs: activation_session_id is canonical; keep legacy session_id persisted for now.
+    activation_sid = data.get("activation_session_id")
+    session_sid = data.get("session_id")
+    if not activation_sid and session_sid:
+        data["activation_session_id"] = session_sid
+    if not session_sid and activation_sid:
+        data["session_id"] = activation_sid
+    return data
+
+
+# activations.json / activation_recycle.json 整表编解码；历史记录缺失的新字段由 dataclass 默认值补齐
+_ACTIVATION_SCHEMA = DataclassSchema(ActivationRecord, prepare=_prepare_activation_record)
+_RECYCLE_SCHEMA = DataclassSchema(ActivationRecycleRecord)
+
+
 def get_simple_base_dir() -> Path:
     """生产业务数据根目录（真实用户数据）。"""
-    project_root = Path(__file__).resolve().parents[4]
-    return project_root / "data" / "simple"
+    return get_project_data_dir() / "simple"
 
 
 def get_simple_test_base_dir() -> Path:
     """测试/调试数据根目录（admin sandbox/workspace/replay）。"""
-    project_root = Path(__file__).resolve().parents[4]
-    return project_root / "data" / "test" / "simple"
+    return get_project_data_dir() / "test" / "simple"
 
 
 def _looks_like_debug_activation_code(code: Optional[str]) -> bool:
@@ -196,6 +216,88 @@ def _default_base_dir() -> Path:
     return get_simple_base_dir()
 
 
+class _ActivationIndex:
+    """
+    activations.json 的进程内索引：code -> 记录快照，owner_user_id / owner_email -> 激活码集合。
+
+    - 本进程写入（_save_all）时按改动的激活码增量维护（claim_owner / update_status /
+      soft_delete_to_recycle_bin / touch_activity 等只传改动的 code），其余写入整表重建
+    - 读取前比较文件 (mtime, size) 签名，其他进程改过文件则整表重建
+    - 对外只返回记录副本，调用方修改不会污染索引
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.signature: Optional[Tuple[int, int]] = None
+        self.loaded = False
+        self.records: Dict[str, ActivationRecord] = {}
+        self.by_user: Dict[str, set] = {}
+        self.by_email: Dict[str, set] = {}
+        self.rebuilds = 0
+
+    def _link(self, code: str, rec: ActivationRecord) -> None:
+        uid = (rec.owner_user_id or "").strip()
+        email = (rec.owner_email or "").strip()
+        if uid:
+            self.by_user.setdefault(uid, set()).add(code)
+        if email:
+            self.by_email.setdefault(email, set()).add(code)
+
+    def _unlink(self, code: str) -> None:
+        old = self.records.get(code)
+        if old is None:
+            return
+        for key, table in (
+            ((old.owner_user_id or "").strip(), self.by_user),
+            ((old.owner_email or "").strip(), self.by_email),
+        ):
+            codes = table.get(key)
+            if codes is not None:
+                codes.discard(code)
+                if not codes:
+                    del table[key]
+
+    def rebuild(
+        self, records: Dict[str, ActivationRecord], signature: Optional[Tuple[int, int]]
+    ) -> None:
+        self.records, self.by_user, self.by_email = {}, {}, {}
+        for code, rec in records.items():
+            self.records[code] = replace(rec)
+            self._link(code, rec)
+        self.signature = signature
+        self.loaded = True
+        self.rebuilds += 1
+
+    def apply(
+        self,
+        records: Dict[str, ActivationRecord],
+        codes: Iterable[str],
+        signature: Optional[Tuple[int, int]],
+    ) -> None:
+        for code in codes:
+            self._unlink(code)
+            rec = records.get(code)
+            if rec is not None:
+                self.records[code] = replace(rec)  # 已有 code 原位覆盖，保持与文件一致的顺序
+                self._link(code, rec)
+            else:
+                self.records.pop(code, None)
+        self.signature = signature
+
+
+_indexes: Dict[str, _ActivationIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _index_for(file: Path) -> _ActivationIndex:
+    key = os.path.abspath(file)
+    idx = _indexes.get(key)
+    if idx is None:
+        with _indexes_lock:
+            idx = _indexes.setdefault(key, _ActivationIndex())
+    return idx
+
+
 class SimpleActivationManager:
     """简单激活码会话管理器（文件存储实现）"""
 
@@ -225,73 +327,86 @@ class SimpleActivationManager:
             return {}
         try:
             content = self._activations_file.read_text(encoding="utf-8")
-            raw = json.loads(content or "{}")
+            return _ACTIVATION_SCHEMA.decode_map(content or "{}", "activations")
         except (json.JSONDecodeError, OSError):
-            raw = {}
-        records: Dict[str, ActivationRecord] = {}
-        for code, data in raw.items():
-            try:
-                data = dict(data)
-                # strict IDs: activation_session_id is canonical; keep legacy session_id persisted for now.
-                activation_sid = data.get("activation_session_id")
-                session_sid = data.get("session_id")
-                if not activation_sid and session_sid:
-                    data["activation_session_id"] = session_sid
-                if not session_sid and activation_sid:
-                    data["session_id"] = activation_sid
-                data.setdefault("vip_level", 1)
-                data.setdefault("is_sandbox", False)
-                data.setdefault("sandbox_root", None)
-                data.setdefault("fork_id", None)
-                data.setdefault("forked_from_code", None)
-                data.setdefault("forked_at", None)
-                data.setdefault("forked_by_user_id", None)
-                data.setdefault("sandbox_expires_at", None)
-                data.setdefault("workspace_kind", None)
-                data.setdefault("workspace_root", None)
-                data.setdefault("report_id", None)
-                data.setdefault("report_index_updated_at", None)
-                records[code] = ActivationRecord(**data)
-            except (TypeError, ValueError):
-                continue
-        return records
+            return {}
 
-    def _save_all(self, records: Dict[str, ActivationRecord]) -> None:
-        serializable = {code: asdict(rec) for code, rec in records.items()}
-        self._activations_file.write_text(
-            json.dumps(serializable, indent=2, ensure_ascii=False),
-            encoding="utf-8",
-        )
+    def _save_all(
+        self, records: Dict[str, ActivationRecord], changed: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        写回 activations.json 并同步内存索引。
+        changed：本次改动的激活码；索引与写入前的文件一致时只更新这些 code，否则整表重建。
+        """
+        idx = _index_for(self._activations_file)
+        with idx.lock:
+            before = file_signature(self._activations_file)
+            self._activations_file.write_text(
+                _ACTIVATION_SCHEMA.encode_map(records, "activations"), encoding="utf-8"
+            )
+            after = file_signature(self._activations_file)
+            if changed is not None and idx.loaded and idx.signature == before:
+                idx.apply(records, changed, after)
+            else:
+                idx.rebuild(records, after)
+
+    def _index(self) -> _ActivationIndex:
+        """返回与磁盘一致的索引（文件签名变化时重新解析；调用方持有 idx.lock 读取）。"""
+        idx = _index_for(self._activations_file)
+        sig = file_signature(self._activations_file)
+        if not idx.loaded or idx.signature != sig:
+            with idx.lock:
+                sig = file_signature(self._activations_file)
+                if not idx.loaded or idx.signature != sig:
+                    idx.rebuild(self._load_all(), sig)
+        return idx
+
+    def activations_by_owner(
+        self,
+        user_ids: Iterable[str] = (),
+        emails: Iterable[str] = (),
+    ) -> Dict[str, List[ActivationRecord]]:
+        """
+        按归属者查激活码（走索引，不解析整个 activations.json）。
+        返回 {user_id 或 email: [记录副本, ...]}，未命中的键对应空列表。
+        同一个键既作 user_id 又作 email 传入时（历史用户以邮箱作 user_id），取两张表的并集。
+        """
+        idx = self._index()
+        with idx.lock:
+            codes: Dict[str, set] = {}
+            for table, keys in ((idx.by_user, user_ids), (idx.by_email, emails)):
+                for key in keys:
+                    k = (key or "").strip()
+                    if k:
+                        codes.setdefault(k, set()).update(table.get(k, ()))
+            return {
+                k: [replace(idx.records[c]) for c in sorted(cs) if c in idx.records]
+                for k, cs in codes.items()
+            }
 
     def _load_recycle_bin(self) -> Dict[str, ActivationRecycleRecord]:
         if not self._recycle_file.exists():
             return {}
         try:
             content = self._recycle_file.read_text(encoding="utf-8")
-            raw = json.loads(content or "{}")
+            return _RECYCLE_SCHEMA.decode_map(content or "{}", "activation_recycle")
         except (json.JSONDecodeError, OSError):
-            raw = {}
-        records: Dict[str, ActivationRecycleRecord] = {}
-        for code, data in raw.items():
-            try:
-                records[code] = ActivationRecycleRecord(**data)
-            except TypeError:
-                continue
-        return records
+            return {}
 
     def _save_recycle_bin(self, records: Dict[str, ActivationRecycleRecord]) -> None:
-        serializable = {code: asdict(rec) for code, rec in records.items()}
         self._recycle_file.write_text(
-            json.dumps(serializable, indent=2, ensure_ascii=False),
-            encoding="utf-8",
+            _RECYCLE_SCHEMA.encode_map(records, "activation_recycle"), encoding="utf-8"
         )
 
     def list_activations(self) -> Dict[str, ActivationRecord]:
         """
         返回所有激活码记录（仅后端 Admin 使用）。
         注意：不会自动删除过期记录，status 字段中包含 active / expired / revoked。
+        记录来自内存索引的副本，文件未变化时不重新解析。
         """
-        return self._load_all()
+        idx = self._index()
+        with idx.lock:
+            return {code: replace(rec) for code, rec in idx.records.items()}
 
     def create_activation(
         self,
@@ -354,8 +469,10 @@ class SimpleActivationManager:
             return None
         # 激活码生成时为大写+数字，查找时统一转大写
         normalized = raw.upper()
-        records = self._load_all()
-        rec = records.get(normalized) or records.get(raw)
+        idx = self._index()
+        with idx.lock:
+            snap = idx.records.get(normalized) or idx.records.get(raw)
+            rec = replace(snap) if snap is not None else None
         if not rec:
             return None
 
@@ -366,8 +483,9 @@ class SimpleActivationManager:
             return rec
         if rec.status == ActivationStatus.ACTIVE and datetime.now(timezone.utc) > expires_dt:
             rec.status = ActivationStatus.EXPIRED
+            records = self._load_all()
             records[normalized] = rec
-            self._save_all(records)
+            self._save_all(records, changed=[normalized])
         return rec
 
     def touch_activity(self, code: str) -> None:
@@ -382,7 +500,7 @@ class SimpleActivationManager:
         now = datetime.now(timezone.utc).isoformat()
         rec.last_activity_at = now
         records[norm or code] = rec
-        self._save_all(records)
+        self._save_all(records, changed=[norm or code])
 
     def update_status(self, codes: List[str], status: str, actor: Optional[dict] = None) -> int:
         """批量更新状态（active / expired / revoked），记录审计日志。"""
@@ -398,6 +516,7 @@ class SimpleActivationManager:
 
         records = self._load_all()
         changed = 0
+        changed_codes: List[str] = []
         for raw in codes or []:
             code = (raw or "").strip().upper()
             rec = records.get(code)
@@ -411,6 +530,7 @@ class SimpleActivationManager:
                 rec.deleted_at = self._now_iso()
             records[code] = rec
             changed += 1
+            changed_codes.append(code)
             append_activation_audit(
                 EVENT_STATUS_CHANGED,
                 code,
@@ -419,7 +539,7 @@ class SimpleActivationManager:
                 detail={"old_status": old_status, "new_status": status},
             )
         if changed:
-            self._save_all(records)
+            self._save_all(records, changed=changed_codes)
         return changed
 
     def extend_and_activate(
@@ -530,7 +650,7 @@ class SimpleActivationManager:
         rec.claimed_at = rec.claimed_at or now
         rec.last_activity_at = now
         records[norm or code] = rec
-        self._save_all(records)
+        self._save_all(records, changed=[norm or code])
 
         # ---- 审计日志：归属变更 ----
         from app.utils.activation_audit import (
@@ -590,6 +710,7 @@ class SimpleActivationManager:
         deleted_at = now.isoformat()
         purge_after = (now + timedelta(days=retention_days)).isoformat()
         changed = 0
+        changed_codes: List[str] = []
 
         for raw in codes or []:
             code = (raw or "").strip().upper()
@@ -612,6 +733,7 @@ class SimpleActivationManager:
                 deleted_by_email=(deleted_by or {}).get("email"),
             )
             changed += 1
+            changed_codes.append(code)
             # 审计日志：软删除
             from app.utils.activation_audit import EVENT_SOFT_DELETED, append_activation_audit
 
@@ -629,7 +751,7 @@ class SimpleActivationManager:
             )
 
         if changed:
-            self._save_all(records)
+            self._save_all(records, changed=changed_codes)
             self._save_recycle_bin(recycle)
         return changed
 
@@ -713,7 +835,9 @@ class SimpleActivationManager:
                     if not rf.is_file():
                         continue
                     try:
-                        rec_data = json.loads(rf.read_text(encoding="utf-8"))
+                        rec_data = storage_codec.loads(
+                            rf.read_text(encoding="utf-8"), "report_record"
+                        )
                     except (OSError, json.JSONDecodeError, TypeError):
                         continue
                     if (rec_data.get("activation_code") or "").upper() == code:
@@ -0,0 +1,145 @@
+"""
+SSE 可见文本合帧：把模型逐 token 的 delta 聚合成较少的 `data: {"chunk": ...}` 帧。
+
+- 首个 delta 立即下发，保证首字延迟不变；
+- 之后在时间窗口（window_ms）或字节阈值（max_bytes）任一到达时合并下发；
+- 上游长时间无新 delta 时由 iter_with_flush_deadline 产出 FLUSH_DUE，避免尾部文本滞留；
+- 非文本事件（think_* / error / done 等）发出前须先 flush，保证事件顺序不变。
+
+每条流的帧数 / 字节数在 finish() 时累计到进程级计数器，可通过 sse_stream_metrics() 读取。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+# iter_with_flush_deadline 在窗口到期、上游仍未产出时返回的哨兵
+FLUSH_DUE = object()
+
+_metrics_lock = threading.Lock()
+_metrics: Dict[str, int] = {
+    "streams": 0,
+    "deltas": 0,
+    "frames": 0,
+    "bytes": 0,
+}
+
+
+def sse_stream_metrics() -> Dict[str, int]:
+    """进程内累计：streams / deltas（上游 delta 数）/ frames（下发 chunk 帧数）/ bytes（帧字节数）"""
+    with _metrics_lock:
+        return dict(_metrics)
+
+
+class SSEChunkCoalescer:
+    """单条 SSE 流的可见文本缓冲区（非线程安全，仅在所属的事件流协程内使用）。"""
+
+    def __init__(self, *, window_ms: float = 0, max_bytes: int = 0, key: str = "chunk") -> None:
+        self.window = max(0.0, float(window_ms or 0)) / 1000.0
+        self.max_bytes = max(0, int(max_bytes or 0))
+        self.key = key
+        self._buf: List[str] = []
+        self._buf_bytes = 0
+        self._first_at: Optional[float] = None
+        self._flushed_once = False
+        self.deltas = 0
+        self.frames = 0
+        self.bytes = 0
+        self._finished = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 or self.max_bytes > 0
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._buf)
+
+    def _frame(self, text: str) -> str:
+        frame = f"data: {json.dumps({self.key: text}, ensure_ascii=False)}\n\n"
+        self.frames += 1
+        self.bytes += len(frame.encode("utf-8"))
+        return frame
+
+    def push(self, delta: str) -> Optional[str]:
+        """加入一段可见文本；需要立即下发时返回帧，否则返回 None。"""
+        if not delta:
+            return None
+        self.deltas += 1
+        if not self.enabled or not self._flushed_once:
+            self._flushed_once = True
+            return self._frame(delta)
+        if not self._buf:
+            self._first_at = time.monotonic()
+        self._buf.append(delta)
+        self._buf_bytes += len(delta.encode("utf-8"))
+        if self.max_bytes and self._buf_bytes >= self.max_bytes:
+            return self.flush()
+        if self.window and time.monotonic() - (self._first_at or 0.0) >= self.window:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[str]:
+        """下发缓冲中的全部文本；缓冲为空返回 None。"""
+        if not self._buf:
+            return None
+        text = "".join(self._buf)
+        self._buf = []
+        self._buf_bytes = 0
+        self._first_at = None
+        return self._frame(text)
+
+    def seconds_until_due(self) -> Optional[float]:
+        """缓冲非空时距窗口到期的秒数；无缓冲或未启用时间窗口返回 None。"""
+        if not self._buf or not self.window or self._first_at is None:
+            return None
+        return max(0.0, self.window - (time.monotonic() - self._first_at))
+
+    def stats(self) -> Dict[str, int]:
+        return {"deltas": self.deltas, "frames": self.frames, "bytes": self.bytes}
+
+    def finish(self) -> Dict[str, int]:
+        """流结束时调用一次：把本流计数累计到进程级指标。"""
+        if not self._finished:
+            self._finished = True
+            with _metrics_lock:
+                _metrics["streams"] += 1
+                _metrics["deltas"] += self.deltas
+                _metrics["frames"] += self.frames
+                _metrics["bytes"] += self.bytes
+        return self.stats()
+
+
+async def iter_with_flush_deadline(
+    source: AsyncIterator[Any], coalescer: SSEChunkCoalescer
+) -> AsyncIterator[Any]:
+    """
+    逐项转发 source；当 coalescer 有缓冲且窗口到期而上游仍未产出时，先产出 FLUSH_DUE。
+    等待中的 __anext__ 不取消（取消会中断上游生成器），下一轮继续等待同一个 future。
+    """
+    it = source.__aiter__()
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(it.__anext__())
+            timeout = coalescer.seconds_until_due()
+            if timeout is not None:
+                done, _ = await asyncio.wait({pending}, timeout=timeout)
+                if not done:
+                    yield FLUSH_DUE
+                    continue
+            try:
+                item = await pending
+            except StopAsyncIteration:
+                return
+            finally:
+                pending = None
+            yield item
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
@@ -0,0 +1,353 @@
+"""
+文件存储 JSON 编解码（对话文件、report record、激活码表、rumination 进度、Prompt Lab、savepoint 等）
+
+- 编码后端：优先 orjson，其次 msgspec，均未安装时用标准库 json（STORAGE_JSON_BACKEND 可强制指定）
+- 解码统一用标准库：orjson 会把超出 64 位的整数静默解码为 float，而排除这种情况的预扫描
+  （找 19 位以上数字串）比 orjson 省下的时间还多（2000 条消息的对话文件：标准库 3.3ms，
+  orjson 2.9ms + 扫描 2.6ms）
+- 默认紧凑输出（无缩进、无多余空白），STORAGE_JSON_PRETTY 打开后按 indent=2 写盘便于人工排查；
+  读取不区分格式，历史缩进文件照常解析
+- 语义与标准库 json.dumps(ensure_ascii=False) / json.loads 对齐：
+  快速后端编码失败（超 64 位整数、孤立代理字符、非字符串键以外的未知类型等）时回退标准库重试，
+  解码失败抛 json.JSONDecodeError（非 UTF-8 内容同样如此），调用方原有 except 分支不用改
+- 待编码对象含 NaN / Infinity 时交给标准库（快速后端会静默写成 null）
+- 带 schema 的解码：DataclassSchema 把 {key: {...}} 映射整表解码为 dataclass（激活码表 / 回收站），
+  DocumentSchema 保证对话文件根对象与 messages / metadata 的结构类型
+
+已知差异（不影响往返结果）：浮点指数写法（1e-07 / 1e-7）、msgspec 后端会直接编码 datetime / dataclass。
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, Generic, Iterable, Mapping, Optional, Tuple, Type, TypeVar
+
+from app.config.settings import settings
+from app.utils.metrics import STORAGE_JSON_SECONDS
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # 可选依赖
+    msgspec = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("orjson", "msgspec", "stdlib")
+
+# 快速后端编码失败时回退标准库（orjson.JSONEncodeError 是 TypeError 子类）
+_FAST_ENCODE_ERRORS: Tuple[type, ...] = (TypeError, ValueError, OverflowError)
+if msgspec is not None:
+    _FAST_ENCODE_ERRORS += (msgspec.EncodeError,)
+
+_SCALAR_TYPES = (str, int, bool, type(None))
+
+T = TypeVar("T")
+
+
+def available_backends() -> Tuple[str, ...]:
+    """当前环境可用的后端（按优先级）。"""
+    return tuple(
+        b
+        for b in BACKENDS
+        if b == "stdlib" or {"orjson": orjson, "msgspec": msgspec}[b] is not None
+    )
+
+
+def resolve_backend(name: Optional[str] = None) -> str:
+    """
+    解析后端名：auto 取第一个可用的；指定的后端未安装时回退 stdlib 并记 warning。
+
+    Raises:
+        ValueError: 未知后端名
+    """
+    name = (name if name is not None else settings.STORAGE_JSON_BACKEND or "auto").strip().lower()
+    if name == "auto":
+        return available_backends()[0]
+    if name not in BACKENDS:
+        raise ValueError(f"未知的存储 JSON 后端: {name}（可选 auto / {' / '.join(BACKENDS)}）")
+    if name not in available_backends():
+        logger.warning("存储 JSON 后端 %s 未安装，回退 stdlib", name)
+        return "stdlib"
+    return name
+
+
+def _pretty(pretty: Optional[bool]) -> bool:
+    return settings.STORAGE_JSON_PRETTY if pretty is None else pretty
+
+
+# ---------------------------------------------------------------------------
+# 编码
+# ---------------------------------------------------------------------------
+
+
+def _stdlib_dumps(
+    obj: Any, pretty: bool, sort_keys: bool, default: Optional[Callable[[Any], Any]]
+) -> str:
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=sort_keys, default=default)
+    return json.dumps(
+        obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys, default=default
+    )
+
+
+def _fast_dumps(
+    backend: str,
+    obj: Any,
+    pretty: bool,
+    sort_keys: bool,
+    default: Optional[Callable[[Any], Any]],
+    native_dataclass: bool,
+) -> bytes:
+    if backend == "orjson":
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if not native_dataclass:
+            # 与标准库一致：dataclass / datetime 交给 default（未提供则报错后回退标准库，同样抛 TypeError）
+            option |= orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME
+        return orjson.dumps(obj, default=default, option=option)
+    if default is not None or sort_keys:
+        # msgspec 没有 sort_keys，也没有与标准库一致的 default 语义，交给标准库
+        raise TypeError("msgspec 不支持该编码选项")
+    raw = msgspec.json.encode(obj)
+    return msgspec.json.format(raw, indent=2) if pretty else raw
+
+
+def _has_non_finite(obj: Any) -> bool:
+    """对象树里是否有 NaN / Infinity（快速后端会写成 null，与标准库不一致）。"""
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        t = type(o)
+        if t in _SCALAR_TYPES:
+            continue
+        if t is float:
+            if not math.isfinite(o):
+                return True
+        elif isinstance(o, Mapping):
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple)):
+            stack.extend(o)
+        elif dataclasses.is_dataclass(o) and not isinstance(o, type):
+            stack.extend(getattr(o, f.name) for f in dataclasses.fields(o))
+        elif isinstance(o, float) and not math.isfinite(o):
+            return True
+    return False
+
+
+def _encode(
+    obj: Any,
+    file_type: str,
+    pretty: Optional[bool],
+    sort_keys: bool,
+    default: Optional[Callable[[Any], Any]],
+    backend: Optional[str],
+    native_dataclass: bool,
+) -> str:
+    t0 = time.perf_counter()
+    try:
+        name = resolve_backend(backend)
+        use_pretty = _pretty(pretty)
+        if name != "stdlib":
+            try:
+                raw = _fast_dumps(name, obj, use_pretty, sort_keys, default, native_dataclass)
+            except _FAST_ENCODE_ERRORS:
+                raw = None
+            # NaN / Infinity 只可能以 null 出现在结果里：没有 null 就不必遍历对象
+            if raw is not None and (b"null" not in raw or not _has_non_finite(obj)):
+                return raw.decode("utf-8")
+        if native_dataclass:
+            obj = _dataclasses_to_dicts(obj)
+        return _stdlib_dumps(obj, use_pretty, sort_keys, default)
+    finally:
+        STORAGE_JSON_SECONDS.observe(time.perf_counter() - t0, file_type=file_type, op="dump")
+
+
+def dumps(
+    obj: Any,
+    file_type: str,
+    *,
+    pretty: Optional[bool] = None,
+    sort_keys: bool = False,
+    default: Optional[Callable[[Any], Any]] = None,
+    backend: Optional[str] = None,
+) -> str:
+    """
+    序列化为写盘文本（UTF-8 原文，不转义非 ASCII）。
+
+    Args:
+        obj: 待序列化对象
+        file_type: 指标中的存储文件类型
+        pretty: 是否缩进；None 时取 STORAGE_JSON_PRETTY
+        sort_keys: 是否按键排序
+        default: 无法序列化的对象的转换函数（同 json.dumps）
+        backend: 强制后端；None 时取 STORAGE_JSON_BACKEND
+    """
+    return _encode(obj, file_type, pretty, sort_keys, default, backend, native_dataclass=False)
+
+
+def dumps_bytes(obj: Any, file_type: str, **kwargs: Any) -> bytes:
+    """同 dumps，返回 UTF-8 字节（用于原子写 bytes 的存储）。"""
+    return dumps(obj, file_type, **kwargs).encode("utf-8")
+
+
+def _dataclasses_to_dicts(obj: Any) -> Any:
+    if isinstance(obj, Mapping):
+        return {k: _dataclasses_to_dicts(v) for k, v in obj.items()}
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    return obj
+
+
+# ---------------------------------------------------------------------------
+# 解码
+# ---------------------------------------------------------------------------
+
+
+def _to_text(raw: Any) -> str:
+    if isinstance(raw, (bytes, bytearray, memoryview)):
+        return bytes(raw).decode("utf-8")
+    return raw
+
+
+def loads(raw: Any, file_type: str) -> Any:
+    """
+    解析存储文件内容（str / bytes），结果与 json.loads 一致。
+
+    Raises:
+        json.JSONDecodeError: 内容不是合法 JSON
+    """
+    t0 = time.perf_counter()
+    try:
+        return json.loads(_to_text(raw))
+    except UnicodeDecodeError as e:
+        raise json.JSONDecodeError(f"非 UTF-8 内容: {e}", "", 0) from e
+    finally:
+        STORAGE_JSON_SECONDS.observe(time.perf_counter() - t0, file_type=file_type, op="load")
+
+
+def load(fp: Any, file_type: str, **kwargs: Any) -> Any:
+    """从已打开的文件对象读取并解析。"""
+    return loads(fp.read(), file_type, **kwargs)
+
+
+# ---------------------------------------------------------------------------
+# 带 schema 的解码
+# ---------------------------------------------------------------------------
+
+
+class DataclassSchema(Generic[T]):
+    """
+    {key: record} 映射与 dataclass 之间的整表编解码。
+
+    解码时逐条校验字段（未知字段或缺必填字段的条目跳过，与 cls(**data) 抛 TypeError 后跳过的旧行为一致），
+    prepare 可在构造前补齐 / 迁移历史字段。编码时快速后端直接序列化 dataclass，不经 asdict 深拷贝。
+    """
+
+    def __init__(
+        self, cls: Type[T], prepare: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+    ):
+        if not dataclasses.is_dataclass(cls):
+            raise TypeError(f"{cls!r} 不是 dataclass")
+        self.cls = cls
+        self.prepare = prepare
+        fields = dataclasses.fields(cls)
+        self.field_names = frozenset(f.name for f in fields)
+        self.required = frozenset(
+            f.name
+            for f in fields
+            if f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING
+        )
+
+    def from_dict(self, data: Any) -> Optional[T]:
+        """单条解码；结构不符返回 None。"""
+        if not isinstance(data, dict):
+            return None
+        data = dict(data)
+        if self.prepare is not None:
+            data = self.prepare(data)
+        keys = data.keys()
+        if not self.required <= keys or not keys <= self.field_names:
+            return None
+        try:
+            return self.cls(**data)
+        except (TypeError, ValueError):
+            return None
+
+    def decode_map(self, raw: Any, file_type: str) -> Dict[str, T]:
+        """
+        解析整表；根对象不是 dict 时返回空表。
+
+        Raises:
+            json.JSONDecodeError: 内容不是合法 JSON
+        """
+        data = loads(raw, file_type)
+        if not isinstance(data, dict):
+            return {}
+        out: Dict[str, T] = {}
+        for key, item in data.items():
+            rec = self.from_dict(item)
+            if rec is not None:
+                out[key] = rec
+        return out
+
+    def encode_map(
+        self, records: Mapping[str, T], file_type: str, *, pretty: Optional[bool] = None
+    ) -> str:
+        """序列化整表（字段顺序与 dataclass 定义一致）。"""
+        return _encode(dict(records), file_type, pretty, False, None, None, native_dataclass=True)
+
+
+class DocumentSchema:
+    """
+    单个 JSON 文档的结构约束：根对象须为 dict，list_fields 中的字段为只含 dict 的列表，
+    dict_fields 中的字段为 dict。类型不符的字段重置为空值，列表中的非 dict 条目丢弃。
+    """
+
+    def __init__(self, list_fields: Iterable[str] = (), dict_fields: Iterable[str] = ()):
+        self.list_fields = tuple(list_fields)
+        self.dict_fields = tuple(dict_fields)
+
+    def coerce(self, data: Any) -> Dict[str, Any]:
+        """
+        按 schema 规整已解析对象。
+
+        Raises:
+            json.JSONDecodeError: 根对象不是 dict（按损坏文件处理）
+        """
+        if not isinstance(data, dict):
+            raise json.JSONDecodeError(f"根对象应为 object，实际为 {type(data).__name__}", "", 0)
+        for name in self.list_fields:
+            value = data.get(name)
+            if name in data and not isinstance(value, list):
+                data[name] = []
+            elif isinstance(value, list) and not all(isinstance(x, dict) for x in value):
+                data[name] = [x for x in value if isinstance(x, dict)]
+        for name in self.dict_fields:
+            if name in data and not isinstance(data[name], dict):
+                data[name] = {}
+        return data
+
+    def loads(self, raw: Any, file_type: str) -> Dict[str, Any]:
+        """解析并规整。"""
+        return self.coerce(loads(raw, file_type))
+
+    def load(self, fp: Any, file_type: str) -> Dict[str, Any]:
+        return self.loads(fp.read(), file_type)
+
+
+# 对话文件：{report_id, category, messages: [message dict, ...], metadata: {...}}
+CONVERSATION_SCHEMA = DocumentSchema(list_fields=("messages",), dict_fields=("metadata",))
+# 线程级额外结论文件：{category}__note/note.json
+NOTE_SCHEMA = DocumentSchema(list_fields=("notes",), dict_fields=("metadata",))
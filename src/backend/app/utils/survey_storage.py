@@ -15,8 +15,12 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from app.domain.conclusion_card_goals import cap_strengths_keywords_list
+from app.utils import storage_codec
+from app.utils.cow_copy import materialize
 from app.utils.data_paths import get_user_data_dir
 
+_FILE_TYPE = "survey"  # 指标中的存储文件类型
+
 # 调研字段到中文标签的映射（用于 format_basic_info_for_prompt）
 SURVEY_LABELS: Dict[str, str] = {
     "nickname": "昵称",
@@ -100,7 +104,7 @@ async def save_basic_info_by_user(user_id: str, data: Dict[str, Any]) -> None:
 
     # 2) DB 成功后再写 JSON 缓存（保持一致性；失败也 raise，避免不一致）
     path = _get_user_basic_info_path(user_id)
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    path.write_text(storage_codec.dumps(data, _FILE_TYPE), encoding="utf-8")
 
 
 def load_basic_info_by_user(user_id: str) -> Optional[Dict[str, Any]]:
@@ -115,7 +119,7 @@ def load_basic_info_by_user(user_id: str) -> Optional[Dict[str, Any]]:
         return None
     try:
         content = path.read_text(encoding="utf-8")
-        return json.loads(content or "{}")
+        return storage_codec.loads(content or "{}", _FILE_TYPE)
     except (json.JSONDecodeError, OSError):
         return None
 
@@ -187,7 +191,7 @@ def load_basic_info(session_id: str, base_dir: str) -> Optional[Dict[str, Any]]:
         return None
     try:
         content = path.read_text(encoding="utf-8")
-        return json.loads(content or "{}")
+        return storage_codec.loads(content or "{}", _FILE_TYPE)
     except (json.JSONDecodeError, OSError):
         return None
 
@@ -226,6 +230,7 @@ def save_prior_context_for_report(report_id: str, phase: str, text: str, reports
         reports_root: reports 目录根路径（如 data/simple/reports）
     """
     path = _get_prior_context_path_for_report(report_id, phase, Path(reports_root))
+    materialize(path)
     path.write_text(text, encoding="utf-8")
 
 
@@ -239,7 +244,7 @@ def load_dimension_conclusions(report_id: str, reports_root: str) -> Dict[str, D
     if not path.is_file():
         return {}
     try:
-        raw = json.loads(path.read_text(encoding="utf-8") or "{}")
+        raw = storage_codec.loads(path.read_text(encoding="utf-8") or "{}", _FILE_TYPE)
     except (json.JSONDecodeError, OSError):
         return {}
     if not isinstance(raw, dict):
@@ -265,7 +270,8 @@ def merge_dimension_conclusion_record(
     path = _dimension_conclusions_path(report_id, reports_root)
     path.parent.mkdir(parents=True, exist_ok=True)
     payload = {k: cur[k] for k in DIMENSION_PHASE_IDS if k in cur}
-    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    materialize(path)
+    path.write_text(storage_codec.dumps(payload, _FILE_TYPE), encoding="utf-8")
 
 
 def format_conclusion_prior_block(phase_step: str, conclusion: Dict[str, Any]) -> str:
@@ -427,6 +433,7 @@ def save_prior_context(session_id: str, phase: str, text: str, base_dir: str) ->
     session_dir = base / session_id
     session_dir.mkdir(parents=True, exist_ok=True)
     filename = _PRIOR_CONTEXT_FILENAME.format(phase=phase)
+    materialize(session_dir / filename)
     (session_dir / filename).write_text(text, encoding="utf-8")
 
 
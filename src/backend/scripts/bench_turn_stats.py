@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+对话每轮时长统计基准：逐条计算 vs NumPy 向量化。
+
+生成 N 个合成会话（含缺失 / 非法时间戳、超长轮次、带时区偏移、末轮无 assistant 收尾等情况），
+分别用 compute_turn_stats_from_messages 逐个计算与 compute_turn_stats_batch 批量计算，
+校验两者结果逐项一致后输出耗时与加速比。
+
+示例：
+  python src/backend/scripts/bench_turn_stats.py --threads 10000 --turns 12 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPTS_DIR.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.conversation_stats_service import compute_turn_stats_from_messages  # noqa: E402
+from app.services.turn_stats_vectorized import HAS_NUMPY, compute_turn_stats_batch  # noqa: E402
+
+_BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+_CST = timezone(timedelta(hours=8))
+
+
+def _format_ts(rng: random.Random, dt: datetime) -> Any:
+    """按一定比例产生各种时间戳写法（含缺失与非法值）。"""
+    roll = rng.random()
+    if roll < 0.02:
+        return None
+    if roll < 0.03:
+        return "not-a-timestamp"
+    if roll < 0.10:
+        return dt.astimezone(_CST).isoformat()
+    if roll < 0.40:
+        return dt.isoformat().replace("+00:00", "Z")
+    return dt.isoformat()
+
+
+def generate_threads(n_threads: int, turns: int = 12, seed: int = 0) -> List[List[Dict[str, Any]]]:
+    """生成 n_threads 个合成会话，每个约 turns 轮。"""
+    rng = random.Random(seed)
+    threads: List[List[Dict[str, Any]]] = []
+    for t in range(n_threads):
+        now = _BASE + timedelta(minutes=t)
+        msgs: List[Dict[str, Any]] = []
+        for i in range(rng.randint(0, turns * 2)):
+            msgs.append({"role": "user", "content": f"问 {i}", "created_at": _format_ts(rng, now)})
+            now += timedelta(seconds=rng.randint(5, 120), microseconds=rng.randint(0, 999_999))
+            if rng.random() < 0.9:
+                msgs.append(
+                    {"role": "assistant", "content": f"答 {i}", "created_at": _format_ts(rng, now)}
+                )
+            # 偶尔出现超过 2 小时的间隔
+            gap = rng.randint(3 * 3600, 5 * 3600) if rng.random() < 0.03 else rng.randint(10, 900)
+            now += timedelta(seconds=gap)
+        threads.append(msgs)
+    return threads
+
+
+def run_benchmark(
+    n_threads: int = 10000, turns: int = 12, repeat: int = 3, seed: int = 0
+) -> Dict[str, Any]:
+    """
+    运行基准并校验一致性。
+
+    Returns:
+        {threads, messages, scalar_seconds, vectorized_seconds, speedup}（各取 repeat 次中的最小耗时）
+
+    Raises:
+        RuntimeError: 未安装 numpy
+        AssertionError: 两种实现结果不一致
+    """
+    if not HAS_NUMPY:
+        raise RuntimeError("向量化基准需要 numpy")
+    threads = generate_threads(n_threads, turns=turns, seed=seed)
+
+    scalar_best = vector_best = float("inf")
+    scalar: List[Dict[str, Any]] = []
+    vector: List[Dict[str, Any]] = []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        scalar = [compute_turn_stats_from_messages(msgs) for msgs in threads]
+        scalar_best = min(scalar_best, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        vector = compute_turn_stats_batch(threads)
+        vector_best = min(vector_best, time.perf_counter() - start)
+
+    mismatches = [i for i, (a, b) in enumerate(zip(scalar, vector)) if a != b]
+    assert len(scalar) == len(vector) and not mismatches, f"结果不一致：thread {mismatches[:5]}"
+
+    return {
+        "threads": n_threads,
+        "messages": sum(len(t) for t in threads),
+        "scalar_seconds": round(scalar_best, 4),
+        "vectorized_seconds": round(vector_best, 4),
+        "speedup": round(scalar_best / vector_best, 2) if vector_best > 0 else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="对话每轮时长统计：逐条 vs 向量化基准")
+    parser.add_argument("--threads", type=int, default=10000, help="会话数（默认 10000）")
+    parser.add_argument("--turns", type=int, default=12, help="每个会话的平均轮数（默认 12）")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最小耗时（默认 3）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+    # 合成数据里的非法时间戳与超长轮次会刷屏 warning
+    logging.disable(logging.WARNING)
+
+    result = run_benchmark(args.threads, turns=args.turns, repeat=args.repeat, seed=args.seed)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
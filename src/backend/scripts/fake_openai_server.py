@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+本地假 OpenAI 兼容服务（/v1/chat/completions），用于离线压测与回放。
+
+特点：
+- stream=true 时按 OpenAI SSE 格式逐 token 输出，可配置首 token 延迟与 token 速率
+- stream=false 时返回完整 JSON（JSON mode 下默认返回 "{}"，避免解析失败）
+- 回复内容可按「最后一条 user 消息」映射（--replies-file），否则使用默认回复
+
+示例：
+  python src/backend/scripts/fake_openai_server.py --port 18081 --token-rate 80 --ttft-ms 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_STREAM_REPLY = (
+    "收到，我们继续往下聊。你刚才提到的这件事里，最让你在意的部分是什么？"
+    "可以再具体说说当时的感受和你做出的选择。\n"
+    '[STATE_JSON]{"state":"continue","draft":null}[/STATE_JSON]'
+)
+DEFAULT_CHAT_REPLY = "测试回复"
+DEFAULT_JSON_REPLY = "{}"
+
+
+def split_tokens(text: str, chars_per_token: int = 2) -> List[str]:
+    """按固定字符数切分为「token」；中文约 1~2 字一个 token，足够模拟真实分片。"""
+    n = max(1, int(chars_per_token))
+    return [text[i : i + n] for i in range(0, len(text), n)] or [""]
+
+
+def _last_user_content(messages: Any) -> str:
+    for m in reversed(messages or []):
+        if isinstance(m, dict) and (m.get("role") or "") == "user":
+            return str(m.get("content") or "")
+    return ""
+
+
+def create_fake_openai_app(
+    *,
+    token_rate: float = 50.0,
+    ttft_ms: float = 200.0,
+    jitter_ms: float = 0.0,
+    chars_per_token: int = 2,
+    replies: Optional[Dict[str, Dict[str, str]]] = None,
+    seed: Optional[int] = None,
+) -> FastAPI:
+    """
+    Args:
+        token_rate: 每秒输出 token 数（<=0 表示不限速）
+        ttft_ms: 首 token 延迟（毫秒）
+        jitter_ms: 首 token 延迟的随机抖动上限（毫秒）
+        chars_per_token: 每个 token 包含的字符数
+        replies: {user_message: {"stream": ..., "chat": ...}}
+    """
+    app = FastAPI(title="fake-openai")
+    reply_map = dict(replies or {})
+    rng = random.Random(seed)
+    stats = {"stream_requests": 0, "chat_requests": 0, "tokens_out": 0}
+
+    def _resolve_reply(body: Dict[str, Any], *, stream: bool) -> str:
+        hit = reply_map.get(_last_user_content(body.get("messages")))
+        if stream:
+            return (hit or {}).get("stream") or DEFAULT_STREAM_REPLY
+        if hit and hit.get("chat"):
+            return hit["chat"]
+        fmt = body.get("response_format") or {}
+        if isinstance(fmt, dict) and fmt.get("type") == "json_object":
+            return DEFAULT_JSON_REPLY
+        return DEFAULT_CHAT_REPLY
+
+    async def _first_token_delay() -> None:
+        delay = max(0.0, ttft_ms + (rng.uniform(0, jitter_ms) if jitter_ms > 0 else 0.0))
+        if delay:
+            await asyncio.sleep(delay / 1000.0)
+
+    def _usage(prompt_text: str, completion_tokens: int) -> Dict[str, int]:
+        prompt_tokens = max(1, len(prompt_text) // max(1, chars_per_token))
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    async def _stream_body(body: Dict[str, Any]) -> AsyncIterator[bytes]:
+        cid = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model = str(body.get("model") or "fake-model")
+        tokens = split_tokens(_resolve_reply(body, stream=True), chars_per_token)
+        interval = 1.0 / token_rate if token_rate > 0 else 0.0
+
+        def _frame(delta: Dict[str, Any], finish: Optional[str] = None, usage=None) -> bytes:
+            obj: Dict[str, Any] = {
+                "id": cid,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            if usage is not None:
+                obj["choices"] = []
+                obj["usage"] = usage
+            return f"data: {json.dumps(obj, ensure_ascii=False)}\n\n".encode("utf-8")
+
+        await _first_token_delay()
+        yield _frame({"role": "assistant", "content": ""})
+        for i, tok in enumerate(tokens):
+            if i and interval:
+                await asyncio.sleep(interval)
+            yield _frame({"content": tok})
+        stats["tokens_out"] += len(tokens)
+        yield _frame({}, finish="stop")
+        prompt_text = "".join(
+            str((m or {}).get("content") or "") for m in body.get("messages") or []
+        )
+        yield _frame({}, usage=_usage(prompt_text, len(tokens)))
+        yield b"data: [DONE]\n\n"
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if bool(body.get("stream")):
+            stats["stream_requests"] += 1
+            return StreamingResponse(_stream_body(body), media_type="text/event-stream")
+
+        stats["chat_requests"] += 1
+        await _first_token_delay()
+        content = _resolve_reply(body, stream=False)
+        n_tokens = len(split_tokens(content, chars_per_token))
+        if token_rate > 0:
+            await asyncio.sleep(n_tokens / token_rate)
+        stats["tokens_out"] += n_tokens
+        prompt_text = "".join(
+            str((m or {}).get("content") or "") for m in body.get("messages") or []
+        )
+        return JSONResponse(
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": str(body.get("model") or "fake-model"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": _usage(prompt_text, n_tokens),
+            }
+        )
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "fake-model", "object": "model"}]}
+
+    @app.get("/__fake__/stats")
+    async def fake_stats():
+        return dict(stats)
+
+    return app
+
+
+def load_replies_file(path: Optional[str]) -> Dict[str, Dict[str, str]]:
+    if not path:
+        return {}
+    raw = json.loads(Path(path).read_text(encoding="utf-8") or "{}")
+    return {str(k): dict(v) for k, v in raw.items() if isinstance(v, dict)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible streaming server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18081)
+    parser.add_argument("--token-rate", type=float, default=50.0, help="每秒 token 数，<=0 不限速")
+    parser.add_argument("--ttft-ms", type=float, default=200.0, help="首 token 延迟（毫秒）")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--chars-per-token", type=int, default=2)
+    parser.add_argument("--replies-file", default="", help="JSON：{user_message: {stream, chat}}")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    app = create_fake_openai_app(
+        token_rate=args.token_rate,
+        ttft_ms=args.ttft_ms,
+        jitter_ms=args.jitter_ms,
+        chars_per_token=args.chars_per_token,
+        replies=load_replies_file(args.replies_file),
+        seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,693 @@
+#!/usr/bin/env python3
+"""
+Simple Chat 离线压测（/simple-chat/message/stream）。
+
+流程：
+1. 启动本地假 OpenAI 服务（fake_openai_server.py，可配 token 速率/首 token 延迟）
+2. 按 test/backend/fixtures/simple_chat_cases 的用例，为每个虚拟用户 seed 独立 report + 激活码
+3. 以子进程启动真实 uvicorn 后端（serve-backend 模式：鉴权覆盖 + 文件 I/O / 事件循环探针）
+4. N 个虚拟用户并发回放，统计 TTFB / 首 chunk / chunk 间隔分位数与每次回复的 SSE 帧数 / 字节数，
+   并按阶段（pre_stream / stream / post_stream）汇总文件 I/O 耗时与事件循环延迟
+
+阶段划分（按客户端墙钟，同机进程共享时钟）：
+- pre_stream：请求发出 → 首个 chunk
+- stream：首个 chunk → 最后一个 chunk
+- post_stream：最后一个 chunk 之后（含 done 后的落盘与请求派生的后台任务）
+
+示例：
+  python src/backend/scripts/loadtest_simple_chat.py \
+    --cases-file test/backend/fixtures/simple_chat_cases/batch_basic.json \
+    --users 20 --rounds 3 --token-rate 60 --ttft-ms 300 \
+    --output-json data/test/loadtest/latest.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPTS_DIR.parent
+PROJECT_ROOT = BACKEND_DIR.parent.parent
+
+PHASES = ("pre_stream", "stream", "post_stream")
+BENCH_HEADER = "x-bench-request-id"
+BENCH_USER_HEADER = "x-bench-user-id"
+
+
+# ---------------------------------------------------------------------------
+# 统计（纯函数）
+# ---------------------------------------------------------------------------
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """线性插值分位数；q 取 0~100。空序列返回 None。"""
+    if not values:
+        return None
+    xs = sorted(values)
+    if len(xs) == 1:
+        return float(xs[0])
+    pos = (len(xs) - 1) * (max(0.0, min(100.0, q)) / 100.0)
+    lo = int(pos)
+    hi = min(lo + 1, len(xs) - 1)
+    return float(xs[lo] + (xs[hi] - xs[lo]) * (pos - lo))
+
+
+def summarize(values: Sequence[float]) -> Dict[str, Any]:
+    vals = [float(v) for v in values]
+    if not vals:
+        return {"count": 0}
+    return {
+        "count": len(vals),
+        "mean": round(sum(vals) / len(vals), 3),
+        "p50": round(percentile(vals, 50), 3),
+        "p90": round(percentile(vals, 90), 3),
+        "p99": round(percentile(vals, 99), 3),
+        "max": round(max(vals), 3),
+    }
+
+
+def phase_at(ts: float, timing: Dict[str, Any]) -> Optional[str]:
+    """按请求时间线判断 ts 所属阶段；早于请求发出返回 None。"""
+    t_send = timing.get("t_send")
+    if t_send is None or ts < t_send:
+        return None
+    first = timing.get("t_first_chunk")
+    last = timing.get("t_last_chunk")
+    if first is None or ts < first:
+        return "pre_stream"
+    if last is None or ts <= last:
+        return "stream"
+    return "post_stream"
+
+
+def attribute_probe(
+    timings: Dict[str, Dict[str, Any]],
+    io_events: Iterable[Dict[str, Any]],
+    lag_samples: Iterable[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    将后端探针数据归到各阶段：
+    - 文件 I/O：按事件携带的 request id 与起始时间定位阶段；无 request id 计入 background
+    - 事件循环延迟：采样时刻处于某阶段的请求存在即计入该阶段（可同时计入多个阶段）
+    """
+    io_ms: Dict[str, List[float]] = {p: [] for p in (*PHASES, "background")}
+    io_ops: Dict[str, Dict[str, int]] = {p: {} for p in (*PHASES, "background")}
+    for ev in io_events:
+        timing = timings.get(str(ev.get("rid") or ""))
+        phase = phase_at(float(ev.get("start") or 0.0), timing) if timing else None
+        key = phase or "background"
+        io_ms[key].append(float(ev.get("ms") or 0.0))
+        op = str(ev.get("op") or "?")
+        io_ops[key][op] = io_ops[key].get(op, 0) + 1
+
+    lag_ms: Dict[str, List[float]] = {p: [] for p in PHASES}
+    idle: List[float] = []
+    spans = list(timings.values())
+    for s in lag_samples:
+        t = float(s.get("t") or 0.0)
+        ms = float(s.get("ms") or 0.0)
+        hit = set()
+        for timing in spans:
+            end = timing.get("t_end")
+            if end is not None and t > end:
+                continue
+            p = phase_at(t, timing)
+            if p:
+                hit.add(p)
+        for p in hit:
+            lag_ms[p].append(ms)
+        if not hit:
+            idle.append(ms)
+
+    out: Dict[str, Any] = {}
+    for p in (*PHASES, "background"):
+        vals = io_ms[p]
+        out[p] = {
+            "file_io_ms_total": round(sum(vals), 3),
+            "file_io": summarize(vals),
+            "file_io_ops": io_ops[p],
+        }
+        if p in lag_ms:
+            out[p]["loop_lag_ms"] = summarize(lag_ms[p])
+    out["idle_loop_lag_ms"] = summarize(idle)
+    return out
+
+
+def build_report(
+    results: List[Dict[str, Any]],
+    probe: Dict[str, Any],
+    *,
+    wall_seconds: float,
+    config: Dict[str, Any],
+) -> Dict[str, Any]:
+    ok = [r for r in results if not r.get("error")]
+    ttfb = [(r["t_first_byte"] - r["t_send"]) * 1000 for r in ok if r.get("t_first_byte")]
+    ttft = [(r["t_first_chunk"] - r["t_send"]) * 1000 for r in ok if r.get("t_first_chunk")]
+    total = [(r["t_end"] - r["t_send"]) * 1000 for r in ok if r.get("t_end")]
+    gaps: List[float] = []
+    for r in ok:
+        gaps.extend(r.get("chunk_gaps_ms") or [])
+    timings = {r["rid"]: r for r in results}
+    return {
+        "config": config,
+        "requests": {
+            "total": len(results),
+            "ok": len(ok),
+            "errors": len(results) - len(ok),
+            "error_samples": [r["error"] for r in results if r.get("error")][:10],
+            "rps": round(len(results) / wall_seconds, 3) if wall_seconds > 0 else None,
+            "wall_seconds": round(wall_seconds, 3),
+        },
+        "latency_ms": {
+            "ttfb": summarize(ttfb),
+            "first_chunk": summarize(ttft),
+            "inter_chunk": summarize(gaps),
+            "total": summarize(total),
+        },
+        "frames_per_reply": {
+            "chunk_frames": summarize([float(r.get("chunks") or 0) for r in ok]),
+            "frames": summarize([float(r.get("frames") or 0) for r in ok]),
+            "bytes": summarize([float(r.get("frame_bytes") or 0) for r in ok]),
+        },
+        "phases": attribute_probe(timings, probe.get("io") or [], probe.get("lag") or []),
+    }
+
+
+# ---------------------------------------------------------------------------
+# 后端探针（serve-backend 子进程内使用）
+# ---------------------------------------------------------------------------
+
+_bench_rid: contextvars.ContextVar[str] = contextvars.ContextVar("bench_rid", default="")
+
+
+class BenchProbe:
+    """收集文件 I/O 事件与事件循环延迟采样；request id 通过 contextvar 传递（含 to_thread/后台任务）。"""
+
+    def __init__(self, lag_interval: float = 0.01) -> None:
+        self.lag_interval = lag_interval
+        self.io: List[Dict[str, Any]] = []
+        self.lag: List[Dict[str, Any]] = []
+        self._lag_task: Optional[asyncio.Task] = None
+
+    def reset(self) -> None:
+        self.io.clear()
+        self.lag.clear()
+
+    def record_io(self, op: str, start: float, ms: float) -> None:
+        self.io.append({"rid": _bench_rid.get(), "op": op, "start": start, "ms": round(ms, 3)})
+
+    def wrap(self, owner: Any, attr: str, op: str) -> None:
+        fn = getattr(owner, attr)
+        probe = self
+
+        if asyncio.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def _async_wrapper(*args, **kwargs):
+                start, t0 = time.time(), time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    probe.record_io(op, start, (time.perf_counter() - t0) * 1000)
+
+            setattr(owner, attr, _async_wrapper)
+        else:
+
+            @functools.wraps(fn)
+            def _sync_wrapper(*args, **kwargs):
+                start, t0 = time.time(), time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    probe.record_io(op, start, (time.perf_counter() - t0) * 1000)
+
+            setattr(owner, attr, _sync_wrapper)
+
+    def ensure_lag_monitor(self) -> None:
+        if self._lag_task is None or self._lag_task.done():
+            self._lag_task = asyncio.get_running_loop().create_task(self._lag_loop())
+
+    async def _lag_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            t0 = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            lag = max(0.0, (loop.time() - t0 - self.lag_interval) * 1000)
+            self.lag.append({"t": time.time(), "ms": round(lag, 3)})
+
+
+class BenchASGI:
+    """包裹后端 ASGI app：设置 request id contextvar，并提供 /__bench__/probe 与 /__bench__/reset。"""
+
+    def __init__(self, app: Any, probe: BenchProbe) -> None:
+        self.app = app
+        self.probe = probe
+
+    async def __call__(self, scope, receive, send):
+        if scope.get("type") != "http":
+            return await self.app(scope, receive, send)
+        self.probe.ensure_lag_monitor()
+        path = scope.get("path") or ""
+        if path == "/__bench__/probe":
+            return await self._json(send, {"io": self.probe.io, "lag": self.probe.lag})
+        if path == "/__bench__/reset":
+            self.probe.reset()
+            return await self._json(send, {"ok": True})
+        headers = dict(scope.get("headers") or [])
+        rid = (headers.get(BENCH_HEADER.encode()) or b"").decode("latin-1")
+        token = _bench_rid.set(rid)
+        try:
+            return await self.app(scope, receive, send)
+        finally:
+            _bench_rid.reset(token)
+
+    @staticmethod
+    async def _json(send, obj: Any) -> None:
+        body = json.dumps(obj).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def install_probe(probe: BenchProbe) -> None:
+    from app.utils.conversation_file_manager import ConversationFileManager
+    from app.utils.report_registry import ReportRegistry
+    from app.utils.simple_activation_manager import SimpleActivationManager
+
+    probe.wrap(ConversationFileManager, "_with_file_lock", "conversation.locked_write")
+    probe.wrap(ConversationFileManager, "get_conversation_data", "conversation.read")
+    probe.wrap(ReportRegistry, "_load_record", "report.load_record")
+    probe.wrap(ReportRegistry, "_save_record", "report.save_record")
+    probe.wrap(SimpleActivationManager, "_load_all", "activation.load_all")
+    probe.wrap(SimpleActivationManager, "_save_all", "activation.save_all")
+
+
+def serve_backend(args: argparse.Namespace) -> None:
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+
+    import uvicorn
+    from fastapi import Header
+
+    import app.utils.simple_activation_manager as activation_manager_mod
+    from app.api.v1.auth import get_current_user
+    from app.main import app
+
+    simple_root = Path(args.simple_root).resolve()
+    activation_manager_mod.get_simple_base_dir = lambda: simple_root
+
+    def _bench_user(x_bench_user_id: str = Header("bench-user")) -> Dict[str, Any]:
+        uid = x_bench_user_id or "bench-user"
+        return {"user_id": uid, "email": f"{uid}@bench.local"}
+
+    app.dependency_overrides[get_current_user] = _bench_user
+
+    probe = BenchProbe(lag_interval=args.lag_interval_ms / 1000.0)
+    install_probe(probe)
+    config = uvicorn.Config(
+        BenchASGI(app, probe), host=args.host, port=args.port, log_level="warning"
+    )
+    uvicorn.Server(config).run()
+
+
+# ---------------------------------------------------------------------------
+# 编排端：seed / 子进程 / 并发客户端
+# ---------------------------------------------------------------------------
+
+
+def _load_cases_file(path: Path) -> List[Dict[str, Any]]:
+    raw = json.loads(path.read_text(encoding="utf-8") or "{}")
+    if isinstance(raw, dict) and isinstance(raw.get("cases"), list):
+        return [x for x in raw["cases"] if isinstance(x, dict)]
+    if isinstance(raw, list):
+        return [x for x in raw if isinstance(x, dict)]
+    raise ValueError(f"cases 文件格式错误: {path}")
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def seed_virtual_users(
+    cases: List[Dict[str, Any]],
+    *,
+    users: int,
+    run_root: Path,
+) -> List[Dict[str, Any]]:
+    """
+    为每个 (虚拟用户, 用例) 拷贝一份 fixture report，并创建 + 认领激活码。
+    report_id 改写为唯一值，避免并发写同一 report 目录。
+    """
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    from app.utils.simple_activation_manager import SimpleActivationManager
+
+    reports_root = run_root / "reports"
+    reports_root.mkdir(parents=True, exist_ok=True)
+    manager = SimpleActivationManager(base_dir=str(run_root))
+    plans: List[Dict[str, Any]] = []
+    for u in range(users):
+        user = {"user_id": f"bench-user-{u:03d}", "email": f"bench-user-{u:03d}@bench.local"}
+        for idx, case in enumerate(cases):
+            fixture_cfg = case.get("seed_fixture") or {}
+            if not (isinstance(fixture_cfg, dict) and fixture_cfg.get("report_dir")):
+                continue
+            fixture_dir = (PROJECT_ROOT / str(fixture_cfg["report_dir"])).resolve()
+            src_record = json.loads(
+                (fixture_dir / "record.json").read_text(encoding="utf-8") or "{}"
+            )
+            old_id = str(src_record.get("report_id") or "").strip()
+            if not old_id:
+                raise ValueError(f"fixture record.json 缺少 report_id: {fixture_dir}")
+            suffix = f"bench{u:03d}{idx:02d}"
+            new_id = f"{old_id}-{suffix}"
+            old_thread = str(case.get("thread_id") or "")
+            new_thread = f"{old_thread}_{suffix}" if old_thread else ""
+            renames = [(old_id, new_id)] + ([(old_thread, new_thread)] if old_thread else [])
+            dst = reports_root / new_id
+            shutil.copytree(fixture_dir, dst, dirs_exist_ok=True)
+            # thread 会话全局只能绑定一个 report，文件名与内容中的 id 需一并改写
+            for fp in sorted(dst.rglob("*"), key=lambda x: len(x.parts), reverse=True):
+                if fp.is_file() and fp.suffix == ".json":
+                    text = fp.read_text(encoding="utf-8")
+                    replaced = text
+                    for a, b in renames:
+                        replaced = replaced.replace(a, b)
+                    if replaced != text:
+                        fp.write_text(replaced, encoding="utf-8")
+                name = fp.name
+                for a, b in renames:
+                    name = name.replace(a, b)
+                if name != fp.name:
+                    fp.rename(fp.with_name(name))
+
+            rec = manager.create_activation(
+                mode="values", ttl_minutes=int(fixture_cfg.get("ttl_minutes") or 180)
+            )
+            manager.claim_owner(rec.code, user)
+            rec_path = dst / "record.json"
+            rec_data = json.loads(rec_path.read_text(encoding="utf-8") or "{}")
+            rec_data["activation_code"] = rec.code
+            rec_data["user_id"] = user["user_id"]
+            rec_path.write_text(
+                json.dumps(rec_data, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+
+            plans.append(
+                {
+                    "vu": u,
+                    "user_id": user["user_id"],
+                    "case": str(case.get("name") or f"case_{idx}"),
+                    "payload": {
+                        "activation_code": rec.code,
+                        "phase": str(case.get("phase") or "values"),
+                        "thread_id": new_thread,
+                        "message": str(case.get("message") or ""),
+                    },
+                }
+            )
+    return plans
+
+
+def _spawn(cmd: List[str], env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    return subprocess.Popen(cmd, cwd=str(PROJECT_ROOT), env={**os.environ, **(env or {})})
+
+
+async def _wait_http(url: str, timeout: float = 60.0) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                resp = await client.get(url, timeout=2.0)
+                if resp.status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"等待服务就绪超时: {url}")
+
+
+async def _one_request(client: Any, base_url: str, plan: Dict[str, Any]) -> Dict[str, Any]:
+    rid = uuid.uuid4().hex[:16]
+    r: Dict[str, Any] = {"rid": rid, "case": plan["case"], "vu": plan["vu"], "t_send": time.time()}
+    headers = {
+        BENCH_HEADER: rid,
+        BENCH_USER_HEADER: plan["user_id"],
+        "Authorization": "Bearer bench",
+    }
+    gaps: List[float] = []
+    chunks = 0
+    frames = 0
+    frame_bytes = 0
+    try:
+        async with client.stream(
+            "POST",
+            f"{base_url}/api/v1/simple-chat/message/stream",
+            json=plan["payload"],
+            headers=headers,
+        ) as resp:
+            if resp.status_code != 200:
+                body = (await resp.aread()).decode("utf-8", "replace")
+                raise RuntimeError(f"status={resp.status_code} body={body[:200]}")
+            async for line in resp.aiter_lines():
+                now = time.time()
+                r.setdefault("t_first_byte", now)
+                if not line.startswith("data: "):
+                    continue
+                frames += 1
+                frame_bytes += len(line.encode("utf-8")) + 2
+                try:
+                    evt = json.loads(line[6:])
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(evt, dict) and evt.get("error"):
+                    r["error"] = f"stream error: {evt.get('error')}"
+                if isinstance(evt, dict) and evt.get("chunk"):
+                    if "t_last_chunk" in r:
+                        gaps.append((now - r["t_last_chunk"]) * 1000)
+                    r.setdefault("t_first_chunk", now)
+                    r["t_last_chunk"] = now
+                    chunks += 1
+    except Exception as e:
+        r["error"] = f"{type(e).__name__}: {e}"
+    r["t_end"] = time.time()
+    r["chunks"] = chunks
+    r["frames"] = frames
+    r["frame_bytes"] = frame_bytes
+    r["chunk_gaps_ms"] = gaps
+    return r
+
+
+async def run_load(
+    base_url: str, plans: List[Dict[str, Any]], *, rounds: int, timeout: float
+) -> List[Dict[str, Any]]:
+    """每个虚拟用户串行执行自己的用例（重复 rounds 轮），虚拟用户之间并发。"""
+    import httpx
+
+    by_vu: Dict[int, List[Dict[str, Any]]] = {}
+    for p in plans:
+        by_vu.setdefault(p["vu"], []).append(p)
+    results: List[Dict[str, Any]] = []
+    limits = httpx.Limits(max_connections=max(10, len(by_vu) * 2))
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+
+        async def _vu(items: List[Dict[str, Any]]) -> None:
+            for _ in range(max(1, rounds)):
+                for plan in items:
+                    results.append(await _one_request(client, base_url, plan))
+
+        await asyncio.gather(*(_vu(items) for items in by_vu.values()))
+    return results
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    req = report["requests"]
+    print("\n=== REQUESTS ===")
+    print(
+        f"total={req['total']} ok={req['ok']} errors={req['errors']} "
+        f"rps={req['rps']} wall={req['wall_seconds']}s"
+    )
+    for err in req.get("error_samples") or []:
+        print("  error:", err)
+    print("\n=== LATENCY (ms) ===")
+    for name, s in report["latency_ms"].items():
+        if s.get("count"):
+            print(
+                f"{name:<12} p50={s['p50']:<9} p90={s['p90']:<9} p99={s['p99']:<9} max={s['max']}"
+            )
+    print("\n=== PHASES ===")
+    for p in (*PHASES, "background"):
+        s = report["phases"][p]
+        lag = s.get("loop_lag_ms") or {}
+        line = (
+            f"{p:<12} file_io_total={s['file_io_ms_total']}ms ops={sum(s['file_io_ops'].values())}"
+        )
+        if lag.get("count"):
+            line += f" loop_lag p50={lag['p50']} p99={lag['p99']} max={lag['max']}"
+        print(line)
+
+
+async def _orchestrate(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+
+    cases = _load_cases_file((PROJECT_ROOT / args.cases_file).resolve())
+    run_root = (
+        PROJECT_ROOT
+        / "data"
+        / "test"
+        / "simple"
+        / "loadtest_runs"
+        / f"run_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+    )
+    plans = seed_virtual_users(cases, users=args.users, run_root=run_root)
+    if not plans:
+        raise RuntimeError("用例中没有可用的 seed_fixture.report_dir")
+
+    llm_port = args.llm_port or _free_port()
+    backend_port = args.port or _free_port()
+    llm_url = f"http://127.0.0.1:{llm_port}"
+    base_url = f"http://127.0.0.1:{backend_port}"
+    procs: List[subprocess.Popen] = []
+    try:
+        procs.append(
+            _spawn(
+                [
+                    sys.executable,
+                    str(SCRIPTS_DIR / "fake_openai_server.py"),
+                    "--port",
+                    str(llm_port),
+                    "--token-rate",
+                    str(args.token_rate),
+                    "--ttft-ms",
+                    str(args.ttft_ms),
+                    "--jitter-ms",
+                    str(args.jitter_ms),
+                    "--chars-per-token",
+                    str(args.chars_per_token),
+                ]
+            )
+        )
+        await _wait_http(f"{llm_url}/v1/models")
+        procs.append(
+            _spawn(
+                [
+                    sys.executable,
+                    str(Path(__file__).resolve()),
+                    "serve-backend",
+                    "--port",
+                    str(backend_port),
+                    "--simple-root",
+                    str(run_root),
+                    "--lag-interval-ms",
+                    str(args.lag_interval_ms),
+                ],
+                env={
+                    "LLM_VIP1_PROVIDER": "deepseek",
+                    "DEEPSEEK_API_KEY": "bench",
+                    "LLM_BASE_URL": f"{llm_url}/v1",
+                    "LLM_VIP1_MODEL": args.model,
+                },
+            )
+        )
+        await _wait_http(f"{base_url}/health")
+        async with httpx.AsyncClient() as client:
+            await client.post(f"{base_url}/__bench__/reset")
+
+        t0 = time.time()
+        results = await run_load(base_url, plans, rounds=args.rounds, timeout=args.request_timeout)
+        wall = time.time() - t0
+        # 留出 post_stream 后台任务的落盘时间
+        await asyncio.sleep(max(0.0, args.settle_seconds))
+        async with httpx.AsyncClient(timeout=30) as client:
+            probe = (await client.get(f"{base_url}/__bench__/probe")).json()
+    finally:
+        for p in reversed(procs):
+            p.terminate()
+        for p in procs:
+            try:
+                p.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                p.kill()
+        if not args.keep_data:
+            shutil.rmtree(run_root, ignore_errors=True)
+
+    config = {
+        "cases_file": args.cases_file,
+        "users": args.users,
+        "rounds": args.rounds,
+        "token_rate": args.token_rate,
+        "ttft_ms": args.ttft_ms,
+        "jitter_ms": args.jitter_ms,
+        "chars_per_token": args.chars_per_token,
+        "model": args.model,
+    }
+    return build_report(results, probe, wall_seconds=wall, config=config)
+
+
+def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "serve-backend":
+        p = argparse.ArgumentParser(description="Backend with bench probes (internal).")
+        p.add_argument("serve_backend")
+        p.add_argument("--host", default="127.0.0.1")
+        p.add_argument("--port", type=int, required=True)
+        p.add_argument("--simple-root", required=True)
+        p.add_argument("--lag-interval-ms", type=float, default=10.0)
+        serve_backend(p.parse_args())
+        return
+
+    parser = argparse.ArgumentParser(description="Offline load test for simple-chat stream.")
+    parser.add_argument(
+        "--cases-file",
+        default="test/backend/fixtures/simple_chat_cases/batch_basic.json",
+    )
+    parser.add_argument("--users", type=int, default=10, help="并发虚拟用户数")
+    parser.add_argument("--rounds", type=int, default=1, help="每个虚拟用户重复执行用例的轮数")
+    parser.add_argument("--token-rate", type=float, default=50.0)
+    parser.add_argument("--ttft-ms", type=float, default=200.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--chars-per-token", type=int, default=2)
+    parser.add_argument("--model", default="deepseek-chat")
+    parser.add_argument("--port", type=int, default=0, help="后端端口（0=自动）")
+    parser.add_argument("--llm-port", type=int, default=0, help="假 LLM 端口（0=自动）")
+    parser.add_argument("--lag-interval-ms", type=float, default=10.0)
+    parser.add_argument("--request-timeout", type=float, default=120.0)
+    parser.add_argument("--settle-seconds", type=float, default=1.0)
+    parser.add_argument("--keep-data", action="store_true", help="保留 seed 的临时数据目录")
+    parser.add_argument("--output-json", default="")
+    args = parser.parse_args()
+
+    report = asyncio.run(_orchestrate(args))
+    print_report(report)
+    if args.output_json:
+        out_file = (PROJECT_ROOT / args.output_json).resolve()
+        out_file.parent.mkdir(parents=True, exist_ok=True)
+        out_file.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"saved: {out_file}")
+    if report["requests"]["errors"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
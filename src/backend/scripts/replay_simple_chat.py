@@ -226,28 +226,44 @@ def _seed_report_fixture(
 ) -> Dict[str, Any]:
     """
     将 fixture report 拷贝到临时 simple 目录并自动创建激活码绑定。
-    fixture_dir 需要包含 record.json 与若干 {step}__{thread}.json。
+    fixture_dir 需要包含 record.json 与若干 {step}__{thread}.json；
+    也可以是含 manifest.json 的 savepoint 目录（内容寻址存储），此时从 blob 还原。
     """
+    from app.utils.savepoint_store import MANIFEST_NAME, load_manifest, restore_tree
+
     if not fixture_dir.is_dir():
         raise ValueError(f"fixture_dir 不存在: {fixture_dir}")
-    record_file = fixture_dir / "record.json"
-    if not record_file.is_file():
-        raise ValueError(f"fixture 缺少 record.json: {record_file}")
-
-    record = json.loads(record_file.read_text(encoding="utf-8") or "{}")
+    manifest_file = fixture_dir / MANIFEST_NAME
+    if manifest_file.is_file():
+        manifest, store = load_manifest(manifest_file)
+        entry = (manifest.get("files") or {}).get("record.json")
+        if not entry:
+            raise ValueError(f"savepoint manifest 缺少 record.json: {manifest_file}")
+        record = json.loads(store.read(str(entry["sha256"])).decode("utf-8") or "{}")
+    else:
+        record_file = fixture_dir / "record.json"
+        if not record_file.is_file():
+            raise ValueError(f"fixture 缺少 record.json: {record_file}")
+        record = json.loads(record_file.read_text(encoding="utf-8") or "{}")
     report_id = str(record.get("report_id") or "").strip()
     if not report_id:
         raise ValueError("fixture record.json 缺少 report_id")
 
     # 每次 seed 到独立临时目录，避免污染真实 data/simple
-    replay_root = PROJECT_ROOT / "data" / "test" / "simple" / "replay_runs"
+    # 批量并行执行时由调用方通过 SIMPLE_REPLAY_RUNS_ROOT 指定每个场景独立的根目录
+    env_root = (os.environ.get("SIMPLE_REPLAY_RUNS_ROOT") or "").strip()
+    default_root = PROJECT_ROOT / "data" / "test" / "simple" / "replay_runs"
+    replay_root = Path(env_root) if env_root else default_root
     replay_root.mkdir(parents=True, exist_ok=True)
     run_root = replay_root / f"run_{os.getpid()}_{uuid.uuid4().hex[:8]}"
     if run_root.exists():
         shutil.rmtree(run_root, ignore_errors=True)
     reports_root = run_root / "reports"
     reports_root.mkdir(parents=True, exist_ok=True)
-    shutil.copytree(fixture_dir, reports_root / report_id, dirs_exist_ok=True)
+    if manifest_file.is_file():
+        restore_tree(manifest_file, reports_root / report_id)
+    else:
+        shutil.copytree(fixture_dir, reports_root / report_id, dirs_exist_ok=True)
 
     manager = SimpleActivationManager(base_dir=str(run_root))
     rec = manager.create_activation(mode="values", ttl_minutes=ttl_minutes)
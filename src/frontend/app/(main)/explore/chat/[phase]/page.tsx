@@ -112,6 +112,8 @@ import { useComboGuideStream } from '@/lib/explore/useComboGuideStream';
 import { useLocale } from '@/hooks/useLocale';
 import { useAuthStore } from '@/stores/authStore';
 import { createAdminSavepoint, fetchAdminSystemSettings } from '@/lib/api/admin';
+import { waitForPostTurnJob, type PostTurnJob } from '@/lib/api/postTurnJobs';
+import { getSimpleChatHistory } from '@/lib/api/simpleChatHistory';
 
 // Phase metadata (color only; desc/hint come from i18n)
 const PHASE_COLORS: Record<PhaseKey, string> = {
@@ -731,8 +733,10 @@ export default function ChatPhasePage() {
         let lastActivationSessionFromApi: string | undefined;
         const hydrateThreadFromHistory = async (th: ChatThread): Promise<ChatThread> => {
           try {
-            const h = await apiClient.get('/simple-chat/history', {
-              params: { activation_code: activationCode, phase: BACKEND_PHASE[phase], thread_id: th.id },
+            const h = await getSimpleChatHistory({
+              activation_code: activationCode,
+              phase: BACKEND_PHASE[phase],
+              thread_id: th.id,
             });
             const history: any[] = h.data.messages ?? [];
             const meta = h.data?.metadata ?? {};
@@ -1740,6 +1744,28 @@ export default function ChatPhasePage() {
     const controller = new AbortController();
     abortControllerRef.current = controller;
     let assistantHasVisibleOutput = false;
+    const postTurnJobIds: string[] = [];
+    const appendConclusionCard = (concl: DimensionConclusionData) => {
+      setConclusionLoading(false);
+      setWaitingForConclusionCardUi(false);
+      const conclMsg: ThreadMessage = {
+        id: `concl_${Date.now()}`,
+        role: 'assistant',
+        content: '',
+        type: 'dimension_conclusion',
+        conclusionData: concl,
+        conclusionCollapsed: false,
+        conclusionConfirmed: false,
+        conclusionLocked: false,
+        createdAt: Date.now(),
+      };
+      setMessages((prev) => {
+        const frozenHistory = prev.map((m) =>
+          m.type === 'dimension_conclusion' ? { ...m, conclusionLocked: true } : m
+        );
+        return [...frozenHistory, conclMsg];
+      });
+    };
     try {
       const apiBase = (process.env.NEXT_PUBLIC_API_URL || '').trim();
       const streamUrl = `${apiBase ? apiBase.replace(/\/+$/, '') : ''}/api/v1/simple-chat/message/stream`;
@@ -1881,26 +1907,17 @@ export default function ChatPhasePage() {
             }
             if (payload.dimension_conclusion) {
               assistantHasVisibleOutput = true;
-              setConclusionLoading(false);
-              setWaitingForConclusionCardUi(false);
-              const concl = payload.dimension_conclusion as DimensionConclusionData;
-              const conclMsg: ThreadMessage = {
-                id: `concl_${Date.now()}`,
-                role: 'assistant',
-                content: '',
-                type: 'dimension_conclusion',
-                conclusionData: concl,
-                conclusionCollapsed: false,
-                conclusionConfirmed: false,
-                conclusionLocked: false,
-                createdAt: Date.now(),
-              };
-              setMessages((prev) => {
-                const frozenHistory = prev.map((m) =>
-                  m.type === 'dimension_conclusion' ? { ...m, conclusionLocked: true } : m
-                );
-                return [...frozenHistory, conclMsg];
-              });
+              appendConclusionCard(payload.dimension_conclusion as DimensionConclusionData);
+            }
+            if (payload.post_turn_job?.job_id) {
+              // 结论卡精炼转入后台任务：流结束后按 job_id 轮询
+              const job = payload.post_turn_job as PostTurnJob;
+              if (job.status === 'done' && job.result?.dimension_conclusion) {
+                assistantHasVisibleOutput = true;
+                appendConclusionCard(job.result.dimension_conclusion as unknown as DimensionConclusionData);
+              } else if (!job.finished) {
+                postTurnJobIds.push(job.job_id);
+              }
             }
             if (payload.table_widget) {
               assistantHasVisibleOutput = true;
@@ -1995,9 +2012,28 @@ export default function ChatPhasePage() {
       if (err?.name !== 'AbortError') setChatError(err?.message || '发送失败，请重试');
     } finally {
       setSending(false);
-      setConclusionLoading(false);
       setPostLlmTailActive(false);
-      setWaitingForConclusionCardUi(false);
+      const threadAtSend = activeThreadIdRef.current;
+      if (postTurnJobIds.length && activationCode && !controller.signal.aborted) {
+        // 结论卡仍在后台生成：保留 loading，轮询结束后再落卡
+        void (async () => {
+          try {
+            for (const jobId of postTurnJobIds) {
+              const job = await waitForPostTurnJob(activationCode, jobId);
+              const concl = job?.status === 'done' ? job.result?.dimension_conclusion : null;
+              if (concl && activeThreadIdRef.current === threadAtSend) {
+                appendConclusionCard(concl as unknown as DimensionConclusionData);
+              }
+            }
+          } finally {
+            setConclusionLoading(false);
+            setWaitingForConclusionCardUi(false);
+          }
+        })();
+      } else {
+        setConclusionLoading(false);
+        setWaitingForConclusionCardUi(false);
+      }
       setMessages((prev) => {
         const normalized = prev.map((m) =>
           m.id === assistantId && m.thinkStreaming
@@ -0,0 +1,56 @@
+/**
+ * simple-chat 轮次后置任务（结论卡精炼等）API
+ * message/stream 结束前下发 post_turn_job 事件，前端据 job_id 轮询结果
+ */
+
+import { apiClient, ApiResponse } from './client';
+
+export type PostTurnJobStatus = 'queued' | 'running' | 'done' | 'failed';
+
+export interface PostTurnJobResult {
+  dimension_conclusion?: Record<string, unknown> | null;
+  stale?: boolean;
+  [key: string]: unknown;
+}
+
+export interface PostTurnJob {
+  job_id: string;
+  kind: string;
+  status: PostTurnJobStatus;
+  finished: boolean;
+  attempts?: number;
+  result?: PostTurnJobResult | null;
+}
+
+export const postTurnJobsApi = {
+  get: async (activationCode: string, jobId: string): Promise<ApiResponse<PostTurnJob>> => {
+    return apiClient.get(`/simple-chat/post-turn/jobs/${encodeURIComponent(jobId)}`, {
+      params: { activation_code: activationCode },
+    });
+  },
+};
+
+/**
+ * 轮询直至任务结束（done / failed）；超时或被 abort 返回 null。
+ * 间隔从 intervalMs 起按 1.5 倍递增，上限 4s。
+ */
+export async function waitForPostTurnJob(
+  activationCode: string,
+  jobId: string,
+  opts: { intervalMs?: number; timeoutMs?: number; signal?: AbortSignal } = {}
+): Promise<PostTurnJob | null> {
+  const deadline = Date.now() + (opts.timeoutMs ?? 90_000);
+  let interval = opts.intervalMs ?? 600;
+  while (Date.now() < deadline) {
+    if (opts.signal?.aborted) return null;
+    try {
+      const res = await postTurnJobsApi.get(activationCode, jobId);
+      if (res.code === 200 && res.data?.finished) return res.data;
+    } catch {
+      // 网络抖动：继续轮询直至超时
+    }
+    await new Promise((r) => setTimeout(r, interval));
+    interval = Math.min(4000, Math.round(interval * 1.5));
+  }
+  return null;
+}
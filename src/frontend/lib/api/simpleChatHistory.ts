@@ -0,0 +1,49 @@
+/**
+ * /simple-chat/history 条件请求：按 (激活码, 阶段, 线程, 分页参数) 缓存上次响应与 ETag，
+ * 切换线程 / 断线重连时带 If-None-Match，后端未变化返回 304 直接复用缓存。
+ */
+
+import { apiClient, ApiResponse } from './client';
+
+export interface SimpleChatHistoryParams {
+  activation_code: string;
+  phase: string;
+  thread_id?: string;
+  before?: string;
+  after?: string;
+  limit?: number;
+}
+
+const MAX_ENTRIES = 50;
+const cache = new Map<string, { etag: string; body: ApiResponse<any> }>();
+
+function cacheKey(p: SimpleChatHistoryParams): string {
+  return JSON.stringify([p.activation_code, p.phase, p.thread_id ?? '', p.before ?? '', p.after ?? '', p.limit ?? 0]);
+}
+
+export async function getSimpleChatHistory(params: SimpleChatHistoryParams): Promise<ApiResponse<any>> {
+  const key = cacheKey(params);
+  const hit = cache.get(key);
+  const res = await apiClient.raw.get('/simple-chat/history', {
+    params,
+    headers: hit ? { 'If-None-Match': hit.etag } : undefined,
+    validateStatus: (s) => (s >= 200 && s < 300) || s === 304,
+  });
+  if (res.status === 304 && hit) {
+    // 刷新 LRU 顺序
+    cache.delete(key);
+    cache.set(key, hit);
+    return hit.body;
+  }
+  const etag = res.headers?.etag as string | undefined;
+  if (etag) {
+    cache.delete(key);
+    cache.set(key, { etag, body: res.data });
+    while (cache.size > MAX_ENTRIES) {
+      const oldest = cache.keys().next().value;
+      if (oldest === undefined) break;
+      cache.delete(oldest);
+    }
+  }
+  return res.data;
+}
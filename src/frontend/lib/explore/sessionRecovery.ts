@@ -8,6 +8,7 @@
  */
 
 import { apiClient } from '@/lib/api/client';
+import { getSimpleChatHistory } from '@/lib/api/simpleChatHistory';
 import {
   loadSession,
   saveSession,
@@ -113,12 +114,10 @@ async function fetchBackendHistory(
   phase: string,
   threadId: string
 ) {
-  const res = await apiClient.get('/simple-chat/history', {
-    params: {
-      activation_code: activationCode,
-      phase: BACKEND_PHASE[phase],
-      thread_id: threadId,
-    },
+  const res = await getSimpleChatHistory({
+    activation_code: activationCode,
+    phase: BACKEND_PHASE[phase],
+    thread_id: threadId,
   });
   const messages = (res.data?.messages ?? []) as BackendMessage[];
   const meta = res.data?.metadata ?? {};
@@ -0,0 +1,99 @@
+"""
+进程级知识库快照测试
+"""
+
+import csv
+
+import pytest
+
+from app.core.knowledge.search import KnowledgeSearcher
+from app.core.knowledge.snapshot import KnowledgeStore, SnapshotLoader, set_knowledge_store
+from app.domain.knowledge_config import get_knowledge_config
+from app.services.question_service import QuestionService
+
+QUESTIONS_MD = """# 题库
+
+## 价值观（重要的事）
+1. 什么让你感到骄傲？⭐
+2. 你最看重什么？
+
+## 才能（擅长的事）
+1. 别人常夸你什么？⭐
+"""
+
+
+def _write_csv(path, header, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def knowledge_dir(tmp_path):
+    _write_csv(
+        tmp_path / "重要的事_价值观.csv", ["序号", "价值观", "定义"], [["1", "成长", "不断进步"]]
+    )
+    _write_csv(tmp_path / "喜欢的事_热情.csv", ["序号", "领域"], [["1", "阅读书籍"]])
+    _write_csv(
+        tmp_path / "擅长的事_才能.csv",
+        ["序号", "才能", "成为长处", "成为短处"],
+        [["1", "沟通表达", "善于交流", "不够细致"]],
+    )
+    (tmp_path / "question.md").write_text(QUESTIONS_MD, encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def store(knowledge_dir):
+    store = KnowledgeStore(config=get_knowledge_config(base_dir=knowledge_dir), check_interval=0)
+    set_knowledge_store(store)
+    yield store
+    set_knowledge_store(None)
+
+
+def test_snapshot_prebuilds_question_indexes(store):
+    snap = store.get()
+    assert [q.content for q in snap.questions_in("values")] == [
+        "什么让你感到骄傲？",
+        "你最看重什么？",
+    ]
+    assert [q.id for q in snap.starred_in("strengths")] == [3]
+    assert snap.question_by_id[2].category == "values"
+    assert snap.questions_in("purpose") == ()
+
+
+def test_unchanged_sources_keep_same_snapshot(store):
+    first = store.get()
+    assert store.get() is first
+    assert store.reloads == 1
+
+
+def test_changed_source_swaps_snapshot(store, knowledge_dir):
+    old = store.get()
+    (knowledge_dir / "question.md").write_text(
+        QUESTIONS_MD + "2. 你做什么事最投入？\n", encoding="utf-8"
+    )
+
+    new = store.get()
+    assert new is not old
+    assert len(new.questions_in("strengths")) == 2
+    # 旧快照对仍持有它的读者保持不变
+    assert len(old.questions_in("strengths")) == 1
+
+
+def test_watched_store_does_not_stat_on_access(store, knowledge_dir):
+    first = store.get()
+    store.watched = True
+    (knowledge_dir / "question.md").write_text("", encoding="utf-8")
+    assert store.get() is first
+
+
+def test_services_share_snapshot(store):
+    service = QuestionService()
+    assert service.get_question_by_id(1)["is_starred"] is True
+    assert [q["id"] for q in service.get_guide_questions("values_exploration")] == [1]
+
+    searcher = KnowledgeSearcher(loader=SnapshotLoader())
+    assert searcher.search_strengths("沟通表达")[0]["item"].name == "沟通表达"
+    assert store.reloads == 1
@@ -0,0 +1,147 @@
+"""
+跨 provider 对冲 / 故障转移 / 熔断测试
+"""
+
+import asyncio
+
+import pytest
+
+from app.config.settings import settings
+from app.core.llmapi import hedging
+from app.core.llmapi.base import BaseLLMProvider, LLMError, LLMResponse
+
+
+class _Provider(BaseLLMProvider):
+    limit_concurrency = False
+
+    def __init__(self, name, delay=0.0, fail=False):
+        super().__init__(name)
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.closed = False
+        self._last_stream_usage = None
+
+    async def chat(self, messages, temperature=0.7, max_tokens=None, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise LLMError(f"{self.model} down")
+        return LLMResponse(content=self.model, model=self.model)
+
+    async def chat_stream(self, messages, temperature=0.7, max_tokens=None, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise LLMError(f"{self.model} down")
+            for piece in (self.model, "-done"):
+                yield piece
+            self._last_stream_usage = {"total_tokens": 3}
+        finally:
+            self.closed = True
+
+    async def count_tokens(self, text):
+        return len(text)
+
+    async def estimate_cost(self, messages, response_tokens=None):
+        return {}
+
+
+@pytest.fixture(autouse=True)
+def _fast_hedge(monkeypatch):
+    hedging.reset_provider_health()
+    monkeypatch.setattr(settings, "LLM_HEDGE_DEFAULT_DELAY_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_DELAY_SECONDS", 0.01)
+    monkeypatch.setattr(settings, "LLM_CIRCUIT_FAILURE_THRESHOLD", 2)
+    yield
+    hedging.reset_provider_health()
+
+
+def test_slow_primary_stream_is_hedged_and_loser_cancelled():
+    primary, backup = _Provider("primary", delay=1.0), _Provider("backup")
+    router = hedging.HedgedLLMProvider(primary, [backup])
+
+    async def run():
+        return [c async for c in router.chat_stream([])]
+
+    assert asyncio.run(run()) == ["backup", "-done"]
+    assert primary.closed and router._last_stream_usage == {"total_tokens": 3}
+    m = hedging.llm_routing_metrics()
+    p = m[next(k for k in m if k.endswith("#primary"))]
+    b = m[next(k for k in m if k.endswith("#backup"))]
+    assert p["hedges_fired"] == 1 and p["abandoned"] == 1 and p["wins"] == 0
+    assert b["wins"] == 1 and b["latency"]["stream"]["samples"] == 1
+
+
+def test_failover_and_circuit_breaker_skip_unhealthy_primary():
+    primary, backup = _Provider("primary", fail=True), _Provider("backup")
+    router = hedging.HedgedLLMProvider(primary, [backup])
+
+    for _ in range(2):
+        assert asyncio.run(router.chat([])).content == "backup"
+    assert primary.calls == 2
+    # 连续失败达阈值：熔断期间不再请求主 provider
+    assert asyncio.run(router.chat([])).content == "backup"
+    assert primary.calls == 2
+
+    dead = hedging.HedgedLLMProvider(_Provider("a", fail=True), [_Provider("b", fail=True)])
+    with pytest.raises(LLMError):
+        asyncio.run(dead.chat([]))
+
+
+def test_histogram_percentile_and_breaker_half_open():
+    h = hedging.LatencyHistogram(max_samples=100)
+    for s in [0.15] * 90 + [5.0] * 10:
+        h.observe(s)
+    assert h.percentile(0.5) == 0.2 and h.percentile(0.95) == 6.0
+    h.observe(0.15)  # 超过 max_samples：整体减半
+    assert h.count <= 100
+
+    br = hedging.CircuitBreaker(failure_threshold=1, cooldown_seconds=0)
+    br.record_failure()
+    assert br.state == "open" and br.available()
+    br.begin()
+    assert br.state == "half_open" and not br.available()
+    br.record_success()
+    assert br.state == "closed"
+
+
+def test_fallback_models_follow_primary_role(monkeypatch):
+    from app.core.llmapi import factory
+
+    monkeypatch.setattr(settings, "LLM_HEDGE_PROVIDERS", "deepseek,kimi")
+    monkeypatch.setattr(settings, "LLM_VIP1_MODEL", "deepseek-reasoner")
+    monkeypatch.setattr(settings, "DEEPSEEK_API_KEY", "k1")
+    monkeypatch.setattr(settings, "KIMI_MODEL", "moonshot-v1-8k")
+    monkeypatch.setattr(settings, "KIMI_API_KEY", "k2")
+
+    dialog = factory._hedge_fallback_configs(1, "openai", factory.HEDGE_ROLE_DIALOG)
+    assert [(name, model) for name, model, _, _ in dialog] == [
+        ("deepseek", "deepseek-chat"),
+        ("kimi", "moonshot-v1-8k"),
+    ]
+    monkeypatch.setattr(settings, "LLM_VIP1_MODEL", "deepseek-chat")
+    reasoning = factory._hedge_fallback_configs(1, "kimi", factory.HEDGE_ROLE_REASONING)
+    assert [(name, model) for name, model, _, _ in reasoning] == [("deepseek", "deepseek-reasoner")]
+    # 未指定角色：沿用各 provider 的默认模型
+    assert factory._hedge_fallback_configs(1, "kimi")[0][1] == "deepseek-chat"
+
+
+def test_consistently_slow_primary_records_censored_samples(monkeypatch):
+    """主 provider 每次都被对冲取消：按取消时已等待的时长记样本，阈值不会只由快样本决定。"""
+    monkeypatch.setattr(settings, "LLM_HEDGE_MIN_SAMPLES", 5)
+    primary, backup = _Provider("primary", delay=0.5), _Provider("backup")
+    router = hedging.HedgedLLMProvider(primary, [backup])
+
+    for _ in range(6):
+        assert asyncio.run(router.chat([])).content == "backup"
+    health = hedging.get_provider_health(primary)
+    assert health.stats["censored"] == 6 and health.latency["chat"].count == 6
+    # 每个样本至少是默认阈值 0.05s，分位落在其后的桶
+    assert health.latency["chat"].percentile(0.95) > 0.05
+    assert hedging.hedge_delay(health, "chat") > 0.05
+
+    h = hedging.LatencyHistogram()
+    h.observe_censored(0.2)
+    assert h.percentile(0.5) == 0.3
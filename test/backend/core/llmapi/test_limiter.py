@@ -0,0 +1,120 @@
+"""
+LLM 优先级自适应并发限制测试
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.llmapi import limiter as lim
+from app.core.llmapi.base import BaseLLMProvider, LLMError, LLMResponse
+
+
+def test_higher_priority_waiters_are_served_first():
+    limiter = lim.AdaptiveLimiter("t", min_limit=1, max_limit=2, initial_limit=2)
+
+    async def run():
+        held = [await limiter.acquire(lim.PRIORITY_INTERACTIVE) for _ in range(2)]
+        order = []
+
+        async def wait(priority, tag):
+            permit = await limiter.acquire(priority)
+            order.append(tag)
+            return permit
+
+        bg = asyncio.create_task(wait(lim.PRIORITY_BACKGROUND, "background"))
+        await asyncio.sleep(0)
+        fg = asyncio.create_task(wait(lim.PRIORITY_INTERACTIVE, "interactive"))
+        await asyncio.sleep(0)
+
+        limiter.release(held[0], lim.OUTCOME_ERROR)
+        await asyncio.sleep(0.01)
+        # background 份额为 int(2*0.5)=1，名额被交互流占满时继续排队
+        assert order == ["interactive"]
+        limiter.release(held[1], lim.OUTCOME_ERROR)
+        limiter.release(await fg, lim.OUTCOME_ERROR)
+        limiter.release(await bg, lim.OUTCOME_ERROR)
+        return order
+
+    assert asyncio.run(run()) == ["interactive", "background"]
+    snap = limiter.snapshot()
+    assert snap["in_flight"] == 0 and snap["wait"]["background"]["count"] == 1
+    assert snap["wait"]["background"]["max_ms"] > 0
+
+
+def test_aimd_decreases_on_throttle_and_latency_and_grows_when_saturated():
+    limiter = lim.AdaptiveLimiter(
+        "t", min_limit=1, max_limit=10, initial_limit=4, cooldown_seconds=60
+    )
+
+    async def one(outcome, latency=None):
+        permit = await limiter.acquire(lim.PRIORITY_JUDGE)
+        limiter.release(permit, outcome, latency=latency)
+
+    asyncio.run(one(lim.OUTCOME_THROTTLED))
+    assert limiter.limit == pytest.approx(2.8)
+    asyncio.run(one(lim.OUTCOME_TIMEOUT))  # 冷却期内不重复下调
+    assert limiter.limit == pytest.approx(2.8)
+
+    limiter._last_decrease = -1e9
+    asyncio.run(one(lim.OUTCOME_OK, latency=1.0))  # 建立基线，未用满不增长
+    assert limiter.limit == pytest.approx(2.8)
+    asyncio.run(one(lim.OUTCOME_OK, latency=5.0))
+    assert limiter.limit == pytest.approx(2.52)
+
+    async def saturated():
+        permits = [await limiter.acquire(lim.PRIORITY_INTERACTIVE) for _ in range(2)]
+        limiter.release(permits[0], lim.OUTCOME_OK, latency=1.0)
+        limiter.release(permits[1], lim.OUTCOME_OK, latency=1.0)
+
+    asyncio.run(saturated())
+    snap = limiter.snapshot()
+    assert limiter.limit > 2.52 and snap["increases"] == 1
+    assert snap["decreases"] == {"throttled": 1, "timeout": 0, "latency": 1}
+
+
+class _FakeProvider(BaseLLMProvider):
+    def __init__(self, error=None):
+        super().__init__("fake-model")
+        self.error = error
+
+    async def chat(self, messages, temperature=0.7, max_tokens=None, **kwargs):
+        if self.error:
+            try:
+                raise self.error
+            except Exception as e:
+                raise LLMError(f"调用失败: {e}")
+        return LLMResponse(content="ok", model=self.model)
+
+    async def chat_stream(self, messages, temperature=0.7, max_tokens=None, **kwargs):
+        yield "a"
+        yield "b"
+
+    async def count_tokens(self, text):
+        return len(text)
+
+    async def estimate_cost(self, messages, response_tokens=None):
+        return {}
+
+
+def test_provider_methods_are_wrapped_and_classify_errors():
+    lim.reset_llm_limiters()
+    ok = _FakeProvider()
+
+    async def run():
+        with lim.llm_priority(lim.PRIORITY_BACKGROUND):
+            await ok.chat([])
+        return [c async for c in ok.chat_stream([])]
+
+    assert asyncio.run(run()) == ["a", "b"]
+    snap = lim.llm_limiter_metrics()["_FakeProvider"]
+    assert snap["wait"]["background"]["count"] == 1
+    assert snap["wait"]["interactive"]["count"] == 1
+    assert snap["outcomes"]["ok"] == 2 and snap["in_flight"] == 0
+
+    throttled = _FakeProvider(error=RuntimeError("Error code: 429 - rate limit reached"))
+    with pytest.raises(LLMError):
+        asyncio.run(throttled.chat([]))
+    assert lim.llm_limiter_metrics()["_FakeProvider"]["decreases"]["throttled"] == 1
+    assert lim.classify_error(LLMError("Request timed out.")) == lim.OUTCOME_TIMEOUT
+    lim.reset_llm_limiters()
@@ -0,0 +1,130 @@
+"""
+TTS 内容哈希缓存 + 流式合成接口测试
+"""
+
+import base64
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1.auth import get_current_user
+from app.config.audio_config import AudioConfig
+from app.core import tts as tts_pkg
+from app.core.tts.cache import TTSCache, aiter_file_chunks, set_tts_cache, tts_cache_key
+from app.core.tts.fake_tts_provider import FakeTTSProvider
+from app.main import app
+
+
+def test_cache_key_covers_all_synthesis_params():
+    base = dict(voice="alloy", model="tts-1", fmt="mp3", speed=1.0)
+    key = tts_cache_key("你好", **base)
+    assert key == tts_cache_key("你好", **base)
+    assert key != tts_cache_key("你好！", **base)
+    for field, value in (("voice", "nova"), ("model", "tts-1-hd"), ("fmt", "wav"), ("speed", 1.25)):
+        assert key != tts_cache_key("你好", **{**base, field: value})
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = TTSCache(tmp_path, max_bytes=250)
+    cache.put("aa01", "mp3", b"a" * 100)
+    cache.put("bb02", "mp3", b"b" * 100)
+    # 让 aa01 成为最近使用
+    os.utime(cache._path("bb02", "mp3"), (1, 1))
+    assert cache.get("aa01", "mp3") is not None
+    cache.put("cc03", "mp3", b"c" * 100)
+
+    assert cache.get("bb02", "mp3") is None
+    assert cache.get("aa01", "mp3").read_bytes() == b"a" * 100
+    assert cache.get("cc03", "mp3") is not None
+    assert cache.stats["evictions"] == 1
+
+
+def test_metadata_stored_with_entry_and_evicted_together(tmp_path):
+    cache = TTSCache(tmp_path, max_bytes=150)
+    cache.put("ee05", "wav", b"e" * 100, {"duration": 1.5})
+    assert cache.read("ee05", "wav") == (b"e" * 100, {"duration": 1.5})
+    cache.put("ff06", "wav", b"f" * 100)
+    assert cache.read("ff06", "wav") == (b"f" * 100, {})
+    assert cache.read("ee05", "wav") is None
+    assert [p.name for p in tmp_path.rglob("*") if p.is_file()] == ["ff06.wav"]
+
+
+@pytest.mark.asyncio
+async def test_aiter_file_chunks(tmp_path):
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"x" * 2500)
+    assert [len(c) async for c in aiter_file_chunks(path, 1000)] == [1000, 1000, 500]
+
+
+def test_discarded_writer_leaves_no_entry(tmp_path):
+    cache = TTSCache(tmp_path, max_bytes=1024)
+    writer = cache.open_writer("dd04", "wav")
+    writer.write(b"partial")
+    writer.discard()
+    assert cache.get("dd04", "wav") is None
+    assert not any(p.is_file() for p in tmp_path.rglob("*"))
+
+
+@pytest.mark.asyncio
+async def test_fake_provider_stream_matches_full_synthesis():
+    provider = FakeTTSProvider()
+    full = (await provider.synthesize("流式合成", voice="alloy")).audio_data
+    chunks = [
+        c async for c in provider.synthesize_stream("流式合成", voice="alloy", chunk_size=1000)
+    ]
+    assert b"".join(chunks) == full
+    assert full[:4] == b"RIFF" and len(chunks) > 1
+
+
+@pytest.fixture
+def audio_client(tmp_path, monkeypatch):
+    provider = FakeTTSProvider()
+    monkeypatch.setattr(AudioConfig, "AUDIO_MODE", True)
+    monkeypatch.setattr(tts_pkg, "get_default_tts_provider", lambda: provider)
+    set_tts_cache(TTSCache(tmp_path, max_bytes=10 * 1024 * 1024))
+    app.dependency_overrides[get_current_user] = lambda: {"user_id": "u1"}
+    try:
+        yield TestClient(app), provider
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+        set_tts_cache(None)
+
+
+def test_synthesize_endpoint_serves_repeat_from_cache(audio_client):
+    client, provider = audio_client
+    body = {"text": "欢迎回来", "voice": "alloy"}
+    first = client.post("/api/v1/audio/synthesize", json=body)
+    second = client.post("/api/v1/audio/synthesize", json=body)
+
+    assert first.status_code == 200 and second.status_code == 200
+    assert provider.calls == 1
+    assert first.json()["data"]["audio_data"] == second.json()["data"]["audio_data"]
+    assert second.json()["data"]["format"] == "wav"
+    assert first.json()["data"]["duration"] > 0
+    assert second.json()["data"]["duration"] == first.json()["data"]["duration"]
+
+
+def test_stream_endpoint_fills_cache_then_replays(audio_client):
+    client, provider = audio_client
+    body = {"text": "第一步：写下触发情境", "voice": "nova"}
+    miss = client.post("/api/v1/audio/synthesize/stream", json=body)
+    hit = client.post("/api/v1/audio/synthesize/stream", json=body)
+
+    assert miss.status_code == 200 and miss.headers["content-type"] == "audio/wav"
+    assert miss.headers["x-tts-cache"] == "miss"
+    assert hit.headers["x-tts-cache"] == "hit"
+    assert hit.content == miss.content
+    assert provider.calls == 1
+
+    # 流式写入的缓存也供非流式接口复用
+    full = client.post("/api/v1/audio/synthesize", json=body).json()["data"]["audio_data"]
+    assert base64.b64decode(full) == miss.content
+    assert provider.calls == 1
+
+
+def test_stream_endpoint_rejects_unsupported_format(audio_client):
+    client, provider = audio_client
+    resp = client.post("/api/v1/audio/synthesize/stream", json={"text": "hi", "format": "mp3"})
+    assert resp.status_code == 500
+    assert provider.calls == 0
@@ -0,0 +1,95 @@
+"""激活码归属索引：写入增量维护、外部改文件后重建、查询不重新解析 activations.json"""
+
+import json
+
+import pytest
+
+from app.utils import simple_activation_manager as sam
+from app.utils.simple_activation_manager import SimpleActivationManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    sam._indexes.pop(str(tmp_path / "activations.json"), None)
+    yield SimpleActivationManager(base_dir=str(tmp_path))
+    sam._indexes.pop(str(tmp_path / "activations.json"), None)
+
+
+def _codes(result, key):
+    return [r.code for r in result.get(key, [])]
+
+
+def test_claim_and_status_changes_reflected(manager):
+    a = manager.create_activation(mode="full")
+    b = manager.create_activation(mode="full")
+    manager.claim_owner(a.code, {"user_id": "u1", "email": "u1@example.com"})
+    manager.claim_owner(b.code, {"user_id": "u1", "email": "u1@example.com"})
+
+    owned = manager.activations_by_owner(["u1", "u2"], ["u1@example.com"])
+    assert sorted(_codes(owned, "u1")) == sorted([a.code, b.code])
+    assert owned["u2"] == []
+    assert len(owned["u1@example.com"]) == 2
+
+    manager.update_status([a.code], "revoked")
+    statuses = {r.code: r.status for r in manager.activations_by_owner(["u1"])["u1"]}
+    assert statuses[a.code] == "revoked"
+
+    manager.soft_delete_to_recycle_bin([b.code])
+    statuses = {r.code: r.status for r in manager.activations_by_owner(["u1"])["u1"]}
+    assert statuses[b.code] == "deleted"
+    assert manager.get_activation(b.code).status == "deleted"
+
+
+def test_returned_records_are_copies(manager):
+    a = manager.create_activation(mode="full")
+    manager.claim_owner(a.code, {"user_id": "u1"})
+    manager.activations_by_owner(["u1"])["u1"][0].status = "revoked"
+    manager.get_activation(a.code).owner_user_id = "someone-else"
+    manager.list_activations()[a.code].mode = "other"
+
+    rec = manager.activations_by_owner(["u1"])["u1"][0]
+    assert (rec.status, rec.owner_user_id, rec.mode) == ("active", "u1", "full")
+
+
+def test_lookups_do_not_reparse_file(manager, monkeypatch):
+    a = manager.create_activation(mode="full")
+    manager.claim_owner(a.code, {"user_id": "u1"})
+    manager.activations_by_owner(["u1"])
+    idx = sam._index_for(manager._activations_file)
+    rebuilds = idx.rebuilds
+
+    def _no_io(*args, **kwargs):
+        raise AssertionError("lookup should not parse activations.json")
+
+    monkeypatch.setattr(SimpleActivationManager, "_load_all", _no_io)
+    for _ in range(50):
+        assert _codes(manager.activations_by_owner(["u1"]), "u1") == [a.code]
+        assert manager.get_activation(a.code.lower()) is not None
+    assert idx.rebuilds == rebuilds
+
+
+def test_out_of_process_rewrite_triggers_rebuild(manager):
+    a = manager.create_activation(mode="full")
+    manager.claim_owner(a.code, {"user_id": "u1"})
+    assert _codes(manager.activations_by_owner(["u1"]), "u1") == [a.code]
+
+    path = manager._activations_file
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    raw[a.code]["owner_user_id"] = "u2"
+    path.write_text(json.dumps(raw, ensure_ascii=False, indent=4), encoding="utf-8")
+
+    owned = manager.activations_by_owner(["u1", "u2"])
+    assert owned["u1"] == [] and _codes(owned, "u2") == [a.code]
+
+
+def test_user_id_equal_to_email_merges_both_tables(manager):
+    """历史用户以邮箱作 user_id：按 user_id 与按 email 归属的激活码都要返回。"""
+    legacy = "old@example.com"
+    by_uid = manager.create_activation(mode="full")
+    by_email = manager.create_activation(mode="full")
+    manager.claim_owner(by_uid.code, {"user_id": legacy})
+    manager.claim_owner(by_email.code, {"user_id": "u9", "email": legacy})
+
+    owned = manager.activations_by_owner([legacy], [legacy])
+    assert sorted(_codes(owned, legacy)) == sorted([by_uid.code, by_email.code])
+    assert _codes(manager.activations_by_owner([legacy]), legacy) == [by_uid.code]
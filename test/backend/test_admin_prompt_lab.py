@@ -0,0 +1,91 @@
+"""Prompt Lab 覆盖配置解析：内存索引在写入 / 外部改文件后刷新，未绑定激活码不读文件"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils import admin_prompt_lab as lab
+from app.utils.data_paths import data_root_override, get_project_root, get_shared_data_dir
+
+
+@pytest.fixture
+def lab_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(lab, "_lab_dir", lambda: tmp_path)
+    monkeypatch.setattr(lab, "_override_index", lab._OverrideIndex())
+    return tmp_path
+
+
+def _profile_with_version(template: str = "模板 A", hint: str = "") -> dict:
+    profile = lab.create_profile("实验配置")
+    lab.add_profile_version(
+        profile["profile_id"], simple_chat_system_prompt_template=template, extra_goal_hint=hint
+    )
+    return profile
+
+
+def test_resolve_follows_bind_and_version_writes(lab_dir):
+    profile = _profile_with_version("模板 A", "多追问")
+    assert lab.resolve_simple_chat_prompt_override("ADM001") is None
+
+    lab.bind_profile_to_activation("adm001", profile["profile_id"])
+    template, extra, meta = lab.resolve_simple_chat_prompt_override("ADM001")
+    assert (template, extra, meta["profile_name"]) == ("模板 A", "多追问", "实验配置")
+    first_vid = meta["version_id"]
+
+    lab.add_profile_version(profile["profile_id"], simple_chat_system_prompt_template="模板 B")
+    template, _, meta = lab.resolve_simple_chat_prompt_override("ADM001")
+    assert template == "模板 B" and meta["version_id"] != first_vid
+
+    lab.set_current_version(profile["profile_id"], first_vid)
+    assert lab.resolve_simple_chat_prompt_override("adm001")[0] == "模板 A"
+
+
+def test_repeated_lookups_do_not_rebuild(lab_dir, monkeypatch):
+    profile = _profile_with_version()
+    lab.bind_profile_to_activation("ADM002", profile["profile_id"])
+    lab.resolve_simple_chat_prompt_override("ADM002")
+    builds = lab._override_index.builds
+
+    def _no_io(*args, **kwargs):
+        raise AssertionError("lookup should not read files")
+
+    monkeypatch.setattr(lab, "_load_json", _no_io)
+    for _ in range(100):
+        assert lab.resolve_simple_chat_prompt_override("SBX999") is None
+        assert lab.resolve_simple_chat_prompt_override("ADM002") is not None
+    assert lab._override_index.builds == builds
+
+
+def test_out_of_process_edit_detected_by_signature(lab_dir, monkeypatch):
+    profile = _profile_with_version()
+    lab.bind_profile_to_activation("ADM003", profile["profile_id"])
+    assert lab.resolve_simple_chat_prompt_override("ADM003") is not None
+
+    # 另一进程直接改写绑定文件
+    (lab_dir / "activation_bindings.json").write_text(json.dumps({"items": []}), encoding="utf-8")
+    monkeypatch.setattr(lab._OverrideIndex, "_STAT_INTERVAL", 0.0)
+    assert lab.resolve_simple_chat_prompt_override("ADM003") is None
+
+
+def test_concurrent_data_roots_resolve_their_own_bindings(tmp_path, monkeypatch):
+    """两个场景在各自的 data_root_override 下并发运行，同一激活码各读到自己的绑定。"""
+    monkeypatch.setattr(lab, "_override_index", lab._OverrideIndex())
+    barrier = threading.Barrier(2)
+
+    def scenario(name: str) -> set:
+        with data_root_override(tmp_path / name):
+            assert get_shared_data_dir() == get_project_root() / "data"
+            profile = _profile_with_version(f"模板 {name}")
+            lab.bind_profile_to_activation("ADM100", profile["profile_id"])
+            seen = set()
+            for _ in range(20):
+                # 每轮都等对方，保证两个场景的查询交错进行
+                barrier.wait()
+                seen.add(lab.resolve_simple_chat_prompt_override("ADM100")[0])
+            return seen
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        seen_a, seen_b = pool.map(scenario, ["a", "b"])
+    assert seen_a == {"模板 a"} and seen_b == {"模板 b"}
@@ -1,10 +1,15 @@
 import json
 import subprocess
+import sys
+import threading
 import time
 from pathlib import Path
 
+import pytest
+
 from app.utils import admin_savepoints
 from app.utils.report_registry import ReportRegistry
+from app.utils.savepoint_store import BlobStore, restore_tree
 from app.utils.simple_activation_manager import ActivationRecord, SimpleActivationManager
 
 
@@ -114,11 +119,13 @@ def test_create_and_load_savepoint_global_rewind(monkeypatch, tmp_path):
     assert len(after_source["messages"]) == 5
 
     sp_dir = test_root / "savepoints" / meta["savepoint_id"]
-    snap_values = json.loads((sp_dir / "report" / "values__t_values_1.json").read_text(encoding="utf-8"))
+    snap_dir = tmp_path / "snap"
+    restore_tree(sp_dir / "manifest.json", snap_dir)
+    snap_values = json.loads((snap_dir / "values__t_values_1.json").read_text(encoding="utf-8"))
     # 目标 assistant 前一条 user 一并回退 => 保留 m0,m1
     assert [m["id"] for m in snap_values["messages"]] == ["m0", "m1"]
     # 后续 phase 文件被清理
-    assert not (sp_dir / "report" / "strengths__t_strengths_1.json").exists()
+    assert not (snap_dir / "strengths__t_strengths_1.json").exists()
 
     # 破坏源 report 后再 load，验证可恢复
     values_file.write_text(
@@ -215,6 +222,41 @@ def test_export_and_delete_savepoint(monkeypatch, tmp_path):
     assert not (test_root / "savepoints" / meta["savepoint_id"]).exists()
 
 
+def test_savepoints_share_blobs_and_gc_on_delete(monkeypatch, tmp_path):
+    test_root = tmp_path / "data_test_simple"
+    project_root = tmp_path / "project"
+    project_root.mkdir(parents=True, exist_ok=True)
+    monkeypatch.setattr(admin_savepoints, "get_simple_test_base_dir", lambda: test_root)
+    monkeypatch.setattr(admin_savepoints, "_project_root", lambda: project_root)
+
+    rec = _seed_debug_activation(test_root)
+    _seed_report_with_messages(rec, "t_values_1")
+    kwargs = dict(
+        activation_code=rec.code,
+        phase="values",
+        thread_id="t_values_1",
+        created_by={"user_id": "admin-1"},
+    )
+    sp1 = admin_savepoints.create_savepoint(target_message_index=3, display_name="去重-1", **kwargs)
+    sp2 = admin_savepoints.create_savepoint(target_message_index=1, display_name="去重-2", **kwargs)
+    # 第二个 savepoint 只有被截断的线程文件与 record.json（updated_at）不同
+    assert sp2["snapshot_new_blobs"] == 2
+    store = BlobStore(test_root / "savepoints" / "_store")
+    assert store.stats()["blobs"] == sp1["snapshot_files"] + 2
+    assert not any((test_root / "savepoints" / "_staging").iterdir())
+
+    ret1 = admin_savepoints.delete_savepoint(savepoint_id=sp1["savepoint_id"])
+    assert ret1["blobs_removed"] == 2
+    # sp2 仍可完整还原
+    loaded = admin_savepoints.load_savepoint(
+        activation_code=rec.code, savepoint_id=sp2["savepoint_id"]
+    )
+    assert loaded["loaded"] is True
+
+    admin_savepoints.delete_savepoint(savepoint_id=sp2["savepoint_id"])
+    assert store.stats()["blobs"] == 0
+
+
 def test_run_generated_scenario_records_status(monkeypatch, tmp_path):
     test_root = tmp_path / "data_test_simple"
     project_root = tmp_path / "project"
@@ -578,3 +620,168 @@ def test_cleanup_batch_job_history(monkeypatch, tmp_path):
     got = admin_savepoints.list_batch_job_history(limit=10)
     assert len(got) == 2
 
+
+
+def _seed_generated_index(project_root: Path, ids):
+    generated_dir = project_root / "test_agent" / "scenarios" / "generated"
+    generated_dir.mkdir(parents=True, exist_ok=True)
+    items = []
+    for i, sid in enumerate(ids):
+        (generated_dir / f"{sid}.yaml").write_text("schema_version: 1\nid: x\n", encoding="utf-8")
+        items.append(
+            {
+                "savepoint_id": sid,
+                "scenario_file": str(generated_dir / f"{sid}.yaml"),
+                "exported_at": f"2026-01-01T00:00:0{i}Z",
+            }
+        )
+    (generated_dir / "generated_index.json").write_text(
+        json.dumps({"version": 1, "items": items}, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+
+
+def test_run_generated_scenarios_batch_parallel_and_fail_fast(monkeypatch, tmp_path):
+    test_root = tmp_path / "data_test_simple"
+    project_root = tmp_path / "project"
+    project_root.mkdir(parents=True, exist_ok=True)
+    monkeypatch.setattr(admin_savepoints, "get_simple_test_base_dir", lambda: test_root)
+    monkeypatch.setattr(admin_savepoints, "_project_root", lambda: project_root)
+    _seed_generated_index(project_root, ["sp_p1", "sp_p2", "sp_p3", "sp_p4"])
+
+    lock = threading.Lock()
+    active = {"now": 0, "peak": 0}
+    roots = []
+
+    def _fake_run_generated_scenario(
+        *, savepoint_id, engine="auto", dry_run=False, timeout_sec=600, max_retries=0
+    ):
+        roots.append(admin_savepoints._SCENARIO_RUN_CTX.get().sandbox_root)
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.1)
+        with lock:
+            active["now"] -= 1
+        status = "failed" if savepoint_id == "sp_p1" else "passed"
+        exit_code = 0 if status == "passed" else 1
+        return {"savepoint_id": savepoint_id, "status": status, "exit_code": exit_code}
+
+    monkeypatch.setattr(admin_savepoints, "run_generated_scenario", _fake_run_generated_scenario)
+    ret = admin_savepoints.run_generated_scenarios_batch(engine="auto", workers=4)
+    assert active["peak"] >= 2
+    assert [x["savepoint_id"] for x in ret["items"]] == ["sp_p1", "sp_p2", "sp_p3", "sp_p4"]
+    assert ret["failed"] == 1
+    assert len(set(roots)) == 4
+
+    ret = admin_savepoints.run_generated_scenarios_batch(
+        savepoint_ids=["sp_p1", "sp_p2", "sp_p3"], engine="auto", workers=1, fail_fast=True
+    )
+    assert ret["total"] == 1
+    assert ret["stopped_reason"] == "fail_fast"
+    assert ret["skipped"] == 2
+    assert (ret["failed"], ret["cancelled"]) == (1, 0)
+
+    with pytest.raises(ValueError):
+        admin_savepoints.run_generated_scenarios_batch(engine="auto", workers=0)
+
+
+def test_run_generated_scenarios_batch_counts_cancelled_separately(monkeypatch, tmp_path):
+    test_root = tmp_path / "data_test_simple"
+    project_root = tmp_path / "project"
+    project_root.mkdir(parents=True, exist_ok=True)
+    monkeypatch.setattr(admin_savepoints, "get_simple_test_base_dir", lambda: test_root)
+    monkeypatch.setattr(admin_savepoints, "_project_root", lambda: project_root)
+    _seed_generated_index(project_root, ["sp_c1", "sp_c2", "sp_c3"])
+
+    def _fake_run_generated_scenario(
+        *, savepoint_id, engine="auto", dry_run=False, timeout_sec=600, max_retries=0
+    ):
+        if savepoint_id == "sp_c1":
+            time.sleep(0.05)
+            return {"savepoint_id": savepoint_id, "status": "failed", "exit_code": 1}
+        ctx = admin_savepoints._SCENARIO_RUN_CTX.get()
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            if ctx.should_cancel():
+                return {"savepoint_id": savepoint_id, "status": "cancelled", "exit_code": 1}
+            time.sleep(0.01)
+        return {"savepoint_id": savepoint_id, "status": "passed", "exit_code": 0}
+
+    monkeypatch.setattr(admin_savepoints, "run_generated_scenario", _fake_run_generated_scenario)
+    ret = admin_savepoints.run_generated_scenarios_batch(
+        savepoint_ids=["sp_c1", "sp_c2", "sp_c3"], engine="auto", workers=2, fail_fast=True
+    )
+    assert ret["stopped_reason"] == "fail_fast"
+    assert (ret["passed"], ret["failed"], ret["cancelled"], ret["skipped"]) == (0, 1, 1, 1)
+
+
+def test_batch_job_parallel_progress(monkeypatch, tmp_path):
+    test_root = tmp_path / "data_test_simple"
+    project_root = tmp_path / "project"
+    project_root.mkdir(parents=True, exist_ok=True)
+    monkeypatch.setattr(admin_savepoints, "get_simple_test_base_dir", lambda: test_root)
+    monkeypatch.setattr(admin_savepoints, "_project_root", lambda: project_root)
+    admin_savepoints._BATCH_JOBS.clear()
+    admin_savepoints._RUNNING_SAVEPOINTS.clear()
+    _seed_generated_index(project_root, ["sp_j1", "sp_j2", "sp_j3"])
+
+    release = threading.Event()
+
+    def _fake_run_generated_scenario(
+        *, savepoint_id, engine="auto", dry_run=False, timeout_sec=600, max_retries=0
+    ):
+        ctx = admin_savepoints._SCENARIO_RUN_CTX.get()
+        ctx.on_output(f"{savepoint_id} started")
+        release.wait(timeout=5)
+        return {"savepoint_id": savepoint_id, "status": "passed", "exit_code": 0}
+
+    monkeypatch.setattr(admin_savepoints, "run_generated_scenario", _fake_run_generated_scenario)
+    started = admin_savepoints.start_generated_scenarios_batch_job(engine="auto", workers=3)
+    assert started["workers"] == 3
+    job_id = started["job_id"]
+
+    snap = {}
+    for _ in range(40):
+        snap = admin_savepoints.get_generated_scenarios_batch_job(job_id=job_id)
+        if len(snap.get("in_progress") or {}) == 3:
+            break
+        time.sleep(0.05)
+    assert set(snap["in_progress"]) == {"sp_j1", "sp_j2", "sp_j3"}
+    assert any("started" in (v.get("last_output") or "") for v in snap["in_progress"].values())
+
+    release.set()
+    final = {}
+    for _ in range(40):
+        final = admin_savepoints.get_generated_scenarios_batch_job(job_id=job_id)
+        if final.get("status") == "completed":
+            break
+        time.sleep(0.05)
+    assert final.get("status") == "completed"
+    assert final.get("passed") == 3
+    assert final.get("in_progress") == {}
+
+
+def test_run_scenario_subprocess_isolated_root_and_cancel(monkeypatch, tmp_path):
+    monkeypatch.setattr(admin_savepoints, "_project_root", lambda: tmp_path)
+    lines = []
+    cancel = threading.Event()
+
+    def _on_output(line):
+        lines.append(line)
+        cancel.set()
+
+    ctx = admin_savepoints._ScenarioRunContext(
+        sandbox_root=tmp_path / "batch_runs" / "job_x" / "sp_x",
+        on_output=_on_output,
+        should_cancel=cancel.is_set,
+    )
+    code = "import os, time; print(os.environ['SIMPLE_REPLAY_RUNS_ROOT']); time.sleep(30)"
+    t0 = time.monotonic()
+    with pytest.raises(admin_savepoints._ScenarioCancelled) as exc:
+        admin_savepoints._run_scenario_subprocess(
+            [sys.executable, "-c", code], timeout_sec=60, ctx=ctx
+        )
+    assert time.monotonic() - t0 < 10
+    assert lines == [str(ctx.sandbox_root)]
+    assert str(ctx.sandbox_root) in exc.value.stdout
+    assert ctx.sandbox_root.is_dir()
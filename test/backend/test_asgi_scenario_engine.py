@@ -0,0 +1,107 @@
+"""test_agent 进程内 ASGI 引擎：app 只启动一次，并发场景各用独立数据根"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.main import app  # noqa: F401  先加载 app，避免循环导入
+from app.utils.data_paths import data_root_override, get_project_data_dir
+from app.utils.simple_activation_manager import get_simple_base_dir
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from test_agent.adapters.beingdoing.adapter import BeingDoingAdapter  # noqa: E402
+from test_agent.core.bdd.asgi_engine import (  # noqa: E402
+    AsgiAppHost,
+    InProcessScenario,
+    run_scenarios_in_process,
+)
+
+
+def test_data_root_override_is_scoped(tmp_path):
+    default = get_simple_base_dir()
+    with data_root_override(tmp_path):
+        assert get_project_data_dir() == tmp_path
+        assert get_simple_base_dir() == tmp_path / "simple"
+    assert get_simple_base_dir() == default
+
+
+STEPS = [
+    {
+        "keyword": "Given",
+        "text": "准备激活码",
+        "raw": {"action": "seed_activation", "mode": "values"},
+    },
+    {
+        "keyword": "When",
+        "text": "查询旅程",
+        "raw": {
+            "action": "api_request",
+            "method": "GET",
+            "path": "/api/v1/simple-auth/journeys",
+            "save_as": "journeys",
+        },
+    },
+    {
+        "keyword": "Then",
+        "text": "错误的激活码",
+        "raw": {
+            "action": "api_request",
+            "method": "POST",
+            "path": "/api/v1/simple-auth/activate",
+            "json": {"code": "${activation_code}X"},
+            "expect_status": 404,
+        },
+    },
+    {"keyword": "And", "text": '右侧应出现引导语 "继续"'},
+]
+
+
+@pytest.fixture
+def host(tmp_path):
+    with AsgiAppHost(runs_root=tmp_path / "runs") as h:
+        yield h
+
+
+def test_concurrent_scenarios_use_isolated_roots(host):
+    real_activations = get_simple_base_dir() / "activations.json"
+    before = real_activations.read_bytes() if real_activations.exists() else None
+
+    scenarios = [
+        InProcessScenario(scenario_id=f"s{i}", steps=STEPS, metadata={"n": i}) for i in range(4)
+    ]
+    results = run_scenarios_in_process(scenarios, BeingDoingAdapter, host=host, workers=4)
+
+    assert [r.scenario_id for r in results] == ["s0", "s1", "s2", "s3"]
+    roots = set()
+    for r in results:
+        assert r.status == "pass", [s.error for s in r.steps]
+        assert len(r.steps) == len(STEPS) and r.metadata["engine"] == "asgi"
+        root = Path(r.metadata["data_root"])
+        roots.add(root)
+        # 每个场景只看得到自己创建的那一个激活码
+        records = json.loads((root / "simple" / "activations.json").read_text(encoding="utf-8"))
+        assert len(records) == 1
+    assert len(roots) == 4
+    after = real_activations.read_bytes() if real_activations.exists() else None
+    assert after == before
+
+
+def test_backend_failure_reported_in_result_model(host):
+    steps = [
+        {
+            "keyword": "When",
+            "text": "访问不存在的接口",
+            "raw": {"action": "api_request", "path": "/api/v1/nope"},
+        }
+    ]
+    [result] = run_scenarios_in_process(
+        [InProcessScenario("bad", steps)], BeingDoingAdapter, host=host
+    )
+    assert result.status == "fail"
+    assert result.steps[0].error.endswith("expected_status=200 actual=404")
+    assert set(result.to_dict()) >= {"run_id", "scenario_id", "level", "steps", "failure_type"}
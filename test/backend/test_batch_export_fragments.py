@@ -0,0 +1,179 @@
+"""批量导出 phase 片段缓存：输出与不走缓存一致，重新导出只渲染变化的 phase，依赖文件变化时失效"""
+
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+from app.config.settings import settings
+from app.services import batch_export_service as bes
+from app.services.batch_export_service import BatchExportService
+from app.utils.export_fragment_cache import ExportFragmentCache, set_export_fragment_cache
+from app.utils.report_registry import STEP_IDS, ReportRegistry
+
+RID = "rpt-frag"
+
+
+def _session(step_id: str, n: int) -> dict:
+    msgs = []
+    for i in range(n):
+        msgs.append(
+            {
+                "role": "user",
+                "content": f"{step_id} 问题 {i}",
+                "created_at": f"2026-01-01T00:{i:02d}:00Z",
+            }
+        )
+        msgs.append(
+            {
+                "role": "assistant",
+                "content": f"{step_id} 回答 {i}\n第二行",
+                "created_at": f"2026-01-01T00:{i:02d}:30Z",
+                "token_usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+            }
+        )
+    return {"messages": msgs, "metadata": {"conclusion_final": {"keywords": [f"{step_id}-关键词"]}}}
+
+
+def _write_json(path: Path, data) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+@pytest.fixture
+def service(tmp_path):
+    svc = BatchExportService()
+    svc.registry = ReportRegistry(base_dir=str(tmp_path / "simple"))
+    steps = {}
+    for sid in STEP_IDS:
+        steps[sid] = {
+            "step_id": sid,
+            "selected_session_id": f"s-{sid}",
+            "session_ids": [f"s-{sid}"],
+        }
+        _write_json(svc.registry.get_step_session_file(RID, sid, f"s-{sid}"), _session(sid, 3))
+    steps["purpose"]["selected_session_id"] = None  # 进行中的 phase
+    _write_json(
+        svc.registry.reports_root / RID / "record.json",
+        {
+            "report_id": RID,
+            "activation_code": "CODE",
+            "user_id": "u1",
+            "status": "in_progress",
+            "final_conclusion": "最终结论",
+            "steps": steps,
+        },
+    )
+    _write_json(
+        svc.registry.reports_root / RID / "rumination_progress.json",
+        {
+            "filter_step_snapshots": {"1": {"submitted": [{"name": "甲", "note": "a|b"}]}},
+        },
+    )
+    cache = ExportFragmentCache(max_entries=32)
+    set_export_fragment_cache(cache)
+    svc.cache = cache
+    yield svc
+    set_export_fragment_cache(None)
+
+
+async def _export(svc, fmt="md"):
+    files = dict(await svc.collect_report_export(RID, fmt))
+    stats = json.loads(files.pop("stats.json"))
+    stats.pop("exported_at")
+    stats.pop("report_updated_at")
+    files = {k: v.decode("utf-8") for k, v in files.items()}
+    for name in list(files):
+        if name.startswith("report_"):
+            files[name] = re.sub(r"- 导出时间: .*", "", files[name])
+    return files, stats
+
+
+async def test_cached_output_matches_uncached(service, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_FRAGMENT_CACHE_ENABLED", False)
+    expected = await _export(service)
+    monkeypatch.setattr(settings, "EXPORT_FRAGMENT_CACHE_ENABLED", True)
+    assert await _export(service) == expected  # 首次：全部渲染并写入缓存
+    assert await _export(service) == expected  # 再次：全部命中
+    assert service.cache.stats["hits_memory"] == len(STEP_IDS)
+
+    md = expected[0][f"report_{RID}.md"]
+    assert md.endswith("\n") and not md.endswith("\n\n")
+    assert "## 4. 使命（purpose）  ⚠️ 进行中（未确认）" in md
+    assert "| 甲 | a\\|b |" in md
+
+
+async def test_reexport_only_rerenders_changed_phase(service, monkeypatch):
+    await _export(service)
+    calls = []
+    original = BatchExportService._compute_phase_stat
+    monkeypatch.setattr(
+        BatchExportService,
+        "_compute_phase_stat",
+        lambda self, step_id, *a: calls.append(step_id) or original(self, step_id, *a),
+    )
+
+    _write_json(
+        service.registry.get_step_session_file(RID, "strengths", "s-strengths"),
+        _session("strengths", 5),
+    )
+    files, stats = await _export(service)
+    assert calls == ["strengths", "rumination"]  # rumination 的前置结论依赖 strengths 源文件
+    assert "strengths 问题 4" in files[f"report_{RID}.md"]
+    assert stats["phases"][1]["message_count"] == 10
+
+
+async def test_rumination_fragment_tracks_dependencies(service):
+    await _export(service)
+    _write_json(
+        service.registry.reports_root / RID / "rumination_progress.json",
+        {
+            "filter_step_snapshots": {"1": {"submitted": [{"name": "乙"}]}},
+        },
+    )
+    files, _ = await _export(service)
+    assert "| 乙 |" in files[f"report_{RID}.md"] and "| 甲 |" not in files[f"report_{RID}.md"]
+
+    _write_json(
+        service.registry.get_step_session_file(RID, "values", "s-values"),
+        {"messages": [], "metadata": {"conclusion_final": {"keywords": ["新价值观"]}}},
+    )
+    files, _ = await _export(service)
+    assert "- 价值观：新价值观" in files[f"report_{RID}.md"]
+
+
+async def test_missing_and_corrupt_sources_not_cached(service):
+    service.registry.get_step_session_file(RID, "interests", "s-interests").write_text(
+        "{broken", encoding="utf-8"
+    )
+    files, stats = await _export(service)
+    assert json.loads(files["raw/interests__s-interests.json"])["error"] == "源对话文件缺失"
+    assert stats["phases"][2]["source_missing"] is True
+    assert service.cache.stats["stores"] == len(STEP_IDS) - 1
+
+
+def test_fragment_cache_disk_layer(tmp_path):
+    disk = tmp_path / "frag"
+    ExportFragmentCache(disk_dir=disk).put("ab" * 32, {"body": "x\n", "stat": {}, "raw_json": "{}"})
+    fresh = ExportFragmentCache(disk_dir=disk)
+    assert fresh.get("ab" * 32)["body"] == "x\n"
+    assert fresh.stats["hits_disk"] == 1
+    assert fresh.get("cd" * 32) is None
+
+
+def test_fragment_cache_memory_bounded_by_bytes():
+    cache = ExportFragmentCache(max_entries=100, max_bytes=1000)
+    for i in range(5):
+        cache.put(f"{i:02d}" * 32, {"body": "字" * 100, "stat": {}, "raw_json": "{}"})
+    assert cache._mem.nbytes <= 1000 and len(cache._mem) == 2
+    assert cache.get("00" * 32) is None
+    assert cache.get("04" * 32)["body"] == "字" * 100
+
+
+def test_md_buffer_lines():
+    buf = bes._MdBuffer()
+    buf.line("a")
+    buf.line()
+    buf.write("b")
+    assert buf.getvalue() == "a\n\nb"
@@ -0,0 +1,66 @@
+"""缓存通用件：内存 LRU 的条目数 / 字节数限额、原子写、实例槽与文件签名"""
+
+import os
+
+from app.utils.cache_tiers import CacheSlot, MemoryLRU, ShardedDir, atomic_write, file_signature
+
+
+def test_memory_lru_evicts_by_bytes_and_entries():
+    lru = MemoryLRU(max_entries=3, max_bytes=100)
+    lru.put("a", 1, 40)
+    lru.put("b", 2, 40)
+    assert lru.get("a") == 1  # a 成为最近使用
+    lru.put("c", 3, 40)
+    assert lru.get("b") is None and lru.nbytes == 80
+    lru.put("d", 4, 1)
+    lru.put("e", 5, 1)
+    assert len(lru) == 3 and lru.get("a") is None
+    lru.put("huge", 6, 101)
+    assert lru.get("huge") is None
+
+
+def test_memory_lru_zero_limit_disables():
+    lru = MemoryLRU(max_bytes=0)
+    lru.put("a", 1, 0)
+    assert lru.get("a") is None
+
+
+def test_atomic_write_and_sharded_dir(tmp_path):
+    p = ShardedDir(tmp_path).path("abcdef", ".wav")
+    assert p == tmp_path / "ab" / "abcdef.wav"
+    atomic_write(p, b"x")
+    atomic_write(p, "中文")
+    assert p.read_text(encoding="utf-8") == "中文"
+    assert os.listdir(p.parent) == ["abcdef.wav"]
+
+
+def test_file_signature(tmp_path):
+    p = tmp_path / "f.txt"
+    assert file_signature(p) is None
+    p.write_bytes(b"abc")
+    st = p.stat()
+    assert file_signature(p) == (st.st_mtime_ns, 3)
+
+
+def test_cache_slot_lazy_create_and_disable():
+    enabled = [True]
+    slot = CacheSlot(object, enabled=lambda: enabled[0])
+    assert slot.current is None
+    first = slot.get()
+    assert slot.get() is first and slot.current is first
+    enabled[0] = False
+    assert slot.get() is None
+    slot.set(None)
+    assert slot.current is None
+
+
+def test_sharded_dir_sweep_removes_expired_then_oldest(tmp_path):
+    d = ShardedDir(tmp_path)
+    for i, key in enumerate(["aa1", "bb2", "cc3", "dd4"]):
+        atomic_write(d.path(key), "x" * 10)
+        os.utime(d.path(key), (1000 + i, 1000 + i))
+    (tmp_path / "aa" / ".aa1.json.tmp").write_text("partial")
+
+    assert d.sweep(max_age=100, now=1101.5) == 2  # aa1、bb2 已过期
+    assert d.sweep(max_bytes=10) == 1  # 超额：删最早写入的 cc3
+    assert [p.name for p in sorted(tmp_path.glob("*/*"))] == [".aa1.json.tmp", "dd4.json"]
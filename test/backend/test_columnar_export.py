@@ -0,0 +1,240 @@
+"""列式导出：按 phase / 日期分区、CSV 回退与类型还原、离线脚本按列读取结果与逐条统计一致"""
+
+import io
+import json
+import sys
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1.auth import get_current_user
+from app.main import app
+from app.services.columnar_export_service import (
+    TABLE_COLUMNS,
+    ColumnarExportService,
+    decode_table,
+    encode_table,
+    resolve_columnar_format,
+)
+from app.services.conversation_stats_service import compute_turn_stats_from_messages
+from app.utils.data_paths import data_root_override
+from app.utils.report_registry import ReportRegistry
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+RID = "rpt-col"
+
+
+def _messages(day: int, n: int, filter_step=None):
+    msgs = []
+    for i in range(n):
+        base = f"2026-01-{day:02d}T10:{i * 5:02d}"
+        msgs.append(
+            {
+                "role": "user",
+                "content": f"问 {i}",
+                "created_at": f"{base}:00Z",
+                "filter_step": filter_step,
+            }
+        )
+        msgs.append(
+            {
+                "role": "assistant",
+                "content": [{"text": "答"}, {"text": f" {i}"}],
+                "created_at": f"{base}:40Z",
+                "token_usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+            }
+        )
+    return msgs
+
+
+SOURCES = {
+    "values": _messages(1, 3) + _messages(2, 2),  # 跨两天
+    "strengths": [{"role": "user", "content": "无时间戳"}] + _messages(3, 2),
+    "rumination": _messages(4, 2, filter_step=1),
+}
+
+
+def _write_json(path: Path, data) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+def _seed(base_dir: Path) -> ReportRegistry:
+    registry = ReportRegistry(base_dir=str(base_dir))
+    steps = {}
+    for sid, msgs in SOURCES.items():
+        steps[sid] = {"selected_session_id": f"s-{sid}", "session_ids": [f"s-{sid}"]}
+        _write_json(registry.get_step_session_file(RID, sid, f"s-{sid}"), {"messages": msgs})
+    _write_json(
+        registry.reports_root / RID / "record.json",
+        {"report_id": RID, "activation_code": "CODE", "user_id": "u1", "steps": steps},
+    )
+    _write_json(
+        registry.reports_root / RID / "rumination_progress.json",
+        {
+            "filter_step_snapshots": {"1": {"submitted": [{"name": "甲"}, {"name": "乙"}]}},
+            "combo_matrix": [{"combo_id": "c1", "passion_name": "p", "strength_name": "s"}],
+        },
+    )
+    return registry
+
+
+@pytest.fixture
+def service(tmp_path):
+    svc = ColumnarExportService("csv")
+    svc.batch.registry = _seed(tmp_path / "simple")
+    return svc
+
+
+async def test_partitions_and_manifest(service):
+    files, skipped = await service.collect_export([RID, "missing"])
+    assert skipped == ["missing"]
+    paths = dict(files)
+    manifest = json.loads(paths["manifest.json"])
+    assert manifest["format"] == "csv" and manifest["reports"] == [RID]
+    assert manifest["csv_null"] == "\\N"
+
+    message_parts = {
+        (p["phase"], p["date"]): p["rows"] for p in manifest["tables"]["messages"]["partitions"]
+    }
+    assert message_parts == {
+        ("values", "2026-01-01"): 6,
+        ("values", "2026-01-02"): 4,
+        ("strengths", "unknown"): 1,
+        ("strengths", "2026-01-03"): 4,
+        ("rumination", "2026-01-04"): 4,
+    }
+    assert "messages/phase=values/date=2026-01-02/part-0.csv" in paths
+
+    rows = decode_table(
+        paths["messages/phase=values/date=2026-01-01/part-0.csv"], TABLE_COLUMNS["messages"], "csv"
+    )
+    assert rows[1]["content"] == "答 0" and rows[1]["chars"] == 3
+    assert rows[1]["total_tokens"] == 120 and rows[0]["total_tokens"] is None
+    assert rows[0]["is_selected"] is True and rows[0]["msg_index"] == 0
+
+    rumination = decode_table(
+        paths["rumination/phase=rumination/date=2026-01-04/part-0.csv"],
+        TABLE_COLUMNS["rumination"],
+        "csv",
+    )
+    step1 = [r for r in rumination if r["filter_step"] == 1 and r["kind"] == "step_rows"]
+    assert [json.loads(r["row_json"])["name"] for r in step1] == ["甲", "乙"]
+    assert sum(1 for r in rumination if r["kind"] == "combo_matrix") == 1
+    assert len({r["filter_step"] for r in rumination if r["kind"] == "step_rows"}) == 7
+
+
+async def test_turns_table_matches_turn_stats(service):
+    files, _ = await service.collect_export([RID])
+    paths = dict(files)
+    manifest = json.loads(paths["manifest.json"])
+    turns = []
+    for part in manifest["tables"]["turns"]["partitions"]:
+        turns.extend(decode_table(paths[part["path"]], TABLE_COLUMNS["turns"], "csv"))
+    for step_id, msgs in SOURCES.items():
+        rows = [t for t in turns if t["step_id"] == step_id]
+        stats = compute_turn_stats_from_messages(msgs)
+        counted = [t["duration_seconds"] for t in rows if t["status"] == "counted"]
+        assert len(rows) == stats["total_turns_seen"]
+        assert (len(counted), round(sum(counted), 2)) == (stats["turns"], stats["total_seconds"])
+    no_ts = [t for t in turns if t["status"] == "skipped_no_ts"]
+    assert [(t["step_id"], t["user_msg_index"], t["started_at"]) for t in no_ts] == [
+        ("strengths", 0, None)
+    ]
+
+
+async def test_offline_reader_matches_markdown_free_stats(service, tmp_path):
+    from conversation_stats import (
+        _read_columnar_entries,
+        compute_report_stats_from_parsed,
+        load_columnar_export,
+    )
+
+    files, _ = await service.collect_export([RID])
+    zip_path = tmp_path / "columnar.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        for name, data in files:
+            zf.writestr(name, data)
+
+    [(rid, meta, phases)] = load_columnar_export(_read_columnar_entries(str(zip_path)))
+    assert rid == RID and meta == {"用户ID": "u1"}
+    assert [p["phase_id"] for p in phases] == ["values", "strengths", "rumination"]
+    stats = compute_report_stats_from_parsed(rid, meta, phases)
+    for ph in stats["per_phase"]:
+        expected = compute_turn_stats_from_messages(SOURCES[ph["phase_id"]])
+        assert (ph["turns"], ph["total_seconds"]) == (expected["turns"], expected["total_seconds"])
+
+    assert _read_columnar_entries(str(tmp_path)) is None  # 无 manifest.json：按 md/txt 处理
+
+
+def test_csv_round_trip_keeps_null_and_empty_strings_apart():
+    rows = [
+        {"report_id": "r", "started_at": None, "ended_at": "", "status": "\\N", "turn_index": None},
+        {
+            "report_id": "r",
+            "started_at": "\\\\N",
+            "ended_at": "x\\N",
+            "status": "counted",
+            "turn_index": 0,
+        },
+    ]
+    decoded = decode_table(
+        encode_table(rows, TABLE_COLUMNS["turns"], "csv"), TABLE_COLUMNS["turns"], "csv"
+    )
+    assert [{k: r[k] for k in rows[0]} for r in decoded] == rows
+
+
+def test_format_resolution(monkeypatch):
+    with pytest.raises(ValueError):
+        resolve_columnar_format("xlsx")
+    monkeypatch.setitem(sys.modules, "pyarrow", None)  # 模拟未安装
+    assert resolve_columnar_format("parquet") == "csv"
+    assert resolve_columnar_format("auto") == "csv"
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_arrow_round_trip(fmt):
+    pytest.importorskip("pyarrow")
+    rows = [
+        {
+            "report_id": "r",
+            "step_id": "values",
+            "turn_index": 0,
+            "duration_seconds": 1.5,
+            "status": "counted",
+        }
+    ]
+    decoded = decode_table(
+        encode_table(rows, TABLE_COLUMNS["turns"], fmt), TABLE_COLUMNS["turns"], fmt
+    )
+    assert decoded[0]["duration_seconds"] == 1.5 and decoded[0]["started_at"] is None
+
+
+def test_batch_route_columnar(tmp_path):
+    _seed(tmp_path / "simple")
+    app.dependency_overrides[get_current_user] = lambda: {"user_id": "admin-1"}
+    try:
+        with data_root_override(tmp_path), patch(
+            "app.api.v1.admin._is_super_admin", return_value=True
+        ):
+            client = TestClient(app)
+            resp = client.post(
+                "/api/v1/admin/reports/export/batch",
+                json={"report_ids": [RID], "format": "columnar", "columnar_format": "csv"},
+            )
+            bad = client.post(
+                "/api/v1/admin/reports/export/batch",
+                json={"report_ids": [RID], "format": "columnar", "columnar_format": "xlsx"},
+            )
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+    assert resp.status_code == 200, resp.text
+    names = zipfile.ZipFile(io.BytesIO(resp.content)).namelist()
+    assert "manifest.json" in names and "turns/phase=values/date=2026-01-01/part-0.csv" in names
+    assert bad.status_code == 400
@@ -0,0 +1,227 @@
+"""协调后端：local / sqlite 的信号量、在途去重与任务注册表"""
+
+import asyncio
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from app.utils.combo_guide_queue import ComboGuideQueue
+from app.utils.coordination import (
+    LocalCoordinationBackend,
+    SqliteCoordinationBackend,
+    create_coordination_backend,
+)
+
+
+def _dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+@pytest.fixture
+def sqlite_pair(tmp_path):
+    db = tmp_path / "coord.sqlite3"
+    return SqliteCoordinationBackend(db), SqliteCoordinationBackend(db)
+
+
+class TestLocalBackend:
+    def test_semaphore_disabled_when_limit_zero(self):
+        assert LocalCoordinationBackend().semaphore("llm", 0) is None
+
+    def test_inflight_set_dedup(self):
+        s = LocalCoordinationBackend().inflight_set("ns")
+        assert s.try_add("k") is True
+        assert s.try_add("k") is False
+        assert "k" in s
+        s.discard("k")
+        assert "k" not in s
+
+    def test_job_registry_transaction(self):
+        reg = LocalCoordinationBackend().job_registry("jobs")
+        with reg.transaction() as jobs:
+            jobs["j1"] = {"status": "running"}
+        assert reg.snapshot() == {"j1": {"status": "running"}}
+        reg.clear()
+        assert reg.snapshot() == {}
+
+    def test_create_rejects_unknown_kind(self):
+        with pytest.raises(ValueError):
+            create_coordination_backend("redis")
+
+
+class TestSqliteBackend:
+    def test_inflight_set_shared_between_instances(self, sqlite_pair):
+        a, b = sqlite_pair
+        assert a.inflight_set("combo").try_add("u1:c1") is True
+        assert b.inflight_set("combo").try_add("u1:c1") is False
+        assert "u1:c1" in b.inflight_set("combo")
+        a.inflight_set("combo").discard("u1:c1")
+        assert b.inflight_set("combo").try_add("u1:c1") is True
+
+    def test_stale_owner_is_reclaimed(self, sqlite_pair):
+        a, b = sqlite_pair
+        a.inflight_set("combo").try_add("k")
+        with a._tx() as conn:
+            conn.execute("UPDATE inflight SET owner = ?", (f"{a.host}:{_dead_pid()}",))
+        assert b.inflight_set("combo").try_add("k") is True
+
+    def test_expired_lease_is_reclaimed(self, tmp_path):
+        a = SqliteCoordinationBackend(tmp_path / "c.sqlite3", lease_seconds=1)
+        assert a.inflight_set("ns").try_add("k") is True
+        with a._tx() as conn:
+            conn.execute("UPDATE inflight SET expires_at = 0")
+        assert a.inflight_set("ns").try_add("k") is True
+
+    async def test_semaphore_limits_across_instances(self, sqlite_pair):
+        a, b = sqlite_pair
+        sem_a = a.semaphore("llm", 1)
+        sem_b = b.semaphore("llm", 1)
+        await sem_a.acquire()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(sem_b.acquire(), timeout=0.2)
+        sem_a.release()
+        async with sem_b:
+            with a._tx() as conn:
+                (held,) = conn.execute("SELECT COUNT(*) FROM sem_slots").fetchone()
+            assert held == 1
+        with a._tx() as conn:
+            (held,) = conn.execute("SELECT COUNT(*) FROM sem_slots").fetchone()
+        assert held == 0
+
+    def test_job_registry_roundtrip_and_delete(self, sqlite_pair):
+        a, b = sqlite_pair
+        with a.job_registry("jobs").transaction() as jobs:
+            jobs["j1"] = {"job_id": "j1", "status": "running"}
+        with b.job_registry("jobs").transaction() as jobs:
+            jobs["j1"]["cancel_requested"] = True
+        assert a.job_registry("jobs").snapshot()["j1"]["cancel_requested"] is True
+        b.job_registry("jobs").clear()
+        assert a.job_registry("jobs").snapshot() == {}
+
+    def test_heartbeat_renews_leases_of_live_holders(self, tmp_path):
+        db = tmp_path / "c.sqlite3"
+        a = SqliteCoordinationBackend(db, lease_seconds=1)
+        b = SqliteCoordinationBackend(db, lease_seconds=1)
+        try:
+            assert a.inflight_set("ns").try_add("long-job") is True
+            time.sleep(1.5)  # 超过租约，心跳已续期
+            assert b.inflight_set("ns").try_add("long-job") is False
+            a.inflight_set("ns").discard("long-job")
+            assert a.renew_leases() == 0
+        finally:
+            a.close()
+            b.close()
+
+    def test_owner_alive(self, sqlite_pair):
+        a, _ = sqlite_pair
+        assert a.owner_alive(a.owner_id) is True
+        assert a.owner_alive(f"{a.host}:{_dead_pid()}") is False
+        assert a.owner_alive("other-host:1") is True
+
+
+async def test_combo_guide_queue_dedup_with_sqlite_backend(tmp_path):
+    backend = SqliteCoordinationBackend(tmp_path / "coord.sqlite3")
+    q1 = ComboGuideQueue(backend=backend)
+    q2 = ComboGuideQueue(backend=SqliteCoordinationBackend(tmp_path / "coord.sqlite3"))
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def _gen():
+        started.set()
+        await release.wait()
+
+    task = asyncio.create_task(q1.enqueue("u1", "c1", _gen))
+    await started.wait()
+    assert await q2.is_in_flight("u1", "c1") is True
+    assert await q2.enqueue("u1", "c1", _gen) is False
+    release.set()
+    assert await task is True
+    assert await q2.is_in_flight("u1", "c1") is False
+
+
+async def test_combo_guide_queue_does_not_block_event_loop(tmp_path):
+    """其他 worker 持有写锁时，等锁发生在线程里，事件循环照常调度。"""
+    db = tmp_path / "coord.sqlite3"
+    queue = ComboGuideQueue(backend=SqliteCoordinationBackend(db))
+    holder = sqlite3.connect(str(db), isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        task = asyncio.create_task(queue.is_in_flight("u1", "c1"))
+        start = time.monotonic()
+        await asyncio.sleep(0.2)
+        assert time.monotonic() - start < 1.0 and not task.done()
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+    assert await task is False
+
+
+async def _cancel_mid_acquire(acquire_coro, thread_started: "threading.Event"):
+    task = asyncio.create_task(acquire_coro)
+    await asyncio.to_thread(thread_started.wait, 5)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+async def test_cancelled_semaphore_acquire_returns_slot(tmp_path, monkeypatch):
+    """线程已写入占用行后调用方被取消：名额归还，且不再被心跳续期。"""
+    backend = SqliteCoordinationBackend(tmp_path / "coord.sqlite3")
+    sem = backend.semaphore("llm", 1)
+    started, proceed = threading.Event(), threading.Event()
+    original = sem._try_acquire
+
+    def slow_try_acquire():
+        token = original()
+        started.set()
+        proceed.wait(5)
+        return token
+
+    monkeypatch.setattr(sem, "_try_acquire", slow_try_acquire)
+    cancel = asyncio.create_task(_cancel_mid_acquire(sem.acquire(), started))
+    await asyncio.to_thread(started.wait, 5)
+    await asyncio.sleep(0.05)
+    proceed.set()
+    await cancel
+    monkeypatch.setattr(sem, "_try_acquire", original)
+
+    await asyncio.wait_for(sem.acquire(), timeout=2)
+    sem.release()
+    with backend._tx() as conn:
+        (held,) = conn.execute("SELECT COUNT(*) FROM sem_slots").fetchone()
+    assert held == 0
+    assert not [h for h in backend._held if h[0] == "sem_slots"]
+    backend.close()
+
+
+async def test_cancelled_inflight_try_add_discards_key(tmp_path, monkeypatch):
+    backend = SqliteCoordinationBackend(tmp_path / "coord.sqlite3")
+    inflight = backend.inflight_set("ns")
+    started, proceed = threading.Event(), threading.Event()
+    original = inflight.try_add
+
+    def slow_try_add(key):
+        added = original(key)
+        started.set()
+        proceed.wait(5)
+        return added
+
+    monkeypatch.setattr(inflight, "try_add", slow_try_add)
+    cancel = asyncio.create_task(_cancel_mid_acquire(inflight.try_add_async("t1"), started))
+    await asyncio.to_thread(started.wait, 5)
+    await asyncio.sleep(0.05)
+    proceed.set()
+    await cancel
+
+    for _ in range(100):
+        if "t1" not in inflight:
+            break
+        await asyncio.sleep(0.02)
+    assert "t1" not in inflight
+    assert not backend._held
+    backend.close()
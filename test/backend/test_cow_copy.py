@@ -0,0 +1,63 @@
+"""写时复制拷贝：硬链接/复制降级与写前断链"""
+
+import json
+import os
+
+from app.utils.cow_copy import copy_file_cow, cow_copytree, materialize
+from app.utils.report_registry import ReportRegistry
+
+
+def _make_tree(root):
+    (root / "sub").mkdir(parents=True)
+    (root / "a.json").write_text('{"v": 1}', encoding="utf-8")
+    (root / "sub" / "b.txt").write_text("b", encoding="utf-8")
+
+
+def test_cow_copytree_links_and_counts(tmp_path):
+    src = tmp_path / "src"
+    _make_tree(src)
+    stats = cow_copytree(src, tmp_path / "dst")
+    assert sum(stats.values()) == 2
+    assert (tmp_path / "dst" / "sub" / "b.txt").read_text(encoding="utf-8") == "b"
+
+
+def test_copy_mode_never_links(tmp_path):
+    src = tmp_path / "src"
+    _make_tree(src)
+    stats = cow_copytree(src, tmp_path / "dst", mode="copy")
+    assert stats == {"reflinked": 0, "linked": 0, "copied": 2}
+    assert os.stat(tmp_path / "dst" / "a.json").st_nlink == 1
+
+
+def test_materialize_breaks_hardlink(tmp_path):
+    src = tmp_path / "a.txt"
+    src.write_text("orig", encoding="utf-8")
+    dst = tmp_path / "b.txt"
+    os.link(src, dst)
+    assert materialize(dst) is True
+    dst.write_text("changed", encoding="utf-8")
+    assert src.read_text(encoding="utf-8") == "orig"
+    assert materialize(dst) is False
+    assert materialize(tmp_path / "missing.txt") is False
+
+
+def test_registry_write_on_linked_copy_keeps_source(tmp_path):
+    src_root = tmp_path / "prod"
+    rid = ReportRegistry(base_dir=str(src_root)).ensure_report("CODE1", "u1")["report_id"]
+    src_record = src_root / "reports" / rid / "record.json"
+    before = src_record.read_text(encoding="utf-8")
+
+    dst_root = tmp_path / "sandbox"
+    cow_copytree(src_root / "reports" / rid, dst_root / "reports" / rid)
+    ReportRegistry(base_dir=str(dst_root)).bind_session(rid, "values", "sess_sandbox")
+
+    assert src_record.read_text(encoding="utf-8") == before
+    saved = json.loads((dst_root / "reports" / rid / "record.json").read_text(encoding="utf-8"))
+    assert "sess_sandbox" in saved["steps"]["values"]["session_ids"]
+
+
+def test_copy_file_cow_reports_method(tmp_path):
+    src = tmp_path / "a.txt"
+    src.write_text("x", encoding="utf-8")
+    assert copy_file_cow(src, tmp_path / "b.txt", allow_hardlink=False) in {"reflink", "copy"}
+    assert copy_file_cow(src, tmp_path / "c.txt", mode="copy") == "copy"
@@ -0,0 +1,99 @@
+"""调试日志 session 索引：写入即建偏移 / 历史日志一次性回填 / 按时间分页去重 / 按行号 seek"""
+
+import json
+import shutil
+
+from app.utils import debug_log_index
+from app.utils.debug_log_index import DebugLogIndex
+
+
+def _index(tmp_path):
+    return DebugLogIndex(debug_dir=tmp_path / "debug_logs", logs_dir=tmp_path / "logs")
+
+
+def test_append_records_offsets_and_pages_by_time(tmp_path):
+    idx = _index(tmp_path)
+    for i, ts in enumerate(["2026-01-01T00:00:03", "2026-01-01T00:00:01", "2026-01-01T00:00:02"]):
+        written = idx.append(
+            "s1",
+            {"timestamp": ts, "n": i},
+            [idx.debug_log_path("s1"), idx.user_log_path("s1", "u1")],
+        )
+        assert written == [i, i]
+
+    # 两份文件内容相同：按 timestamp 去重后按时间排序
+    entries, total = idx.page("s1")
+    assert total == 3 and [e["n"] for e in entries] == [1, 2, 0]
+    entries, total = idx.page("s1", offset=1, limit=1)
+    assert total == 3 and [e["n"] for e in entries] == [2]
+
+    assert json.loads(idx.read_line("s1", 2))["n"] == 2
+    assert idx.read_line("s1", 5) is None
+    assert idx.locate("s1")[0] == idx.debug_log_path("s1")
+
+
+def test_legacy_logs_are_backfilled_and_external_appends_indexed(tmp_path):
+    legacy = tmp_path / "logs" / "u9" / "s2" / "runs.jsonl"
+    legacy.parent.mkdir(parents=True)
+    legacy.write_text(json.dumps({"timestamp": "t1", "n": 1}) + "\n\nnot-json\n", encoding="utf-8")
+    idx = _index(tmp_path)
+    lines = idx.read_primary("s2")
+    assert [i for i, _ in lines] == [0, 2]
+    entries, total = idx.page("s2")
+    assert total == 1 and entries[0]["n"] == 1
+
+    # 绕过索引直接追加（旧进程写入）：读取时增量补索引
+    with legacy.open("a", encoding="utf-8") as f:
+        f.write(json.dumps({"timestamp": "t0", "n": 0}) + "\n")
+    entries, total = idx.page("s2")
+    assert total == 2 and [e["n"] for e in entries] == [0, 1]
+    assert json.loads(idx.read_line("s2", 3))["n"] == 0
+    assert idx.read_primary("missing") is None
+
+
+def _write(idx, sid, n):
+    return idx.append(
+        sid,
+        {"timestamp": f"2026-01-01T00:00:{n:02d}", "n": n},
+        [idx.debug_log_path(sid), idx.user_log_path(sid, "u1")],
+    )
+
+
+def test_first_read_after_write_skips_directory_scan(tmp_path, monkeypatch):
+    idx = _index(tmp_path)
+    _write(idx, "s3", 0)
+
+    def _no_scan(session_id):
+        raise AssertionError("new session written by the index should not be scanned")
+
+    monkeypatch.setattr(idx, "_scan_candidates", _no_scan)
+    entries, total = idx.page("s3")
+    assert total == 1 and entries[0]["n"] == 0
+
+
+def test_appends_go_to_journal_until_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(debug_log_index, "JOURNAL_COMPACT_RECORDS", 8)
+    idx = _index(tmp_path)
+    index_file, journal = idx._index_path("s4"), idx._journal_path("s4")
+    _write(idx, "s4", 0)
+    snapshot = index_file.read_bytes()
+    assert _write(idx, "s4", 1) == [1, 1]
+    # 追加只写旁路日志，索引文件不重写
+    assert index_file.read_bytes() == snapshot and journal.is_file()
+    assert [e["n"] for e in idx.page("s4")[0]] == [0, 1]
+
+    _write(idx, "s4", 2)
+    saved = tmp_path / "journal.bak"
+    shutil.copy(journal, saved)
+    # 第 8 条记录（每次写两份文件）触发合并：旁路日志并入索引后删除
+    assert _write(idx, "s4", 3) == [3, 3]
+    assert not journal.exists()
+    files = json.loads(index_file.read_text(encoding="utf-8"))["files"]
+    assert all(len(meta["offsets"]) == 4 for meta in files.values())
+
+    # 写完索引、删除旁路日志前中断：残留的旧记录不会重复并入
+    shutil.copy(saved, journal)
+    entries, total = idx.page("s4")
+    assert total == 4 and [e["n"] for e in entries] == [0, 1, 2, 3]
+    assert json.loads(idx.read_line("s4", 3))["n"] == 3
+    assert idx.read_line("s4", 4) is None
@@ -0,0 +1,124 @@
+"""LLM 响应缓存：key 规范化 / 内存与磁盘两级命中 / TTL / 并发合并 / 调用点开关"""
+
+import asyncio
+import os
+
+from app.config.settings import settings
+from app.core.llmapi import response_cache as rc
+from app.core.llmapi.base import LLMMessage, LLMResponse
+
+
+class CountingLLM:
+    def __init__(self, model="judge-model", content='{"complete": true}', delay=0.0):
+        self.model = model
+        self.content = content
+        self.delay = delay
+        self.calls = 0
+
+    async def chat(self, messages, temperature=0.7, max_tokens=None, **kwargs):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return LLMResponse(content=self.content, model=self.model, usage={"total_tokens": 9})
+
+
+MSGS = [LLMMessage(role="user", content="判断是否完成")]
+
+
+def test_cache_key_covers_model_and_params():
+    a = CountingLLM()
+    base = rc.cache_key(a, MSGS, temperature=0.1, response_format={"type": "json_object"})
+    assert base == rc.cache_key(
+        a, list(MSGS), temperature=0.10, response_format={"type": "json_object"}
+    )
+    assert base != rc.cache_key(a, MSGS, temperature=0.1)
+    assert base != rc.cache_key(
+        CountingLLM(model="other"), MSGS, temperature=0.1, response_format={"type": "json_object"}
+    )
+
+
+def test_memory_then_disk_tier_and_ttl(tmp_path):
+    llm = CountingLLM()
+    cache = rc.LLMResponseCache(max_entries=8, ttl_seconds=60, disk_dir=tmp_path)
+
+    async def run(c):
+        return await c.chat(llm, MSGS, site="t", temperature=0.1)
+
+    first = asyncio.run(run(cache))
+    second = asyncio.run(run(cache))
+    assert llm.calls == 1 and second.content == first.content and second.usage is None
+
+    # 新进程（空内存）仍可从磁盘命中
+    cold = rc.LLMResponseCache(max_entries=8, ttl_seconds=60, disk_dir=tmp_path)
+    asyncio.run(run(cold))
+    assert llm.calls == 1
+    assert cache.stats()["t"]["hits_memory"] == 1 and cold.stats()["t"]["hits_disk"] == 1
+
+    expired = rc.LLMResponseCache(max_entries=8, ttl_seconds=-1, disk_dir=tmp_path / "x")
+    asyncio.run(run(expired))
+    asyncio.run(run(expired))
+    assert llm.calls == 3
+
+
+def test_concurrent_identical_requests_are_coalesced_and_empty_not_stored():
+    llm = CountingLLM(delay=0.05)
+    cache = rc.LLMResponseCache(max_entries=8, ttl_seconds=60)
+
+    async def run():
+        return await asyncio.gather(
+            *[cache.chat(llm, MSGS, site="t", temperature=0.1) for _ in range(4)]
+        )
+
+    results = asyncio.run(run())
+    assert llm.calls == 1 and len({r.content for r in results}) == 1
+    assert cache.stats()["t"]["coalesced"] == 3
+
+    empty = CountingLLM(model="empty-model", content="")
+    asyncio.run(cache.chat(empty, MSGS, site="t", temperature=0.1))
+    asyncio.run(cache.chat(empty, MSGS, site="t", temperature=0.1))
+    assert empty.calls == 2
+
+
+def test_cached_chat_respects_site_flags(monkeypatch, tmp_path):
+    monkeypatch.setattr(rc._slot, "_instance", rc.LLMResponseCache(max_entries=8, ttl_seconds=60))
+    llm = CountingLLM()
+
+    async def call(site):
+        return await rc.cached_chat(llm, MSGS, site=site, temperature=0.1)
+
+    monkeypatch.setattr(settings, "LLM_RESPONSE_CACHE_ENABLED", False)
+    asyncio.run(call(rc.SITE_PENDING_JUDGE))
+    asyncio.run(call(rc.SITE_PENDING_JUDGE))
+    assert llm.calls == 2
+
+    monkeypatch.setattr(settings, "LLM_RESPONSE_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_RESPONSE_CACHE_SITES", rc.SITE_DIMENSION_CHECK)
+    asyncio.run(call(rc.SITE_PENDING_JUDGE))
+    assert llm.calls == 3
+    asyncio.run(call(rc.SITE_DIMENSION_CHECK))
+    asyncio.run(call(rc.SITE_DIMENSION_CHECK))
+    assert llm.calls == 4
+    assert rc.llm_cache_metrics()[rc.SITE_DIMENSION_CHECK]["hits_memory"] == 1
+
+
+def test_disk_tier_sweeps_expired_and_caps_size(tmp_path):
+    cache = rc.LLMResponseCache(ttl_seconds=60, disk_dir=tmp_path, disk_max_bytes=10_000)
+    for i in range(3):
+        cache.put(f"{i:02d}" * 32, LLMResponse(content=f"r{i}", model="m"), site="t")
+    files = sorted(tmp_path.glob("*/*.json"))
+    assert len(files) == 3
+    # 两条已超过 TTL（按写入时间）
+    for p in files[:2]:
+        os.utime(p, (0, 0))
+
+    cache.put("ff" * 32, LLMResponse(content="r3", model="m"), site="t")
+    assert len(list(tmp_path.glob("*/*.json"))) == 4  # 未到清扫间隔
+    cache._last_sweep = 0.0
+    cache.put("ee" * 32, LLMResponse(content="r4", model="m"), site="t")
+    assert sorted(p.name[:2] for p in tmp_path.glob("*/*.json")) == ["02", "ee", "ff"]
+    assert cache.swept == 2
+
+    size = files[2].stat().st_size
+    cache.disk_max_bytes = size
+    assert cache.sweep_disk() == 2
+    assert len(list(tmp_path.glob("*/*.json"))) == 1
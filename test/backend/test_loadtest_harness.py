@@ -0,0 +1,73 @@
+"""离线压测工具：分位数 / 阶段归因 / 假 OpenAI 流式服务"""
+
+import json
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+scripts_dir = Path(__file__).resolve().parents[2] / "src" / "backend" / "scripts"
+if str(scripts_dir) not in sys.path:
+    sys.path.insert(0, str(scripts_dir))
+
+from fake_openai_server import create_fake_openai_app, split_tokens  # noqa: E402
+from loadtest_simple_chat import attribute_probe, percentile, phase_at  # noqa: E402
+
+
+def test_percentile_interpolates():
+    assert percentile([], 50) is None
+    assert percentile([5], 99) == 5.0
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([10, 0], 100) == 10.0
+
+
+def test_phase_at_boundaries():
+    timing = {"t_send": 10.0, "t_first_chunk": 11.0, "t_last_chunk": 12.0, "t_end": 12.5}
+    assert phase_at(9.9, timing) is None
+    assert phase_at(10.5, timing) == "pre_stream"
+    assert phase_at(11.0, timing) == "stream"
+    assert phase_at(12.0, timing) == "stream"
+    assert phase_at(12.3, timing) == "post_stream"
+    # 没收到 chunk 的请求全部算 pre_stream
+    assert phase_at(20.0, {"t_send": 10.0}) == "pre_stream"
+
+
+def test_attribute_probe_groups_io_and_lag():
+    timings = {"r1": {"t_send": 0.0, "t_first_chunk": 1.0, "t_last_chunk": 2.0, "t_end": 3.0}}
+    io = [
+        {"rid": "r1", "op": "report.load_record", "start": 0.5, "ms": 4.0},
+        {"rid": "r1", "op": "conversation.locked_write", "start": 2.5, "ms": 6.0},
+        {"rid": "", "op": "activation.load_all", "start": 0.1, "ms": 1.0},
+    ]
+    lag = [{"t": 1.5, "ms": 7.0}, {"t": 5.0, "ms": 2.0}]
+    out = attribute_probe(timings, io, lag)
+    assert out["pre_stream"]["file_io_ms_total"] == 4.0
+    assert out["post_stream"]["file_io_ops"] == {"conversation.locked_write": 1}
+    assert out["background"]["file_io_ops"] == {"activation.load_all": 1}
+    assert out["stream"]["loop_lag_ms"]["max"] == 7.0
+    assert out["idle_loop_lag_ms"]["count"] == 1
+
+
+def test_fake_openai_stream_and_json_mode():
+    app = create_fake_openai_app(
+        token_rate=0, ttft_ms=0, chars_per_token=3, replies={"hi": {"stream": "abcdefg"}}
+    )
+    client = TestClient(app)
+    body = {"model": "m", "stream": True, "messages": [{"role": "user", "content": "hi"}]}
+    with client.stream("POST", "/v1/chat/completions", json=body) as resp:
+        lines = [line for line in resp.iter_lines() if line.startswith("data: ")]
+    assert lines[-1] == "data: [DONE]"
+    chunks = [json.loads(line[6:]) for line in lines[:-1]]
+    text = "".join((c["choices"][0]["delta"].get("content") or "") for c in chunks if c["choices"])
+    assert text == "abcdefg"
+    assert chunks[-1]["usage"]["completion_tokens"] == len(split_tokens("abcdefg", 3))
+
+    resp = client.post(
+        "/v1/chat/completions",
+        json={
+            "model": "m",
+            "messages": [{"role": "user", "content": "x"}],
+            "response_format": {"type": "json_object"},
+        },
+    )
+    assert resp.json()["choices"][0]["message"]["content"] == "{}"
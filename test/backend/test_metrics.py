@@ -0,0 +1,100 @@
+"""进程内指标：注册表渲染 / HTTP 路由埋点与 /metrics / 锁与 JSON 计时 / LLM 首包与 token"""
+
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.config.settings import settings
+from app.core.llmapi.base import BaseLLMProvider, LLMResponse
+from app.core.llmapi.instrumentation import llm_call_site
+from app.main import app
+from app.utils import metrics, storage_codec
+
+
+def test_registry_renders_prometheus_text():
+    reg = metrics.MetricsRegistry()
+    c = reg.counter("demo_total", "演示计数", ("kind",))
+    c.inc(kind='a"b')
+    c.inc(2, kind='a"b')
+    h = reg.histogram("demo_seconds", "演示耗时", buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 5.0):
+        h.observe(v)
+    reg.register_collector(lambda: [("demo_gauge", "gauge", "演示", [({"x": "1"}, 7)])])
+    text = reg.render()
+    assert 'demo_total{kind="a\\"b"} 3' in text
+    assert 'demo_seconds_bucket{le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{le="1"} 2' in text
+    assert 'demo_seconds_bucket{le="+Inf"} 3' in text
+    assert "demo_seconds_count 3" in text
+    assert "# TYPE demo_gauge gauge" in text and 'demo_gauge{x="1"} 7' in text
+
+
+def test_metrics_endpoint_reports_route_templates(monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG", True)
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    client = TestClient(app)
+    assert client.get("/health").status_code == 200
+    assert client.get("/api/v1/simple-chat/history").status_code == 401
+    body = client.get("/metrics").text
+    assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in body
+    # include_router 挂载的路由：标签带 /api/v1 前缀，与真实 URL 一致
+    assert 'route="/api/v1/simple-chat/history",status="401"' in body
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+    # 非 DEBUG 环境未配置 token：不暴露
+    monkeypatch.setattr(settings, "DEBUG", False)
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    assert client.get("/metrics").status_code == 404
+
+
+def test_lock_and_json_helpers_record_timings():
+    before_wait = metrics.FILE_LOCK_WAIT_SECONDS.snapshot(store="t")[0]
+    with metrics.timed_lock(threading.Lock(), "t"):
+        pass
+    assert metrics.FILE_LOCK_WAIT_SECONDS.snapshot(store="t")[0] == before_wait + 1
+    assert metrics.FILE_LOCK_HOLD_SECONDS.snapshot(store="t")[0] >= 1
+
+    raw = storage_codec.dumps({"a": 1}, "t")
+    assert storage_codec.loads(raw, "t") == {"a": 1}
+    assert metrics.STORAGE_JSON_SECONDS.snapshot(file_type="t", op="load")[0] >= 1
+    assert metrics.STORAGE_JSON_SECONDS.snapshot(file_type="t", op="dump")[0] >= 1
+
+
+class _StreamProvider(BaseLLMProvider):
+    async def chat(self, messages, temperature=0.7, max_tokens=None, **kwargs):
+        return LLMResponse(
+            content="x", model=self.model, usage={"prompt_tokens": 5, "completion_tokens": 2}
+        )
+
+    async def chat_stream(self, messages, temperature=0.7, max_tokens=None, **kwargs):
+        yield "a"
+        self._last_stream_usage = {"prompt_tokens": 3, "completion_tokens": 1}
+
+    async def count_tokens(self, text):
+        return 0
+
+    async def estimate_cost(self, messages, response_tokens=None):
+        return {}
+
+
+def test_llm_calls_record_ttft_duration_and_tokens():
+    llm = _StreamProvider("metrics-model")
+    labels = {"provider": "_StreamProvider", "model": "metrics-model", "site": "unit"}
+
+    async def run():
+        with llm_call_site("unit"):
+            await llm.chat([])
+            return [c async for c in llm.chat_stream([])]
+
+    assert asyncio.run(run()) == ["a"]
+    assert metrics.LLM_TTFT_SECONDS.snapshot(**labels)[0] == 1
+    assert metrics.LLM_DURATION_SECONDS.snapshot(kind="chat", outcome="ok", **labels)[0] == 1
+    text = metrics.render_metrics()
+    series = 'llm_tokens_total{provider="_StreamProvider",model="metrics-model",site="unit"'
+    assert f'{series},direction="in"}} 8' in text
+    assert f'{series},direction="out"}} 3' in text
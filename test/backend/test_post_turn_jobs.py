@@ -0,0 +1,194 @@
+"""轮次后置任务队列：幂等入队 / 退避重试 / 结论卡后台精炼的状态校验"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.main import app  # noqa: F401  先加载应用，避免 simple_chat_routes 循环导入
+
+# isort: split
+import app.api.v1.simple_chat_routes as simple_chat_api
+from app.config.settings import settings
+from app.utils import post_turn_jobs
+from app.utils.conversation_file_manager import ConversationFileManager
+from app.utils.post_turn_jobs import (
+    JOB_STATUS_DONE,
+    JOB_STATUS_FAILED,
+    JOB_STATUS_QUEUED,
+    JOB_STATUS_RUNNING,
+    PostTurnJobQueue,
+    PostTurnJobWorker,
+    register_post_turn_handler,
+)
+
+
+def test_enqueue_is_idempotent_and_retry_backs_off(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "POST_TURN_JOB_RETRY_BASE_SECONDS", 30.0)
+    q = PostTurnJobQueue(tmp_path / "jobs.sqlite3")
+    a = q.enqueue("k", {"x": 1}, idem_key="r:t:1:k", max_attempts=2)
+    b = q.enqueue("k", {"x": 2}, idem_key="r:t:1:k", max_attempts=2)
+    assert a["job_id"] == b["job_id"] and b["payload"] == {"x": 1}
+
+    job = q.claim()
+    assert job["attempts"] == 1 and q.claim() is None
+    assert q.fail(job["job_id"], "boom") == JOB_STATUS_QUEUED
+    # 退避期内不可再次领取
+    assert q.claim() is None
+    with q._tx() as conn:
+        conn.execute("UPDATE post_turn_jobs SET next_run_at = 0")
+    job = q.claim()
+    assert job["attempts"] == 2
+    assert q.fail(job["job_id"], "boom") == JOB_STATUS_FAILED
+    assert q.get(job["job_id"])["error"] == "boom"
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    """隔离全局处理函数注册表：测试内注册的处理函数在结束后移除。"""
+    monkeypatch.setattr(post_turn_jobs, "_HANDLERS", dict(post_turn_jobs._HANDLERS))
+    return post_turn_jobs._HANDLERS
+
+
+def test_complete_and_fail_require_current_lease(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "POST_TURN_JOB_RETRY_BASE_SECONDS", 0.0)
+    stale = PostTurnJobQueue(tmp_path / "jobs.sqlite3")
+    fresh = PostTurnJobQueue(tmp_path / "jobs.sqlite3")
+    fresh.owner_id = "other-host:1"
+    job = stale.enqueue("k", {}, idem_key="lease", max_attempts=3)
+    stale.claim()
+    # 租约过期，被另一个 worker 重新领取
+    with stale._tx() as conn:
+        conn.execute("UPDATE post_turn_jobs SET lease_until = 0")
+    assert fresh.claim()["attempts"] == 2
+
+    assert stale.complete(job["job_id"], {"from": "stale"}) is False
+    assert stale.fail(job["job_id"], "late") == JOB_STATUS_RUNNING
+    assert fresh.complete(job["job_id"], {"from": "fresh"}) is True
+    done = stale.get(job["job_id"])
+    assert done["status"] == JOB_STATUS_DONE and done["result"] == {"from": "fresh"}
+
+
+def test_worker_retries_until_final_attempt(tmp_path, monkeypatch, handlers):
+    monkeypatch.setattr(settings, "POST_TURN_JOB_RETRY_BASE_SECONDS", 0.0)
+    q = PostTurnJobQueue(tmp_path / "jobs.sqlite3")
+    seen = []
+
+    async def _handler(payload, *, final_attempt):
+        seen.append(final_attempt)
+        if not final_attempt:
+            raise RuntimeError("transient")
+        return {"ok": payload["v"]}
+
+    register_post_turn_handler("test.flaky", _handler)
+    job = q.enqueue("test.flaky", {"v": 7}, idem_key="flaky", max_attempts=3)
+    assert asyncio.run(PostTurnJobWorker(q).run_once()) == 3
+    assert seen == [False, False, True]
+    done = q.get(job["job_id"])
+    assert done["status"] == JOB_STATUS_DONE and done["result"] == {"ok": 7}
+
+
+def _seed_pending_thread(tmp_path, draft):
+    reports = tmp_path / "reports"
+    mgr = ConversationFileManager(base_dir=str(reports))
+    fp = reports / "rep1" / "values__t1.json"
+    fp.parent.mkdir(parents=True, exist_ok=True)
+    fp.write_text(
+        json.dumps(
+            {
+                "messages": [],
+                "metadata": {"conclusion_state": "pending", "conclusion_draft": draft},
+            },
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+    return mgr, fp
+
+
+def _job_payload(tmp_path, draft):
+    return {
+        "report_id": "rep1",
+        "thread_id": "t1",
+        "category": "values__t1",
+        "storage_root": str(tmp_path),
+        "phase": "values",
+        "source": simple_chat_api.POST_TURN_SOURCE_PENDING_READY,
+        "draft": draft,
+        "user_count": 3,
+        "conv_history": [],
+    }
+
+
+def test_pending_conclusion_job_refines_draft(tmp_path, monkeypatch):
+    draft = {"summary": "草案", "keywords": ["成长"]}
+    _, fp = _seed_pending_thread(tmp_path, draft)
+
+    async def fake_check(*args, **kwargs):
+        assert kwargs.get("skip_completion_check") is True
+        return {"summary": "精炼版", "keywords": ["成长", "意义"]}
+
+    monkeypatch.setattr(simple_chat_api, "check_dimension_complete", fake_check)
+    monkeypatch.setattr(
+        simple_chat_api, "_get_reasoning_llm_provider", lambda vip_level=1: object()
+    )
+
+    ret = asyncio.run(
+        simple_chat_api._run_pending_conclusion_job(
+            _job_payload(tmp_path, draft), final_attempt=False
+        )
+    )
+    assert ret["dimension_conclusion"]["summary"] == "精炼版"
+    data = json.loads(fp.read_text(encoding="utf-8"))
+    assert data["metadata"]["conclusion_draft"]["summary"] == "精炼版"
+    note = json.loads((fp.parent / "values__t1__note" / "note.json").read_text(encoding="utf-8"))
+    assert note["notes"][-1]["type"] == "pending_conclusion_created"
+
+
+def test_pending_conclusion_job_skips_stale_thread(tmp_path, monkeypatch):
+    draft = {"summary": "草案", "keywords": ["成长"]}
+    _, fp = _seed_pending_thread(tmp_path, draft)
+    # 任务执行前用户已确认：状态已变化，后台结果不得覆盖
+    data = json.loads(fp.read_text(encoding="utf-8"))
+    data["metadata"]["conclusion_state"] = "confirmed"
+    fp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    async def fake_check(*args, **kwargs):
+        return {"summary": "精炼版"}
+
+    monkeypatch.setattr(simple_chat_api, "check_dimension_complete", fake_check)
+    monkeypatch.setattr(
+        simple_chat_api, "_get_reasoning_llm_provider", lambda vip_level=1: object()
+    )
+
+    ret = asyncio.run(
+        simple_chat_api._run_pending_conclusion_job(
+            _job_payload(tmp_path, draft), final_attempt=True
+        )
+    )
+    assert ret == {"dimension_conclusion": None, "stale": True}
+    assert json.loads(fp.read_text(encoding="utf-8"))["metadata"]["conclusion_state"] == "confirmed"
+
+
+def test_rewound_turn_enqueues_new_job(tmp_path, monkeypatch):
+    """回退后重跑同一轮（用户消息数相同）：新一轮拿到新任务，而不是上一轮已完成的结果。"""
+    monkeypatch.setattr(post_turn_jobs, "_queue", PostTurnJobQueue(tmp_path / "jobs.sqlite3"))
+    fields = dict(report_id="rep1", thread_id="t1", category="values__t1", phase="values")
+    payload = {"source": simple_chat_api.POST_TURN_SOURCE_PENDING_READY, "user_count": 3}
+    kind = simple_chat_api.POST_TURN_KIND_PENDING_CONCLUSION
+
+    async def run():
+        ctx = simple_chat_api._new_post_turn_ctx(**fields)
+        first = await simple_chat_api._enqueue_post_turn(kind, ctx, payload)
+        # 同一轮内重复入队仍幂等
+        again = await simple_chat_api._enqueue_post_turn(kind, ctx, payload)
+        assert again["job_id"] == first["job_id"]
+        job = post_turn_jobs._queue.claim()
+        post_turn_jobs._queue.complete(job["job_id"], {"dimension_conclusion": {"summary": "旧"}})
+
+        rerun_ctx = simple_chat_api._new_post_turn_ctx(**fields)
+        return first, await simple_chat_api._enqueue_post_turn(kind, rerun_ctx, payload)
+
+    first, rerun = asyncio.run(run())
+    assert rerun["job_id"] != first["job_id"]
+    assert rerun["status"] == JOB_STATUS_QUEUED and rerun.get("result") is None
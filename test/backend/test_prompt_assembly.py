@@ -0,0 +1,162 @@
+"""simple-chat system prompt 分层组装：与直接渲染逐字节一致，静态层复用，前缀稳定度统计"""
+
+import pytest
+from jinja2 import Environment
+
+from app.main import app  # noqa: F401  先加载 app，避免循环导入
+
+# isort: split
+import app.api.v1.simple_chat_routes as routes
+from app.domain.prompts import get_simple_chat_system_prompt
+from app.domain.prompts.assembly import prompt_assembly_metrics, reset_prompt_assembly
+
+OVERRIDE = (
+    "实验模板 {{ phase }}\n"
+    "{% if rumination_step_addon %}[{{ rumination_step_addon }}]{% endif %}\n"
+    "题库：{{ question_bank }}\n"
+    "信息：{{ basic_info }}{{ prior_block }}"
+)
+
+
+def _reference(
+    phase,
+    question_bank,
+    basic_info,
+    prior_context,
+    template_override,
+    extra_goal_hint,
+    values_info,
+    rumination_step_addon,
+    rumination_neg_injection,
+    purpose_progress_injection,
+):
+    """逐段直接渲染（组装引擎引入前的拼接规则）。"""
+    prior_block = (
+        f"\n\n以下是该来访者在上一轮咨询中的谈话结果，供你参考：\n{prior_context}"
+        if prior_context.strip()
+        else ""
+    )
+    context = {
+        "phase": phase,
+        "question_bank": question_bank,
+        "basic_info": basic_info,
+        "prior_block": prior_block,
+        "values_info": values_info.strip(),
+        "rumination_step_addon": rumination_step_addon.strip(),
+    }
+    if template_override:
+        base = (
+            Environment(trim_blocks=True, lstrip_blocks=True)
+            .from_string(template_override)
+            .render(**context)
+        )
+    else:
+        base = get_simple_chat_system_prompt(context)
+    if extra_goal_hint.strip():
+        base = f"{base}\n\n[管理员调试目标补充]\n{extra_goal_hint.strip()}"
+    if rumination_neg_injection.strip():
+        base = f"{base}\n{rumination_neg_injection.strip()}"
+    if phase == "purpose" and purpose_progress_injection.strip():
+        base = f"{base}\n\n{purpose_progress_injection.strip()}"
+    if phase == "rumination":
+        return base
+    return f"{base}{routes._state_json_protocol(phase)}"
+
+
+@pytest.fixture(autouse=True)
+def _fresh_assembler():
+    reset_prompt_assembly()
+    yield
+    reset_prompt_assembly()
+
+
+@pytest.mark.parametrize(
+    "phase", ["values", "strengths", "interests", "purpose", "rumination", "other"]
+)
+@pytest.mark.parametrize("override", [None, OVERRIDE])
+@pytest.mark.parametrize(
+    "dynamic",
+    [
+        dict(question_bank="", basic_info="暂无", prior_context=""),
+        dict(
+            question_bank="1. 你最骄傲的事？",
+            basic_info="张三，设计师",
+            prior_context="上一轮确认：成长",
+        ),
+    ],
+)
+def test_assembled_prompt_matches_direct_render(phase, override, dynamic):
+    extras = dict(
+        template_override=override,
+        extra_goal_hint="  多追问细节 ",
+        values_info=" 成长、自由 ",
+        rumination_step_addon="子步 2：逐条筛选",
+        rumination_neg_injection="[负向探索] 请追问反例",
+        purpose_progress_injection="[使命进度] 2/5",
+    )
+    args = dict(phase=phase, **dynamic, **extras)
+    expected = _reference(
+        **{k: (v or "") if k != "template_override" else v for k, v in args.items()}
+    )
+    for _ in range(2):  # 第二次走预编译缓存
+        assert routes._build_system_prompt(**args) == expected
+
+
+def test_static_layers_reused_and_prefix_ratio_reported():
+    for turn in range(5):
+        routes._build_system_prompt(
+            "values",
+            question_bank="1. 题目",
+            basic_info=f"第 {turn} 轮的基本信息",
+            prior_context="",
+        )
+    stats = prompt_assembly_metrics()["values"]
+    assert stats["assemblies"] == 5 and stats["compiled"] == 1
+    assert 0.3 < stats["prefix_stable_ratio"] < 1.0
+
+
+def test_stable_prefix_identical_across_turns():
+    from app.domain.prompts.assembly import assemble_simple_chat_system_prompt
+
+    a = assemble_simple_chat_system_prompt("strengths", question_bank="题库", basic_info="甲")
+    b = assemble_simple_chat_system_prompt("strengths", question_bank="题库", basic_info="乙")
+    n = a.stable_prefix_chars
+    assert n > 0 and a.text[:n] == b.text[:n]
+
+
+@pytest.mark.parametrize(
+    "override",
+    [
+        "信息：{{ basic_info|trim }}|{{ prior_block|length }}",
+        "{% if '成长' in question_bank %}含成长{% else %}不含{% endif %}：{{ question_bank }}",
+    ],
+)
+def test_override_that_transforms_slots_matches_direct_render(override):
+    args = dict(
+        phase="values", question_bank="1. 谈谈成长", basic_info="  张三  ", prior_context="上一轮"
+    )
+    expected = _reference(
+        **args,
+        template_override=override,
+        extra_goal_hint="",
+        values_info="",
+        rumination_step_addon="",
+        rumination_neg_injection="",
+        purpose_progress_injection="",
+    )
+    for _ in range(2):
+        assert routes._build_system_prompt(**args, template_override=override) == expected
+
+
+def test_compile_layers_rejects_template_transforming_slots():
+    from app.domain.prompts.assembly import compile_layers
+
+    tpl = Environment().from_string("A{{ basic_info|trim }}B{{ question_bank }}")
+    render = lambda ctx: tpl.render(**ctx)  # noqa: E731
+    present = frozenset({"basic_info", "question_bank"})
+    values = {"basic_info": " 甲 ", "question_bank": "题"}
+    assert compile_layers(render, {}, present).exact  # 单看哨兵渲染看不出问题
+    assert not compile_layers(render, {}, present, verify=values).exact
+    plain = Environment().from_string("A{{ basic_info }}B{{ question_bank }}")
+    layers = compile_layers(lambda ctx: plain.render(**ctx), {}, present, verify=values)
+    assert layers.exact and layers.fill(values)[0] == "A 甲 B题"
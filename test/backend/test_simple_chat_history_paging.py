@@ -0,0 +1,107 @@
+"""/simple-chat/history：消息 id 游标分页 + ETag / If-None-Match 304"""
+
+from __future__ import annotations
+
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.utils.simple_activation_manager as activation_manager_mod
+from app.api.v1.auth import get_current_user
+from app.main import app
+from app.utils.simple_activation_manager import SimpleActivationManager
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+REPORT_FIXTURE_DIR = (
+    PROJECT_ROOT / "test" / "backend" / "fixtures" / "simple_chat_reports" / "mock_values_pending"
+)
+THREAD_ID = "t_mock_pending_001"
+TEST_USER = {"user_id": "pytest-history-user", "email": "pytest-history@example.com"}
+
+
+@pytest.fixture()
+def history_env(tmp_path, monkeypatch):
+    simple_root = tmp_path / "simple"
+    monkeypatch.setattr(activation_manager_mod, "get_simple_base_dir", lambda: simple_root)
+    record = json.loads((REPORT_FIXTURE_DIR / "record.json").read_text(encoding="utf-8"))
+    report_dir = simple_root / "reports" / record["report_id"]
+    shutil.copytree(REPORT_FIXTURE_DIR, report_dir)
+
+    manager = SimpleActivationManager(base_dir=str(simple_root))
+    rec = manager.create_activation(mode="values", ttl_minutes=180)
+    manager.claim_owner(rec.code, TEST_USER)
+    record.update(activation_code=rec.code, user_id=TEST_USER["user_id"])
+    (report_dir / "record.json").write_text(
+        json.dumps(record, ensure_ascii=False), encoding="utf-8"
+    )
+
+    conv_file = report_dir / f"values__{THREAD_ID}.json"
+    conv = json.loads(conv_file.read_text(encoding="utf-8"))
+    conv["messages"] = [
+        {"id": f"m{i}", "role": "user" if i % 2 else "assistant", "content": f"第{i}条"}
+        for i in range(1, 8)
+    ]
+    conv_file.write_text(json.dumps(conv, ensure_ascii=False), encoding="utf-8")
+
+    app.dependency_overrides[get_current_user] = lambda: TEST_USER
+    client = TestClient(app)
+
+    def get(headers=None, **params):
+        return client.get(
+            "/api/v1/simple-chat/history",
+            params={
+                "activation_code": rec.code,
+                "phase": "values",
+                "thread_id": THREAD_ID,
+                **params,
+            },
+            headers={"Authorization": "Bearer t", **(headers or {})},
+        )
+
+    yield get, conv_file
+    app.dependency_overrides.clear()
+
+
+def _ids(resp):
+    return [m["id"] for m in resp.json()["data"]["messages"]]
+
+
+def test_history_etag_returns_304_until_file_changes(history_env):
+    get, conv_file = history_env
+    full = get()
+    assert full.status_code == 200
+    assert "page" not in full.json()["data"]
+    assert _ids(full) == [f"m{i}" for i in range(1, 8)]
+    etag = full.headers["etag"]
+    assert etag.startswith('"') and etag.endswith('"')
+
+    cached = get(headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.headers["etag"] == etag
+    # 分页参数参与 ETag
+    assert get(headers={"If-None-Match": etag}, limit=2).status_code == 200
+
+    conv = json.loads(conv_file.read_text(encoding="utf-8"))
+    conv["messages"].append({"id": "m8", "role": "assistant", "content": "新回复"})
+    conv_file.write_text(json.dumps(conv, ensure_ascii=False), encoding="utf-8")
+    fresh = get(headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+    assert _ids(fresh)[-1] == "m8"
+
+
+def test_history_cursor_pagination(history_env):
+    get, _ = history_env
+    tail = get(limit=3)
+    assert _ids(tail) == ["m5", "m6", "m7"]
+    page = tail.json()["data"]["page"]
+    assert page["has_more_before"] and not page["has_more_after"] and page["total"] == 7
+
+    older = get(before="m5", limit=3)
+    assert _ids(older) == ["m2", "m3", "m4"]
+    assert _ids(get(before="m2", limit=3)) == ["m1"]
+    assert _ids(get(after="m3", limit=2)) == ["m4", "m5"]
+    assert _ids(get(after="m7")) == []
+    assert _ids(get(after="m2", before="m5")) == ["m3", "m4"]
+    assert get(after="missing").status_code == 400
@@ -0,0 +1,68 @@
+"""SSE 可见文本合帧：首帧立即下发 / 阈值合并 / 窗口到期兜底 flush / 指标累计"""
+
+import asyncio
+import json
+
+from app.utils.sse_coalesce import (
+    FLUSH_DUE,
+    SSEChunkCoalescer,
+    iter_with_flush_deadline,
+    sse_stream_metrics,
+)
+
+
+def _text(frame):
+    assert frame.startswith("data: ") and frame.endswith("\n\n")
+    return json.loads(frame[6:])["chunk"]
+
+
+def test_first_delta_is_immediate_then_byte_threshold_merges():
+    c = SSEChunkCoalescer(window_ms=10_000, max_bytes=6)
+    assert _text(c.push("你")) == "你"
+    assert c.push("ab") is None
+    assert c.push("cd") is None
+    assert _text(c.push("ef")) == "abcdef"
+    assert c.push("g") is None
+    assert _text(c.flush()) == "g"
+    assert c.flush() is None
+    assert c.stats()["deltas"] == 5 and c.stats()["frames"] == 3
+
+
+def test_disabled_coalescer_emits_every_delta():
+    c = SSEChunkCoalescer(window_ms=0, max_bytes=0)
+    frames = [c.push(x) for x in ("a", "b", "c")]
+    assert [_text(f) for f in frames] == ["a", "b", "c"]
+
+
+def test_deadline_flushes_when_upstream_stalls():
+    async def source():
+        yield "a"
+        yield "b"
+        await asyncio.sleep(0.2)
+        yield "c"
+
+    async def run():
+        c = SSEChunkCoalescer(window_ms=20, max_bytes=1 << 20)
+        out = []
+        async for item in iter_with_flush_deadline(source(), c):
+            if item is FLUSH_DUE:
+                out.append(("flush", _text(c.flush())))
+                continue
+            frame = c.push(item)
+            if frame:
+                out.append(("push", _text(frame)))
+        tail = c.flush()
+        if tail:
+            out.append(("tail", _text(tail)))
+        return out, c
+
+    before = sse_stream_metrics()
+    out, c = asyncio.run(run())
+    # "b" 在上游停顿期间由窗口到期下发，不必等到 "c"
+    assert out == [("push", "a"), ("flush", "b"), ("tail", "c")]
+    c.finish()
+    c.finish()
+    after = sse_stream_metrics()
+    assert after["streams"] - before["streams"] == 1
+    assert after["frames"] - before["frames"] == 3
+    assert after["bytes"] - before["bytes"] == c.stats()["bytes"]
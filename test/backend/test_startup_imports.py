@@ -0,0 +1,31 @@
+"""启动导入基准：import app.main 不拉起 LangGraph / openai / tiktoken，总耗时在预算内，按路由汇总可解析"""
+
+import os
+
+from app.utils import import_profile
+
+# 冷启动预算（毫秒）；CI 机器较慢时可通过环境变量放宽
+STARTUP_IMPORT_BUDGET_MS = float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", "6000"))
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       100 |        100 |     leaf
+import time:       200 |        300 |   app.api.v1.chat
+import time:        50 |         50 |   fastapi
+import time:        10 |        360 | app.main
+"""
+
+
+def test_parse_importtime_attributes_self_time_to_routers():
+    profile = import_profile.parse_importtime(SAMPLE, "app.main")
+    assert [r.name for r in profile.roots] == ["app.main"]
+    assert profile.total_us == 360
+    assert profile.by_router() == {"app.api.v1.chat": 300, "<base>": 60}
+    assert profile.loaded("fastapi") and not profile.loaded("langgraph")
+
+
+def test_app_main_import_defers_heavy_dependencies_and_fits_budget():
+    profile = import_profile.measure_import("app.main")
+    loaded = [m for m in import_profile.DEFERRED_MODULES if profile.loaded(m)]
+    assert loaded == [], import_profile.format_report(profile)
+    assert profile.total_us / 1000 < STARTUP_IMPORT_BUDGET_MS, import_profile.format_report(profile)
+    assert "app.api.v1.simple_chat_routes" in profile.by_router()
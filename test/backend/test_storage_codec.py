@@ -0,0 +1,215 @@
+"""文件存储 JSON 编解码：各后端与标准库往返一致、历史缩进文件兼容、schema 解码与各存储接入"""
+
+import json
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from app.config.settings import settings
+from app.utils import storage_codec
+from app.utils.conversation_file_manager import ConversationFileManager
+from app.utils.rumination_progress import load_rumination_progress, save_rumination_progress
+from app.utils.simple_activation_manager import ActivationRecord, SimpleActivationManager
+from app.utils.storage_codec import CONVERSATION_SCHEMA, DataclassSchema
+
+BACKENDS = storage_codec.available_backends()
+
+SAMPLE = {
+    "report_id": "rpt-1",
+    "messages": [
+        {
+            "role": "user",
+            "content": '你好 😀 "quoted" \\ \n\t\u0001',
+            "created_at": "2026-01-01T00:00:00Z",
+            "filter_step": None,
+            "token_usage": {"prompt_tokens": 12, "total_tokens": 30},
+        },
+        {
+            "role": "assistant",
+            "content": "",
+            "card_payload": {"keywords": [], "score": 0.1, "big": 2**63 - 1},
+        },
+    ],
+    "metadata": {
+        "total_messages": 2,
+        "ratio": 1e-7,
+        "neg": -0.0,
+        "flags": [True, False],
+        "empty": {},
+    },
+    "unicode_key_中文": "  ",
+}
+
+
+@pytest.fixture(autouse=True)
+def _compact(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_JSON_BACKEND", "auto")
+    monkeypatch.setattr(settings, "STORAGE_JSON_PRETTY", False)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("pretty", [False, True])
+def test_round_trip_matches_stdlib(backend, pretty):
+    text = storage_codec.dumps(SAMPLE, "t", pretty=pretty, backend=backend)
+    assert json.loads(text) == SAMPLE
+    assert storage_codec.loads(text, "t") == SAMPLE
+    assert storage_codec.loads(text.encode("utf-8"), "t") == SAMPLE
+    assert ("\n" in text) is pretty
+    # 历史文件（标准库 indent=2）照常读取
+    legacy = json.dumps(SAMPLE, ensure_ascii=False, indent=2)
+    assert storage_codec.loads(legacy, "t") == SAMPLE
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_values_fast_backends_reject_fall_back_to_stdlib(backend):
+    data = {"huge": 2**70, "surrogate": "\ud800", 1: "int key"}
+    text = storage_codec.dumps(data, "t", backend=backend)
+    assert json.loads(text) == json.loads(json.dumps(data))
+
+    stamp = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    assert json.loads(storage_codec.dumps({"t": stamp}, "t", default=str, backend=backend)) == {
+        "t": str(stamp)
+    }
+    with pytest.raises(TypeError):
+        storage_codec.dumps({"t": stamp}, "t", backend=backend)
+
+
+def test_decode_errors_are_json_decode_errors():
+    for raw in ("{broken", "", b"\xff\xfe{}"):
+        with pytest.raises(json.JSONDecodeError):
+            storage_codec.loads(raw, "t")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_huge_ints_and_non_finite_floats_round_trip_like_stdlib(backend):
+    huge = 2**70
+    assert storage_codec.loads('{"x": 1180591620717411303424}', "t") == {"x": huge}
+    assert storage_codec.loads(b"[-9223372036854775809]", "t") == [-(2**63) - 1]
+
+    data = {"nan": float("nan"), "inf": [float("inf"), float("-inf")], "huge": huge, "none": None}
+    text = storage_codec.dumps(data, "t", backend=backend)
+    assert text == json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    back = storage_codec.loads(text, "t")
+    assert back["nan"] != back["nan"] and back["inf"] == [float("inf"), float("-inf")]
+    assert back["huge"] == huge and back["none"] is None
+
+
+def test_sort_keys_and_backend_resolution(monkeypatch):
+    assert (
+        storage_codec.dumps({"b": 1, "a": {"d": 1, "c": 2}}, "t", sort_keys=True)
+        == '{"a":{"c":2,"d":1},"b":1}'
+    )
+    with pytest.raises(ValueError):
+        storage_codec.resolve_backend("yaml")
+    monkeypatch.setattr(storage_codec, "msgspec", None)
+    assert storage_codec.resolve_backend("msgspec") == "stdlib"
+
+
+def test_pretty_setting_matches_stdlib_layout(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_JSON_PRETTY", True)
+    data = {"a": [1, {"b": "中"}], "c": {}, "d": []}
+    assert storage_codec.dumps(data, "t") == json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def test_dataclass_schema_decodes_legacy_activation_records():
+    legacy = {
+        "OLD": {
+            "code": "OLD",
+            "session_id": "s1",
+            "mode": "combined",
+            "created_at": "c",
+            "expires_at": "e",
+            "last_activity_at": "l",
+        },
+        "EXTRA": {
+            "code": "EXTRA",
+            "session_id": "s2",
+            "mode": "m",
+            "created_at": "c",
+            "expires_at": "e",
+            "last_activity_at": "l",
+            "unknown_field": 1,
+        },
+        "PARTIAL": {"code": "PARTIAL"},
+        "JUNK": [1, 2],
+    }
+    schema = DataclassSchema(ActivationRecord)
+    records = schema.decode_map(json.dumps(legacy), "t")
+    assert list(records) == ["OLD"]
+    assert records["OLD"].vip_level == 1 and records["OLD"].is_sandbox is False
+    assert schema.decode_map("[]", "t") == {}
+
+    encoded = schema.encode_map(records, "t")
+    assert json.loads(encoded) == {"OLD": asdict(records["OLD"])}
+    assert list(json.loads(encoded)["OLD"]) == list(asdict(records["OLD"]))  # 字段顺序与定义一致
+
+
+def test_activation_manager_round_trip(tmp_path):
+    mgr = SimpleActivationManager(base_dir=str(tmp_path))
+    legacy = {
+        "CODE1": {
+            "code": "CODE1",
+            "activation_session_id": "sid-1",
+            "mode": "combined",
+            "created_at": "2026-01-01T00:00:00+00:00",
+            "expires_at": "2099-01-01T00:00:00+00:00",
+            "last_activity_at": "2026-01-01T00:00:00+00:00",
+            "status": "active",
+        }
+    }
+    (tmp_path / "activations.json").write_text(json.dumps(legacy, indent=2), encoding="utf-8")
+    records = mgr._load_all()
+    assert records["CODE1"].session_id == "sid-1"  # 历史字段互补
+
+    mgr._save_all(records)
+    text = (tmp_path / "activations.json").read_text(encoding="utf-8")
+    assert "\n" not in text and json.loads(text)["CODE1"]["status"] == "active"
+    assert mgr._load_all() == records
+
+
+def test_conversation_schema_coerces_structure():
+    doc = CONVERSATION_SCHEMA.loads(
+        '{"messages": [{"role": "user"}, "junk", null], "metadata": []}', "t"
+    )
+    assert doc == {"messages": [{"role": "user"}], "metadata": {}}
+    assert CONVERSATION_SCHEMA.loads('{"messages": "x"}', "t") == {"messages": []}
+    with pytest.raises(json.JSONDecodeError):
+        CONVERSATION_SCHEMA.loads("[]", "t")
+
+
+async def test_conversation_store_reads_legacy_and_writes_compact(tmp_path):
+    mgr = ConversationFileManager(base_dir=str(tmp_path))
+    fp = mgr._get_file_path("rpt-1", "values")
+    legacy = {
+        "report_id": "rpt-1",
+        "category": "values",
+        "messages": [{"role": "user", "content": "旧"}],
+        "metadata": {"created_at": "c", "updated_at": "u"},
+    }
+    fp.write_text(json.dumps(legacy, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    await mgr.append_message("rpt-1", "values", {"role": "assistant", "content": "新"})
+    text = fp.read_text(encoding="utf-8")
+    assert "\n" not in text and "新" in text
+    messages = await mgr.get_messages("rpt-1", "values")
+    assert [m["content"] for m in messages] == ["旧", "新"]
+
+    fp.write_text("[1, 2]", encoding="utf-8")  # 根对象损坏：按新文件重建
+    await mgr.append_message("rpt-1", "values", {"role": "user", "content": "重建"})
+    assert [m["content"] for m in await mgr.get_messages("rpt-1", "values")] == ["重建"]
+
+
+def test_rumination_progress_round_trip(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_JSON_PRETTY", True)
+    saved = save_rumination_progress(
+        tmp_path,
+        "rpt-1",
+        main_section="filter",
+        filter_step=2,
+        filter_step_snapshots={"1": {"submitted": [{"name": "甲"}]}},
+    )
+    path = tmp_path / "rpt-1" / "rumination_progress.json"
+    assert path.read_text(encoding="utf-8").startswith("{\n  ")
+    assert load_rumination_progress(tmp_path, "rpt-1") == saved
@@ -0,0 +1,169 @@
+"""每轮时长统计向量化实现：与逐条计算逐项一致（含各种时间戳写法），批量入口按开关回退"""
+
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.config.settings import settings
+from app.services import turn_stats_vectorized
+from app.services.conversation_stats_service import (
+    compute_turn_stats_from_messages,
+    compute_turn_stats_many,
+)
+from app.services.turn_stats_vectorized import compute_turn_stats_batch
+
+scripts_dir = Path(__file__).resolve().parents[2] / "src" / "backend" / "scripts"
+if str(scripts_dir) not in sys.path:
+    sys.path.insert(0, str(scripts_dir))
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _ts(minutes: float) -> str:
+    return (BASE + timedelta(minutes=minutes)).isoformat()
+
+
+def _twelve_turns():
+    msgs = []
+    for i in range(12):
+        msgs.append({"role": "user", "content": f"问{i}", "created_at": _ts(i * 8)})
+        msgs.append({"role": "assistant", "content": f"答{i}", "created_at": _ts(i * 8 + 1)})
+    msgs[-1]["created_at"] = _ts(11 * 8 + 14)
+    return msgs
+
+
+def _thread(*pairs):
+    return [{"role": role, "content": "x", "created_at": ts} for role, ts in pairs]
+
+
+FIXTURES = {
+    "12_turns": _twelve_turns(),
+    "missing_ts": _thread(
+        ("user", _ts(0)),
+        ("assistant", _ts(1)),
+        ("user", None),
+        ("assistant", _ts(2)),
+        ("user", _ts(5)),
+        ("assistant", _ts(6)),
+    ),
+    "long_turn": _thread(
+        ("user", _ts(0)),
+        ("assistant", _ts(1)),
+        ("user", _ts(180)),
+        ("assistant", _ts(181)),
+        ("user", _ts(185)),
+        ("assistant", _ts(186)),
+    ),
+    "empty": [],
+    "no_user": _thread(("assistant", _ts(0))),
+    "no_closing_assistant": _thread(("user", _ts(0)), ("assistant", _ts(3)), ("user", _ts(5))),
+    "negative": _thread(("user", _ts(10)), ("user", _ts(0)), ("assistant", _ts(1))),
+}
+
+
+def test_matches_scalar_on_fixtures():
+    threads = list(FIXTURES.values())
+    expected = [compute_turn_stats_from_messages(msgs) for msgs in threads]
+    assert compute_turn_stats_batch(threads) == expected
+    assert expected[0]["turns"] == 12 and expected[0]["avg_seconds"] == 510.0
+
+
+TS_VARIANTS = [
+    lambda dt: dt.isoformat(),
+    lambda dt: dt.isoformat().replace("+00:00", "Z"),
+    lambda dt: dt.replace(tzinfo=None).isoformat(),
+    lambda dt: dt.astimezone(timezone(timedelta(hours=8))).isoformat(),
+    lambda dt: dt.astimezone(timezone(timedelta(hours=-5, minutes=-30))).isoformat(),
+    lambda dt: dt.isoformat(timespec="milliseconds"),
+    lambda dt: f" {dt.isoformat()} ",
+    lambda dt: dt.strftime("%Y-%m-%d %H:%M:%S"),
+    lambda dt: dt.isoformat() + "Z",  # +00:00Z：两种实现都判为非法
+    lambda dt: "0000-01-01T00:00:00",
+    lambda dt: "2026-02-30T00:00:00",
+    lambda dt: "not-a-timestamp",
+    lambda dt: "",
+    lambda dt: None,
+    lambda dt: 1767225600,
+]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_fuzz_matches_scalar(seed):
+    rng = random.Random(seed)
+    threads = []
+    for _ in range(60):
+        now = BASE + timedelta(seconds=rng.randint(0, 86400))
+        msgs = []
+        for _ in range(rng.randint(0, 30)):
+            role = rng.choice(["user", "assistant", "assistant", "system", " User ", None])
+            key = "timestamp" if rng.random() < 0.1 else "created_at"
+            variant = rng.choice(TS_VARIANTS[:7]) if rng.random() < 0.9 else rng.choice(TS_VARIANTS)
+            msgs.append({"role": role, key: variant(now)})
+            now += timedelta(
+                seconds=rng.choice([rng.randint(-60, 900), rng.randint(7000, 9000)]),
+                microseconds=rng.randint(0, 999_999),
+            )
+        threads.append(msgs)
+    assert compute_turn_stats_batch(threads) == [
+        compute_turn_stats_from_messages(m) for m in threads
+    ]
+
+
+def test_compute_turn_stats_many_switch(monkeypatch):
+    threads = list(FIXTURES.values())
+    expected = [compute_turn_stats_from_messages(msgs) for msgs in threads]
+    calls = []
+    monkeypatch.setattr(
+        turn_stats_vectorized,
+        "compute_turn_stats_batch",
+        lambda t: calls.append(len(t)) or compute_turn_stats_batch(t),
+    )
+
+    # 默认关闭，需显式开启
+    assert settings.TURN_STATS_VECTORIZED is False
+    assert compute_turn_stats_many(threads) == expected
+    assert calls == []
+
+    monkeypatch.setattr(settings, "TURN_STATS_VECTORIZED", True)
+    assert compute_turn_stats_many(threads) == expected
+    assert calls == [len(threads)]
+
+    monkeypatch.setattr(settings, "TURN_STATS_VECTORIZED", False)
+    assert compute_turn_stats_many(threads) == expected
+    monkeypatch.setattr(settings, "TURN_STATS_VECTORIZED", True)
+    monkeypatch.setattr(turn_stats_vectorized, "HAS_NUMPY", False)
+    assert compute_turn_stats_many(threads) == expected
+    assert calls == [len(threads)]
+
+
+def test_out_of_range_date_only_falls_back_for_that_string(monkeypatch):
+    good = [_ts(0), _ts(1), _ts(5), _ts(6)]
+    msgs = _thread(
+        ("user", good[0]),
+        ("assistant", "2026-02-30T00:00:00"),
+        ("assistant", good[1]),
+        ("user", good[2]),
+        ("assistant", good[3]),
+    )
+    scalar_calls = []
+    real_scalar = turn_stats_vectorized._epoch_us_scalar
+    monkeypatch.setattr(
+        turn_stats_vectorized,
+        "_epoch_us_scalar",
+        lambda raw: scalar_calls.append(raw) or real_scalar(raw),
+    )
+
+    assert compute_turn_stats_batch([msgs]) == [compute_turn_stats_from_messages(msgs)]
+    assert scalar_calls == ["2026-02-30T00:00:00"]
+
+
+def test_benchmark_10k_threads():
+    from bench_turn_stats import run_benchmark
+
+    result = run_benchmark(10000, repeat=1)
+    assert result["threads"] == 10000 and result["messages"] > 0
@@ -0,0 +1,92 @@
+"""批量用户聚合加载：结果与逐条查询一致，查询次数不随用户数 / 履历数增长"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.database import UserDB
+
+# 经 app.models 包导入 Base：包初始化时导入全部模型模块，create_all 才能建出所有表
+from app.models import Base
+from app.services import user_service
+from app.services.user_service import UserService
+
+
+@pytest.fixture
+async def session_factory(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(user_service, "AsyncSessionLocal", factory)
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+    factory.statements = statements
+    yield factory
+    await engine.dispose()
+
+
+async def _seed(factory, n_users: int, n_histories: int):
+    ids = []
+    async with factory() as db:
+        user_db = UserDB(db)
+        for i in range(n_users):
+            user = await user_db.create_user(email=f"u{i}@example.com", password_hash="x")
+            await user_db.create_user_profile(user.id, gender="female", age=20 + i)
+            for j in range(n_histories):
+                wh = await user_db.create_work_history(
+                    user.id, company=f"公司{j}", start_date=date(2010 + j, 1, 1)
+                )
+                await user_db.create_project_experience(wh.id, name=f"项目{j}-a")
+                await user_db.create_project_experience(wh.id, name=f"项目{j}-b")
+            ids.append(user.id)
+    return ids
+
+
+async def _legacy_profile(factory, user_id):
+    """逐条查询的旧实现，作为对照"""
+    async with factory() as db:
+        user_db = UserDB(db)
+        user = await user_db.get_user_by_id(user_id)
+        profile = await user_db.get_user_profile(user_id)
+        histories = []
+        for wh in await user_db.get_user_work_histories(user_id):
+            projects = await user_db.get_work_history_projects(wh.id)
+            histories.append(
+                (wh.id, wh.company, str(wh.start_date), sorted(p.name for p in projects))
+            )
+        return user.email, profile.age, histories
+
+
+async def test_matches_per_row_queries(session_factory):
+    ids = await _seed(session_factory, n_users=3, n_histories=3)
+    profiles = await UserService.get_user_profiles(ids + ["missing"])
+    assert set(profiles) == set(ids)
+    for uid in ids:
+        data = profiles[uid]
+        got = (
+            data["email"],
+            data["age"],
+            [
+                (w["id"], w["company"], w["start_date"], sorted(p["name"] for p in w["projects"]))
+                for w in data["work_histories"]
+            ],
+        )
+        assert got == await _legacy_profile(session_factory, uid)
+    assert await UserService.get_user_profile("missing") is None
+
+
+@pytest.mark.parametrize("n_users,n_histories", [(1, 1), (5, 4)])
+async def test_round_trips_fixed(session_factory, n_users, n_histories):
+    ids = await _seed(session_factory, n_users, n_histories)
+    session_factory.statements.clear()
+    async with session_factory() as db:
+        aggregates = await UserDB(db).load_user_aggregates(ids)
+    selects = [s for s in session_factory.statements if s.lstrip().upper().startswith("SELECT")]
+    assert len(selects) == 4
+    assert all(len(a.work_histories) == n_histories for a in aggregates.values())
+    assert [w.start_date.year for w in aggregates[ids[0]].work_histories] == sorted(
+        (2010 + j for j in range(n_histories)), reverse=True
+    )
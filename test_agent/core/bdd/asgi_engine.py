@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import json
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import quote, unquote
+from uuid import uuid4
+
+from test_agent.core.bdd.executor import BddExecutor, LocalActionExecutor, _classify_failure
+from test_agent.core.contracts.action_contract import ActionContract
+from test_agent.core.runner.result_model import ScenarioResult
+
+DATA_ROOT_HEADER = "x-test-agent-data-root"
+USER_HEADER = "x-test-agent-user"
+
+DEFAULT_USER = {"user_id": "test-agent-user", "email": "test-agent@example.com"}
+
+
+def _project_root() -> Path:
+    return Path(__file__).resolve().parents[3]
+
+
+@dataclass(slots=True)
+class ScenarioScope:
+    """单个场景在进程内后端里的隔离范围：独立数据根 + 登录用户。"""
+
+    scenario_id: str
+    data_root: Path
+    user: Dict[str, Any] = field(default_factory=lambda: dict(DEFAULT_USER))
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            DATA_ROOT_HEADER: quote(str(self.data_root)),
+            USER_HEADER: json.dumps(self.user, ensure_ascii=True),
+        }
+
+
+class _ScenarioScopeMiddleware:
+    """
+    包在 app 外层的 ASGI 中间件（只存在于测试进程内）：
+    按请求头为本次请求设置数据根覆盖与当前用户，请求之间互不影响。
+    """
+
+    def __init__(
+        self, app: Any, data_root_override: Callable[[Path], Any], user_var: ContextVar
+    ) -> None:
+        self.app = app
+        self._data_root_override = data_root_override
+        self._user_var = user_var
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope.get("type") not in {"http", "websocket"}:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        raw_root = headers.get(DATA_ROOT_HEADER.encode("latin-1"))
+        raw_user = headers.get(USER_HEADER.encode("latin-1"))
+        token = self._user_var.set(json.loads(raw_user.decode("latin-1")) if raw_user else None)
+        try:
+            if raw_root:
+                with self._data_root_override(Path(unquote(raw_root.decode("latin-1")))):
+                    await self.app(scope, receive, send)
+            else:
+                await self.app(scope, receive, send)
+        finally:
+            self._user_var.reset(token)
+
+
+class AsgiAppHost:
+    """
+    进程内托管后端 FastAPI app：只导入、启动一次，所有场景共享。
+
+    - 通过 TestClient（ASGI 传输）发请求，app 跑在 TestClient 的事件循环线程里，
+      多个场景线程可以同时发请求
+    - get_current_user 被替换为读取请求头里的场景用户，不需要真实 token
+    """
+
+    def __init__(self, runs_root: Path | None = None) -> None:
+        self.runs_root = runs_root or (
+            _project_root() / "data" / "test" / "simple" / "asgi_runs" / f"run_{uuid4().hex[:8]}"
+        )
+        self._lock = threading.Lock()
+        self._client: Any = None
+        self._app: Any = None
+        self._override_key: Any = None
+
+    def start(self) -> "AsgiAppHost":
+        with self._lock:
+            if self._client is not None:
+                return self
+            backend_dir = _project_root() / "src" / "backend"
+            if str(backend_dir) not in sys.path:
+                sys.path.insert(0, str(backend_dir))
+
+            from fastapi import HTTPException
+            from fastapi.testclient import TestClient
+
+            from app.api.v1.auth import get_current_user
+            from app.main import app
+            from app.utils.data_paths import data_root_override
+
+            user_var: ContextVar[Optional[Dict[str, Any]]] = ContextVar(
+                "test_agent_user", default=None
+            )
+
+            async def _scenario_user() -> Dict[str, Any]:
+                user = user_var.get()
+                if not user:
+                    raise HTTPException(status_code=401, detail="未提供认证Token")
+                return user
+
+            app.dependency_overrides[get_current_user] = _scenario_user
+            client = TestClient(_ScenarioScopeMiddleware(app, data_root_override, user_var))
+            client.__enter__()  # 只跑一次 startup
+            self._app, self._override_key, self._client = app, get_current_user, client
+        return self
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._client is None:
+                return
+            try:
+                self._client.__exit__(None, None, None)
+            finally:
+                self._app.dependency_overrides.pop(self._override_key, None)
+                self._client = None
+
+    def __enter__(self) -> "AsgiAppHost":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def new_scope(self, scenario_id: str, user: Dict[str, Any] | None = None) -> ScenarioScope:
+        safe_id = re.sub(r"[^\w.-]+", "_", scenario_id or "scenario")[:60]
+        data_root = self.runs_root / f"{safe_id}_{uuid4().hex[:6]}"
+        data_root.mkdir(parents=True, exist_ok=True)
+        return ScenarioScope(
+            scenario_id=scenario_id, data_root=data_root, user=dict(user or DEFAULT_USER)
+        )
+
+    def request(self, scope: ScenarioScope, method: str, path: str, **kwargs: Any) -> Any:
+        if self._client is None:
+            raise RuntimeError("AsgiAppHost 未启动")
+        headers = {**(kwargs.pop("headers", None) or {}), **scope.headers()}
+        return self._client.request(method.upper(), path, headers=headers, **kwargs)
+
+
+_PLACEHOLDER = re.compile(r"\$\{(\w+)\}")
+
+
+def _interpolate(value: Any, context: Dict[str, Any]) -> Any:
+    """把 ${key} 替换成 context[key]（用于引用前面步骤保存的激活码等）。"""
+    if isinstance(value, str):
+        return _PLACEHOLDER.sub(lambda m: str(context.get(m.group(1), m.group(0))), value)
+    if isinstance(value, dict):
+        return {k: _interpolate(v, context) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_interpolate(v, context) for v in value]
+    return value
+
+
+class AsgiActionExecutor(LocalActionExecutor):
+    """
+    进程内后端动作执行器。
+
+    - api_request：向进程内 app 发请求，校验状态码，可用 save_as 把响应 JSON 存入上下文
+    - seed_activation：在场景数据根里创建并激活一个激活码，写入 context["activation_code"]
+    - 其余动作沿用 LocalActionExecutor 的语义
+    """
+
+    BACKEND_ACTIONS = {"api_request", "seed_activation"}
+
+    def __init__(self, host: AsgiAppHost, scope: ScenarioScope) -> None:
+        self.host = host
+        self.scope = scope
+
+    def execute_action(
+        self,
+        action: ActionContract,
+        context: Dict[str, Any],
+        adapter: Any,
+    ) -> Dict[str, Any]:
+        if action.action not in self.BACKEND_ACTIONS:
+            return super().execute_action(action, context, adapter)
+        context.setdefault("data_root", str(self.scope.data_root))
+        try:
+            if action.action == "api_request":
+                return self._api_request(_interpolate(dict(action.params), context), context)
+            return self._seed_activation(action.params, context)
+        except Exception as e:  # noqa: BLE001
+            return {
+                "status": "fail",
+                "observation": "",
+                "artifacts": [],
+                "error": f"{type(e).__name__}: {e}",
+            }
+
+    def _api_request(self, params: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        method = str(params.get("method") or "GET")
+        path = str(params.get("path") or "").strip()
+        if not path:
+            return {
+                "status": "fail",
+                "observation": "",
+                "artifacts": [],
+                "error": "api_request 缺少 path",
+            }
+        kwargs: Dict[str, Any] = {}
+        if params.get("json") is not None:
+            kwargs["json"] = params["json"]
+        if isinstance(params.get("params"), dict):
+            kwargs["params"] = params["params"]
+        resp = self.host.request(self.scope, method, path, **kwargs)
+        try:
+            body: Any = resp.json()
+        except ValueError:
+            body = resp.text
+        context["last_response"] = {"status_code": resp.status_code, "body": body}
+        save_as = str(params.get("save_as") or "").strip()
+        if save_as:
+            context[save_as] = body
+        observation = f"{method.upper()} {path} -> {resp.status_code}"
+        expected = int(params.get("expect_status") or 200)
+        if resp.status_code != expected:
+            return {
+                "status": "fail",
+                "observation": observation,
+                "artifacts": [],
+                "error": f"expected_status={expected} actual={resp.status_code}",
+            }
+        return {"status": "pass", "observation": observation, "artifacts": []}
+
+    def _seed_activation(self, params: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        created = self.host.request(
+            self.scope,
+            "POST",
+            "/api/v1/simple-auth/activation",
+            json={
+                "mode": str(params.get("mode") or "values"),
+                "ttl_minutes": int(params.get("ttl_minutes") or 180),
+            },
+        )
+        if created.status_code != 200:
+            return {
+                "status": "fail",
+                "observation": "",
+                "artifacts": [],
+                "error": f"创建激活码失败: {created.status_code}",
+            }
+        code = created.json()["data"]["activation_code"]
+        activated = self.host.request(
+            self.scope, "POST", "/api/v1/simple-auth/activate", json={"code": code}
+        )
+        if activated.status_code != 200:
+            return {
+                "status": "fail",
+                "observation": "",
+                "artifacts": [],
+                "error": f"激活失败: {activated.status_code}",
+            }
+        context["activation_code"] = code
+        return {"status": "pass", "observation": f"已激活 {code}", "artifacts": []}
+
+
+@dataclass(slots=True)
+class InProcessScenario:
+    scenario_id: str
+    steps: List[Dict[str, Any]]
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    user: Dict[str, Any] | None = None
+
+
+def run_scenarios_in_process(
+    scenarios: List[InProcessScenario],
+    adapter_factory: Callable[[], Any],
+    host: AsgiAppHost | None = None,
+    workers: int = 4,
+) -> List[ScenarioResult]:
+    """
+    在同一个进程内并发执行多个 L3 场景，按输入顺序返回 ScenarioResult（与 run_l3 的报告格式相同）。
+    host 为空时临时启动一个并在结束后关闭。
+    """
+    own_host = host is None
+    host = (host or AsgiAppHost()).start()
+
+    def _run(item: InProcessScenario) -> ScenarioResult:
+        scope = host.new_scope(item.scenario_id, item.user)
+        executor = BddExecutor(
+            adapter=adapter_factory(),
+            action_executor=AsgiActionExecutor(host, scope),
+            engine="asgi",
+        )
+        try:
+            result = executor.run(scenario_id=item.scenario_id, steps=item.steps)
+        except Exception as e:  # noqa: BLE001
+            result = ScenarioResult.new(
+                run_id=f"l3_{uuid4().hex[:12]}", scenario_id=item.scenario_id, level="L3"
+            )
+            result.status = "fail"
+            result.failure_type = _classify_failure(str(e))
+            result.metadata["error"] = f"{type(e).__name__}: {e}"
+            result.finalize()
+        result.metadata.update(item.metadata)
+        result.metadata.update({"engine": "asgi", "data_root": str(scope.data_root)})
+        return result
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="l3-asgi") as pool:
+            return list(pool.map(_run, scenarios))
+    finally:
+        if own_host:
+            host.stop()
@@ -17,6 +17,7 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from test_agent.adapters.beingdoing.adapter import BeingDoingAdapter
+from test_agent.core.bdd.asgi_engine import InProcessScenario, run_scenarios_in_process
 from test_agent.core.bdd.executor import BddExecutor, PlaywrightActionExecutor
 from test_agent.core.bdd.parser_gherkin import parse_feature_file
 from test_agent.core.bdd.parser_yaml import parse_yaml_scenario
@@ -37,12 +38,36 @@ def _normalize_steps_from_yaml(path: Path) -> tuple[str, List[Dict[str, Any]], D
     return parsed.scenario_id, steps, metadata
 
 
+def load_scenario(path: Path) -> tuple[str, List[Dict[str, Any]], Dict[str, Any]]:
+    suffix = path.suffix.lower()
+    if suffix == ".feature":
+        return _normalize_steps_from_feature(path)
+    if suffix in {".yaml", ".yml", ".json"}:
+        return _normalize_steps_from_yaml(path)
+    raise SystemExit("仅支持 .feature/.yaml/.yml/.json")
+
+
+def write_report(result: Any, report_dir: Path) -> Path:
+    report_dir.mkdir(parents=True, exist_ok=True)
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report_path = report_dir / f"l3_{result.scenario_id}_{ts}.json"
+    report_path.write_text(
+        json.dumps(result.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    return report_path
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Run one L3 BDD scenario.")
     parser.add_argument("--scenario", required=True, help="feature/yaml/json 场景文件")
     parser.add_argument("--report-dir", default="test_agent/reports", help="报告输出目录")
     parser.add_argument("--dry-run", action="store_true", help="仅解析并打印步骤，不执行")
-    parser.add_argument("--engine", choices=["local", "playwright"], default="local", help="动作执行引擎")
+    parser.add_argument(
+        "--engine",
+        choices=["local", "playwright", "asgi"],
+        default="local",
+        help="动作执行引擎（asgi：进程内托管后端 app）",
+    )
     parser.add_argument("--base-url", default="http://127.0.0.1:3000", help="playwright 前端地址")
     parser.add_argument("--backend-url", default="http://127.0.0.1:8000", help="playwright 后端地址")
     parser.add_argument("--activation-code", default="", help="可选：激活码（用于 deep link/savepoint）")
@@ -59,13 +84,7 @@ def main() -> None:
     if not scenario_path.is_file():
         raise SystemExit(f"场景文件不存在: {scenario_path}")
 
-    suffix = scenario_path.suffix.lower()
-    if suffix == ".feature":
-        scenario_id, steps, metadata = _normalize_steps_from_feature(scenario_path)
-    elif suffix in {".yaml", ".yml", ".json"}:
-        scenario_id, steps, metadata = _normalize_steps_from_yaml(scenario_path)
-    else:
-        raise SystemExit("仅支持 .feature/.yaml/.yml/.json")
+    scenario_id, steps, metadata = load_scenario(scenario_path)
 
     if args.dry_run:
         print(
@@ -77,6 +96,19 @@ def main() -> None:
         )
         return
 
+    report_dir = Path(args.report_dir)
+    if not report_dir.is_absolute():
+        report_dir = (root / report_dir).resolve()
+
+    if args.engine == "asgi":
+        result = run_scenarios_in_process(
+            [InProcessScenario(scenario_id=scenario_id, steps=steps, metadata=metadata)],
+            adapter_factory=BeingDoingAdapter,
+            workers=1,
+        )[0]
+        _print_result(result, write_report(result, report_dir))
+        return
+
     adapter = BeingDoingAdapter()
     pw_executor = None
     if args.engine == "playwright":
@@ -100,20 +132,24 @@ def main() -> None:
             "backend_url": args.backend_url if args.engine == "playwright" else None,
         }
     )
-    report = result.to_dict()
+    _print_result(result, write_report(result, report_dir))
+
+
+def format_result(result: Any, report_path: Path) -> str:
+    return "\n".join(
+        [
+            f"[L3] scenario={result.scenario_id}",
+            f"[L3] status={result.status}",
+            f"[L3] report={report_path}",
+            json.dumps(
+                {"run_id": result.run_id, "duration_ms": result.duration_ms}, ensure_ascii=False
+            ),
+        ]
+    )
 
-    report_dir = Path(args.report_dir)
-    if not report_dir.is_absolute():
-        report_dir = (root / report_dir).resolve()
-    report_dir.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    report_path = report_dir / f"l3_{scenario_id}_{ts}.json"
-    report_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
 
-    print(f"[L3] scenario={scenario_id}")
-    print(f"[L3] status={result.status}")
-    print(f"[L3] report={report_path}")
-    print(json.dumps({"run_id": result.run_id, "duration_ms": result.duration_ms}, ensure_ascii=False))
+def _print_result(result: Any, report_path: Path) -> None:
+    print(format_result(result, report_path))
     if result.status != "pass":
         raise SystemExit(1)
 
@@ -14,6 +14,11 @@ def _project_root() -> Path:
     return Path(__file__).resolve().parents[2]
 
 
+PROJECT_ROOT = _project_root()
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
 def _collect_scenarios(target: Path) -> List[Path]:
     if target.is_file():
         return [target]
@@ -72,6 +77,52 @@ def _run_one(
     }
 
 
+def _run_in_process(
+    scenarios: List[Path],
+    workers: int,
+    fail_fast: bool,
+    report_dir: Path,
+) -> tuple[List[Dict[str, object]], bool]:
+    """asgi 引擎：后端只在本进程启动一次，场景并发执行（fail-fast 时逐个执行以便及时停止）。"""
+    from test_agent.adapters.beingdoing.adapter import BeingDoingAdapter
+    from test_agent.core.bdd.asgi_engine import (
+        AsgiAppHost,
+        InProcessScenario,
+        run_scenarios_in_process,
+    )
+    from test_agent.pipelines.run_l3 import format_result, load_scenario, write_report
+
+    items = []
+    for path in scenarios:
+        scenario_id, steps, metadata = load_scenario(path)
+        items.append(InProcessScenario(scenario_id=scenario_id, steps=steps, metadata=metadata))
+
+    results: List[Dict[str, object]] = []
+    stopped_early = False
+    with AsgiAppHost() as host:
+        batches = [[x] for x in items] if fail_fast else [items]
+        offset = 0
+        for batch in batches:
+            outcomes = run_scenarios_in_process(
+                batch, BeingDoingAdapter, host=host, workers=workers
+            )
+            for path, result in zip(scenarios[offset:], outcomes):
+                report_path = write_report(result, report_dir)
+                results.append(
+                    {
+                        "scenario": str(path),
+                        "exit_code": 0 if result.status == "pass" else 1,
+                        "stdout": format_result(result, report_path) + "\n",
+                        "stderr": "",
+                    }
+                )
+            offset += len(batch)
+            if fail_fast and any(int(x["exit_code"]) != 0 for x in results):
+                stopped_early = offset < len(items)
+                break
+    return results, stopped_early
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Batch-run L3 scenarios.")
     parser.add_argument(
@@ -84,10 +135,11 @@ def main() -> None:
     parser.add_argument("--dry-run", action="store_true", help="仅打印将执行命令，不执行")
     parser.add_argument(
         "--engine",
-        choices=["local", "playwright"],
+        choices=["local", "playwright", "asgi"],
         default="local",
-        help="执行引擎",
+        help="执行引擎（asgi：进程内托管后端 app，场景并发执行）",
     )
+    parser.add_argument("--workers", type=int, default=4, help="asgi 引擎的并发场景数")
     parser.add_argument("--base-url", default="http://127.0.0.1:3000", help="playwright 前端地址")
     parser.add_argument("--backend-url", default="http://127.0.0.1:8000", help="playwright 后端地址")
     parser.add_argument("--timeout-ms", type=int, default=30000, help="playwright 动作超时")
@@ -109,26 +161,38 @@ def main() -> None:
     print(f"[L3-BATCH] scenarios={len(scenarios)} engine={args.engine}")
     results: List[Dict[str, object]] = []
     stopped_early = False
-    for i, s in enumerate(scenarios, start=1):
-        print(f"[L3-BATCH] ({i}/{len(scenarios)}) {s}")
-        ret = _run_one(
-            scenario_file=s,
-            engine=args.engine,
-            base_url=args.base_url,
-            backend_url=args.backend_url,
-            timeout_ms=args.timeout_ms,
-            headless=args.headless,
-            dry_run=args.dry_run,
+    if args.engine == "asgi" and not args.dry_run:
+        results, stopped_early = _run_in_process(
+            scenarios,
+            workers=args.workers,
+            fail_fast=args.fail_fast,
+            report_dir=root / "test_agent" / "reports",
         )
-        results.append(ret)
-        if ret["stdout"]:
+        for ret in results:
             print(ret["stdout"])
-        if ret["stderr"]:
-            print(ret["stderr"])
-        if int(ret["exit_code"]) != 0 and args.fail_fast and not args.dry_run:
-            stopped_early = True
+        if stopped_early:
             print("[L3-BATCH] fail-fast: first failure encountered, stopping.")
-            break
+    else:
+        for i, s in enumerate(scenarios, start=1):
+            print(f"[L3-BATCH] ({i}/{len(scenarios)}) {s}")
+            ret = _run_one(
+                scenario_file=s,
+                engine=args.engine,
+                base_url=args.base_url,
+                backend_url=args.backend_url,
+                timeout_ms=args.timeout_ms,
+                headless=args.headless,
+                dry_run=args.dry_run,
+            )
+            results.append(ret)
+            if ret["stdout"]:
+                print(ret["stdout"])
+            if ret["stderr"]:
+                print(ret["stderr"])
+            if int(ret["exit_code"]) != 0 and args.fail_fast and not args.dry_run:
+                stopped_early = True
+                print("[L3-BATCH] fail-fast: first failure encountered, stopping.")
+                break
 
     passed = sum(1 for x in results if int(x["exit_code"]) == 0)
     failed = len(results) - passed
@@ -4,8 +4,10 @@ from __future__ import annotations
 import argparse
 import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from typing import Any, Dict, List
 
 def _project_root() -> Path:
     return Path(__file__).resolve().parents[2]
@@ -20,6 +22,90 @@ from test_agent.core.ai_user.bridge_kimi import KimiBridge, KimiBridgeConfig
 from test_agent.core.ai_user.task_spec import TaskSpec
 
 
+def run_task(
+    task_path: Path,
+    bridge_mode: str,
+    engine: str,
+    runtime_options: Dict[str, Any],
+    report_dir: Path,
+    run_tag: str = "",
+) -> tuple[TaskSpec, Dict[str, Any], Path]:
+    """执行一个 TaskSpec 并写报告（run_l4 / 进程内批量执行共用）；run_tag 区分同一秒内并发的多次执行。"""
+    root = _project_root()
+    task_spec = TaskSpec.from_yaml(task_path)
+    report_dir.mkdir(parents=True, exist_ok=True)
+
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S") + (f"_{run_tag}" if run_tag else "")
+    artifacts_dir = report_dir / "artifacts" / f"{task_spec.task_id}_{ts}"
+    bridge = KimiBridge(config=KimiBridgeConfig(mode=bridge_mode))
+    loop = L4AgentLoop(
+        bridge=bridge,
+        runtime_engine=engine,
+        runtime_options=runtime_options,
+        project_root=root,
+    )
+    result = loop.run(task_spec=task_spec, artifacts_dir=artifacts_dir)
+
+    report_path = report_dir / f"l4_{task_spec.task_id}_{ts}.json"
+    report_path.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    return task_spec, result, report_path
+
+
+def run_tasks_in_process(
+    jobs: List[Dict[str, Any]],
+    workers: int = 4,
+) -> List[Dict[str, Any]]:
+    """
+    在本进程内并发执行多个 L4 任务（省去每个任务一次的解释器启动与导入），按输入顺序返回
+    {"task", "exit_code", "stdout", "stderr", "report_path", "report"}，字段与子进程方式一致。
+    jobs 的每一项是 run_task 的关键字参数。
+    """
+
+    def _one(job: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            task_spec, result, report_path = run_task(**job)
+        except Exception as e:  # noqa: BLE001
+            return {
+                "task": str(job["task_path"]),
+                "exit_code": 1,
+                "stdout": "",
+                "stderr": f"{type(e).__name__}: {e}",
+                "report_path": None,
+                "report": {},
+            }
+        return {
+            "task": str(job["task_path"]),
+            "exit_code": 1 if result["status"] == "failed" else 0,
+            "stdout": format_result(
+                task_spec, result, report_path, job["engine"], job["bridge_mode"]
+            )
+            + "\n",
+            "stderr": "",
+            "report_path": str(report_path),
+            "report": result,
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="l4-inproc") as pool:
+        return list(pool.map(_one, jobs))
+
+
+def format_result(
+    task_spec: TaskSpec,
+    result: Dict[str, Any],
+    report_path: Path,
+    engine: str,
+    bridge_mode: str,
+) -> str:
+    return "\n".join(
+        [
+            f"[L4] task={task_spec.task_id}",
+            f"[L4] engine={engine} bridge={bridge_mode}",
+            f"[L4] status={result['status']} score={result['score']}",
+            f"[L4] report={report_path}",
+        ]
+    )
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Run one L4 AI user task.")
     parser.add_argument("--task", required=True, help="L4 TaskSpec YAML 路径")
@@ -42,18 +128,14 @@ def main() -> None:
     if not task_path.is_file():
         raise SystemExit(f"TaskSpec 文件不存在: {task_path}")
 
-    task_spec = TaskSpec.from_yaml(task_path)
     report_dir = Path(args.report_dir)
     if not report_dir.is_absolute():
         report_dir = (root / report_dir).resolve()
-    report_dir.mkdir(parents=True, exist_ok=True)
 
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    artifacts_dir = report_dir / "artifacts" / f"{task_spec.task_id}_{ts}"
-    bridge = KimiBridge(config=KimiBridgeConfig(mode=args.bridge_mode))
-    loop = L4AgentLoop(
-        bridge=bridge,
-        runtime_engine=args.engine,
+    task_spec, result, report_path = run_task(
+        task_path,
+        bridge_mode=args.bridge_mode,
+        engine=args.engine,
         runtime_options={
             "base_url": args.base_url,
             "backend_url": args.backend_url,
@@ -63,17 +145,9 @@ def main() -> None:
             "headless": args.headless == "true",
             "timeout_ms": args.timeout_ms,
         },
-        project_root=root,
+        report_dir=report_dir,
     )
-    result = loop.run(task_spec=task_spec, artifacts_dir=artifacts_dir)
-
-    report_path = report_dir / f"l4_{task_spec.task_id}_{ts}.json"
-    report_path.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
-
-    print(f"[L4] task={task_spec.task_id}")
-    print(f"[L4] engine={args.engine} bridge={args.bridge_mode}")
-    print(f"[L4] status={result['status']} score={result['score']}")
-    print(f"[L4] report={report_path}")
+    print(format_result(task_spec, result, report_path, args.engine, args.bridge_mode))
     if result["status"] == "failed":
         raise SystemExit(1)
 
@@ -14,6 +14,11 @@ def _project_root() -> Path:
     return Path(__file__).resolve().parents[2]
 
 
+PROJECT_ROOT = _project_root()
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
 def _collect_tasks(target: Path) -> List[Path]:
     if target.is_file():
         return [target]
@@ -92,6 +97,12 @@ def main() -> None:
     parser.add_argument("--report-dir", default="test_agent/reports", help="报告输出目录")
     parser.add_argument("--fail-fast", action="store_true", help="遇到首个失败立即停止")
     parser.add_argument("--dry-run", action="store_true", help="仅打印将执行命令，不执行")
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="在本进程内并发执行（不再为每个任务启动 run_l4.py 子进程）",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="--in-process 时的并发任务数")
     args = parser.parse_args()
 
     root = _project_root()
@@ -115,28 +126,65 @@ def main() -> None:
     )
     results: List[Dict[str, object]] = []
     stopped_early = False
-    for i, task in enumerate(tasks, start=1):
-        print(f"[L4-BATCH] ({i}/{len(tasks)}) {task}")
-        ret = _run_one(
-            task_file=task,
-            bridge_mode=args.bridge_mode,
-            engine=args.engine,
-            base_url=args.base_url,
-            backend_url=args.backend_url,
-            timeout_ms=args.timeout_ms,
-            headless=args.headless,
-            report_dir=report_dir,
-            dry_run=args.dry_run,
-        )
-        results.append(ret)
-        if ret["stdout"]:
-            print(ret["stdout"])
-        if ret["stderr"]:
-            print(ret["stderr"])
-        if int(ret["exit_code"]) != 0 and args.fail_fast and not args.dry_run:
-            stopped_early = True
-            print("[L4-BATCH] fail-fast: first failure encountered, stopping.")
-            break
+    if args.in_process and not args.dry_run:
+        from test_agent.pipelines.run_l4 import run_tasks_in_process
+
+        runtime_options = {
+            "base_url": args.base_url,
+            "backend_url": args.backend_url,
+            "headless": args.headless == "true",
+            "timeout_ms": args.timeout_ms,
+        }
+        # fail-fast 需要按顺序判定，逐个执行
+        batches = [[t] for t in tasks] if args.fail_fast else [tasks]
+        for batch in batches:
+            rets = run_tasks_in_process(
+                [
+                    {
+                        "task_path": t,
+                        "bridge_mode": args.bridge_mode,
+                        "engine": args.engine,
+                        "runtime_options": dict(runtime_options),
+                        "report_dir": report_dir,
+                    }
+                    for t in batch
+                ],
+                workers=args.workers,
+            )
+            for ret in rets:
+                results.append(ret)
+                if ret["stdout"]:
+                    print(ret["stdout"])
+                if ret["stderr"]:
+                    print(ret["stderr"])
+            if args.fail_fast and any(int(x["exit_code"]) != 0 for x in results):
+                stopped_early = len(results) < len(tasks)
+                if stopped_early:
+                    print("[L4-BATCH] fail-fast: first failure encountered, stopping.")
+                break
+    else:
+        for i, task in enumerate(tasks, start=1):
+            print(f"[L4-BATCH] ({i}/{len(tasks)}) {task}")
+            ret = _run_one(
+                task_file=task,
+                bridge_mode=args.bridge_mode,
+                engine=args.engine,
+                base_url=args.base_url,
+                backend_url=args.backend_url,
+                timeout_ms=args.timeout_ms,
+                headless=args.headless,
+                report_dir=report_dir,
+                dry_run=args.dry_run,
+            )
+            results.append(ret)
+            if ret["stdout"]:
+                print(ret["stdout"])
+            if ret["stderr"]:
+                print(ret["stderr"])
+            if int(ret["exit_code"]) != 0 and args.fail_fast and not args.dry_run:
+                stopped_early = True
+                print("[L4-BATCH] fail-fast: first failure encountered, stopping.")
+                break
 
     passed = sum(1 for x in results if int(x["exit_code"]) == 0)
     failed = len(results) - passed
@@ -148,6 +196,7 @@ def main() -> None:
         "dry_run": bool(args.dry_run),
         "bridge_mode": args.bridge_mode,
         "engine": args.engine,
+        "in_process": bool(args.in_process),
         "filter": args.filter or None,
         "results": [{"task": x["task"], "exit_code": x["exit_code"]} for x in results],
     }
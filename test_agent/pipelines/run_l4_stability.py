@@ -14,6 +14,11 @@ def _project_root() -> Path:
     return Path(__file__).resolve().parents[2]
 
 
+PROJECT_ROOT = _project_root()
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
 def _parse_report_path(stdout: str) -> str:
     for line in stdout.splitlines():
         if line.startswith("[L4] report="):
@@ -86,6 +91,12 @@ def main() -> None:
     parser.add_argument("--timeout-ms", type=int, default=30000)
     parser.add_argument("--headless", choices=["true", "false"], default="true")
     parser.add_argument("--report-dir", default="test_agent/reports")
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="在本进程内并发执行各轮（不再为每轮启动 run_l4.py 子进程）",
+    )
+    parser.add_argument("--workers", type=int, default=3, help="--in-process 时的并发轮数")
     args = parser.parse_args()
 
     root = _project_root()
@@ -101,24 +112,53 @@ def main() -> None:
         f"engine={args.engine} bridge={args.bridge_mode}"
     )
     records: List[Dict[str, Any]] = []
-    for i in range(1, args.runs + 1):
-        print(f"[L4-STABILITY] run {i}/{args.runs}")
-        rec = _run_once(
-            root=root,
-            task=task,
-            engine=args.engine,
-            bridge_mode=args.bridge_mode,
-            base_url=args.base_url,
-            backend_url=args.backend_url,
-            timeout_ms=args.timeout_ms,
-            headless=args.headless,
-            report_dir=report_dir,
+    if args.in_process:
+        from test_agent.pipelines.run_l4 import run_tasks_in_process
+
+        runtime_options = {
+            "base_url": args.base_url,
+            "backend_url": args.backend_url,
+            "headless": args.headless == "true",
+            "timeout_ms": args.timeout_ms,
+        }
+        records = run_tasks_in_process(
+            [
+                {
+                    "task_path": Path(task),
+                    "bridge_mode": args.bridge_mode,
+                    "engine": args.engine,
+                    "runtime_options": dict(runtime_options),
+                    "report_dir": Path(report_dir),
+                    "run_tag": f"r{i}",
+                }
+                for i in range(1, args.runs + 1)
+            ],
+            workers=args.workers,
         )
-        records.append(rec)
-        if rec["stdout"]:
-            print(rec["stdout"])
-        if rec["stderr"]:
-            print(rec["stderr"])
+        for rec in records:
+            if rec["stdout"]:
+                print(rec["stdout"])
+            if rec["stderr"]:
+                print(rec["stderr"])
+    else:
+        for i in range(1, args.runs + 1):
+            print(f"[L4-STABILITY] run {i}/{args.runs}")
+            rec = _run_once(
+                root=root,
+                task=task,
+                engine=args.engine,
+                bridge_mode=args.bridge_mode,
+                base_url=args.base_url,
+                backend_url=args.backend_url,
+                timeout_ms=args.timeout_ms,
+                headless=args.headless,
+                report_dir=report_dir,
+            )
+            records.append(rec)
+            if rec["stdout"]:
+                print(rec["stdout"])
+            if rec["stderr"]:
+                print(rec["stderr"])
 
     pass_count = 0
     failure_classified = True
@@ -150,6 +190,7 @@ def main() -> None:
         "accepted": accepted,
         "engine": args.engine,
         "bridge_mode": args.bridge_mode,
+        "in_process": bool(args.in_process),
         "records": [
             {
                 "exit_code": x.get("exit_code"),